@@ -0,0 +1,224 @@
+"""
+Checks how the commands run by wingetui/PackageEngine/CommandRunner.py behave with children that flood their output, go silent, hang or get
+cancelled, and measures how long collecting their output takes. Then checks that the watchdog (wingetui/PackageEngine/CommandWatchdog.py)
+learns the deadlines of a command from its previous runs, and that the circuit breaker of a manager (wingetui/PackageEngine/CircuitBreaker.py)
+opens after repeated timeouts, lets a single probe through once its backoff is over, and closes again once the manager works.
+
+    python scripts/benchmark_command_runner.py [--lines 200000]
+
+The package managers are replaced by a fake child process: "flood N" prints N lines as fast as it can, "hang N" prints N lines and never ends,
+"silent SECONDS" prints a line, says nothing for the given time and prints another one, "args ..." prints every argument it got on a line,
+"spawn" starts a grandchild that holds the output pipe open and then hangs, and "stream N DELAY" prints N lines, one every DELAY seconds.
+The script exits with code 1 if some output is lost, if reading a silent child keeps the reader busy, if an argument is not passed as is,
+if a hung or cancelled child (or its grandchild) is left running, if a hung child is not killed at its learnt deadline, or if the circuit
+breaker lets the wrong requests through.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+script_path = os.path.abspath(__file__)
+root_dir = os.path.join(os.path.dirname(script_path), "..")
+os.chdir(root_dir)  # move to root project
+
+sys.path.append("./")
+
+FAKE_CHILD_SCRIPT = """
+import subprocess, sys, time
+mode = sys.argv[1]
+if mode == "flood":
+    for i in range(int(sys.argv[2])):
+        sys.stdout.write(f"Line {i} of a very chatty package manager, which prints a lot of output on every command\\n")
+elif mode == "hang":
+    for i in range(int(sys.argv[2])):
+        print(f"Line {i}", flush=True)
+    time.sleep(3600)
+elif mode == "silent":
+    print("Before", flush=True)
+    time.sleep(float(sys.argv[2]))
+    print("After", end="")  # No newline, so the tail of the output is checked too
+elif mode == "args":
+    for arg in sys.argv[2:]:
+        print(arg)
+elif mode == "spawn":
+    grandchild = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(3600)"])  # Inherits the output pipe
+    print(grandchild.pid, flush=True)
+    time.sleep(3600)
+elif mode == "stream":
+    for i in range(int(sys.argv[2])):
+        print(f"Line {i}", flush=True)
+        time.sleep(float(sys.argv[3]))
+"""
+
+
+def createFakeChild(directory: str) -> list[str]:
+    with open(os.path.join(directory, "fake_child.py"), "w") as f:
+        f.write(FAKE_CHILD_SCRIPT)
+    return [sys.executable, os.path.join(directory, "fake_child.py")]
+
+
+def report(passed: bool, message: str) -> bool:
+    print(f"{'ok  ' if passed else 'FAIL'} {message}")
+    return passed
+
+
+def isProcessAlive(pid: int) -> bool:
+    if os.name == "nt":
+        import ctypes
+        handle = ctypes.windll.kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        exitCode = ctypes.c_ulong()
+        ctypes.windll.kernel32.GetExitCodeProcess(handle, ctypes.byref(exitCode))
+        ctypes.windll.kernel32.CloseHandle(handle)
+        return exitCode.value == 259  # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except OSError:
+        return False
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"  # A killed orphan stays a zombie until init reaps it
+    except OSError:
+        return True
+
+
+def getThreadCpuTime(function: callable) -> tuple[object, float, float]:
+    """
+    Runs the function on a thread of its own, and returns its result, its wall time and the CPU time the thread used.
+    """
+    result = {}
+
+    def run() -> None:
+        startCpuTime = time.thread_time()
+        result["value"] = function()
+        result["cpuTime"] = time.thread_time() - startCpuTime
+
+    startTime = time.perf_counter()
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join()
+    return result.get("value"), time.perf_counter() - startTime, result.get("cpuTime", float("inf"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=200000)
+    arguments = parser.parse_args()
+
+    import io
+    import contextlib
+    with contextlib.redirect_stdout(io.StringIO()):  # The engine is quite verbose
+        from wingetui.PackageEngine.Cancellation import CancellationToken
+        from wingetui.PackageEngine.CircuitBreaker import ManagerCircuitBreaker, STATE_CLOSED, STATE_HALF_OPEN, STATE_OPEN
+        from wingetui.PackageEngine.CommandRunner import CommandRunner
+        from wingetui.PackageEngine.CommandWatchdog import Watchdog
+        from wingetui.PackageEngine.QualityOfService import QoS
+    Watchdog.save = lambda: None  # Keep the timings of the fake child out of the user settings
+
+    directory = tempfile.mkdtemp()
+    child = createFakeChild(directory)
+    runner = CommandRunner("Command runner benchmark")
+    allPassed = True
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        startTime = time.perf_counter()
+        command = runner.run(child + ["flood", str(arguments.lines)], timeout=60).wait()
+        totalTime = time.perf_counter() - startTime
+    allPassed &= report(command.ReturnCode == 0 and len(command.Lines) == arguments.lines and command.Lines[-1].startswith(f"Line {arguments.lines - 1} "),
+                        f"{arguments.lines} lines ({round(command.BytesRead / 1048576, 1)}MB) collected in {round(totalTime, 2)}s, {round(command.BytesRead / 1048576 / totalTime, 1)}MB/s")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        command, duration, cpuTime = getThreadCpuTime(lambda: runner.run(child + ["silent", "2"], timeout=60).wait())
+    allPassed &= report(command.Lines == ["Before", "After"] and cpuTime < 0.2,
+                        f"a child silent for 2s is waited for without polling: the reader used {round(cpuTime * 1000, 1)}ms of CPU in {round(duration, 2)}s, and the unterminated last line was kept")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        startTime = time.perf_counter()
+        command = runner.run(child + ["hang", "3"], timeout=1).wait()
+        duration = time.perf_counter() - startTime
+    allPassed &= report(command.TimedOut and command.Killed and command.Lines == ["Line 0", "Line 1", "Line 2"] and duration < 5,
+                        f"a hung child is killed by its deadline after {round(duration, 2)}s, and the {len(command.Lines)} line(s) it printed are kept")
+
+    argv = ["with spaces", 'with "quotes"', "C:\\Program Files\\", "&& echo injected", "$HOME", "%PATH%", "ünïcødé ✓", "-m", ""]
+    with contextlib.redirect_stdout(io.StringIO()):
+        command = runner.run(child + ["args"] + argv, timeout=30).wait()
+    allPassed &= report(command.Lines == argv, f"{len(argv)} arguments with spaces, quotes, shell operators and variables are passed as they are, without a shell")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        startTime = time.perf_counter()
+        command = runner.run(child + ["spawn"], timeout=1).wait()
+        duration = time.perf_counter() - startTime
+    time.sleep(0.5)
+    grandchildPid = int(command.Lines[0]) if command.Lines and command.Lines[0].isdigit() else None
+    allPassed &= report(command.TimedOut and duration < 5 and grandchildPid is not None and not isProcessAlive(grandchildPid),
+                        f"a hung child whose grandchild holds the output pipe is killed with its grandchild by the deadline, after {round(duration, 2)}s")
+
+    token = CancellationToken()
+    with contextlib.redirect_stdout(io.StringIO()):
+        startTime = time.perf_counter()
+        lines = []
+        for line in runner.run(child + ["stream", "1000", "0.01"], timeout=60, token=token):
+            lines.append(line)
+            if len(lines) == 10:
+                token.cancel()
+        duration = time.perf_counter() - startTime
+    command = runner.History[-1]
+    allPassed &= report(command.Cancelled and command.Killed and 10 <= len(lines) < 1000 and duration < 5,
+                        f"a command cancelled mid-stream stops after {len(lines)} of 1000 line(s), in {round(duration, 2)}s")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        startTime = time.perf_counter()
+        command = runner.run(child + ["hang", "1"], timeout=60, token=token).wait()
+        duration = time.perf_counter() - startTime
+    allPassed &= report(command.Cancelled and duration < 5, f"a command started with a token that was already cancelled is killed right away, in {round(duration, 2)}s")
+
+    # The watchdog learns the deadlines from the previous runs of the command, and gives a short grace period once it stalls
+    Watchdog.MIN_STALL_TIME = 0.5
+    Watchdog.getGracePeriod = lambda: 0.5
+    os.makedirs(os.path.join(directory, "watchdog"))
+    child = createFakeChild(os.path.join(directory, "watchdog"))  # A command with no history, since the key comes from the path of the script
+    key = runner.getCommandKey(child + ["silent"])
+    defaultLimits = Watchdog.getLimits(key)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _i in range(Watchdog.MIN_SAMPLES + 2):
+            runner.run(child + ["silent", "0"]).wait()
+        learntLimits = Watchdog.getLimits(key)
+        startTime = time.perf_counter()
+        command = runner.run(child + ["hang", "1"]).wait()
+        duration = time.perf_counter() - startTime
+    allPassed &= report(defaultLimits == (Watchdog.DEFAULT_STALL_TIME, Watchdog.DEFAULT_STALL_TIME + 0.5) and learntLimits == (0.5, 1.0) and command.TimedOut and duration < 3 and Watchdog.getLimits(key)[0] > learntLimits[0],
+                        f"after {Watchdog.MIN_SAMPLES + 2} quick runs, a hung run of the same command is killed at its learnt deadline, after {round(duration, 2)}s "
+                        f"instead of {defaultLimits[1]:.0f}s, and the next run gets {Watchdog.getLimits(key)[0]:.1f}s before stalling")
+
+    breaker = ManagerCircuitBreaker("Fake manager")
+    breaker.Backoff = breaker.BASE_BACKOFF = 1
+    states = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _i in range(breaker.FAILURE_THRESHOLD):
+            states.append(breaker.allowRequest())
+            breaker.recordCommand(runner.run(child + ["hang", "1"], timeout=0.5).wait())
+        cancelToken = CancellationToken()
+        cancelToken.cancel()
+        breaker.recordCommand(runner.run(child + ["hang", "1"], timeout=30, token=cancelToken).wait())  # Says nothing about the manager
+        opened = (breaker.State, breaker.allowRequest(), breaker.isOpen())
+        time.sleep(breaker.Backoff + 0.1)
+        probe = (breaker.allowRequest(), breaker.State, breaker.allowRequest())
+        breaker.recordCommand(runner.run(child + ["hang", "1"], timeout=0.5).wait())
+        reopened = (breaker.State, breaker.Backoff, breaker.allowRequest())
+        time.sleep(breaker.Backoff + 0.1)
+        secondProbe = breaker.allowRequest()
+        breaker.recordCommand(runner.run(child + ["silent", "0"], timeout=30).wait())
+        closed = (breaker.State, breaker.Backoff, breaker.ConsecutiveFailures, breaker.allowRequest())
+    allPassed &= report(states == [True] * breaker.FAILURE_THRESHOLD and opened == (STATE_OPEN, False, True),
+                        f"the circuit breaker opens after {breaker.FAILURE_THRESHOLD} timeouts in a row, and a cancelled command does not count")
+    allPassed &= report(probe == (True, STATE_HALF_OPEN, False) and reopened == (STATE_OPEN, 2, False),
+                        "once its backoff is over, it lets a single probe through, and opens again for twice as long when the probe times out")
+    allPassed &= report(secondProbe and closed == (STATE_CLOSED, 1, 0, True), "a probe that works closes it, and resets its backoff")
+
+    allPassed &= report(QoS.RunningInteractive == 0 and QoS.RunningBackground == 0, "no QoS slot is left taken")
+    sys.exit(0 if allPassed else 1)
@@ -0,0 +1,205 @@
+"""
+Checks that the number of threads WingetUI uses stays bounded under a synthetic load of 5,000 packages, now that the background work
+runs on the pools of wingetui/Core/Executor.py, and shows how long the load takes and how the pools were used.
+
+    python scripts/benchmark_executor.py [--packages 5000] [--searches 20]
+
+The load is what the sections do with that many packages, all at the same time:
+- the installed packages and the updates are listed (pip is replaced by a fake executable printing 5,000 packages) on the subprocess pool,
+  and every package found gets its icon loaded on the io pool and its store looked up later on the cpu pool, as the package items do
+- the user types on the search box of a section, which debounces the filter on the scheduler
+- winget searches on three sources at the same time (winget is replaced by a fake executable), from the subprocess pool
+- every package gets queued for an update, and waits for its turn on the scheduler, as the installer widgets do (the updates that are
+  still queued when the rest of the load is done are cancelled, since the queue moves at the pace of the real installers)
+- the package backup is written on the io pool
+The script exits with code 1 if the peak thread count goes over the threads of the executor, if some work is lost, or if the queue does not move.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+script_path = os.path.abspath(__file__)
+root_dir = os.path.join(os.path.dirname(script_path), "..")
+os.chdir(root_dir)  # move to root project
+
+sys.path.append("./")
+
+FAKE_MANAGER_SCRIPT = """
+import json, sys, time
+outputs = json.load(open(sys.argv[1], encoding="utf-8"))
+key = " ".join(sys.argv[2:])
+for output in outputs:
+    if key.startswith(output):
+        time.sleep(0.05)
+        sys.stdout.write(outputs[output])
+        sys.exit(0)
+print(f"Unknown command: {key}")
+sys.exit(1)
+"""
+
+
+def createFakeManager(directory: str, name: str, outputs: dict) -> str:
+    with open(os.path.join(directory, f"{name}.json"), "w", encoding="utf-8") as f:
+        json.dump(outputs, f)
+    with open(os.path.join(directory, "fake_manager.py"), "w") as f:
+        f.write(FAKE_MANAGER_SCRIPT)
+    if os.name == "nt":
+        executable = os.path.join(directory, f"fake_{name}.cmd")
+        with open(executable, "w") as f:
+            f.write(f'@"{sys.executable}" "{os.path.join(directory, "fake_manager.py")}" "{os.path.join(directory, f"{name}.json")}" %*\n')
+    else:
+        executable = os.path.join(directory, f"fake_{name}")
+        with open(executable, "w") as f:
+            f.write(f'#!/bin/sh\nexec "{sys.executable}" "{os.path.join(directory, "fake_manager.py")}" "{os.path.join(directory, f"{name}.json")}" "$@"\n')
+        os.chmod(executable, 0o755)
+    return executable
+
+
+class ThreadCountSampler():
+    """
+    Samples the number of alive threads every few milliseconds, on a thread of its own.
+    """
+    Peak: int = 0
+
+    def __init__(self):
+        self.Peak = threading.active_count()
+        self.__stop = threading.Event()
+        self.__thread = threading.Thread(target=self.__sample, daemon=True, name="Thread count sampler")
+        self.__thread.start()
+
+    def __sample(self) -> None:
+        while not self.__stop.wait(0.002):
+            self.Peak = max(self.Peak, threading.active_count())
+
+    def stop(self) -> None:
+        self.__stop.set()
+        self.__thread.join()
+
+
+class QueuedUpdate():
+    """
+    An update waiting for its turn on the installation queue, checked again on the scheduler like PackageInstallerWidget.startInstallation does.
+    """
+    Canceled: bool = False
+
+    def __init__(self, queue: list, finished: list, Executor):
+        self.Id = str(len(queue))
+        self.__queue = queue
+        self.__finished = finished
+        self.__executor = Executor
+        queue.append(self.Id)
+        self.WaitTask = Executor.schedule(0, self.waitForTurn)
+
+    def cancel(self) -> None:
+        self.Canceled = True
+        self.WaitTask.cancel()
+
+    def waitForTurn(self) -> None:
+        if self.Canceled:
+            return
+        position = self.__queue.index(self.Id)
+        if position != 0:
+            self.WaitTask = self.__executor.schedule(0.2 if position < 10 else 2, self.waitForTurn)
+            return
+        self.__executor.schedule(0.05, self.finishInstallation)  # A very quick installer
+
+    def finishInstallation(self) -> None:
+        self.__queue.pop(0)
+        self.__finished.append(self.Id)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--packages", type=int, default=5000)
+    parser.add_argument("--searches", type=int, default=20)
+    arguments = parser.parse_args()
+
+    import io
+    import contextlib
+    with contextlib.redirect_stdout(io.StringIO()):  # The engine is quite verbose
+        import wingetui.Core.Globals as Globals
+        from wingetui.Core.Executor import Executor, POOL_CPU, POOL_IO, POOL_SUBPROCESS, PRIORITY_HIGH, PRIORITY_LOW
+        from wingetui.PackageEngine.CommandWatchdog import Watchdog
+        from wingetui.PackageEngine.Managers.pip import Pip
+        from wingetui.PackageEngine.Managers.winget import Winget
+        from wingetui.PackageEngine.WingetSourceIndex import WingetIndex
+    Watchdog.save = lambda: None  # Keep the timings of the fake managers out of the user settings
+    WingetIndex.findIndex = lambda: None  # Search every source with the fake winget
+
+    count = arguments.packages
+    directory = tempfile.mkdtemp()
+    packages = [{"name": f"package-{i}", "version": f"1.{i}", "latest_version": f"2.{i}"} for i in range(count)]
+    Pip.EXECUTABLE = createFakeManager(directory, "pip", {
+        "-m pip list --outdated --format=json": json.dumps(packages),
+        "-m pip list --format=json": json.dumps(packages),
+    }) + " -m pip"
+    table = "Name" + " " * 26 + "Id" + " " * 38 + "Version\n" + "-" * 80 + "\n" + "".join(f"{f'App {i}':<30}{f'Publisher.App{i}':<40}1.0\n" for i in range(50))
+    Winget.EXECUTABLE = createFakeManager(directory, "winget", {"search": table})
+    Globals.wingetSources = {"winget": "", "msstore": "", "other": ""}
+
+    lock = threading.Lock()
+    counts = {"icons": 0, "lookups": 0, "filters": 0, "searchResults": 0, "backups": 0}
+
+    def countDone(name: str, amount: int = 1) -> None:
+        with lock:
+            counts[name] += amount
+
+    def loadIcon(package) -> None:
+        time.sleep(0.001)  # Reading the icon from the cache
+        countDone("icons")
+
+    def loadPackages(iterable) -> int:
+        found = 0
+        for package in iterable:
+            Executor.submit(POOL_IO, loadIcon, package, priority=PRIORITY_HIGH)
+            Executor.schedule(0.5, countDone, "lookups", pool=POOL_CPU, priority=PRIORITY_LOW)
+            found += 1
+        return found
+
+    def search() -> None:
+        countDone("searchResults", sum(1 for _package in Winget.iterSourcesSearchResults("app", list(Globals.wingetSources.keys()))))
+
+    def backup(packageCount: int) -> None:
+        with open(os.path.join(directory, "backup.json"), "w", encoding="utf-8") as f:
+            json.dump([package["name"] for package in packages[:packageCount]], f)
+        countDone("backups")
+
+    baseline = threading.active_count()
+    sampler = ThreadCountSampler()
+    startTime = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        loads = [Executor.submit(POOL_SUBPROCESS, loadPackages, iterable, name="Section loader") for iterable in (Pip.iterInstalledPackages(), Pip.iterAvailableUpdates())]
+        for i in range(100):  # The keystrokes, 20ms apart, each one debounced by half a second
+            Executor.schedule(0.5 + i * 0.02, countDone, "filters")
+        searches = [Executor.submit(POOL_SUBPROCESS, search, priority=PRIORITY_HIGH, name="Discover search") for _i in range(arguments.searches)]
+        installationQueue = []
+        finishedUpdates = []
+        updates = [QueuedUpdate(installationQueue, finishedUpdates, Executor) for _i in range(count)]
+        found = [load.result() for load in loads]
+        Executor.submit(POOL_IO, backup, found[0], priority=PRIORITY_LOW, name="Package backup").result()
+        for future in searches:
+            future.result()
+        expected = {"icons": sum(found), "lookups": sum(found), "filters": 100, "searchResults": arguments.searches * 50, "backups": 1}
+        while counts != expected and time.perf_counter() - startTime < 120:
+            time.sleep(0.05)
+    totalTime = time.perf_counter() - startTime
+    sampler.stop()
+    installedUpdates = len(finishedUpdates)
+    for update in updates:
+        update.cancel()
+
+    extraThreads = sampler.Peak - baseline - 1  # Without the sampler
+    bound = Executor.getMaximumThreadCount()
+    passed = found == [count, count] and counts == expected and installedUpdates > 0 and extraThreads <= bound
+    for name, metrics in Executor.getMetrics().items():
+        print(f"     {name}: {metrics}")
+    print(f"{'ok  ' if passed else 'FAIL'} {count} installed packages and updates, {sum(found)} icons and store lookups, {arguments.searches} searches, "
+          f"{count} queued updates ({installedUpdates} got their turn) in {round(totalTime, 2)}s: {extraThreads} extra thread(s) at the peak, the executor can use {bound}")
+    if counts != expected:
+        print(f"     done: {counts}, expected: {expected}")
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,179 @@
+"""
+Checks how wingetui/PackageEngine/PowerShellHosts.py recovers from hosts that hang, crash or are abandoned in the middle of a reply,
+and measures how long a command takes on a warm host and on a host that has to be started again.
+
+    python scripts/benchmark_powershell_hosts.py [--commands 40]
+
+PowerShell is replaced by a fake host that speaks the same framing protocol, and runs tiny scripts made for the checks: "pid" prints
+its process id, "lines N DELAY" prints N lines, "fail CODE" exits with the given code, "hang" never ends and "crash" kills the host.
+Run with -Command, it runs a single script the way a one-shot PowerShell process would.
+The script exits with code 1 if a command gets a wrong output, if closing or timing out a command blocks, or if a broken host gets reused.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+script_path = os.path.abspath(__file__)
+root_dir = os.path.join(os.path.dirname(script_path), "..")
+os.chdir(root_dir)  # move to root project
+
+sys.path.append("./")
+
+FAKE_HOST_SCRIPT = """
+import base64, os, sys, time
+MARKER = REPLY_MARKER
+oneShot = "-Command" in sys.argv
+
+def write(line):
+    sys.stdout.write(line + "\\n")
+    sys.stdout.flush()
+
+def run(script):
+    words = script.split()
+    if not words:
+        return 0
+    if words[0] == "pid":
+        write(str(os.getpid()))
+    elif words[0] == "lines":
+        for i in range(int(words[1])):
+            write(f"line {i}")
+            time.sleep(float(words[2]))
+    elif words[0] == "fail":
+        write("something went wrong")
+        return int(words[1])
+    elif words[0] == "hang":
+        time.sleep(3600)
+    elif words[0] == "crash":
+        if not oneShot:
+            os._exit(3)
+        write("recovered on a one-shot process")
+    return 0
+
+if oneShot:
+    sys.exit(run(sys.argv[sys.argv.index("-Command") + 1]))
+for request in sys.stdin:
+    token, payload = request.rstrip("\\r\\n").split(" ", 1)
+    code = run(base64.b64decode(payload).decode("utf-8"))
+    write(f"{MARKER} {token} {code}")
+"""
+
+
+def createFakeHost(directory: str, marker: str) -> str:
+    with open(os.path.join(directory, "fake_host.py"), "w") as f:
+        f.write(FAKE_HOST_SCRIPT.replace("REPLY_MARKER", repr(marker)))
+    if os.name == "nt":
+        executable = os.path.join(directory, "fake_powershell.cmd")
+        with open(executable, "w") as f:
+            f.write(f'@"{sys.executable}" "{os.path.join(directory, "fake_host.py")}" %*\n')
+    else:
+        executable = os.path.join(directory, "fake_powershell")
+        with open(executable, "w") as f:
+            f.write(f'#!/bin/sh\nexec "{sys.executable}" "{os.path.join(directory, "fake_host.py")}" "$@"\n')
+        os.chmod(executable, 0o755)
+    return executable
+
+
+def report(passed: bool, message: str) -> bool:
+    print(f"{'ok  ' if passed else 'FAIL'} {message}")
+    return passed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--commands", type=int, default=40)
+    arguments = parser.parse_args()
+
+    import io
+    import contextlib
+    with contextlib.redirect_stdout(io.StringIO()):  # The engine is quite verbose
+        from wingetui.PackageEngine.Cancellation import CancellationToken
+        from wingetui.PackageEngine.CommandRunner import CommandRunner, RunningCommand
+        from wingetui.PackageEngine.CommandWatchdog import Watchdog
+        from wingetui.PackageEngine.PowerShellHosts import HostedCommand, PowerShellHostPool, REPLY_MARKER
+        from wingetui.PackageEngine.QualityOfService import QoS
+    Watchdog.save = lambda: None  # Keep the timings of the fake host out of the user settings
+
+    directory = tempfile.mkdtemp()
+    executable = createFakeHost(directory, REPLY_MARKER)
+    pool = PowerShellHostPool(executable, hostArgs=[executable])
+    runner = CommandRunner("PowerShell host benchmark")
+    allPassed = True
+
+    def runScript(script: str, timeout: float | None = 30, token: CancellationToken = None) -> tuple[HostedCommand | RunningCommand, float]:
+        startTime = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            command = pool.run(script, runner, timeout=timeout, token=token).wait()
+        return command, time.perf_counter() - startTime
+
+    def getHostPid() -> tuple[str, float]:
+        command, duration = runScript("pid")
+        return (command.Lines[0] if isinstance(command, HostedCommand) and command.ReturnCode == 0 and len(command.Lines) == 1 else None), duration
+
+    firstPid, startDuration = getHostPid()
+    durations = []
+    pids = [firstPid]
+    for _i in range(arguments.commands):
+        pid, duration = getHostPid()
+        pids.append(pid)
+        durations.append(duration)
+    warmDuration = sum(durations) / len(durations)
+    # The hosts are replaced after MAX_COMMANDS_PER_HOST commands
+    expectedPids = [pids[i - i % pool.MAX_COMMANDS_PER_HOST] for i in range(len(pids))]
+    allPassed &= report(None not in pids and pids == expectedPids and len(set(pids)) == (len(pids) - 1) // pool.MAX_COMMANDS_PER_HOST + 1,
+                        f"{arguments.commands} command(s) on {len(set(pids))} warm host(s): {round(warmDuration * 1000, 1)}ms each, {round(startDuration * 1000, 1)}ms for the first one, which started the host")
+    lastPid = pids[-1]
+
+    command, _duration = runScript("fail 5")
+    pid, _duration = getHostPid()
+    allPassed &= report(command.ReturnCode == 5 and command.Lines == ["something went wrong"] and pid == lastPid, "a failing script gets its exit code, and the host is kept")
+
+    # The consumer stops reading in the middle of a long reply
+    with contextlib.redirect_stdout(io.StringIO()):
+        command = pool.run("lines 100000 0.001", runner, timeout=60)
+        lines = [line for _i, line in zip(range(3), command)]
+        startTime = time.perf_counter()
+        command.close()
+        closeDuration = time.perf_counter() - startTime
+    pid, recycleDuration = getHostPid()
+    allPassed &= report(lines == ["line 0", "line 1", "line 2"] and command.Killed and closeDuration < 5 and pid not in (None, lastPid),
+                        f"a command closed after 3 of 100000 lines: closed in {round(closeDuration * 1000, 1)}ms, the next command got a new host in {round(recycleDuration * 1000, 1)}ms")
+    lastPid = pid
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        with pool.run("lines 100000 0.001", runner, timeout=60) as command:
+            next(iter(command))
+    pid, _duration = getHostPid()
+    allPassed &= report(command.Finished and command.Killed and pid not in (None, lastPid), "a command left on a with block before the end of its output gets its host replaced")
+    lastPid = pid
+
+    command, duration = runScript("hang", timeout=1)
+    pid, _duration = getHostPid()
+    allPassed &= report(command.TimedOut and duration < 5 and pid not in (None, lastPid), f"a hung script is killed by its deadline after {round(duration, 2)}s, and its host replaced")
+    lastPid = pid
+
+    command, duration = runScript("crash")
+    pid, _duration = getHostPid()
+    allPassed &= report(command.Lines == ["recovered on a one-shot process"] and command.ReturnCode == 0 and pid not in (None, lastPid),
+                        f"a script that crashes its host is run again on a one-shot process, in {round(duration * 1000, 1)}ms, and the host is replaced")
+    lastPid = pid
+
+    token = CancellationToken()
+    threading.Timer(0.5, token.cancel).start()
+    command, duration = runScript("lines 100000 0.001", timeout=60, token=token)
+    pid, _duration = getHostPid()
+    allPassed &= report(command.Cancelled and duration < 5 and 0 < len(command.Lines) < 100000 and pid not in (None, lastPid),
+                        f"a command cancelled mid-stream after {len(command.Lines)} line(s) ends in {round(duration, 2)}s, and its host is replaced")
+
+    # Every slot must have been given back, so as many commands as there are hosts can still run at once on hosts
+    with contextlib.redirect_stdout(io.StringIO()):
+        commands = [pool.run("lines 3 0.2", runner, timeout=30) for _i in range(pool.MAX_HOSTS)]
+        for command in commands:
+            command.wait()
+    allPassed &= report(all(isinstance(command, HostedCommand) and command.ReturnCode == 0 for command in commands) and QoS.RunningInteractive == 0 and QoS.RunningBackground == 0,
+                        f"{pool.MAX_HOSTS} command(s) at once still run on hosts, and no QoS slot is left taken")
+    pool.shutdown()
+    sys.exit(0 if allPassed else 1)
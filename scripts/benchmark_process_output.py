@@ -0,0 +1,171 @@
+"""
+Checks the output readers of wingetui/Core/Tools.py (StdoutLineReader, used by the installation threads, and ProcessOutput, used by CommandRunner)
+against a chatty fake executable, and measures their throughput and how long a line takes to reach them, next to a plain p.stdout.readline() loop.
+
+    python scripts/benchmark_process_output.py [--lines 200000] [--latency-lines 200] [--interval 0.005]
+
+The fake executable writes a recorded output in odd-sized bursts, so the "\\r\\n" pairs and the multi-byte characters get split between two reads,
+with "\\r"-ended progress redraws in the middle and a last line without a newline. Then it prints timestamped lines a few milliseconds apart.
+The script exits with code 1 if a reader loses, merges or alters a line, or if a line takes more than --max-latency seconds to be read.
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+script_path = os.path.abspath(__file__)
+root_dir = os.path.join(os.path.dirname(script_path), "..")
+os.chdir(root_dir)  # move to root project
+
+sys.path.append("./")
+
+FAKE_CHATTY_SCRIPT = """
+import sys, time
+out = sys.stdout.buffer
+if sys.argv[1] == "replay":
+    data = open(sys.argv[2], "rb").read()
+    sizes = [4093, 1, 65537, 17, 8191]  # Odd sizes, so the separators and the characters get split between the reads
+    position, i = 0, 0
+    while position < len(data):
+        out.write(data[position:position + sizes[i % len(sizes)]])
+        out.flush()
+        position += sizes[i % len(sizes)]
+        i += 1
+else:
+    for i in range(int(sys.argv[2])):
+        out.write(f"{time.time()}\\r\\n".encode())
+        out.flush()
+        time.sleep(float(sys.argv[3]))
+"""
+
+
+def createFakeExecutable(directory: str) -> list[str]:
+    with open(os.path.join(directory, "fake_chatty.py"), "w") as f:
+        f.write(FAKE_CHATTY_SCRIPT)
+    if os.name == "nt":
+        executable = os.path.join(directory, "fake_chatty.cmd")
+        with open(executable, "w") as f:
+            f.write(f'@"{sys.executable}" "{os.path.join(directory, "fake_chatty.py")}" %*\n')
+    else:
+        executable = os.path.join(directory, "fake_chatty")
+        with open(executable, "w") as f:
+            f.write(f'#!/bin/sh\nexec "{sys.executable}" "{os.path.join(directory, "fake_chatty.py")}" "$@"\n')
+        os.chmod(executable, 0o755)
+    return [executable]
+
+
+def getRecordedOutput(lineCount: int) -> bytes:
+    """
+    Returns an installer-like output: log lines ended with \\n or \\r\\n, progress bars redrawn with \\r, and a last line without a newline.
+    """
+    parts = []
+    for i in range(lineCount):
+        if i % 10 == 9:
+            parts.append(f"  ██████▒▒▒▒ {i % 100}% — descargando ünïcødé".encode() + b"\r")
+        else:
+            parts.append(f"Line {i}: Installing package «{i}» 安装中 ✓".encode() + (b"\r\n" if i % 2 else b"\n"))
+    parts.append("Done, no newline at the end ✓".encode())
+    return b"".join(parts)
+
+
+def getExpectedReaderLines(data: bytes) -> list[tuple[bytes, bool]]:
+    lines = []
+    start = 0
+    for separator in re.finditer(rb"\r\n|\r|\n", data):
+        if separator.start() > start:
+            lines.append((data[start:separator.start()], separator.group() != b"\r"))
+        start = separator.end()
+    if data[start:]:
+        lines.append((data[start:], True))
+    return lines
+
+
+def getExpectedOutputLines(data: bytes) -> list[str]:
+    return [line[:-1] if line.endswith("\r") else line for line in data.decode("utf-8").split("\n")]
+
+
+def startProcess(command: list[str]) -> subprocess.Popen:
+    return subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL)
+
+
+def readWithStdoutLineReader(p: subprocess.Popen, onLine: callable = None) -> list:
+    lines = []
+    for line, is_newline in StdoutLineReader(p):
+        if onLine:
+            onLine(line)
+        lines.append((line, is_newline))
+    p.wait()
+    return lines
+
+
+def readWithProcessOutput(p: subprocess.Popen, onLine: callable = None) -> list:
+    output = ProcessOutput(p)
+    for line in output:
+        if onLine:
+            onLine(line)
+    return output.Lines
+
+
+def readWithReadline(p: subprocess.Popen, onLine: callable = None) -> list:
+    lines = []
+    for line in iter(p.stdout.readline, b""):
+        if onLine:
+            onLine(line)
+        lines.append(line)
+    p.wait()
+    return lines
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=200000)
+    parser.add_argument("--latency-lines", type=int, default=200)
+    parser.add_argument("--interval", type=float, default=0.005)
+    parser.add_argument("--max-latency", type=float, default=0.05)
+    arguments = parser.parse_args()
+
+    import io
+    import contextlib
+    with contextlib.redirect_stdout(io.StringIO()):  # The engine is quite verbose
+        from wingetui.Core.Tools import ProcessOutput, StdoutLineReader
+
+    directory = tempfile.mkdtemp()
+    command = createFakeExecutable(directory)
+    data = getRecordedOutput(arguments.lines)
+    with open(os.path.join(directory, "output.bin"), "wb") as f:
+        f.write(data)
+    expected = {
+        "StdoutLineReader": getExpectedReaderLines(data),
+        "ProcessOutput": getExpectedOutputLines(data),
+        "readline": [line + b"\n" for line in data.split(b"\n")[:-1]] + ([data.split(b"\n")[-1]] if not data.endswith(b"\n") else []),
+    }
+    readers = {"StdoutLineReader": readWithStdoutLineReader, "ProcessOutput": readWithProcessOutput, "readline": readWithReadline}
+    allPassed = True
+
+    print(f"{'reader':>18}  {'lines':>8}  {'MB/s':>8}  {'lines/s':>10}  {'mean ms':>8}  {'p95 ms':>8}  {'max ms':>8}")
+    for name, read in readers.items():
+        startTime = time.perf_counter()
+        lines = read(startProcess(command + ["replay", os.path.join(directory, "output.bin")]))
+        totalTime = time.perf_counter() - startTime
+
+        latencies = []
+
+        def measureLatency(line) -> None:
+            stamp = line.decode() if isinstance(line, bytes) else line
+            latencies.append(time.time() - float(stamp.strip()))
+
+        read(startProcess(command + ["timestamps", str(arguments.latency_lines), str(arguments.interval)]), measureLatency)
+        latencies = sorted(latencies) if latencies else [float("inf")]
+        meanLatency = sum(latencies) / len(latencies)
+        p95Latency = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+        passed = lines == expected[name] and (name == "readline" or (len(latencies) == arguments.latency_lines and latencies[-1] <= arguments.max_latency))
+        allPassed &= passed
+        print(f"{'ok  ' if passed else 'FAIL'}{name:>14}  {len(lines):>8}  {round(len(data) / 1048576 / totalTime, 1):>8}  {round(len(lines) / totalTime):>10}  "
+              f"{round(meanLatency * 1000, 2):>8}  {round(p95Latency * 1000, 2):>8}  {round(latencies[-1] * 1000, 2):>8}")
+    print("\nreadline is the reference: it splits on \\n only, so it can't show the \\r progress redraws, and it is not checked for latency")
+    sys.exit(0 if allPassed else 1)
@@ -0,0 +1,190 @@
+"""
+Checks wingetui/PackageEngine/ScoopBucketRefresh.py against local checkouts of Scoop and of its buckets, and measures how long refreshing
+them takes when they are pulled one after the other (like scoop update does) and when they are pulled at the same time.
+
+    python scripts/benchmark_scoop_buckets.py [--buckets 12] [--manifests 200] [--latency 0.5] [--keep DIRECTORY]
+
+Scoop and every bucket are cloned from local bare repositories, which get new commits between the refreshes. git is replaced by a wrapper that waits
+for the given latency before every pull, as a remote on the network would. The script exits with code 1 if a bucket is not up to date after
+a refresh (or Scoop itself), if its package count or update date are wrong, if a recently fetched bucket is pulled again, or if a broken remote
+is not reported.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+script_path = os.path.abspath(__file__)
+root_dir = os.path.join(os.path.dirname(script_path), "..")
+os.chdir(root_dir)  # move to root project
+
+sys.path.append("./")
+
+FAKE_GIT_SCRIPT = """
+import subprocess, sys, time
+latency, git = float(sys.argv[1]), sys.argv[2]
+if "pull" in sys.argv[3:]:
+    time.sleep(latency)
+sys.exit(subprocess.run([git] + sys.argv[3:]).returncode)
+"""
+
+COMMIT_DATES = ["2024-01-10 10:00:00", "2024-02-20 12:30:00", "2024-03-30 18:45:00"]
+
+
+def createFakeGit(directory: str, latency: float, git: str) -> str:
+    with open(os.path.join(directory, "fake_git.py"), "w") as f:
+        f.write(FAKE_GIT_SCRIPT)
+    if os.name == "nt":
+        executable = os.path.join(directory, "fake_git.cmd")
+        with open(executable, "w") as f:
+            f.write(f'@"{sys.executable}" "{os.path.join(directory, "fake_git.py")}" {latency} "{git}" %*\n')
+    else:
+        executable = os.path.join(directory, "fake_git")
+        with open(executable, "w") as f:
+            f.write(f'#!/bin/sh\nexec "{sys.executable}" "{os.path.join(directory, "fake_git.py")}" {latency} "{git}" "$@"\n')
+        os.chmod(executable, 0o755)
+    return executable
+
+
+def git(*args: str, date: str = COMMIT_DATES[0]) -> str:
+    environment = dict(os.environ, GIT_AUTHOR_DATE=date, GIT_COMMITTER_DATE=date)
+    return subprocess.run(["git"] + list(args), check=True, capture_output=True, text=True, env=environment).stdout.strip()
+
+
+def addManifests(workFolder: str, names: list[str], date: str) -> None:
+    for name in names:
+        with open(os.path.join(workFolder, "bucket", f"{name}.json"), "w", encoding="utf-8") as f:
+            json.dump({"version": "1.0", "description": f"The {name} app", "url": f"https://example.com/{name}.zip", "hash": "0" * 64}, f)
+    git("-C", workFolder, "add", "-A")
+    git("-C", workFolder, "commit", "-q", "-m", f"Add {len(names)} app(s)", date=date)
+    git("-C", workFolder, "push", "-q", "origin", "HEAD:master")
+
+
+def createFixture(directory: str, bucketCount: int, manifestCount: int) -> str:
+    """
+    Creates a bare remote, a working copy to push to it and a checkout for Scoop itself and for every bucket, and returns the buckets folder.
+    """
+    scoopFolder = os.path.join(directory, "scoop")
+    bucketsFolder = os.path.join(scoopFolder, "buckets")
+    os.makedirs(bucketsFolder, exist_ok=True)
+    for name, checkout in [("scoop", os.path.join(scoopFolder, "apps", "scoop", "current"))] + [(f"bucket{b}", os.path.join(bucketsFolder, f"bucket{b}")) for b in range(bucketCount)]:
+        remote = os.path.join(directory, "remotes", f"{name}.git")
+        workFolder = os.path.join(directory, "work", name)
+        git("init", "-q", "--bare", "-b", "master", remote)
+        git("clone", "-q", remote, workFolder)
+        os.makedirs(os.path.join(workFolder, "bucket"), exist_ok=True)
+        addManifests(workFolder, [f"app{i}" for i in range(manifestCount)] if name != "scoop" else ["core"], COMMIT_DATES[0])
+        git("clone", "-q", remote, checkout)
+    return bucketsFolder
+
+
+def check(buckets: list, directory: str, manifestCount: int, date: str, expectRefreshed: bool, failing: set[str] = set()) -> bool:
+    passed = True
+    for bucket in buckets:
+        remoteHead = git("--git-dir", os.path.join(directory, "remotes", f"{bucket.Name}.git"), "rev-parse", "HEAD") if bucket.Name not in failing else None
+        expected = {
+            "Refreshed": expectRefreshed,
+            "Failed": bucket.Name in failing,
+            "PackageCount": manifestCount,
+            "UpdateDate": date,
+        }
+        found = {"Refreshed": bucket.Refreshed, "Failed": bucket.Failed, "PackageCount": bucket.PackageCount, "UpdateDate": bucket.UpdateDate}
+        if found != expected or (remoteHead is not None and bucket.Head != remoteHead) or not bucket.Url.endswith(f"{bucket.Name}.git"):
+            passed = False
+            print(f"FAIL {bucket.Name}: {found} on {bucket.Head} from {bucket.Url}, expected {expected} on {remoteHead}")
+    return passed
+
+
+def pushToEveryRemote(directory: str, bucketCount: int, names: list[str], date: str) -> None:
+    for name in ["scoop"] + [f"bucket{b}" for b in range(bucketCount)]:
+        addManifests(os.path.join(directory, "work", name), names, date)
+
+
+def isCoreUpToDate(refresher, directory: str) -> bool:
+    return refresher.Core is not None and refresher.Core.Refreshed and not refresher.Core.Failed and refresher.Core.Head == git("--git-dir", os.path.join(directory, "remotes", "scoop.git"), "rev-parse", "HEAD")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--buckets", type=int, default=12)
+    parser.add_argument("--manifests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--keep", default=None, help="Write the fixture to this directory instead of a temporary one")
+    arguments = parser.parse_args()
+    os.environ.update({"GIT_AUTHOR_NAME": "Benchmark", "GIT_AUTHOR_EMAIL": "benchmark@example.com", "GIT_COMMITTER_NAME": "Benchmark", "GIT_COMMITTER_EMAIL": "benchmark@example.com", "TZ": "UTC"})
+    if hasattr(time, "tzset"):
+        time.tzset()  # So the update dates are the commit dates above
+
+    import io
+    import contextlib
+    with contextlib.redirect_stdout(io.StringIO()):  # The engine is quite verbose
+        from wingetui.PackageEngine.CommandRunner import CommandRunner
+        from wingetui.PackageEngine.CommandWatchdog import Watchdog
+        from wingetui.PackageEngine.ScoopBucketRefresh import ScoopBucketRefresher
+        from wingetui.Core.Executor import Executor, POOL_SUBPROCESS
+    Watchdog.save = lambda: None  # Keep the timings of the fixture out of the user settings
+
+    directory = arguments.keep or tempfile.mkdtemp()
+    os.makedirs(directory, exist_ok=True)
+    bucketsFolder = createFixture(directory, arguments.buckets, arguments.manifests)
+    os.environ["SCOOP"] = os.path.dirname(bucketsFolder)
+    refresher = ScoopBucketRefresher()
+    refresher.GIT_EXECUTABLE = createFakeGit(directory, arguments.latency, shutil.which("git"))
+    runner = CommandRunner("Scoop bucket refresh benchmark")
+
+    allPassed = refresher.isAvailable()
+    os.rename(os.path.join(refresher.getCoreFolder(), ".git"), os.path.join(directory, "core.git"))
+    allPassed = allPassed and not refresher.isAvailable()  # Only scoop update can update a Scoop that is not a git checkout
+    os.rename(os.path.join(directory, "core.git"), os.path.join(refresher.getCoreFolder(), ".git"))
+    print(f"{'ok  ' if allPassed else 'FAIL'} the buckets are refreshed with git only if Scoop itself is a git checkout")
+    manifestCount = arguments.manifests
+    for run, maxPulls in enumerate((1, refresher.MAX_CONCURRENT_PULLS)):
+        pushToEveryRemote(directory, arguments.buckets, [f"new{run}"], COMMIT_DATES[run + 1])
+        manifestCount += 1
+        refresher.MAX_CONCURRENT_PULLS = maxPulls
+        with contextlib.redirect_stdout(io.StringIO()):
+            startTime = time.perf_counter()
+            buckets = refresher.refresh(runner, force=True)
+            totalTime = time.perf_counter() - startTime
+        passed = check(buckets, directory, manifestCount, COMMIT_DATES[run + 1], True) and isCoreUpToDate(refresher, directory)
+        allPassed = allPassed and passed
+        print(f"{'ok  ' if passed else 'FAIL'} Scoop and {len(buckets)} bucket(s) {'one by one  ' if maxPulls == 1 else f'{maxPulls} at a time'}: refreshed in {round(totalTime, 2)}s, "
+              f"the slowest one took {round(max(bucket.Duration for bucket in buckets), 2)}s")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        startTime = time.perf_counter()
+        buckets = refresher.refresh(runner)
+        totalTime = time.perf_counter() - startTime
+        sources = refresher.getSources(None)
+    passed = check(buckets, directory, manifestCount, COMMIT_DATES[2], False)
+    passed = passed and sources is not None and [(source.Name, source.PackageCount, source.UpdateDate) for source in sources] == [(bucket.Name, bucket.PackageCount, bucket.UpdateDate) for bucket in buckets]
+    allPassed = allPassed and passed
+    print(f"{'ok  ' if passed else 'FAIL'} {len(buckets)} bucket(s) fetched within the freshness window: skipped in {round(totalTime * 1000, 1)}ms")
+
+    shutil.rmtree(os.path.join(directory, "remotes", "bucket0.git"))
+    with contextlib.redirect_stdout(io.StringIO()):
+        buckets = refresher.refresh(runner, force=True)
+    passed = check(buckets, directory, manifestCount, COMMIT_DATES[2], True, failing={"bucket0"})
+    allPassed = allPassed and passed
+    print(f"{'ok  ' if passed else 'FAIL'} a bucket whose remote is gone is reported as failed, and the other ones are refreshed")
+
+    # A refresh started from a worker of the subprocess pool, while every other worker is busy, must not wait for a free one
+    release = threading.Event()
+    blockers = [Executor.submit(POOL_SUBPROCESS, release.wait) for _i in range(Executor.Pools[POOL_SUBPROCESS].MaxWorkers - 1)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        refresh = Executor.submit(POOL_SUBPROCESS, refresher.refresh, runner, True)
+        try:
+            buckets = refresh.result(timeout=60)
+        except TimeoutError:
+            buckets = []
+    release.set()
+    passed = len(buckets) == arguments.buckets and all(bucket.Refreshed for bucket in buckets)
+    allPassed = allPassed and passed
+    print(f"{'ok  ' if passed else 'FAIL'} a refresh running on a busy subprocess pool pulls the buckets on its own thread")
+    sys.exit(0 if allPassed else 1)
@@ -0,0 +1,376 @@
+"""
+Checks the readers of the Scoop folders against a fixture Scoop tree, and measures how long they take:
+- wingetui/PackageEngine/ScoopInventory.py, which reads the installed apps;
+- wingetui/PackageEngine/ScoopBuckets.py, which finds their upgrades and their details on the bucket manifests;
+- wingetui/PackageEngine/ScoopSearchIndex.py, which searches the bucket manifests (on a larger fixture, with git checkouts).
+
+    python scripts/benchmark_scoop_folders.py [--apps 3000] [--search-buckets 30] [--search-manifests 30000] [--keep DIRECTORY]
+
+The fixture has a user and a global root, with apps installed from buckets and from urls, held apps, failed installations, nightly apps
+and apps with more than one installed version, and three buckets (one of them with the old layout, without a bucket subfolder).
+The script exits with code 1 if the apps or the upgrades found are not the expected ones.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+script_path = os.path.abspath(__file__)
+root_dir = os.path.join(os.path.dirname(script_path), "..")
+os.chdir(root_dir)  # move to root project
+
+sys.path.append("./")
+
+import wingetui.PackageEngine.ScoopBuckets as ScoopBucketsModule  # noqa: E402
+from wingetui.PackageEngine.ScoopBuckets import ScoopBucketManifests, getScoopInstaller, resolveScoopUpgrades  # noqa: E402
+from wingetui.PackageEngine.ScoopInventory import ScoopInventory  # noqa: E402
+import wingetui.PackageEngine.ScoopSearchIndex as ScoopSearchIndexModule  # noqa: E402
+from wingetui.PackageEngine.VersionComparison import compareScoopVersions, isNewerScoopVersion  # noqa: E402
+
+# (name, manifest) of the manifests the searches are checked against, on the first bucket of the search fixture
+SEARCH_MANIFESTS = [
+    ("vscode", {"version": "1.86.0", "description": "Lightweight but powerful source code editor", "homepage": "https://code.visualstudio.com", "bin": "bin\\code.cmd"}),
+    ("vscode-insiders", {"version": "1.87.0", "description": "Insiders build of the source code editor", "homepage": "https://code.visualstudio.com/insiders", "bin": [["bin\\code-insiders.cmd", "codei"]]}),
+    ("7zip", {"version": "23.01", "description": "A multi-format file archiver with high compression ratios", "homepage": "https://www.7-zip.org", "architecture": {"64bit": {"bin": "7z.exe"}}}),
+    ("ripgrep", {"version": "14.1.0", "description": "Recursively searches directories for a regex pattern", "homepage": "https://github.com/BurntSushi/ripgrep", "bin": "rg.exe"}),
+    ("neovim", {"version": "0.9.5", "description": ["Vim-fork focused on extensibility", "and usability"], "homepage": "https://neovim.io", "bin": ["bin\\nvim.exe"]}),
+]
+
+# The generated manifests are described with a few of these words each
+DESCRIPTION_WORDS = """a an and the for of with to on in from by your fast simple small modern lightweight portable open source free cross platform
+    command line terminal shell graphical tool utility library framework runtime compiler interpreter editor viewer manager client server
+    browser player recorder converter downloader archiver backup sync monitor benchmark debugger profiler formatter linter generator builder
+    installer launcher extension plugin theme font icon image video audio music photo document text markdown json yaml xml csv pdf database
+    network http proxy vpn ssh ftp git version control package container virtual machine cloud storage file disk system process memory
+    window desktop keyboard mouse screen clipboard password security encryption privacy game emulator engine development programming""".split()
+
+# (query, ids that must be found, first id expected, or None)
+SEARCH_CHECKS = [
+    ("vscode", {"vscode", "vscode-insiders"}, "vscode"),
+    ("code", {"vscode", "vscode-insiders"}, "vscode"),
+    ("rg", {"ripgrep"}, None),
+    ("compression archiver", {"7zip"}, "7zip"),
+    ("7z", {"7zip"}, "7zip"),
+    ("nvim", {"neovim"}, "neovim"),
+    ("usability", {"neovim"}, "neovim"),
+    ("zzzz", set(), None),
+]
+
+# (manifest, architecture, expected (url, hash) of getScoopInstaller)
+ARCHITECTURE_SECTIONS = {"64bit": {"url": "https://example.com/x64.zip", "hash": "64"}, "32bit": {"url": ["https://example.com/x86.zip", "https://example.com/extra.zip"], "hash": ["32", "extra"]}}
+INSTALLER_CHECKS = [
+    ({"url": "https://example.com/app.zip", "hash": "0"}, "64bit", ("https://example.com/app.zip", "0")),
+    ({"url": ["https://example.com/a.zip", "https://example.com/b.7z"], "hash": ["a", "b"]}, "32bit", ("https://example.com/a.zip", "a")),
+    ({"architecture": ARCHITECTURE_SECTIONS}, "64bit", ("https://example.com/x64.zip", "64")),
+    ({"architecture": ARCHITECTURE_SECTIONS}, "32bit", ("https://example.com/x86.zip", "32")),
+    ({"architecture": ARCHITECTURE_SECTIONS}, "arm64", ("https://example.com/x64.zip", "64")),  # Scoop installs the x64 build on arm64 if there is no arm64 one
+    ({"architecture": {"64bit": ARCHITECTURE_SECTIONS["64bit"]}}, "32bit", ("", "")),
+    ({"url": "https://example.com/any.zip", "hash": "any", "architecture": {"64bit": {"bin": "app.exe"}}}, "64bit", ("https://example.com/any.zip", "any")),
+    ({"url": "https://example.com/any.zip", "architecture": {"arm64": {"url": "https://example.com/arm.zip"}}}, "arm64", ("https://example.com/arm.zip", "")),
+    ({"version": "1.0"}, "64bit", ("", "")),
+]
+
+# (first, second, expected sign of compareScoopVersions)
+VERSION_COMPARISONS = [
+    ("1.10", "1.9", 1),
+    ("1.1", "1.1-beta", 1),
+    ("1.1.1", "1.1", 1),
+    ("2.0-rc1", "2.0-rc2", -1),
+    ("1.2b3", "1.2b10", -1),
+    ("7.4.2+build5", "7.4.2", 1),
+    ("2024.01.05", "2023.12.31", 1),
+    ("22H2", "21H2", 1),
+    ("1.0_2", "1.0-2", 0),
+]
+
+# (candidate, installed, expected result of isNewerScoopVersion on 2024-03-02)
+UPGRADE_CHECKS = [
+    ("nightly", "nightly-20240301", True),
+    ("nightly", "nightly-20240302", False),
+    ("1.0", "1.0", False),
+    ("0.9", "1.0", False),
+]
+
+
+def createApp(root: str, id: str, versions: list[str], installInfo: dict | None, manifest: bool = True) -> None:
+    """
+    Creates apps/<id>/<version> for every version, and apps/<id>/current pointing to the last one (a symbolic link when possible, like the junction Scoop creates).
+    """
+    appFolder = os.path.join(root, "apps", id)
+    for version in versions:
+        versionFolder = os.path.join(appFolder, version)
+        os.makedirs(versionFolder, exist_ok=True)
+        if manifest:
+            with open(os.path.join(versionFolder, "manifest.json"), "w", encoding="utf-8") as f:
+                json.dump({"version": version, "description": f"The {id} app", "url": f"https://example.com/{id}-{version}.zip", "hash": "0" * 64}, f)
+        if installInfo is not None:
+            with open(os.path.join(versionFolder, "install.json"), "w", encoding="utf-8") as f:
+                json.dump(installInfo, f)
+    try:
+        os.symlink(os.path.join(appFolder, versions[-1]), os.path.join(appFolder, "current"), target_is_directory=True)
+    except OSError:
+        shutil.copytree(os.path.join(appFolder, versions[-1]), os.path.join(appFolder, "current"))
+
+
+def createFixture(directory: str, appCount: int) -> dict[str, tuple]:
+    """
+    Creates the fixture and returns the apps that should be read, as {id: (version, bucket, isGlobal, isHeld)}.
+    """
+    userRoot, globalRoot = os.path.join(directory, "user"), os.path.join(directory, "global")
+    expected = {}
+    for i in range(appCount):
+        root, isGlobal = (globalRoot, True) if i % 10 == 0 else (userRoot, False)
+        bucket = ("main", "extras", "versions")[i % 3]
+        versions = [f"1.{i % 7}.0"] + ([f"2.{i % 5}.0"] if i % 4 == 0 else [])
+        createApp(root, f"app{i}", versions, {"bucket": bucket, "architecture": "64bit", "hold": i % 25 == 0})
+        expected[f"app{i}"] = (versions[-1], bucket, isGlobal, i % 25 == 0)
+    createApp(userRoot, "fromurl", ["0.1"], {"url": "https://example.com/fromurl.json", "architecture": "64bit"})
+    expected["fromurl"] = ("0.1", "https://example.com/fromurl.json", False, False)
+    createApp(userRoot, "noinstallinfo", ["3.0"], None)
+    expected["noinstallinfo"] = ("3.0", "", False, False)
+    createApp(userRoot, "failed", ["1.0"], {"bucket": "main"}, manifest=False)  # Left out, like scoop list does
+    createApp(userRoot, "scoop", ["0.4.0"], {"bucket": ""})  # Scoop itself
+    createApp(userRoot, "nightlyapp", ["nightly-20240301"], {"bucket": "main"})
+    expected["nightlyapp"] = ("nightly-20240301", "main", False, False)
+    return expected
+
+
+def createBuckets(directory: str, installedApps: dict[str, tuple]) -> dict[str, str]:
+    """
+    Creates the buckets of the installed apps and returns the upgrades that should be found on them, as {id: latest version}.
+    A third of the apps get a newer version, some an older one, and the manifests of a few are removed from their bucket.
+    """
+    expected = {}
+    for bucket in ("main", "extras", "versions"):
+        manifestsFolder = os.path.join(directory, "user", "buckets", bucket) if bucket == "extras" else os.path.join(directory, "user", "buckets", bucket, "bucket")
+        os.makedirs(manifestsFolder, exist_ok=True)
+        with open(os.path.join(manifestsFolder, "unrelated.json"), "w", encoding="utf-8") as f:
+            json.dump({"version": "1.0"}, f)
+    for i, (id, (version, bucket, isGlobal, isHeld)) in enumerate(sorted(installedApps.items())):
+        if bucket not in ("main", "extras", "versions") or i % 50 == 7:
+            continue  # Installed from a url, or removed from the bucket
+        if id == "nightlyapp":
+            latestVersion = "nightly"
+        elif i % 3 == 0:
+            latestVersion = version.replace("1.", "3.", 1).replace("2.", "3.", 1)
+        elif i % 3 == 1:
+            latestVersion = version
+        else:
+            latestVersion = "0.1"
+        manifestsFolder = os.path.join(directory, "user", "buckets", bucket) if bucket == "extras" else os.path.join(directory, "user", "buckets", bucket, "bucket")
+        with open(os.path.join(manifestsFolder, f"{id}.json"), "w", encoding="utf-8") as f:
+            json.dump({"version": latestVersion, "description": f"The {id} app", "homepage": f"https://example.com/{id}", "license": "MIT",
+                       "url": f"https://example.com/{id}-{latestVersion}.zip", "hash": "0" * 64, "autoupdate": {"url": f"https://example.com/{id}-$version.zip"}}, f)
+        if (latestVersion == "nightly" or i % 3 == 0) and not isHeld:
+            expected[id] = latestVersion
+    return expected
+
+
+def createSearchBuckets(directory: str, bucketCount: int, manifestCount: int) -> None:
+    """
+    Creates bucketCount git checkouts with manifestCount manifests between them, and the SEARCH_MANIFESTS on the first one.
+    """
+    for b in range(bucketCount):
+        bucketFolder = os.path.join(directory, f"bucket{b}")
+        os.makedirs(os.path.join(bucketFolder, "bucket"), exist_ok=True)
+        os.makedirs(os.path.join(bucketFolder, ".git", "refs", "heads"), exist_ok=True)
+        with open(os.path.join(bucketFolder, ".git", "HEAD"), "w") as f:
+            f.write("ref: refs/heads/master\n")
+        setGitHead(bucketFolder, "0" * 40)
+    for i in range(manifestCount):
+        with open(os.path.join(directory, f"bucket{i % bucketCount}", "bucket", f"tool{i}.json"), "w", encoding="utf-8") as f:
+            description = " ".join(DESCRIPTION_WORDS[(i * k * 7919) % len(DESCRIPTION_WORDS)] for k in range(1, 8))
+            json.dump({"version": f"{i % 9}.{i % 7}.0", "description": f"{description} topic{i % 300}", "homepage": f"https://example{i % 1000}.org/tool{i}", "bin": f"t{i}.exe"}, f)
+    for name, manifest in SEARCH_MANIFESTS:
+        with open(os.path.join(directory, "bucket0", "bucket", f"{name}.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+
+
+def setGitHead(bucketFolder: str, commit: str) -> None:
+    with open(os.path.join(bucketFolder, ".git", "refs", "heads", "master"), "w") as f:
+        f.write(commit + "\n")
+
+
+def checkSearches(index, checks: list) -> tuple[bool, list[float]]:
+    allPassed = True
+    durations = []
+    for query, expectedIds, expectedFirst in checks:
+        startTime = time.perf_counter()
+        results = index.search(query)
+        durations.append(time.perf_counter() - startTime)
+        ids = [id for id, version, bucket in results]
+        if not expectedIds.issubset(ids) or (not expectedIds and ids) or (expectedFirst is not None and ids[:1] != [expectedFirst]):
+            allPassed = False
+            print(f"FAIL search for \"{query}\" returned {ids[:10]}, expected {expectedIds} with {expectedFirst} first")
+    return allPassed, durations
+
+
+def measureSearchIndex(directory: str, bucketCount: int, manifestCount: int) -> bool:
+    bucketsFolder = os.path.join(directory, "search", "buckets")
+    createSearchBuckets(bucketsFolder, bucketCount, manifestCount)
+    manifests = ScoopBucketManifests()
+    manifests.getBucketsFolder = lambda: bucketsFolder
+    ScoopSearchIndexModule.Manifests = manifests
+    index = ScoopSearchIndexModule.ScoopSearchIndex()
+    index.PATH = os.path.join(directory, "search", "ScoopSearchIndex.db")
+    if os.path.isfile(index.PATH):
+        os.remove(index.PATH)
+
+    startTime = time.perf_counter()
+    index.update()
+    buildTime = time.perf_counter() - startTime
+    passed, durations = checkSearches(index, SEARCH_CHECKS)
+    for query in ("tool123", "topic42", "t99", "example7", "editor", "command line", "pro", "t"):
+        startTime = time.perf_counter()
+        index.search(query)
+        durations.append(time.perf_counter() - startTime)
+    startTime = time.perf_counter()
+    index.update()
+    unchangedUpdateTime = time.perf_counter() - startTime
+
+    time.sleep(0.05)  # So the modification times are not the same
+    with open(os.path.join(bucketsFolder, "bucket0", "bucket", "vscode.json"), "w", encoding="utf-8") as f:
+        json.dump({"version": "1.87.0", "description": "A wonderful source code editor", "bin": "bin\\code.cmd"}, f)
+    os.remove(os.path.join(bucketsFolder, "bucket0", "bucket", "ripgrep.json"))
+    setGitHead(os.path.join(bucketsFolder, "bucket0"), "1" * 40)
+    shutil.rmtree(os.path.join(bucketsFolder, f"bucket{bucketCount - 1}"))
+    startTime = time.perf_counter()
+    index.update()
+    changedUpdateTime = time.perf_counter() - startTime
+    changedPassed, changedDurations = checkSearches(index, [("wonderful", {"vscode"}, "vscode"), ("ripgrep", set(), None)])
+    removedBucket = f"bucket{bucketCount - 1}"
+    if any(bucket == removedBucket for id, version, bucket in index.search("tool", limit=manifestCount)):
+        changedPassed = False
+        print(f"FAIL the manifests of {removedBucket} are still found after removing it")
+    passed = passed and changedPassed and [version for id, version, bucket in index.search("vscode") if id == "vscode"] == ["1.87.0"]
+
+    print(f"{'ok  ' if passed else 'FAIL'} {manifestCount + len(SEARCH_MANIFESTS)} manifests on {bucketCount} buckets: building the index took {round(buildTime, 2)}s, "
+          f"an average search {round(sum(durations) / len(durations) * 1000, 2)}ms, an update without changes {round(unchangedUpdateTime * 1000, 1)}ms, "
+          f"an update after a pull and a removed bucket {round(changedUpdateTime * 1000, 1)}ms")
+    return passed
+
+
+def checkVersionComparison() -> bool:
+    allPassed = True
+    for first, second, expected in VERSION_COMPARISONS:
+        result, reverseResult = compareScoopVersions(first, second), compareScoopVersions(second, first)
+        if (result > 0) - (result < 0) != expected or (reverseResult > 0) - (reverseResult < 0) != -expected:
+            allPassed = False
+            print(f"FAIL compareScoopVersions(\"{first}\", \"{second}\") returned {result} and {reverseResult} the other way around, expected {expected}")
+    for candidate, installed, expected in UPGRADE_CHECKS:
+        if isNewerScoopVersion(candidate, installed, "20240302") != expected:
+            allPassed = False
+            print(f"FAIL isNewerScoopVersion(\"{candidate}\", \"{installed}\") should be {expected}")
+    print(f"{'ok  ' if allPassed else 'FAIL'} Scoop version comparison")
+    return allPassed
+
+
+def checkInstallers() -> bool:
+    passed = True
+    for manifest, architecture, expected in INSTALLER_CHECKS:
+        installer = getScoopInstaller(manifest, architecture)
+        if installer != expected:
+            passed = False
+            print(f"FAIL installer of {manifest} on {architecture}: found {installer}, expected {expected}")
+    print(f"{'ok  ' if passed else 'FAIL'} Scoop installers by architecture")
+    return passed
+
+
+def checkManifestLookups(inventory: ScoopInventory, manifests: ScoopBucketManifests) -> bool:
+    """
+    Looks up the manifest of every installed app without telling its bucket, the way the details of an upgradable package are loaded.
+    """
+    ScoopBucketsModule.Inventory = inventory
+    apps = inventory.getInstalledApps()
+    expected = {app.Id: app.Bucket for app in apps if app.Bucket in ("main", "extras", "versions") and os.path.isfile(manifests.getManifestPath(app.Bucket, app.Id))}
+    durations = []
+    for run in range(2):
+        startTime = time.perf_counter()
+        found = {}
+        for app in apps:
+            result = manifests.findManifest(app.Id)
+            if result is not None:
+                found[app.Id] = result[0]
+        durations.append(time.perf_counter() - startTime)
+    passed = all(found.get(id) == bucket for id, bucket in expected.items())  # The other ones may be found on any bucket that has them
+    if not passed:
+        for id in sorted(expected.keys()):
+            if found.get(id) != expected.get(id):
+                print(f"FAIL manifest of {id}: found on {found.get(id)}, expected on {expected.get(id)}")
+    print(f"{'ok  ' if passed else 'FAIL'} {len(found)} manifest(s) found: {round(durations[0] / len(apps) * 1000, 3)}ms per app the first time, {round(durations[1] / len(apps) * 1000, 3)}ms the next ones")
+    return passed
+
+
+def checkUpgrades(inventory: ScoopInventory, manifests: ScoopBucketManifests, expected: dict[str, str]) -> bool:
+    upgrades = {app.Id: latestVersion for app, latestVersion in resolveScoopUpgrades(inventory.getInstalledApps(), manifests, "20240302")}
+    passed = upgrades == expected
+    if not passed:
+        for id in sorted(upgrades.keys() | expected.keys()):
+            if upgrades.get(id) != expected.get(id):
+                print(f"FAIL upgrade of {id}: found {upgrades.get(id)}, expected {expected.get(id)}")
+    return passed
+
+
+def check(inventory: ScoopInventory, expected: dict[str, tuple]) -> bool:
+    apps = {app.Id: (app.Version, app.Bucket, app.IsGlobal, app.IsHeld) for app in inventory.getInstalledApps()}
+    passed = apps == expected
+    if not passed:
+        for id in sorted(apps.keys() | expected.keys()):
+            if apps.get(id) != expected.get(id):
+                print(f"FAIL {id}: read {apps.get(id)}, expected {expected.get(id)}")
+    return passed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--apps", type=int, default=3000)
+    parser.add_argument("--search-buckets", type=int, default=30)
+    parser.add_argument("--search-manifests", type=int, default=30000)
+    parser.add_argument("--keep", default=None, help="Write the fixture to this directory instead of a temporary one")
+    arguments = parser.parse_args()
+
+    directory = arguments.keep or tempfile.mkdtemp()
+    os.makedirs(directory, exist_ok=True)
+    expected = createFixture(directory, arguments.apps)
+    expectedUpgrades = createBuckets(directory, expected)
+    inventory = ScoopInventory()
+    inventory.getRoots = lambda: [(os.path.join(directory, "user"), False), (os.path.join(directory, "global"), True)]
+    manifests = ScoopBucketManifests()
+    manifests.getBucketsFolder = lambda: os.path.join(directory, "user", "buckets")
+
+    startTime = time.perf_counter()
+    passed = check(inventory, expected)
+    coldTime = time.perf_counter() - startTime
+    startTime = time.perf_counter()
+    passed = check(inventory, expected) and passed
+    warmTime = time.perf_counter() - startTime
+
+    time.sleep(0.05)  # So the modification times are not the same
+    installInfoPath = os.path.join(directory, "user", "apps", "app1", "current", "install.json")
+    with open(installInfoPath, "w", encoding="utf-8") as f:
+        json.dump({"bucket": "main", "architecture": "64bit", "hold": True}, f)
+    expected["app1"] = (expected["app1"][0], "main", False, True)
+    createApp(os.path.join(directory, "user"), "newapp", ["5.0"], {"bucket": "main"})
+    expected["newapp"] = ("5.0", "main", False, False)
+    passed = check(inventory, expected) and passed
+
+    print(f"{'ok  ' if passed else 'FAIL'} {len(expected)} apps: the first read took {round(coldTime * 1000, 1)}ms, the next ones {round(warmTime * 1000, 1)}ms")
+
+    allPassed = checkVersionComparison() and passed
+    expectedUpgrades.pop("app1", None)  # Held above
+    startTime = time.perf_counter()
+    passed = checkUpgrades(inventory, manifests, expectedUpgrades)
+    coldTime = time.perf_counter() - startTime
+    startTime = time.perf_counter()
+    passed = checkUpgrades(inventory, manifests, expectedUpgrades) and passed
+    warmTime = time.perf_counter() - startTime
+    print(f"{'ok  ' if passed else 'FAIL'} {len(expectedUpgrades)} upgrade(s): the first check took {round(coldTime * 1000, 1)}ms, the next ones {round(warmTime * 1000, 1)}ms")
+    allPassed = allPassed and passed
+    allPassed = checkInstallers() and allPassed
+    allPassed = checkManifestLookups(inventory, manifests) and allPassed
+    allPassed = measureSearchIndex(directory, arguments.search_buckets, arguments.search_manifests) and allPassed
+    sys.exit(0 if allPassed else 1)
@@ -0,0 +1,244 @@
+"""
+Checks that the structured output modes of the package managers (see wingetui/PackageEngine/StructuredOutput.py) report the same packages,
+versions and sources as the table outputs they replace, and measures how long each path takes.
+
+    python scripts/benchmark_structured_output.py [--packages 300]
+
+Every manager is replaced by a fake executable that prints recorded output for each command line: pip list (--format=json), npm list and
+npm outdated (--json), choco list and choco outdated (-r), and winget list, on a wide table and on a narrow one whose ids and versions
+winget has truncated, completed with winget export. Scoop is left out, as its structured modes run on the PowerShell hosts.
+It also stops reading the installed winget packages after the first one, while winget export is still running, to check that the export
+gets killed and its QoS slot released. The script exits with code 1 if the two paths of a manager do not report the same packages, or if
+anything is left running.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+script_path = os.path.abspath(__file__)
+root_dir = os.path.join(os.path.dirname(script_path), "..")
+os.chdir(root_dir)  # move to root project
+
+sys.path.append("./")
+
+FAKE_MANAGER_SCRIPT = """
+import json, shutil, sys, time
+outputs = json.load(open(sys.argv[1], encoding="utf-8"))
+args = sys.argv[2:]
+if "export" in args:  # winget export writes its document to the file after -o
+    time.sleep(outputs.get("exportDelay", 0))
+    shutil.copyfile(outputs["export"], args[args.index("-o") + 1])
+    sys.exit(0)
+key = " ".join(args)
+if key not in outputs:
+    print(f"Unknown command: {key}")
+    sys.exit(1)
+sys.stdout.buffer.write(outputs[key].encode("utf-8"))
+"""
+
+def createFakeManager(directory: str, name: str, outputs: dict) -> str:
+    with open(os.path.join(directory, f"{name}.json"), "w", encoding="utf-8") as f:
+        json.dump(outputs, f)
+    with open(os.path.join(directory, "fake_manager.py"), "w") as f:
+        f.write(FAKE_MANAGER_SCRIPT)
+    if os.name == "nt":
+        executable = os.path.join(directory, f"fake_{name}.cmd")
+        with open(executable, "w") as f:
+            f.write(f'@"{sys.executable}" "{os.path.join(directory, "fake_manager.py")}" "{os.path.join(directory, f"{name}.json")}" %*\n')
+    else:
+        executable = os.path.join(directory, f"fake_{name}")
+        with open(executable, "w") as f:
+            f.write(f'#!/bin/sh\nexec "{sys.executable}" "{os.path.join(directory, "fake_manager.py")}" "{os.path.join(directory, f"{name}.json")}" "$@"\n')
+        os.chmod(executable, 0o755)
+    return executable
+
+
+def formatTable(headers: list[str], rows: list[list[str]], widths: list[int] = None, dashesByColumn: bool = False) -> str:
+    """
+    Formats a table the way the managers print them. Values longer than their column are truncated the way winget does it.
+    """
+    widths = widths or [max(len(header), *(len(row[i]) for row in rows)) for i, header in enumerate(headers)]
+
+    def formatRow(values: list[str]) -> str:
+        cells = []
+        for value, width in zip(values, widths):
+            cells.append((value[:width - 1] + "…" if len(value) > width else value).ljust(width))
+        return " ".join(cells).rstrip()
+
+    dashes = " ".join("-" * width for width in widths) if dashesByColumn else "-" * (sum(widths) + len(widths) - 1)
+    return "\n".join([formatRow(headers), dashes] + [formatRow(row) for row in rows]) + "\n"
+
+
+def getPipOutputs(count: int) -> tuple[dict, int]:
+    packages = [(f"package-{i}", f"{i % 5}.{i % 7}.{i}") for i in range(count)]
+    outdated = [(id, version, f"{int(version.split('.')[0]) + 1}.0.0") for id, version in packages[::4]]
+    return {
+        "-m pip list --format=json": json.dumps([{"name": id, "version": version} for id, version in packages]) + "\n[notice] A new release of pip is available\n",
+        "-m pip list": formatTable(["Package", "Version"], [list(package) for package in packages], dashesByColumn=True),
+        "-m pip list --outdated --format=json": json.dumps([{"name": id, "version": version, "latest_version": latest, "latest_filetype": "wheel"} for id, version, latest in outdated]),
+        "-m pip list --outdated": formatTable(["Package", "Version", "Latest", "Type"], [[id, version, latest, "wheel"] for id, version, latest in outdated], dashesByColumn=True),
+    }, len(packages)
+
+
+def getNpmOutputs(count: int) -> dict:
+    local = [(f"@scope/local-{i}" if i % 3 == 0 else f"local-{i}", f"1.{i}.0") for i in range(count // 2)]
+    globalPackages = [(f"global-{i}", f"2.{i}.0") for i in range(count // 2)]
+
+    def listTable(header: str, packages: list) -> str:
+        return header + "\n" + "\n".join(f"{'`--' if i == len(packages) - 1 else '+--'} {id}@{version}" for i, (id, version) in enumerate(packages)) + "\n"
+
+    def outdatedTable(packages: list) -> str:
+        rows = [[id, version, version, f"9.{i}.0", f"node_modules/{id}", "user"] for i, (id, version) in enumerate(packages[::5])]
+        return formatTable(["Package", "Current", "Wanted", "Latest", "Location", "Depended by"], rows)
+
+    def outdatedDocument(packages: list) -> str:
+        return json.dumps({id: {"current": version, "wanted": version, "latest": f"9.{i}.0", "location": f"node_modules/{id}"} for i, (id, version) in enumerate(packages[::5])})
+
+    return {
+        "list --json --depth=0": json.dumps({"name": "user", "dependencies": {id: {"version": version} for id, version in local}}),
+        "list --json --depth=0 -g": json.dumps({"dependencies": {id: {"version": version} for id, version in globalPackages}}),
+        "list": listTable("user@ C:\\Users\\user", local),
+        "list -g": listTable("C:\\Users\\user\\AppData\\Roaming\\npm", globalPackages),
+        "outdated --json": outdatedDocument(local),
+        "outdated --json -g": outdatedDocument(globalPackages),
+        "outdated": outdatedTable(local),
+        "outdated -g": outdatedTable(globalPackages),
+    }
+
+
+def getChocoOutputs(count: int) -> dict:
+    packages = [(f"package{i}", f"{i}.0.{i % 3}") for i in range(count)]
+    outdated = [(id, version, f"{id[7:]}.1.0", "false") for id, version in packages[::3]]
+    return {
+        "list -r": "\n".join(f"{id}|{version}" for id, version in packages) + "\n",
+        "list": "Chocolatey v2.2.2\n" + "\n".join(f"{id} {version}" for id, version in packages) + f"\n{len(packages)} packages installed.\n",
+        "outdated -r": "\n".join("|".join(package) for package in outdated) + "\n",
+        "outdated": "Chocolatey v2.2.2\nOutdated Packages\n Output is package name | current version | available version | pinned?\n\n"
+                    + "\n".join("|".join(package) for package in outdated) + f"\n\nChocolatey has determined {len(outdated)} package(s) are outdated.\n",
+    }
+
+
+def getWingetOutputs(count: int, directory: str) -> tuple[dict, dict]:
+    """
+    Returns the outputs of a wide winget (nothing truncated) and of a narrow one (with winget export), which must give the same packages.
+    """
+    packages = []
+    for i in range(count):
+        if i % 10 == 9:
+            packages.append((f"Local program {i}", f"Local{i}", f"{i}.0", ""))  # Not installed from a source, winget export does not have it
+        elif i % 10 == 8:
+            packages.append((f"Store app {i}", f"9NSTORE{i:05}", f"{i}.0.0.0", "msstore"))
+        else:
+            packages.append((f"Application number {i}", f"Publisher{i}.VeryLongApplicationName", f"{i}.{i % 4}.1234567890", "winget"))
+    headers = ["Name", "Id", "Version", "Source"]
+    rows = [list(package) for package in packages]
+    exportPath = os.path.join(directory, "winget_export.json")
+    with open(exportPath, "w", encoding="utf-8") as f:
+        json.dump({"Sources": [{"SourceDetails": {"Name": source}, "Packages": [{"PackageIdentifier": id, "Version": version} for name, id, version, packageSource in packages if packageSource == source]}
+                               for source in ("winget", "msstore")]}, f)
+    wide = {"list --accept-source-agreements": formatTable(headers, rows)}
+    narrow = {"list --accept-source-agreements": formatTable(headers, rows, widths=[24, 30, 12, 8]), "export": exportPath}
+    return wide, narrow
+
+
+def getPackages(iterable) -> tuple[list[tuple], float]:
+    startTime = time.perf_counter()
+    packages = sorted((package.Id, package.Version, getattr(package, "NewVersion", ""), package.Source) for package in iterable)
+    return packages, time.perf_counter() - startTime
+
+
+def compare(managerName: str, operation: str, structured: list[tuple], table: list[tuple], expectedCount: int) -> bool:
+    passed = structured == table and len(structured) == expectedCount
+    if not passed:
+        print(f"FAIL {managerName} {operation}: {len(structured)} package(s) on the structured output, {len(table)} on the table, {expectedCount} expected")
+        for package in sorted(set(structured) ^ set(table))[:6]:
+            print(f"     only on the {'structured output' if package in structured else 'table'}: {package}")
+    return passed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--packages", type=int, default=300)
+    arguments = parser.parse_args()
+
+    import io
+    import contextlib
+    with contextlib.redirect_stdout(io.StringIO()):  # The engine is quite verbose
+        import wingetui.Core.Globals as Globals
+        from wingetui.PackageEngine.CommandWatchdog import Watchdog
+        from wingetui.PackageEngine.Managers.choco import Choco
+        from wingetui.PackageEngine.Managers.npm import Npm
+        from wingetui.PackageEngine.Managers.pip import Pip
+        from wingetui.PackageEngine.Managers.winget import Winget
+        from wingetui.PackageEngine.QualityOfService import QoS
+        from wingetui.PackageEngine.StructuredOutput import StructuredOutputModes
+        from wingetui.PackageEngine.WingetIdResolver import IdResolver
+        from wingetui.PackageEngine.WingetSourceIndex import WingetIndex
+    Watchdog.save = lambda: None  # Keep the timings of the fake managers out of the user settings
+    IdResolver.save = lambda: None
+    WingetIndex.findIndex = lambda: None  # Only winget export can complete the truncated values
+    Globals.wingetSources = {"winget": "", "msstore": ""}
+
+    directory = tempfile.mkdtemp()
+    count = arguments.packages
+    pipOutputs, pipCount = getPipOutputs(count)
+    Pip.EXECUTABLE = createFakeManager(directory, "pip", pipOutputs) + " -m pip"
+    Npm.EXECUTABLE = createFakeManager(directory, "npm", getNpmOutputs(count))
+    Choco.EXECUTABLE = createFakeManager(directory, "choco", getChocoOutputs(count))
+
+    cases = [
+        (Pip, "installed", ["list"], lambda: Pip.iterInstalledPackages(), pipCount),
+        (Pip, "updates", ["outdated"], lambda: Pip.iterAvailableUpdates(), len(range(0, count, 4))),
+        (Npm, "installed", ["list"], lambda: Npm.iterInstalledPackages(), 2 * (count // 2)),
+        (Npm, "updates", ["outdated"], lambda: Npm.iterAvailableUpdates(), 2 * len(range(0, count // 2, 5))),
+        (Choco, "installed", ["list"], lambda: Choco.iterInstalledPackages(), count),
+        (Choco, "updates", ["outdated"], lambda: Choco.iterAvailableUpdates(), len(range(0, count, 3))),
+    ]
+    allPassed = True
+    for manager, operation, modes, iterate, expectedCount in cases:
+        manager.StructuredOutput = StructuredOutputModes(manager.NAME)
+        with contextlib.redirect_stdout(io.StringIO()):
+            structured, structuredTime = getPackages(iterate())
+            for mode in modes:
+                manager.StructuredOutput.markUnavailable(mode, "checking the table output")
+            table, tableTime = getPackages(iterate())
+        unavailable = manager.StructuredOutput.getUnavailableModes()
+        passed = compare(manager.NAME, operation, structured, table, expectedCount) and all(reason == "checking the table output" for reason in unavailable.values())
+        allPassed = allPassed and passed
+        print(f"{'ok  ' if passed else 'FAIL'} {manager.NAME} {operation}: {len(structured)} package(s), {round(structuredTime * 1000, 1)}ms structured, {round(tableTime * 1000, 1)}ms from the table")
+
+    wideOutputs, narrowOutputs = getWingetOutputs(count, directory)
+    results = []
+    for outputs, exportAvailable in ((wideOutputs, False), (narrowOutputs, True)):
+        Winget.EXECUTABLE = createFakeManager(directory, f"winget_{'narrow' if exportAvailable else 'wide'}", outputs)
+        Winget.EXPORT_FILE = os.path.join(directory, "WingetExport.json")
+        Winget.StructuredOutput = StructuredOutputModes(Winget.NAME)
+        with contextlib.redirect_stdout(io.StringIO()):
+            if not exportAvailable:
+                Winget.StructuredOutput.markUnavailable("export", "checking the table output")
+            results.append(getPackages(Winget.iterInstalledPackages()))
+    (table, tableTime), (exported, exportedTime) = results
+    truncatedRows = sum(1 for line in narrowOutputs["list --accept-source-agreements"].splitlines() if "…" in line)
+    passed = compare(Winget.NAME, "installed", exported, table, count) and truncatedRows > 0
+    allPassed = allPassed and passed
+    print(f"{'ok  ' if passed else 'FAIL'} {Winget.NAME} installed: {len(exported)} package(s), {truncatedRows} truncated row(s) completed with winget export in {round(exportedTime * 1000, 1)}ms, "
+          f"{round(tableTime * 1000, 1)}ms from a wide table")
+
+    Winget.EXECUTABLE = createFakeManager(directory, "winget_slow_export", dict(wideOutputs, export=narrowOutputs["export"], exportDelay=30))
+    Winget.StructuredOutput = StructuredOutputModes(Winget.NAME)
+    with contextlib.redirect_stdout(io.StringIO()):
+        startTime = time.perf_counter()
+        packages = Winget.iterInstalledPackages()
+        next(packages)
+        packages.close()  # As a consumer that has stopped reading would
+        totalTime = time.perf_counter() - startTime
+    export = [timing for timing in Winget.Runner.History if "export" in timing.Args][-1]
+    passed = export.Killed and QoS.RunningInteractive == 0 and QoS.RunningBackground == 0 and totalTime < 10
+    allPassed = allPassed and passed
+    print(f"{'ok  ' if passed else 'FAIL'} {Winget.NAME} installed, stopped after the first package: winget export {'killed' if export.Killed else 'NOT killed'} after {round(export.WallTime, 2)}s, "
+          f"{QoS.RunningInteractive + QoS.RunningBackground} QoS slot(s) still taken")
+    sys.exit(0 if allPassed else 1)
@@ -0,0 +1,170 @@
+"""
+Checks wingetui/PackageEngine/TableOutputParser.py against a corpus of recorded tables, and measures how many rows per second it parses.
+
+    python scripts/benchmark_table_parser.py [--rows 100000]
+
+The corpus covers the winget, pip, dotnet and scoop tables, localized headers, double-width characters, truncated values and progress spinners.
+The script exits with code 1 if any table is not parsed as expected.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+script_path = os.path.abspath(__file__)
+root_dir = os.path.join(os.path.dirname(script_path), "..")
+os.chdir(root_dir)  # move to root project
+
+sys.path.append("./")
+
+from wingetui.PackageEngine.TableOutputParser import TableOutputParser, isTruncated  # noqa: E402
+
+# (name, parser arguments, output lines, expected rows)
+FIXTURES = [
+    (
+        "winget upgrade, with a spinner, a truncated id and a second table",
+        {"requiredColumns": 3},
+        [
+            "   - \r   \\ \r   | \r                                                                                                                        \rName                            Id                                Version        Available      Source",
+            "-------------------------------------------------------------------------------------------------------------",
+            "Microsoft Visual C++ 2010  x64… Microsoft.VCRedist.2010.x64       10.0.40219     10.0.40219.473 winget",
+            "Visual Studio Code Insiders     Microsoft.VisualStudioCode.Insid… 1.86.0         1.87.0         winget",
+            "Zoom                            Zoom.Zoom                         < 5.17.0       5.17.5.2543    winget",
+            "3 upgrades available.",
+            "",
+            "The following packages have an upgrade available, but require explicit targeting for upgrade:",
+            "Name    Id              Version  Available Source",
+            "--------------------------------------------------",
+            "Discord Discord.Discord 1.0.9028 1.0.9032  winget",
+        ],
+        [
+            ["Microsoft Visual C++ 2010  x64…", "Microsoft.VCRedist.2010.x64", "10.0.40219", "10.0.40219.473", "winget"],
+            ["Visual Studio Code Insiders", "Microsoft.VisualStudioCode.Insid…", "1.86.0", "1.87.0", "winget"],
+            ["Zoom", "Zoom.Zoom", "< 5.17.0", "5.17.5.2543", "winget"],
+            ["Discord", "Discord.Discord", "1.0.9028", "1.0.9032", "winget"],
+        ],
+    ),
+    (
+        "winget list, in japanese, with double-width names and a package without a source",
+        {"requiredColumns": 3},
+        [
+            "名前                       ID                         バージョン ソース",
+            "-----------------------------------------------------------------------",
+            "ビジュアル スタジオ コード Microsoft.VisualStudioCode 1.86.0     winget",
+            "秀丸エディタ               Hidemaru.Editor            9.22       winget",
+            "7-Zip 23.01 (x64)          7zip.7zip                  23.01      winget",
+            "ローカルアプリ             ARP\\Machine\\X64\\Local…     1.0",
+        ],
+        [
+            ["ビジュアル スタジオ コード", "Microsoft.VisualStudioCode", "1.86.0", "winget"],
+            ["秀丸エディタ", "Hidemaru.Editor", "9.22", "winget"],
+            ["7-Zip 23.01 (x64)", "7zip.7zip", "23.01", "winget"],
+            ["ローカルアプリ", "ARP\\Machine\\X64\\Local…", "1.0", ""],
+        ],
+    ),
+    (
+        "winget search, in german, with a match column",
+        {"requiredColumns": 3},
+        [
+            "Name            ID              Version  Übereinstimmung Quelle",
+            "---------------------------------------------------------------",
+            "Mozilla Firefox Mozilla.Firefox 122.0.1  Tag: browser    winget",
+            "Brave           Brave.Brave     121.1.62                 winget",
+        ],
+        [
+            ["Mozilla Firefox", "Mozilla.Firefox", "122.0.1", "Tag: browser", "winget"],
+            ["Brave", "Brave.Brave", "121.1.62", "", "winget"],
+        ],
+    ),
+    (
+        "pip list --outdated",
+        {"requiredColumns": 3},
+        [
+            "Package    Version Latest Type",
+            "---------- ------- ------ -----",
+            "requests   2.28.0  2.31.0 wheel",
+            "setuptools 65.5.0  69.0.3 wheel",
+            "",
+            "[notice] A new release of pip is available: 23.0 -> 24.0",
+        ],
+        [
+            ["requests", "2.28.0", "2.31.0", "wheel"],
+            ["setuptools", "65.5.0", "69.0.3", "wheel"],
+        ],
+    ),
+    (
+        "dotnet tool list --global, with column names that have spaces",
+        {"minimumColumnGap": 2, "requiredColumns": 2},
+        [
+            "Package Id      Version      Commands",
+            "-------------------------------------------",
+            "dotnet-ef       8.0.1        dotnet-ef",
+            "powershell      7.4.1        pwsh",
+        ],
+        [
+            ["dotnet-ef", "8.0.1", "dotnet-ef"],
+            ["powershell", "7.4.1", "pwsh"],
+        ],
+    ),
+    (
+        "scoop status, with the dashes split by column",
+        {"requiredColumns": 3},
+        [
+            "",
+            "Name   Installed Version Latest Version   Missing Dependencies Info",
+            "----   ----------------- --------------   -------------------- ----",
+            "git    2.43.0.windows.1  2.44.0.windows.1",
+            "nodejs 21.6.0            21.6.1                                Held package",
+            "",
+        ],
+        [
+            ["git", "2.43.0.windows.1", "2.44.0.windows.1", "", ""],
+            ["nodejs", "21.6.0", "21.6.1", "", "Held package"],
+        ],
+    ),
+]
+
+
+def checkFixtures() -> bool:
+    allPassed = True
+    for name, arguments, lines, expected in FIXTURES:
+        rows = list(TableOutputParser(**arguments).parse(lines))
+        passed = rows == expected
+        allPassed = allPassed and passed
+        print(f"{'ok  ' if passed else 'FAIL'} {name}")
+        if not passed:
+            for row, expectedRow in zip(rows + [None] * len(expected), expected + [None] * len(rows)):
+                if row != expectedRow:
+                    print(f"       got      {row}\n       expected {expectedRow}")
+    if not isTruncated("Microsoft.VisualStudioCode.Insid…") or isTruncated("Microsoft.VisualStudioCode"):
+        print("FAIL isTruncated")
+        allPassed = False
+    return allPassed
+
+
+def benchmark(rowCount: int, wideEvery: int) -> float:
+    lines = ["Name                            Id                                Version        Available      Source", "-" * 110]
+    for i in range(rowCount):
+        if wideEvery and i % wideEvery == 0:
+            name = "ビジュアル スタジオ コード"
+            lines.append(f"{name}{' ' * (32 - 26)}Publisher.Package{i:<16} {i % 100}.{i % 7}.0{' ' * 9}{i % 100}.{i % 7}.1{' ' * 9}winget")
+        else:
+            lines.append(f"Package number {i:<17} Publisher.Package{i:<16} {i % 100}.{i % 7}.0{' ' * 9}{i % 100}.{i % 7}.1{' ' * 9}winget")
+    startTime = time.perf_counter()
+    count = sum(1 for _row in TableOutputParser(requiredColumns=3).parse(lines))
+    elapsed = time.perf_counter() - startTime
+    assert count == rowCount, count
+    return rowCount / elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    arguments = parser.parse_args()
+
+    passed = checkFixtures()
+    print()
+    print(f"ascii rows:                  {benchmark(arguments.rows, 0):>10,.0f} rows/s")
+    print(f"one in ten rows with CJK:    {benchmark(arguments.rows, 10):>10,.0f} rows/s")
+    sys.exit(0 if passed else 1)
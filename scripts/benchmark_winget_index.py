@@ -0,0 +1,204 @@
+"""
+Checks wingetui/PackageEngine/WingetSourceIndex.py against fixture index.db files, one for each known schema, and measures how long a search takes.
+Then checks the version comparator and measures how long the offline upgrade resolver (wingetui/PackageEngine/WingetUpgradeResolver.py) takes.
+
+    python scripts/benchmark_winget_index.py [--packages 10000] [--keep DIRECTORY]
+
+The fixtures are created from scratch, with the tables winget uses and a few thousand generated packages (winget-pkgs has around 8000).
+The script exits with code 1 if a search does not return what is expected.
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+script_path = os.path.abspath(__file__)
+root_dir = os.path.join(os.path.dirname(script_path), "..")
+os.chdir(root_dir)  # move to root project
+
+sys.path.append("./")
+
+from wingetui.PackageEngine.VersionComparison import compareVersions, isNewerVersion  # noqa: E402
+from wingetui.PackageEngine.WingetSourceIndex import WingetSourceIndex  # noqa: E402
+from wingetui.PackageEngine.WingetUpgradeResolver import resolveUpgrades  # noqa: E402
+
+# (id, name, moniker, versions, tags)
+FIXTURE_PACKAGES = [
+    ("Microsoft.VisualStudioCode", "Microsoft Visual Studio Code", "vscode", ["1.9.0", "1.10.0", "1.86.0"], ["editor", "developer-tools"]),
+    ("Mozilla.Firefox", "Mozilla Firefox", "firefox", ["121.0", "122.0.1"], ["browser"]),
+    ("Brave.Brave", "Brave", "brave", ["1.62.153"], ["browser", "privacy"]),
+    ("7zip.7zip", "7-Zip", "7zip", ["23.01"], ["compression"]),
+    ("Some_Publisher.100%Tool", "100% Tool", "", ["1.0"], []),
+]
+
+EXPECTED_RESULTS = {
+    "code": {("Microsoft.VisualStudioCode", "Microsoft Visual Studio Code", "1.86.0")},
+    "BROWSER": {("Mozilla.Firefox", "Mozilla Firefox", "122.0.1"), ("Brave.Brave", "Brave", "1.62.153")},
+    "7zip": {("7zip.7zip", "7-Zip", "23.01")},
+    "100%": {("Some_Publisher.100%Tool", "100% Tool", "1.0")},
+    "d_p": set(),  # The underscore must not match any character, such as the space of "Generated package"
+    "nothing matches this": set(),
+}
+
+# (first, second, expected sign of compareVersions)
+VERSION_COMPARISONS = [
+    ("1.10", "1.9", 1),
+    ("1.0", "1.0.0", 0),
+    ("v2.0", "2.0", 0),
+    ("1.0-beta", "1.0", -1),
+    ("2.1rc1", "2.1rc2", -1),
+    ("10.0.40219.473", "10.0.40219", 1),
+    ("2024.01.5", "2023.12.31", 1),
+]
+
+# (candidate, installed, expected result of isNewerVersion)
+UPGRADE_CHECKS = [
+    ("5.17.5", "< 5.17.0", True),
+    ("5.17.0", "< 5.17.0", True),
+    ("1.0", "Unknown", True),
+    ("2.0", "> 1.0", False),
+    ("1.0.0", "1.0", False),
+]
+
+
+def createVersion1Index(path: str, packages: list) -> None:
+    connection = sqlite3.connect(path)
+    connection.executescript("""
+        CREATE TABLE metadata(name TEXT PRIMARY KEY, value TEXT);
+        INSERT INTO metadata VALUES ('majorVersion', '1'), ('minorVersion', '7');
+        CREATE TABLE ids(id TEXT UNIQUE);
+        CREATE TABLE names(name TEXT UNIQUE);
+        CREATE TABLE monikers(moniker TEXT UNIQUE);
+        CREATE TABLE versions(version TEXT UNIQUE);
+        CREATE TABLE tags(tag TEXT UNIQUE);
+        CREATE TABLE manifest(id INT64, name INT64, moniker INT64, version INT64, channel INT64, pathpart INT64);
+        CREATE TABLE tags_map(manifest INT64, tag INT64);
+        CREATE INDEX manifest_id_index ON manifest(id);
+        CREATE INDEX manifest_name_index ON manifest(name);
+        CREATE INDEX manifest_moniker_index ON manifest(moniker);
+        CREATE INDEX manifest_version_index ON manifest(version);
+        CREATE INDEX tags_map_index ON tags_map(tag);
+    """)
+
+    def getRowid(table: str, value: str) -> int:
+        connection.execute(f"INSERT OR IGNORE INTO {table}({table[:-1]}) VALUES (?)", (value,))
+        return connection.execute(f"SELECT rowid FROM {table} WHERE {table[:-1]} = ?", (value,)).fetchone()[0]
+
+    for id, name, moniker, versions, tags in packages:
+        for version in versions:
+            manifest = connection.execute("INSERT INTO manifest VALUES (?, ?, ?, ?, 0, 0)", (getRowid("ids", id), getRowid("names", name), getRowid("monikers", moniker), getRowid("versions", version))).lastrowid
+            for tag in tags:
+                connection.execute("INSERT INTO tags_map VALUES (?, ?)", (manifest, getRowid("tags", tag)))
+    connection.commit()
+    connection.close()
+
+
+def createVersion2Index(path: str, packages: list) -> None:
+    connection = sqlite3.connect(path)
+    connection.executescript("""
+        CREATE TABLE metadata(name TEXT PRIMARY KEY, value TEXT);
+        INSERT INTO metadata VALUES ('majorVersion', '2'), ('minorVersion', '0');
+        CREATE TABLE packages(id TEXT, name TEXT, moniker TEXT, latest_version TEXT, arp_min_version TEXT, arp_max_version TEXT, hash BLOB);
+        CREATE TABLE tags2(tag TEXT UNIQUE);
+        CREATE TABLE tags2_map(package INT64, tag INT64);
+    """)
+    for id, name, moniker, versions, tags in packages:
+        package = connection.execute("INSERT INTO packages VALUES (?, ?, ?, ?, '', '', NULL)", (id, name, moniker, versions[-1])).lastrowid
+        for tag in tags:
+            connection.execute("INSERT OR IGNORE INTO tags2(tag) VALUES (?)", (tag,))
+            connection.execute("INSERT INTO tags2_map VALUES (?, (SELECT rowid FROM tags2 WHERE tag = ?))", (package, tag))
+    connection.commit()
+    connection.close()
+
+
+def getGeneratedPackages(count: int) -> list:
+    return [(f"Publisher{i % 500}.Package{i}", f"Generated package {i}", f"package{i}", [f"{i % 10}.0.0", f"{i % 10}.1.0"], [f"tag{i % 50}"]) for i in range(count)]
+
+
+def checkAndMeasure(name: str, path: str) -> bool:
+    index = WingetSourceIndex()
+    index.findIndex = lambda: path
+    if not index.isAvailable():
+        print(f"FAIL {name}: the index was not recognized")
+        return False
+    allPassed = True
+    for query, expected in EXPECTED_RESULTS.items():
+        results = set(index.search(query))
+        if results != expected:
+            allPassed = False
+            print(f"FAIL {name}: search for \"{query}\" returned {results}, expected {expected}")
+    durations = []
+    for query in ("package1", "tag7", "studio", "zzz"):
+        startTime = time.perf_counter()
+        index.search(query)
+        durations.append(time.perf_counter() - startTime)
+    print(f"{'ok  ' if allPassed else 'FAIL'} {name}: average search took {round(sum(durations) / len(durations) * 1000, 2)}ms")
+    return allPassed
+
+
+def checkUnknownSchema(path: str) -> bool:
+    connection = sqlite3.connect(path)
+    connection.executescript("CREATE TABLE metadata(name TEXT PRIMARY KEY, value TEXT); INSERT INTO metadata VALUES ('majorVersion', '99');")
+    connection.close()
+    index = WingetSourceIndex()
+    index.findIndex = lambda: path
+    passed = not index.isAvailable()
+    print(f"{'ok  ' if passed else 'FAIL'} an unknown schema is not used")
+    return passed
+
+
+def getSign(number: int) -> int:
+    return (number > 0) - (number < 0)
+
+
+def checkVersionComparison() -> bool:
+    allPassed = True
+    for first, second, expected in VERSION_COMPARISONS:
+        result, reverseResult = compareVersions(first, second), compareVersions(second, first)
+        if getSign(result) != expected or getSign(reverseResult) != -expected:
+            allPassed = False
+            print(f"FAIL compareVersions(\"{first}\", \"{second}\") returned {result} and {reverseResult} the other way around, expected {expected}")
+    for candidate, installed, expected in UPGRADE_CHECKS:
+        if isNewerVersion(candidate, installed) != expected:
+            allPassed = False
+            print(f"FAIL isNewerVersion(\"{candidate}\", \"{installed}\") should be {expected}")
+    print(f"{'ok  ' if allPassed else 'FAIL'} version comparison")
+    return allPassed
+
+
+def measureUpgradeResolver(path: str, packages: list) -> bool:
+    index = WingetSourceIndex()
+    index.findIndex = lambda: path
+    installedPackages = {id: (versions[0], "winget") for id, name, moniker, versions, tags in packages}
+    installedPackages.update({f"9NBLGGH{i:05}": ("1.0", "msstore") for i in range(100)})
+    startTime = time.perf_counter()
+    latestVersions = index.getLatestVersions()
+    loadTime = time.perf_counter()
+    upgrades = resolveUpgrades(installedPackages, latestVersions, "winget")
+    endTime = time.perf_counter()
+    passed = len(upgrades) == len([package for package in packages if len(package[3]) > 1]) and ("Microsoft Visual Studio Code", "Microsoft.VisualStudioCode", "1.9.0", "1.86.0") in upgrades
+    print(f"{'ok  ' if passed else 'FAIL'} {len(upgrades)} upgrade(s) among {len(installedPackages)} installed packages: loading the index took {round((loadTime - startTime) * 1000, 1)}ms, resolving took {round((endTime - loadTime) * 1000, 1)}ms")
+    return passed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--packages", type=int, default=10000)
+    parser.add_argument("--keep", default=None, help="Write the fixtures to this directory instead of a temporary one")
+    arguments = parser.parse_args()
+
+    directory = arguments.keep or tempfile.mkdtemp()
+    os.makedirs(directory, exist_ok=True)
+    packages = FIXTURE_PACKAGES + getGeneratedPackages(arguments.packages)
+    createVersion1Index(os.path.join(directory, "index_v1.db"), packages)
+    createVersion2Index(os.path.join(directory, "index_v2.db"), packages)
+
+    passed = checkAndMeasure("schema version 1", os.path.join(directory, "index_v1.db"))
+    passed = checkAndMeasure("schema version 2", os.path.join(directory, "index_v2.db")) and passed
+    passed = checkUnknownSchema(os.path.join(directory, "index_unknown.db")) and passed
+    passed = checkVersionComparison() and passed
+    passed = measureUpgradeResolver(os.path.join(directory, "index_v1.db"), packages) and passed
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,116 @@
+"""
+Measures how long a winget search takes to show its first and last results when every source is searched at the same time (see
+WingetPackageManager.iterSourcesSearchResults), compared with searching the sources one after the other.
+
+    python scripts/benchmark_winget_search.py [--packages 50] [--slow-delay 3]
+
+Winget is replaced by a fake executable that answers each source with a different latency: the community source answers right away,
+msstore takes a while, and a third source never answers within its latency budget. The concurrent search is measured again from a worker
+of the subprocess pool, while every other worker is busy. The script exits with code 1 if the results are not deduplicated, or if the
+results of a source are lost.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+script_path = os.path.abspath(__file__)
+root_dir = os.path.join(os.path.dirname(script_path), "..")
+os.chdir(root_dir)  # move to root project
+
+sys.path.append("./")
+
+FAKE_WINGET_SCRIPT = """
+import json, sys, time
+sources = json.load(open(sys.argv[1]))
+args = sys.argv[2:]
+source = args[args.index("--source") + 1]
+delay, packages = sources[source]
+print("Name" + " " * 26 + "Id" + " " * 38 + "Version")
+print("-" * 80)
+sys.stdout.flush()
+for i, (name, id) in enumerate(packages):
+    if i == 1:
+        time.sleep(delay)  # The first row comes right away, like the ones winget prints while the source answers
+    print(f"{name:<30}{id:<40}1.0")
+    sys.stdout.flush()
+"""
+
+
+def createFakeWinget(directory: str, sources: dict) -> str:
+    with open(os.path.join(directory, "sources.json"), "w") as f:
+        json.dump(sources, f)
+    with open(os.path.join(directory, "fake_winget.py"), "w") as f:
+        f.write(FAKE_WINGET_SCRIPT)
+    if os.name == "nt":
+        executable = os.path.join(directory, "fake_winget.cmd")
+        with open(executable, "w") as f:
+            f.write(f'@"{sys.executable}" "{os.path.join(directory, "fake_winget.py")}" "{os.path.join(directory, "sources.json")}" %*\n')
+    else:
+        executable = os.path.join(directory, "fake_winget")
+        with open(executable, "w") as f:
+            f.write(f'#!/bin/sh\nexec "{sys.executable}" "{os.path.join(directory, "fake_winget.py")}" "{os.path.join(directory, "sources.json")}" "$@"\n')
+        os.chmod(executable, 0o755)
+    return executable
+
+
+def measureSearch(winget, concurrently: bool) -> tuple[list, float, float]:
+    winget.Runner.CanRunConcurrently = concurrently
+    startTime = time.perf_counter()
+    firstResultTime = None
+    packages = []
+    for package in winget.iterPackagesForQuery("app"):
+        if firstResultTime is None:
+            firstResultTime = time.perf_counter() - startTime
+        packages.append(package)
+    return packages, firstResultTime or 0.0, time.perf_counter() - startTime
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--packages", type=int, default=50)
+    parser.add_argument("--slow-delay", type=float, default=3)
+    arguments = parser.parse_args()
+
+    import io
+    import contextlib
+    with contextlib.redirect_stdout(io.StringIO()):  # The engine is quite verbose
+        import wingetui.Core.Globals as Globals
+        from wingetui.Core.Executor import Executor, POOL_SUBPROCESS
+        from wingetui.PackageEngine.CommandWatchdog import Watchdog
+        from wingetui.PackageEngine.Managers.winget import Winget
+        from wingetui.PackageEngine.WingetSourceIndex import WingetIndex
+    Watchdog.save = lambda: None  # Keep the timings of the fake winget out of the user settings
+    WingetIndex.findIndex = lambda: None  # Search every source with the fake winget
+
+    sources = {
+        "winget": (0.1, [("Shared App", "Shared.App")] + [(f"Community App {i}", f"Community.App{i}") for i in range(arguments.packages)]),
+        "msstore": (arguments.slow_delay, [("Store App", "9NSTOREAPP001")] + [(f"Store App {i}", f"9NSTOREAPP{i:03}X") for i in range(arguments.packages)] + [("Shared App", "shared.app")]),
+        "hanging": (60, [("Hanging App", "Hanging.App"), ("Never shown", "Never.Shown")]),
+    }
+    Winget.EXECUTABLE = createFakeWinget(tempfile.mkdtemp(), sources)
+    Winget.SEARCH_LATENCY_BUDGETS = {"winget": 20, "msstore": 20, "hanging": arguments.slow_delay + 1}
+    Globals.wingetSources = {source: "" for source in sources.keys()}
+
+    passed = True
+    for concurrently, busyPool in ((False, False), (True, False), (True, True)):
+        with contextlib.redirect_stdout(io.StringIO()):
+            if busyPool:
+                # Every worker but the one running the search is busy, so the searches of the sources can't get a worker
+                release = threading.Event()
+                blockers = [Executor.submit(POOL_SUBPROCESS, release.wait) for _i in range(Executor.Pools[POOL_SUBPROCESS].MaxWorkers - 1)]
+                packages, firstResultTime, totalTime = Executor.submit(POOL_SUBPROCESS, measureSearch, Winget, concurrently).result()
+                release.set()
+            else:
+                packages, firstResultTime, totalTime = measureSearch(Winget, concurrently)
+        ids = [package.Id.lower() for package in packages]
+        expectedCount = 2 * (arguments.packages + 1) + 1  # The community and store apps (Shared.App once), and the first row of the hanging source
+        ok = len(ids) == len(set(ids)) == expectedCount and "hanging.app" in ids
+        passed = passed and ok
+        print(f"{'ok  ' if ok else 'FAIL'} {'on a busy pool' if busyPool else 'concurrently  ' if concurrently else 'one by one    '}: {len(packages)} result(s), "
+              f"first one after {round(firstResultTime, 2)}s, all of them after {round(totalTime, 2)}s")
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,150 @@
+"""
+Checks wingetui/PackageEngine/WingetSourceClassifier.py against the classification it replaced, and measures how long it takes to classify the ids of a winget list.
+
+    python scripts/benchmark_winget_sources.py [--rows 10000]
+
+The fixture cycles through ids that take every branch of the classifier (Microsoft Store, Steam, GOG, Ubisoft Connect, Android Subsystem, ARP entries, etc.)
+The script exits with code 1 if any id is not classified as expected, or not classified as it used to be.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+script_path = os.path.abspath(__file__)
+root_dir = os.path.join(os.path.dirname(script_path), "..")
+os.chdir(root_dir)  # move to root project
+
+sys.path.append("./")
+
+from wingetui.Core.Tools import _  # noqa: E402
+from wingetui.PackageEngine.WingetSourceClassifier import WingetSourceClassifier  # noqa: E402
+
+# (id generator, expected source), the generators get the row number so the ids are not all the same
+FIXTURE_IDS = [
+    (lambda i: f"Publisher{i}.App", "Winget: winget"),
+    (lambda i: f"publisher{i}.app", "Winget: winget"),
+    (lambda i: f"Publisher.App.{i}", "Winget: winget"),
+    (lambda i: f"com.example.app{'x' * (i % 5)}", _("Android Subsystem")),
+    (lambda i: f"{{{i:08}-0000-0000-0000-000000000000}}", _("Local PC")),
+    (lambda i: f"Some Program {i}", _("Local PC")),
+    (lambda i: f"Program{i}", _("Local PC")),
+    (lambda i: f"program.v{i}.0", _("Local PC")),
+    (lambda i: "Steam", "Steam"),
+    (lambda i: f"Steam App {i}", "Steam"),
+    (lambda i: f"Steam App {i}b", _("Local PC")),
+    (lambda i: "Uplay", "Ubisoft Connect"),
+    (lambda i: f"Uplay Install {i}", "Ubisoft Connect"),
+    (lambda i: f"Uplay Install x{i}", _("Local PC")),
+    (lambda i: f"{1000000000 + i}_is1", "GOG"),
+    (lambda i: f"{i}_is1", _("Local PC")),
+    (lambda i: f"GOG Galaxy {i}_is1", "GOG"),
+    (lambda i: f"Microsoft.App{i % 10}_8wekyb3d8bbwe", "Microsoft Store"),
+    (lambda i: f"MICROSOFT.APP_{i % 10}8WEKYB3D8BBWE", "Microsoft Store"),
+    (lambda i: f"Microsoft.App{i % 10}_8wekyb3…", "Microsoft Store"),
+    (lambda i: f"XP9KHM4BK9F{i % 1000:03}", "Winget: msstore"),
+    (lambda i: f"9NBLGGH4N{i % 1000:03}", _("Local PC")),
+]
+
+
+def getLegacySource(id: str) -> str:
+    """
+    The classification as it was done before WingetSourceClassifier, kept to check that the results have not changed.
+    """
+    id = id.strip()
+    androidValid = True
+    for letter in id:
+        if letter not in "abcdefghijklmnopqrstuvwxyz.":
+            androidValid = False
+    if androidValid and id.count(".") > 1:
+        return _("Android Subsystem")
+    s = "Winget"
+    for illegal_char in ("{", "}", " "):
+        if illegal_char in id:
+            s = _("Local PC")
+            break
+    if s == "Winget":
+        if id.count(".") != 1:
+            s = (_("Local PC"))
+            if id.count(".") > 1:
+                for letter in id:
+                    if letter in "ABCDEFGHIJKLMNOPQRSTUVWXYZ":
+                        s = "Winget"
+                        break
+    if s == _("Local PC"):
+        if id == "Steam":
+            s = "Steam"
+        if id.count("Steam App ") == 1:
+            s = "Steam"
+            for number in id.split("Steam App ")[1]:
+                if number not in "0123456789":
+                    s = _("Local PC")
+                    break
+        if id == "Uplay":
+            s = "Ubisoft Connect"
+        if id.count("Uplay Install ") == 1:
+            s = "Ubisoft Connect"
+            for number in id.split("Uplay Install ")[1]:
+                if number not in "0123456789":
+                    s = _("Local PC")
+                    break
+        if id.count("_is1") == 1:
+            s = "GOG"
+            for number in id.split("_is1")[0]:
+                if number not in "0123456789":
+                    s = _("Local PC")
+                    break
+            if len(id) != 14:
+                s = _("Local PC")
+            if id.count("GOG") == 1:
+                s = "GOG"
+    if s == "Winget":
+        if len(id.split("_")[-1]) in (13, 14) and (len(id.split("_")) == 2 or id == id.upper()):
+            s = "Microsoft Store"
+        elif len(id.split("_")[-1]) <= 13 and len(id.split("_")) == 2 and "…" == id.split("_")[-1][-1]:
+            s = "Microsoft Store"
+    if len(id) in (13, 14) and (id.upper() == id):
+        s = "Winget: msstore"
+    if s == "Winget":
+        s = "Winget: winget"
+    return s
+
+
+def getFixture(rows: int) -> list[tuple[str, str]]:
+    return [(FIXTURE_IDS[i % len(FIXTURE_IDS)][0](i), FIXTURE_IDS[i % len(FIXTURE_IDS)][1]) for i in range(rows)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    arguments = parser.parse_args()
+
+    fixture = getFixture(arguments.rows)
+    classifier = WingetSourceClassifier()
+    failures = 0
+    for id, expected in fixture:
+        source, legacySource = classifier.getSource(id), getLegacySource(id)
+        if source != expected or source != legacySource:
+            failures += 1
+            if failures <= 20:
+                print(f"FAIL {id}: classified as {source}, expected {expected} (used to be {legacySource})")
+
+    ids = [id for id, expected in fixture]
+    startTime = time.perf_counter()
+    for id in ids:
+        getLegacySource(id)
+    legacyTime = time.perf_counter() - startTime
+    classifier = WingetSourceClassifier()
+    startTime = time.perf_counter()
+    for id in ids:
+        classifier.classify(id)
+    coldTime = time.perf_counter() - startTime
+    startTime = time.perf_counter()
+    for id in ids:
+        classifier.classify(id)
+    warmTime = time.perf_counter() - startTime
+
+    print(f"{'ok  ' if not failures else 'FAIL'} {len(ids)} ids, {len(FIXTURE_IDS)} kinds: {failures} failure(s)")
+    print(f"     before: {round(legacyTime * 1000, 1)}ms, first refresh: {round(coldTime * 1000, 1)}ms, next refreshes: {round(warmTime * 1000, 1)}ms")
+    sys.exit(0 if not failures else 1)
@@ -0,0 +1,243 @@
+if __name__ == "__main__":
+    # WingetUI cannot be run directly from this file, it must be run by importing the wingetui module
+    import os
+    import subprocess
+    import sys
+    sys.exit(subprocess.run(["cmd", "/C", "python", "-m", "wingetui"], shell=True, cwd=os.path.dirname(__file__).split("wingetui")[0]).returncode)
+
+
+import heapq
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+from wingetui.Core.Tools import report
+
+
+POOL_IO = "io"  # Network and disk: icons, screenshots, announcements, backups
+POOL_SUBPROCESS = "subprocess"  # Package manager commands
+POOL_CPU = "cpu"  # Short in-process work: lookups, parsing
+
+PRIORITY_HIGH = 0  # Something the user is waiting for right now
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2  # Background work nobody is waiting for
+
+
+class ExecutorTask():
+    """
+    A function submitted to a pool, together with its priority and the Future where its result will be set.
+    Tasks with the same priority run in submission order.
+    """
+    Priority: int = PRIORITY_NORMAL
+    Sequence: int = 0
+    Name: str = ""
+    SubmitTime: float = 0.0
+    Future: Future = None
+
+    def __init__(self, function: callable, args: tuple, priority: int, sequence: int, name: str):
+        self.Priority = priority
+        self.Sequence = sequence
+        self.Name = name or getattr(function, "__qualname__", str(function))
+        self.SubmitTime = time.time()
+        self.Future = Future()
+        self.__function = function
+        self.__args = args
+
+    def __lt__(self, other: 'ExecutorTask') -> bool:
+        return (self.Priority, self.Sequence) < (other.Priority, other.Sequence)
+
+    def run(self) -> None:
+        if not self.Future.set_running_or_notify_cancel():
+            return
+        try:
+            self.Future.set_result(self.__function(*self.__args))
+        except Exception as e:
+            report(e)  # Most tasks are fire-and-forget, so nobody would see the exception otherwise
+            self.Future.set_exception(e)
+
+
+class BoundedPool():
+    """
+    A named pool of at most MaxWorkers threads, fed from a priority queue. The workers are started on demand,
+    and exit after IDLE_TIMEOUT seconds without work, so an idle application does not keep them around.
+    """
+    IDLE_TIMEOUT: float = 30
+
+    Name: str = ""
+    MaxWorkers: int = 1
+    Workers: int = 0
+    IdleWorkers: int = 0
+    Running: int = 0
+    PeakWorkers: int = 0
+    PeakQueueDepth: int = 0
+    Submitted: int = 0
+    Completed: int = 0
+    TotalWaitTime: float = 0.0
+
+    def __init__(self, name: str, maxWorkers: int):
+        self.Name = name
+        self.MaxWorkers = max(1, maxWorkers)
+        self.Workers = 0
+        self.IdleWorkers = 0
+        self.Running = 0
+        self.PeakWorkers = 0
+        self.PeakQueueDepth = 0
+        self.Submitted = 0
+        self.Completed = 0
+        self.TotalWaitTime = 0.0
+        self.__queue: list[ExecutorTask] = []
+        self.__condition = threading.Condition()
+        self.__workerNumbers = itertools.count(1)
+
+    def submit(self, task: ExecutorTask) -> None:
+        with self.__condition:
+            heapq.heappush(self.__queue, task)
+            self.Submitted += 1
+            self.PeakQueueDepth = max(self.PeakQueueDepth, len(self.__queue))
+            if len(self.__queue) > self.IdleWorkers and self.Workers < self.MaxWorkers:
+                self.Workers += 1
+                self.PeakWorkers = max(self.PeakWorkers, self.Workers)
+                threading.Thread(target=self.__work, daemon=True, name=f"{self.Name} pool worker {next(self.__workerNumbers)}").start()
+            else:
+                self.__condition.notify()
+
+    def getQueueDepth(self) -> int:
+        return len(self.__queue)
+
+    def getMetrics(self) -> dict:
+        with self.__condition:
+            return {
+                "QueueDepth": len(self.__queue),
+                "PeakQueueDepth": self.PeakQueueDepth,
+                "Running": self.Running,
+                "Workers": self.Workers,
+                "PeakWorkers": self.PeakWorkers,
+                "MaxWorkers": self.MaxWorkers,
+                "Submitted": self.Submitted,
+                "Completed": self.Completed,
+                "AverageWaitTime": round(self.TotalWaitTime / self.Completed, 3) if self.Completed else 0.0,
+            }
+
+    def __work(self) -> None:
+        while True:
+            with self.__condition:
+                idleSince = time.time()
+                while not self.__queue:
+                    remaining = self.IDLE_TIMEOUT - (time.time() - idleSince)
+                    if remaining <= 0:
+                        self.Workers -= 1
+                        return
+                    self.IdleWorkers += 1
+                    self.__condition.wait(remaining)
+                    self.IdleWorkers -= 1
+                task = heapq.heappop(self.__queue)
+                self.Running += 1
+                waitTime = time.time() - task.SubmitTime
+            task.run()
+            with self.__condition:
+                self.Running -= 1
+                self.Completed += 1
+                self.TotalWaitTime += waitTime
+
+
+class ScheduledTask():
+    """
+    A function that will be run after a delay. It can be cancelled until then.
+    """
+    Time: float = 0.0
+    Cancelled: bool = False
+
+    def __init__(self, when: float, sequence: int, function: callable, args: tuple, pool: str | None, priority: int, name: str):
+        self.Time = when
+        self.Cancelled = False
+        self.Sequence = sequence
+        self.Function = function
+        self.Args = args
+        self.Pool = pool
+        self.Priority = priority
+        self.Name = name
+
+    def __lt__(self, other: 'ScheduledTask') -> bool:
+        return (self.Time, self.Sequence) < (other.Time, other.Sequence)
+
+    def cancel(self) -> None:
+        self.Cancelled = True
+
+
+class ExecutorService():
+    """
+    Runs all the background work of WingetUI on a few named, bounded pools, instead of a new thread for every job:
+    - POOL_IO: network and disk access (icons, screenshots, announcements, backups)
+    - POOL_SUBPROCESS: package manager operations, which mostly wait for a command
+    - POOL_CPU: short in-process work
+    Delayed jobs (debounces, retries, periodic checks) wait on a single scheduler thread instead of sleeping on a thread of their own.
+    The queue depths and worker counts of every pool can be read with getMetrics().
+    """
+    POOL_SIZES: dict[str, int] = {
+        POOL_IO: 8,
+        POOL_SUBPROCESS: 12,
+        POOL_CPU: min(4, os.cpu_count() or 1),
+    }
+
+    Pools: dict[str, BoundedPool] = {}
+
+    def __init__(self):
+        self.Pools = {name: BoundedPool(name, size) for name, size in self.POOL_SIZES.items()}
+        self.__sequence = itertools.count()
+        self.__scheduled: list[ScheduledTask] = []
+        self.__schedulerCondition = threading.Condition()
+        self.__schedulerThread: threading.Thread = None
+
+    def submit(self, pool: str, function: callable, *args, priority: int = PRIORITY_NORMAL, name: str = "") -> Future:
+        """
+        Runs function(*args) on the given pool, as soon as a worker is free and no task with a higher priority is waiting. Returns a Future with its result.
+        """
+        task = ExecutorTask(function, args, priority, next(self.__sequence), name)
+        self.Pools[pool].submit(task)
+        return task.Future
+
+    def schedule(self, delay: float, function: callable, *args, pool: str | None = None, priority: int = PRIORITY_NORMAL, name: str = "") -> ScheduledTask:
+        """
+        Runs function(*args) after the given delay, in seconds. If a pool is given the function is submitted to it,
+        otherwise it runs on the scheduler thread itself, so it must return quickly (emitting a signal, setting a flag, killing a process).
+        """
+        task = ScheduledTask(time.time() + max(0, delay), next(self.__sequence), function, args, pool, priority, name)
+        with self.__schedulerCondition:
+            heapq.heappush(self.__scheduled, task)
+            if self.__schedulerThread is None:
+                self.__schedulerThread = threading.Thread(target=self.__runScheduler, daemon=True, name="Executor scheduler")
+                self.__schedulerThread.start()
+            self.__schedulerCondition.notify()
+        return task
+
+    def getMetrics(self) -> dict[str, dict]:
+        metrics = {name: pool.getMetrics() for name, pool in self.Pools.items()}
+        metrics["scheduler"] = {"Scheduled": len(self.__scheduled)}
+        return metrics
+
+    def getMaximumThreadCount(self) -> int:
+        """
+        Returns the number of threads the executor can ever use: the workers of every pool, plus the scheduler.
+        """
+        return sum(pool.MaxWorkers for pool in self.Pools.values()) + 1
+
+    def __runScheduler(self) -> None:
+        while True:
+            with self.__schedulerCondition:
+                while not self.__scheduled or self.__scheduled[0].Time > time.time():
+                    self.__schedulerCondition.wait(max(0, self.__scheduled[0].Time - time.time()) if self.__scheduled else None)
+                task = heapq.heappop(self.__scheduled)
+            if task.Cancelled:
+                continue
+            if task.Pool:
+                self.submit(task.Pool, task.Function, *task.Args, priority=task.Priority, name=task.Name)
+            else:
+                try:
+                    task.Function(*task.Args)
+                except Exception as e:
+                    report(e)
+
+
+Executor = ExecutorService()
@@ -6,6 +6,7 @@ if __name__ == "__main__":
     sys.exit(subprocess.run(["cmd", "/C", "python", "-m", "wingetui"], shell=True, cwd=os.path.dirname(__file__).split("wingetui")[0]).returncode)
 
 
+import codecs
 import io
 import json
 import locale
@@ -18,8 +19,7 @@ import sys
 import time
 import tempfile
 import traceback
-import winreg
-import win32gui
+from collections import deque
 from datetime import datetime
 from pathlib import Path
 from threading import Thread
@@ -31,9 +31,15 @@ import wingetui.Core.Globals as Globals
 from wingetui.Core.Languages.LangReference import *
 from wingetui.Core.Data.Versions import *
 
+if os.name == "nt":
+    import winreg
+    import win32gui
+else:  # Only the package engine can be loaded outside of Windows, to run the checks on scripts/
+    winreg = win32gui = None
 
 try:
-    import clr
+    if os.name == "nt":
+        import clr
 except RuntimeError:
     print("🔴 .NET Runtime not found, aborting...")
     import traceback
@@ -230,8 +236,10 @@ def SetJsonSettings(Name: str, Data: dict, Scope: str = "") -> None:
         print(e)
 
 
-def readRegedit(aKey, sKey, default, storage=winreg.HKEY_CURRENT_USER):
-    registry = winreg.ConnectRegistry(None, storage)
+def readRegedit(aKey, sKey, default, storage=None):
+    if winreg is None:
+        return default
+    registry = winreg.ConnectRegistry(None, storage if storage is not None else winreg.HKEY_CURRENT_USER)
     reg_keypath = aKey
     try:
         reg_key = winreg.OpenKey(registry, reg_keypath)
@@ -391,32 +399,131 @@ def GetIgnoredPackageUpdates_SpecificVersion() -> list[list[str, str, str]]:
     return [v.split(",") for v in baseList if len(v.split(",")) == 3]
 
 
-carriedChar = b""
-
-
-def getLineFromStdout(p: subprocess.Popen) -> (bytes, bool):
+class StdoutLineReader():
     """
-    This function replaces p.stdout.readline(). Will return lines both from \\n-ending and \\r-ending character sequences.
-    This function may be more resource-intensive, so it should be used only when live outputs must be analyzed in real time.
+    Per-process replacement for p.stdout.readline(). Will return lines both from \\n-ending and \\r-ending character sequences, so progress redraws can be shown live.
+    The output is read in chunks and all the state is kept on the reader, so one reader can be created for each process and used from any thread.
+    Iterating over the reader yields (line: bytes, is_newline: bool) tuples until the process closes its stdout, so the tail of the output is never lost.
     """
-    global carriedChar
-    stdout: IO[bytes] = p.stdout
-    is_newline: bool = False
-    char = stdout.read(1)
-    line = carriedChar
-    carriedChar = b""
-    while char not in (b"\n", b"\r") and p.poll() is None:
-        line += char
-        char = stdout.read(1)
-    if b"\n" in char:
-        is_newline = True
-    elif b"\r" in char:
-        carriedChar = stdout.read(1)
-        if carriedChar == b"\n":
-            is_newline = True
-            carriedChar = b""
-    line = line.replace(b"\r", b"").replace(b"\n", b"")
-    return (line, is_newline) if (line or p.poll() is not None) else getLineFromStdout(p)
+    CHUNK_SIZE: int = 65536
+    LINE_SEPARATORS = re.compile(rb"\r\n|\r|\n")
+
+    def __init__(self, p: subprocess.Popen, chunkSize: int = CHUNK_SIZE):
+        stdout: IO[bytes] = p.stdout
+        self.__read = getattr(stdout, "read1", stdout.read)
+        self.__chunkSize = chunkSize
+        self.__buffer = b""
+        self.__lines: deque[tuple[bytes, bool]] = deque()
+        self.__eof = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> tuple[bytes, bool]:
+        line = self.readLine()
+        if line is None:
+            raise StopIteration
+        return line
+
+    def readLine(self) -> tuple[bytes, bool] | None:
+        """
+        Returns the next non-empty line and wether it ended with a newline (False means it was a \\r-ended progress redraw).
+        Will return None once the process output has been exhausted.
+        """
+        while not self.__lines:
+            if self.__eof:
+                return None
+            self.__readChunk()
+        return self.__lines.popleft()
+
+    def __readChunk(self) -> None:
+        chunk = self.__read(self.__chunkSize)
+        data = self.__buffer + chunk
+        if not chunk:
+            self.__eof = True
+            self.__buffer = b""
+            data = data.rstrip(b"\r")
+            if data:
+                self.__lines.append((data, True))
+            return
+
+        heldCarriageReturn = data.endswith(b"\r")
+        if heldCarriageReturn:  # A "\r" at the end of the chunk might be the first half of a "\r\n", so wait for the next chunk
+            data = data[:-1]
+        start = 0
+        for separator in self.LINE_SEPARATORS.finditer(data):
+            end = separator.start()
+            if end > start:
+                self.__lines.append((data[start:end], separator.group() != b"\r"))
+            start = separator.end()
+        self.__buffer = data[start:] + (b"\r" if heldCarriageReturn else b"")
+
+
+class ProcessOutput():
+    """
+    Collects the output of a process without polling it: the pipe is read in blocking chunks, decoded incrementally and split on newlines.
+    Iterating over the object yields each decoded line (without the line terminator) as soon as it is available. Once the pipe has been
+    drained, the process is waited for, and the ReturnCode, BytesRead and WallTime attributes are set.
+    Output still buffered when the process exits is always returned.
+    """
+    CHUNK_SIZE: int = 65536
+
+    Process: subprocess.Popen = None
+    Lines: list[str] = []
+    ReturnCode: int = None
+    BytesRead: int = 0
+    WallTime: float = 0.0
+    Finished: bool = False
+
+    def __init__(self, p: subprocess.Popen, encoding: str = "utf-8", errors: str = "ignore"):
+        self.Process = p
+        self.Lines = []
+        self.ReturnCode = None
+        self.BytesRead = 0
+        self.WallTime = 0.0
+        self.Finished = False
+        self.__encoding = encoding
+        self.__errors = errors
+        self.__startTime = time.time()
+
+    def __iter__(self):
+        if self.Finished:
+            yield from self.Lines
+            return
+        stdout: IO[bytes] = self.Process.stdout
+        read = getattr(stdout, "read1", stdout.read)
+        decoder = codecs.getincrementaldecoder(self.__encoding)(errors=self.__errors)
+        pending = ""
+        while True:
+            chunk = read(self.CHUNK_SIZE)
+            self.BytesRead += len(chunk)
+            text = pending + decoder.decode(chunk, final=not chunk)
+            if chunk:
+                lines = text.split("\n")
+                pending = lines.pop()  # The last piece may be an incomplete line
+            else:
+                lines = [text] if text else []
+            for line in lines:
+                if line.endswith("\r"):
+                    line = line[:-1]
+                self.Lines.append(line)
+                yield line
+            if not chunk:
+                break
+        self.ReturnCode = self.Process.wait()
+        self.WallTime = time.time() - self.__startTime
+        self.Finished = True
+
+    def readAll(self) -> list[str]:
+        """
+        Blocks until the process has finished, and returns all the lines it has printed.
+        """
+        for _line in self:
+            pass
+        return self.Lines
+
+    def __str__(self) -> str:
+        return f"<ProcessOutput: {self.Process.args}; ReturnCode={self.ReturnCode}; BytesRead={self.BytesRead}; WallTime={self.WallTime:.3f}s>"
 
 
 class KillableThread(Thread):
@@ -717,8 +824,9 @@ print(f"🔵 It took {time.time()-t0} to load all language files")
 
 
 Thread(target=checkQueue, daemon=True).start()
-Thread(target=foregroundWindowThread, daemon=True,
-       name="Tools: get foreground window").start()
+if win32gui is not None:
+    Thread(target=foregroundWindowThread, daemon=True,
+           name="Tools: get foreground window").start()
 
 
 if __name__ == "__main__":
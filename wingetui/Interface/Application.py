@@ -20,6 +20,7 @@ from urllib.request import urlopen
 
 import wingetui.Core.Globals as Globals
 import wingetui.Interface.BackendApi as BackendApi
+from wingetui.Core.Executor import Executor, POOL_IO, POOL_SUBPROCESS, PRIORITY_HIGH, PRIORITY_LOW
 from wingetui.Core.Tools import *
 from wingetui.Core.Tools import _
 from wingetui.ExternalLibraries.BlurWindow import ExtendFrameIntoClientArea, GlobalBlur
@@ -154,10 +155,10 @@ class WingetUIApplication(QApplication):
                 self.loadStatus += 1
             self.finishedPreloadingStep.connect(increaseStep)
             if getSettings("ShownWelcomeWizard") is False or "--welcomewizard" in sys.argv or "--welcome" in sys.argv:
-                self.askAboutPackageManagers(onclose=lambda: (Thread(target=self.loadPreUIComponents, daemon=True).start(), Thread(target=lambda: (time.sleep(15), self.callInMain.emit(skipButton.show)), daemon=True).start()))
+                self.askAboutPackageManagers(onclose=lambda: (Executor.submit(POOL_IO, self.loadPreUIComponents, priority=PRIORITY_HIGH, name="Loading the pre-UI components"), Executor.schedule(15, self.callInMain.emit, skipButton.show, name="Showing the skip button")))
             else:
-                Thread(target=self.loadPreUIComponents, daemon=True).start()
-                Thread(target=lambda: (time.sleep(15), self.callInMain.emit(skipButton.show)), daemon=True).start()
+                Executor.submit(POOL_IO, self.loadPreUIComponents, priority=PRIORITY_HIGH, name="Loading the pre-UI components")
+                Executor.schedule(15, self.callInMain.emit, skipButton.show, name="Showing the skip button")
                 self.loadingText.setText(_("Checking for other running instances..."))
         except Exception as e:
             raise e
@@ -171,15 +172,15 @@ class WingetUIApplication(QApplication):
         try:
             self.loadStatus = 0
 
-            # Preparation threads
-            Thread(target=self.checkForRunningInstances, daemon=True).start()
-            Thread(target=self.downloadPackagesMetadata, daemon=True).start()
-            if not getSettings("DisableApi"):
+            # Preparation tasks
+            Executor.submit(POOL_IO, self.checkForRunningInstances, priority=PRIORITY_HIGH, name="Checking for running instances")
+            Executor.submit(POOL_IO, self.downloadPackagesMetadata, priority=PRIORITY_HIGH, name="Downloading the package metadata")
+            if not getSettings("DisableApi"):  # The API server runs for as long as WingetUI does, so it gets a thread of its own
                 Thread(target=BackendApi.runBackendApi, args=(self.showProgram,), daemon=True).start()
 
             for manager in PackageManagersList:
                 if manager.isEnabled():
-                    Thread(target=manager.detectManager, args=(self.finishedPreloadingStep,), daemon=True).start()
+                    Executor.submit(POOL_SUBPROCESS, manager.detectManager, self.finishedPreloadingStep, priority=PRIORITY_HIGH, name=f"Detecting {manager.NAME}")
                 else:
                     self.loadStatus += 1
                     Globals.componentStatus[f"{manager.NAME}Found"] = False
@@ -188,17 +189,17 @@ class WingetUIApplication(QApplication):
             if not getSettings("DisableUpdateIndexes"):
                 for manager in PackageManagersList:
                     if manager.isEnabled():
-                        Thread(target=manager.updateSources, args=(self.finishedPreloadingStep,), daemon=True).start()
+                        Executor.submit(POOL_SUBPROCESS, manager.updateSources, self.finishedPreloadingStep, name=f"Updating the {manager.NAME} sources")
                     else:
                         self.loadStatus += 1
             else:
                 self.loadStatus += len(PackageManagersList)
 
-            Thread(target=self.detectSudo, daemon=True).start()
-            Thread(target=self.getAUMID, daemon=True).start()
-            Thread(target=self.removeScoopCache, daemon=True).start()
+            Executor.submit(POOL_SUBPROCESS, self.detectSudo, priority=PRIORITY_HIGH, name="Detecting sudo")
+            Executor.submit(POOL_SUBPROCESS, self.getAUMID, priority=PRIORITY_HIGH, name="Loading the AUMID")
+            Executor.submit(POOL_SUBPROCESS, self.removeScoopCache, priority=PRIORITY_LOW, name="Removing the Scoop cache")
 
-            # Daemon threads
+            # Daemon threads, which run for as long as WingetUI does
             Thread(target=self.instanceThread, daemon=True).start()
             Thread(target=self.updateIfPossible, daemon=True).start()
 
@@ -505,6 +505,7 @@ class PushButtonWithAction(QPushButton):
 class CustomComboBox(QComboBox):
     disableScrolling = False
     registeredThemeEvent = False
+    popupAboutToShow = Signal()
 
     def __init__(self, parent=None) -> None:
         super().__init__(parent)
@@ -535,6 +536,10 @@ class CustomComboBox(QComboBox):
         else:
             return super().wheelEvent(e)
 
+    def showPopup(self) -> None:
+        self.popupAboutToShow.emit()
+        return super().showPopup()
+
     def dg(self):
         pass
 
@@ -9,12 +9,12 @@ if __name__ == "__main__":
 import subprocess
 import time
 import os
-from threading import Thread
 from PySide6.QtCore import *
 from PySide6.QtGui import *
 from PySide6.QtWidgets import *
 
 import wingetui.Core.Globals as Globals
+from wingetui.Core.Executor import Executor, ScheduledTask, POOL_IO, POOL_SUBPROCESS, PRIORITY_HIGH
 from wingetui.Interface.CustomWidgets.SpecificWidgets import *
 from wingetui.Interface.Tools import *
 from wingetui.Interface.Tools import _
@@ -29,6 +29,8 @@ class PackageInstallerWidget(QWidget):
     counterSignal = Signal(int)
     callInMain = Signal(object)
     changeBarOrientation = Signal()
+    QUEUE_CHECK_INTERVAL: float = 0.2  # In seconds, see startInstallation
+    FAR_QUEUE_CHECK_INTERVAL: float = 2
 
     def __init__(self, package: Package, options: InstallationOptions):
         super().__init__()
@@ -117,9 +119,9 @@ class PackageInstallerWidget(QWidget):
         if self.Package.PackageItem:
             self.Package.PackageItem.setTag(PackageItem.Tag.Pending)
 
-        self.waitThread = KillableThread(target=self.startInstallation, daemon=True)
-        self.waitThread.start()
-        Thread(target=self.loadIconThread, daemon=True, name=f"Installer: loading icon for {package}").start()
+        self.queuePosition = -1
+        self.waitTask: ScheduledTask = Executor.schedule(0, self.startInstallation, name=f"Installer: waiting to install {package.Id}")
+        Executor.submit(POOL_IO, self.loadIconThread, name=f"Installer: loading icon for {package}")
         print(f"🟢 Waiting for install permission... title={self.Package.Name}, id={self.Package.Id}, installId={self.installId}")
         print("🔵 Given package:", package)
         print("🔵 Installation options:", options)
@@ -127,17 +129,23 @@ class PackageInstallerWidget(QWidget):
         ApplyMica(self.liveOutputWindowWindow.winId(), MicaTheme.DARK)
 
     def startInstallation(self) -> None:
-        last_position_count = -1
-        while self.installId != Globals.current_program and not getSettings("AllowParallelInstalls"):
-            time.sleep(0.2)
-            append = " "
-            if last_position_count != Globals.pending_programs.index(self.installId):
-                last_position_count = Globals.pending_programs.index(self.installId)
-                try:
-                    append += _("(Number {0} in the queue)").format(last_position_count)
-                except ValueError:
-                    print(f"🔴 Package {self.Package.Id} not in Globals.pending_programs")
-                self.addInfoLine.emit((_("Waiting for other installations to finish...") + append, False))
+        """
+        Starts the installation if it is its turn, otherwise checks again later on the scheduler thread of the executor, so the
+        installations waiting on the queue do not keep a thread each. The ones far from the front of the queue are checked less often.
+        """
+        if self.canceled:
+            return
+        if self.installId != Globals.current_program and not getSettings("AllowParallelInstalls"):
+            try:
+                position = Globals.pending_programs.index(self.installId)
+            except ValueError:
+                print(f"🔴 Package {self.Package.Id} not in Globals.pending_programs")
+                position = self.queuePosition
+            if position != self.queuePosition:
+                self.queuePosition = position
+                self.addInfoLine.emit((_("Waiting for other installations to finish...") + " " + _("(Number {0} in the queue)").format(position), False))
+            self.waitTask = Executor.schedule(self.QUEUE_CHECK_INTERVAL if position < 10 else self.FAR_QUEUE_CHECK_INTERVAL, self.startInstallation, name=f"Installer: waiting to install {self.Package.Id}")
+            return
 
         print("🟢 Have permission to install, starting installation threads...")
         self.callInMain.emit(self.runInstallation)
@@ -203,7 +211,7 @@ class PackageInstallerWidget(QWidget):
         self.canceled = True
         removeProgram(self.installId)
         try:
-            self.waitThread.kill()
+            self.waitTask.cancel()
         except Exception:
             pass
         try:
@@ -234,7 +242,7 @@ class PackageInstallerWidget(QWidget):
         self.cancelButton.setEnabled(True)
         removeProgram(self.installId)
         try:
-            self.waitThread.kill()
+            self.waitTask.cancel()
         except Exception:
             pass
         try:
@@ -348,10 +356,7 @@ class PackageInstallerWidget(QWidget):
             a.valueChanged.connect(lambda v: updateOp(v))
             a.finished.connect(self.heightAnim)
 
-            def timerFunc():
-                time.sleep(3)
-                self.callInMain.emit(a.start)
-            Thread(target=timerFunc, daemon=True).start()
+            Executor.schedule(3, self.callInMain.emit, a.start, name="Installer widget autohide")
         else:
             print("🟡 Autohide disabled!")
 
@@ -513,7 +518,7 @@ class PackageUninstallerWidget(PackageInstallerWidget):
         self.canceled = True
         removeProgram(self.installId)
         try:
-            self.waitThread.kill()
+            self.waitTask.cancel()
         except Exception:
             pass
         try:
@@ -550,7 +555,7 @@ class PackageUninstallerWidget(PackageInstallerWidget):
             self.cancelButton.setEnabled(True)
             removeProgram(self.installId)
             try:
-                self.waitThread.kill()
+                self.waitTask.cancel()
             except Exception:
                 pass
             try:
@@ -740,7 +745,7 @@ class SourceManagerWidget(QWidget):
         self.LoadingIndicator.show()
         self.TreeWidget.label.show()
         self.TreeWidget.label.setText(_("Loading..."))
-        Thread(target=self.WaitForSources, name=f"Loading {self.Manager.NAME} sources").start()
+        Executor.submit(POOL_SUBPROCESS, self.WaitForSources, priority=PRIORITY_HIGH, name=f"Loading {self.Manager.NAME} sources")
 
     def WaitForSources(self):
         self.IsLoading = True
@@ -11,6 +11,7 @@ from PySide6.QtGui import *
 from PySide6.QtWidgets import *
 from win32mica import *
 
+from wingetui.Core.Executor import Executor
 from wingetui.Interface.CustomWidgets.GenericWidgets import *
 from wingetui.Interface.Tools import *
 from wingetui.Interface.Tools import _
@@ -128,9 +129,7 @@ class CollapsableSection(QWidget):
         self.callInMain.emit(lambda: self.compressibleWidget.show())
         self.callInMain.emit(lambda: self.setChildFixedHeight(self.compressibleWidget.sizeHint().height()))
         self.callInMain.emit(self.newHideAnim.start)
-        time.sleep(0.2)
-        self.callInMain.emit(lambda: self.compressibleWidget.move((-1500), (-1500)))
-        self.callInMain.emit(lambda: self.setChildFixedHeight(self.baseHeight))
+        Executor.schedule(0.2, self.callInMain.emit, lambda: (self.compressibleWidget.move((-1500), (-1500)), self.setChildFixedHeight(self.baseHeight)), name="Section collapse")
 
     def showChildren(self) -> None:
         self.callInMain.emit(lambda: self.compressibleWidget.move(0, (self.baseHeight - 20)))
@@ -150,15 +149,15 @@ class CollapsableSection(QWidget):
             self.childrenVisible = False
             self.invertNotAnimated()
             self.showHideButton.setIcon(QIcon(getMedia("collapse")))
-            Thread(target=lambda: (time.sleep(0.2), self.HoverableButton.setStyleSheet("border-bottom-left-radius: 8px;border-bottom-right-radius: 8px;"), self.bg70.setStyleSheet("border-bottom-left-radius: 8px;border-bottom-right-radius: 8px;")), daemon=True).start()
-            Thread(target=self.hideChildren).start()
+            Executor.schedule(0.2, self.callInMain.emit, lambda: (self.HoverableButton.setStyleSheet("border-bottom-left-radius: 8px;border-bottom-right-radius: 8px;"), self.bg70.setStyleSheet("border-bottom-left-radius: 8px;border-bottom-right-radius: 8px;")), name="Section collapse")
+            self.hideChildren()
         else:
             self.showHideButton.setIcon(QIcon(getMedia("expand")))
             self.HoverableButton.setStyleSheet("border-bottom-left-radius: 0;border-bottom-right-radius: 0;")
             self.bg70.setStyleSheet("border-bottom-left-radius: 0;border-bottom-right-radius: 0;")
             self.invertNotAnimated()
             self.childrenVisible = True
-            Thread(target=self.showChildren).start()
+            self.showChildren()
 
     def get6px(self, i: int) -> int:
         return round(i * self.screen().devicePixelRatio())
@@ -259,9 +258,7 @@ class SmallCollapsableSection(CollapsableSection):
         self.callInMain.emit(lambda: self.compressibleWidget.show())
         self.callInMain.emit(lambda: self.setChildFixedHeight(self.compressibleWidget.sizeHint().height()))
         self.callInMain.emit(self.newHideAnim.start)
-        time.sleep(0.2)
-        self.callInMain.emit(lambda: self.compressibleWidget.move(-1500, -1500))
-        self.callInMain.emit(lambda: self.setChildFixedHeight(40))
+        Executor.schedule(0.2, self.callInMain.emit, lambda: (self.compressibleWidget.move(-1500, -1500), self.setChildFixedHeight(40)), name="Section collapse")
 
     def showChildren(self) -> None:
         self.callInMain.emit(lambda: self.compressibleWidget.move(0, 20))
@@ -281,15 +278,15 @@ class SmallCollapsableSection(CollapsableSection):
             self.childrenVisible = False
             self.invertNotAnimated()
             self.showHideButton.setIcon(QIcon(getMedia("collapse")))
-            Thread(target=lambda: (time.sleep(0.2), self.HoverableButton.setStyleSheet("border-bottom-left-radius: 8px;border-bottom-right-radius: 8px;"), self.bg70.setStyleSheet("border-bottom-left-radius: 8px;border-bottom-right-radius: 8px;")), daemon=True).start()
-            Thread(target=self.hideChildren).start()
+            Executor.schedule(0.2, self.callInMain.emit, lambda: (self.HoverableButton.setStyleSheet("border-bottom-left-radius: 8px;border-bottom-right-radius: 8px;"), self.bg70.setStyleSheet("border-bottom-left-radius: 8px;border-bottom-right-radius: 8px;")), name="Section collapse")
+            self.hideChildren()
         else:
             self.showHideButton.setIcon(QIcon(getMedia("expand")))
             self.HoverableButton.setStyleSheet("border-bottom-left-radius: 0;border-bottom-right-radius: 0;")
             self.bg70.setStyleSheet("border-bottom-left-radius: 0;border-bottom-right-radius: 0;")
             self.invertNotAnimated()
             self.childrenVisible = True
-            Thread(target=self.showChildren).start()
+            self.showChildren()
 
     def get6px(self, i: int) -> int:
         return round(i * self.screen().devicePixelRatio())
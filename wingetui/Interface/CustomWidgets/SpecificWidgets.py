@@ -13,6 +13,7 @@ from PySide6.QtGui import *
 from PySide6.QtWidgets import *
 from win32mica import *
 
+from wingetui.Core.Executor import Executor, POOL_CPU, POOL_SUBPROCESS, PRIORITY_LOW
 from wingetui.Interface.CustomWidgets.SectionWidgets import *
 from wingetui.Interface.Tools import *
 from wingetui.Interface.Tools import _
@@ -250,10 +251,11 @@ class CustomMessageBox(QMainWindow):
                 Globals.app.beep()
             else:
                 def waitNShow():
-                    while not self.parent().window().isVisible():
-                        time.sleep(0.5)
-                    self.callInMain.emit(lambda: (self.show(), Globals.app.beep()))
-                Thread(target=waitNShow, daemon=True, name="Error message waiting to be shown").start()
+                    if not self.parent().window().isVisible():
+                        Executor.schedule(0.5, waitNShow, name="Error message waiting to be shown")
+                    else:
+                        self.callInMain.emit(lambda: (self.show(), Globals.app.beep()))
+                waitNShow()
         else:
             self.show()
             Globals.app.beep()
@@ -631,6 +633,7 @@ class PackageTreeWidget(TreeWidget):
 class SoftwareSection(QWidget):
 
     addProgram = Signal(object)
+    addPrograms = Signal(list, object)
     finishLoading = Signal()
     askForScoopInstall = Signal(str)
     setLoadBarValue = Signal(str)
@@ -653,6 +656,13 @@ class SoftwareSection(QWidget):
     nextItemToShow: int = 0
     OnThemeChange = Signal()
     AllItemsSelected: bool = False
+    LoadingToken: CancellationToken = None
+    LoadingStartTime: float = 0.0
+    TimeToFirstRow: float = None
+
+    STREAMING_BATCH_SIZE: int = 25
+    STREAMING_BATCH_INTERVAL: float = 0.2
+    PROBE_CHECK_INTERVAL: float = 1  # In seconds, see loadPackagesWhenAllowed
 
     FilterItemForManager = {}
 
@@ -984,6 +994,7 @@ class SoftwareSection(QWidget):
         self.infobox.hide()
 
         self.addProgram.connect(self.addItem)
+        self.addPrograms.connect(self.addItems)
 
         self.finishLoading.connect(self.finishLoadingIfNeeded)
         self.infobox.addProgram.connect(self.addInstallation)
@@ -1037,6 +1048,46 @@ class SoftwareSection(QWidget):
     def addItem(self, name: str, id: str, version: str, store: str) -> None:
         raise NotImplementedError("This function requires being reimplemented")
 
+    def addItems(self, packages: list[Package], token: CancellationToken) -> None:
+        """
+        Adds a batch of packages sent by streamPackages. The first rows are shown right away, without waiting for the
+        managers to finish, so the time to the first row does not depend on how many packages are being loaded.
+        """
+        if token.isCancelled():
+            return  # The batch belongs to a load that has been replaced while it was queued
+        for package in packages:
+            self.addItem(package)
+        if len(self.shownItems) < 50:
+            self.addItemsToTreeWidget(itemsToAdd=50 - len(self.shownItems))
+        if self.shownItems and self.TimeToFirstRow is None:
+            self.TimeToFirstRow = time.time() - self.LoadingStartTime
+            self.packageList.label.hide()
+            print(f"🔵 {self.sectionName}: first row shown {self.TimeToFirstRow:.3f}s after the load started")
+
+    def streamPackages(self, packages: Iterator[Package], token: CancellationToken) -> bool:
+        """
+        Sends the packages yielded by one of the iter* methods of a manager to the interface in small batches, as they get parsed.
+        The first package is sent alone, and later batches are sent every STREAMING_BATCH_SIZE packages or STREAMING_BATCH_INTERVAL seconds.
+        Returns False if the token got cancelled, in which case the rest of the packages are dropped.
+        """
+        batch: list[Package] = []
+        sentFirst = False
+        lastSent = time.time()
+        for package in packages:
+            if token.isCancelled():
+                break
+            batch.append(package)
+            if not sentFirst or len(batch) >= self.STREAMING_BATCH_SIZE or time.time() - lastSent >= self.STREAMING_BATCH_INTERVAL:
+                self.addPrograms.emit(batch, token)
+                batch = []
+                sentFirst = True
+                lastSent = time.time()
+        if token.isCancelled():
+            return False
+        if batch:
+            self.addPrograms.emit(batch, token)
+        return True
+
     def addItemsToTreeWidget(self, reset: bool = False, itemsToAdd: int = 50):
         self.setUpdatesEnabled(False)
         if reset:
@@ -1068,7 +1119,7 @@ class SoftwareSection(QWidget):
 
     def filter(self) -> None:
         print(f"🟢 Searching for string \"{self.query.text()}\"")
-        Thread(target=lambda: (time.sleep(0.1), self.callInMain.emit(partial(self.finishFiltering, self.query.text())))).start()
+        Executor.schedule(0.1, lambda: self.callInMain.emit(partial(self.finishFiltering, self.query.text())), name=f"{self.sectionName} filter")
 
     def containsQuery(self, item: 'PackageItem', querytext: str) -> bool:
         packageName = item.Package.Name
@@ -1161,6 +1212,12 @@ class SoftwareSection(QWidget):
         for manager in PackageManagersList:
             item: QTreeWidgetItem = self.FilterItemForManager[manager]
             item.setText(2, str(managerCount[manager]))
+            if manager.Health.isDegraded():
+                item.setText(1, f"⚠️ {manager.NAME}")
+                item.setToolTip(1, manager.Health.getStatusText())
+            else:
+                item.setText(1, manager.NAME)
+                item.setToolTip(1, "")
             item.setHidden(not manager.isEnabled())
             HostWidgetHeight += 34 if manager.isEnabled() else 0
             item.setDisabled(managerCount[manager] == 0)
@@ -1177,7 +1234,7 @@ class SoftwareSection(QWidget):
         self.infobox.show()
         self.infobox.reposition()
 
-    def loadPackages(self, manager) -> None:
+    def loadPackages(self, manager: PackageManagerModule, token: CancellationToken) -> None:
         raise NotImplementedError("This function requires being reimplemented")
 
     def exportSelectedPackages(self, all: bool = False) -> None:
@@ -1216,15 +1273,36 @@ class SoftwareSection(QWidget):
         self.packageList.clear()
         self.query.setText("")
         self.packageList.label.setText(self.countLabel.text())
+        if self.LoadingToken is not None:
+            self.LoadingToken.cancel()  # A forced reload: whatever the previous load is still running would be dropped
+        self.LoadingToken = CancellationToken()
+        self.LoadingStartTime = time.time()
+        self.TimeToFirstRow = None
 
         for manager in self.PackageManagers:
             if manager.isEnabled():
-                Thread(target=self.loadPackages, args=(manager,), daemon=True, name=f"{manager.NAME} available packages loader").start()
+                self.loadPackagesWhenAllowed(manager, self.LoadingToken)
             else:
                 self.PackagesLoaded[manager] = True
 
         self.finishLoadingIfNeeded()
 
+    def loadPackagesWhenAllowed(self, manager: PackageManagerModule, token: CancellationToken) -> None:
+        """
+        Loads the packages of the given manager unless its circuit breaker is open. When another section is probing the manager,
+        the probe is waited for on the scheduler, and the packages are loaded once it reports back that the manager works.
+        """
+        if token.isCancelled():
+            return
+        if manager.Health.allowRequest():
+            Executor.submit(POOL_SUBPROCESS, self.loadPackages, manager, token, name=f"{manager.NAME} available packages loader")
+        elif manager.Health.isOpen():
+            print(f"🟠 Skipping {manager.NAME}: {manager.Health.getStatusText()}")
+            self.PackagesLoaded[manager] = True
+            self.finishLoading.emit()
+        else:
+            Executor.schedule(self.PROBE_CHECK_INTERVAL, self.loadPackagesWhenAllowed, manager, token, name=f"{manager.NAME} waiting for its probe")
+
     def addInstallation(self, p) -> None:
         Globals.installersWidget.addItem(p)
 
@@ -1955,7 +2033,7 @@ class UpgradablePackageItem(PackageItem):
             else:
                 self.setText(5, _("Loading..."))
                 print(f"🟡 Package {self.Package.Id} found in the updates section but not in the installed one, might be a temporal issue, retrying in 3 seconds...")
-                Thread(target=self.updateStore).start()
+                Executor.schedule(3, self.updateStore, pool=POOL_CPU, priority=PRIORITY_LOW, name=f"Scoop bucket lookup for {self.Package.Id}")
         else:
             self.setText(5, self.Package.Source)
 
@@ -1969,7 +2047,6 @@ class UpgradablePackageItem(PackageItem):
         """
         Scoop does not report buckets when checking for updates. Therefore, this function handles this.
         """
-        time.sleep(3)
         installedPackage = self.Package.getInstalledPackage()
         if installedPackage:
             if self.Package.Version == installedPackage.Version:
@@ -14,9 +14,9 @@ import win32mica
 from PySide6.QtCore import *
 from PySide6.QtGui import *
 from PySide6.QtWidgets import *
-from threading import Thread
 
 import wingetui.Core.Globals as Globals
+from wingetui.Core.Executor import Executor, POOL_IO, POOL_SUBPROCESS, PRIORITY_LOW
 from wingetui.Core.Data.Contributors import contributorsInfo
 from wingetui.Core.Data.Translations import languageCredits, untranslatedPercentage
 from wingetui.Core.Data.Licenses import licenses, licenseUrls
@@ -231,8 +231,7 @@ class AboutSection(SmoothScrollArea):
         print("🟢 About tab loaded!")
 
     def showEvent(self, event: QShowEvent) -> None:
-        Thread(target=self.announcements.loadAnnouncements,
-               daemon=True, name="Settings: Announce loader").start()
+        Executor.submit(POOL_IO, self.announcements.loadAnnouncements, priority=PRIORITY_LOW, name="Settings: Announce loader")
         return super().showEvent(event)
 
 
@@ -801,7 +800,7 @@ class SettingsSection(SmoothScrollArea):
         Scoop_Remove.clicked.connect(lambda: (setSettings("DisableScoop", True), os.startfile(os.path.join(realpath, "resources/uninstall_scoop.cmd"))))
 
         Scoop_ResetAppCache = SectionButton(_("Reset Scoop's global app cache"), _("Reset"))
-        Scoop_ResetAppCache.clicked.connect(lambda: Thread(target=lambda: subprocess.Popen([GSUDO_EXECUTABLE, os.path.join(realpath, "resources", "scoop_cleanup.cmd")]), daemon=True).start())
+        Scoop_ResetAppCache.clicked.connect(lambda: Executor.submit(POOL_SUBPROCESS, subprocess.Popen, [GSUDO_EXECUTABLE, os.path.join(realpath, "resources", "scoop_cleanup.cmd")], name="Resetting the Scoop app cache"))
 
         self.ExtraManagerWidgets[Scoop] = [
             Scoop_Install,
@@ -867,8 +866,7 @@ class SettingsSection(SmoothScrollArea):
         print("🟢 Settings tab loaded!")
 
     def showEvent(self, event: QShowEvent) -> None:
-        Thread(target=self.announcements.loadAnnouncements,
-               daemon=True, name="Settings: Announce loader").start()
+        Executor.submit(POOL_IO, self.announcements.loadAnnouncements, priority=PRIORITY_LOW, name="Settings: Announce loader")
         return super().showEvent(event)
 
     def inform(self, text: str) -> None:
@@ -15,6 +15,7 @@ from PySide6.QtGui import *
 from PySide6.QtWidgets import *
 
 import wingetui.Core.Globals as Globals
+from wingetui.Core.Executor import Executor, POOL_IO, PRIORITY_HIGH
 from wingetui.Core.Tools import *
 from wingetui.Core.Tools import _
 from wingetui.Interface.CustomWidgets.InstallerWidgets import *
@@ -353,7 +354,7 @@ class RootWindow(QMainWindow):
 
     def askRestart(self):
         e = CustomMessageBox(self)
-        Thread(target=self.askRestart_threaded, args=(e,)).start()
+        Executor.submit(POOL_IO, self.askRestart_threaded, e, priority=PRIORITY_HIGH, name="Asking for a restart")
 
     def askRestart_threaded(self, e: CustomMessageBox):
         questionData = {
@@ -479,7 +480,7 @@ class RootWindow(QMainWindow):
         Globals.lastFocusedWindow = 0
 
     def focusOutEvent(self, event: QEvent) -> None:
-        Thread(target=lambda: (time.sleep(0.3), self.loseFocusUpdate())).start()
+        Executor.schedule(0.3, self.loseFocusUpdate, name="Focus loss update")
         return super().focusOutEvent(event)
 
     def mouseReleaseEvent(self, event: QMouseEvent) -> None:
@@ -13,16 +13,18 @@ import time
 from PySide6.QtCore import *
 from PySide6.QtGui import *
 from PySide6.QtWidgets import *
-from threading import Thread
 
 import wingetui.Core.Globals as Globals
 import wingetui.Interface.BackendApi as BackendApi
+from wingetui.Core.Executor import Executor, POOL_IO, POOL_SUBPROCESS, PRIORITY_HIGH, PRIORITY_LOW
 from wingetui.Core.Tools import *
 from wingetui.Core.Tools import _
 from wingetui.Interface.CustomWidgets.SpecificWidgets import *
 from wingetui.Interface.CustomWidgets.InstallerWidgets import *
 from wingetui.Interface.GenericSections import *
+from wingetui.PackageEngine.Cancellation import CancellationToken
 from wingetui.PackageEngine.Classes import PackageManagerModule
+from wingetui.PackageEngine.QualityOfService import QoS, QOS_BACKGROUND, QOS_INTERACTIVE
 
 
 class DiscoverSoftwareSection(SoftwareSection):
@@ -40,6 +42,7 @@ class DiscoverSoftwareSection(SoftwareSection):
     ShouldHideGuideArrow: bool = False
 
     runningThreads = 0
+    DynamicLoadingToken: CancellationToken = None
 
     def __init__(self, parent=None):
         super().__init__(parent=parent, sectionName="Discover")
@@ -327,7 +330,7 @@ class DiscoverSoftwareSection(SoftwareSection):
             self.query.setText(id)
             self.finishFiltering(self.query.text())
             self.packageList.setEnabled(False)
-            Thread(target=self.loadSharedId, args=(argument,), daemon=True).start()
+            self.loadSharedId(argument)
         else:
             self.packageList.setEnabled(True)
             self.err = CustomMessageBox(self.window())
@@ -342,9 +345,10 @@ class DiscoverSoftwareSection(SoftwareSection):
             self.err.showErrorMessage(errorData, showNotification=False)
 
     def loadSharedId(self, argument: str):
-        while self.isLoadingDynamicPackages():
-            time.sleep(0.1)
-        self.callInMain.emit(lambda: self.loadShared(argument, second_round=True))
+        if self.isLoadingDynamicPackages():
+            Executor.schedule(0.1, self.loadSharedId, argument, name="Waiting for the shared package")  # Checked again on the scheduler thread, without sleeping on a thread of its own
+        else:
+            self.callInMain.emit(lambda: self.loadShared(argument, second_round=True))
 
     def installSelectedPackageItems(self, admin: bool = False, interactive: bool = False, skiphash: bool = False) -> None:
         for package in self.packageItems:
@@ -361,11 +365,10 @@ class DiscoverSoftwareSection(SoftwareSection):
         print(f"🟢 Searching for string \"{self.query.text()}\"")
 
         def waitAndFilter(query: str):
-            time.sleep(0.5)
             if query == self.query.text():
                 self.callInMain.emit(partial(self.finishFiltering, query))
 
-        Thread(target=lambda: waitAndFilter(self.query.text())).start()
+        Executor.schedule(0.5, waitAndFilter, self.query.text(), name="Discover filter")
 
     def finishFiltering(self, text: str) -> None:
         if len(text) >= 2:
@@ -467,20 +470,25 @@ class DiscoverSoftwareSection(SoftwareSection):
             options = InstallationOptions(package)
         self.addInstallation(PackageInstallerWidget(package, options))
 
-    def loadPackages(self, manager: PackageManagerModule) -> None:
+    def loadPackages(self, manager: PackageManagerModule, token: CancellationToken) -> None:
         self.PackagesLoaded[manager] = True
         self.finishLoading.emit()
 
-    def loadDynamicPackages(self, query: str, manager: PackageManagerModule) -> None:
-        self.runningThreads += 1
-        packages = manager.getPackagesForQuery(query)
-        for package in packages:
-            if package.UniqueId in self.UniqueIdPackageReference and package.Source == self.UniqueIdPackageReference[package.UniqueId].Source and package.Version == self.UniqueIdPackageReference[package.UniqueId].Version:
-                print(f"🟡 Not showing found result {package} because it is already present")
-            elif query != self.query.text():
-                print(f"🟡 Not showing found result {package} because the query changed")  # thanks copilot :)
-            else:
-                self.addProgram.emit(package)
+    def loadDynamicPackages(self, query: str, manager: PackageManagerModule, token: CancellationToken) -> None:
+        def getNewPackages() -> Iterator[Package]:
+            for package in manager.iterPackagesForQuery(query, token):
+                if package.UniqueId in self.UniqueIdPackageReference and package.Source == self.UniqueIdPackageReference[package.UniqueId].Source and package.Version == self.UniqueIdPackageReference[package.UniqueId].Version:
+                    print(f"🟡 Not showing found result {package} because it is already present")
+                elif query != self.query.text():
+                    print(f"🟡 Not showing found result {package} because the query changed")  # thanks copilot :)
+                else:
+                    yield package
+
+        if not self.streamPackages(getNewPackages(), token):
+            print(f"🟡 Dropping the {manager.NAME} results for query {query} because a newer query was started")
+            self.runningThreads -= 1
+            self.finishDynamicLoading.emit()
+            return
         self.DynamicPackagesLoaded[manager] = True
         self.runningThreads -= 1
         self.finishDynamicLoading.emit()
@@ -495,13 +503,19 @@ class DiscoverSoftwareSection(SoftwareSection):
 
     def startLoadingDyamicPackages(self, query: str, force: bool = False) -> None:
         print(f"🔵 Loading dynamic packages for query {query}")
+        if self.DynamicLoadingToken is not None:
+            self.DynamicLoadingToken.cancel()  # The searches for the previous query are killed, their results would be dropped anyway
+        self.DynamicLoadingToken = CancellationToken()
+        self.LoadingStartTime = time.time()
+        self.TimeToFirstRow = None
         for manager in self.DynaimcPackageManagers:
             self.DynamicPackagesLoaded[manager] = False
         self.LoadingIndicator.show()
 
         for manager in self.DynaimcPackageManagers:
-            if manager.isEnabled():
-                Thread(target=self.loadDynamicPackages, args=(query, manager), daemon=True, name=f"{manager.NAME} dyamic packages loader").start()
+            if manager.isEnabled() and not manager.Health.isOpen():
+                self.runningThreads += 1  # Counted when queued, so a search waiting for a free worker still shows as loading
+                Executor.submit(POOL_SUBPROCESS, self.loadDynamicPackages, query, manager, self.DynamicLoadingToken, priority=PRIORITY_HIGH, name=f"{manager.NAME} dyamic packages loader")
             else:
                 self.PackagesLoaded[manager] = True
 
@@ -531,6 +545,8 @@ class UpdateSoftwareSection(SoftwareSection):
     IdPackageReference: dict[str:UpgradablePackage] = {}
     UpdatesNotification: ToastNotification = None
     AllItemsSelected = True
+    IsAutomaticCheck: bool = False
+    LoadingQoS: str = QOS_INTERACTIVE
 
     def __init__(self, parent=None):
         super().__init__(parent=parent, sectionName="Update")
@@ -914,7 +930,7 @@ class UpdateSoftwareSection(SoftwareSection):
             except ValueError:
                 print(f"🟡 Can't get custom interval time! (got value was '{getSettingsValue('UpdatesCheckInterval')}')")
                 waitTime = 3600
-            Thread(target=lambda: (time.sleep(waitTime), self.reloadSources()), daemon=True, name="AutoCheckForUpdates Thread").start()
+            Executor.schedule(waitTime, self.automaticUpdatesCheck, pool=POOL_SUBPROCESS, priority=PRIORITY_LOW, name="AutoCheckForUpdates")
         print("🟢 Total packages: " + str(len(self.packageItems)))
 
     def changeStore(self, package: UpgradablePackage):
@@ -1077,27 +1093,36 @@ class UpdateSoftwareSection(SoftwareSection):
         package: Package = self.IdPackageReference[id]
         self.updatePackageItem(self.PackageItemReference[package])
 
+    def automaticUpdatesCheck(self):
+        self.IsAutomaticCheck = True  # The user is not waiting for this check, so it will run with the background QoS
+        self.reloadSources()
+
     def reloadSources(self, asyncroutine: bool = False):
         print("🔵 Reloading sources...")
+        for manager in PackageManagersList:
+            self.refreshSources(manager)
+        if not asyncroutine:
+            self.callInMain.emit(self.startLoadingPackages)
+
+    def refreshSources(self, manager: PackageManagerModule) -> None:
         try:
-            for manager in PackageManagersList:
-                manager.updateSources()
+            with QoS.background():
+                manager.updateSources()  # A hung refresh gets killed by the command watchdog, so there is no need for a blind wait
         except Exception as e:
             report(e)
-        if not asyncroutine:
-            self.callInMain.emit(self.startLoadingPackages)
 
-    def loadPackages(self, manager: PackageManagerModule) -> None:
-        t = Thread(target=lambda: self.reloadSources(asyncroutine=True), daemon=True)
-        t.start()
-        t0 = int(time.time())
-        while t.is_alive() and (int(time.time()) - t0 < 10):  # Timeout of 10 seconds for the reloadSources function
-            time.sleep(0.2)
-        packages = manager.getAvailableUpdates()
-        for package in packages:
-            self.addProgram.emit(package)
+    def loadPackages(self, manager: PackageManagerModule, token: CancellationToken) -> None:
+        qos = self.LoadingQoS
+        with QoS.running(qos):
+            if not self.streamPackages(manager.iterAvailableUpdates(token), token):
+                print(f"🟡 Dropping the {manager.NAME} updates because the list was reloaded")
+                return
         self.PackagesLoaded[manager] = True
         self.finishLoading.emit()
+        if qos == QOS_INTERACTIVE:
+            # The automatic checks refresh the sources before loading (see reloadSources). When the user is waiting, the updates are listed
+            # from the local sources first, and they are refreshed afterwards, so the next check finds them up to date
+            Executor.submit(POOL_SUBPROCESS, self.refreshSources, manager, priority=PRIORITY_LOW, name=f"{manager.NAME} sources refresh")
 
     def startLoadingPackages(self, force: bool = False) -> None:
         self.countLabel.setText(_("Searching for updates..."))
@@ -1105,6 +1130,8 @@ class UpdateSoftwareSection(SoftwareSection):
         for action in Globals.trayMenuUpdatesList.actions():
             Globals.trayMenuUpdatesList.removeAction(action)
         Globals.trayMenuUpdatesList.addAction(Globals.updatesHeader)
+        self.LoadingQoS = QOS_BACKGROUND if self.IsAutomaticCheck else QOS_INTERACTIVE
+        self.IsAutomaticCheck = False
         return super().startLoadingPackages(force)
 
     def sharePackage(self, packageItem: UpgradablePackageItem):
@@ -1446,7 +1473,7 @@ class UninstallSoftwareSection(SoftwareSection):
                 except AttributeError:
                     pass
         a = CustomMessageBox(self)
-        Thread(target=self.confirmUninstallSelected, args=(toUninstall, a, admin, interactive)).start()
+        Executor.submit(POOL_IO, self.confirmUninstallSelected, toUninstall, a, admin, interactive, priority=PRIORITY_HIGH, name="Confirming the uninstallation")
 
     def updatePackageNumber(self, showQueried: bool = False, foundResults: int = 0):
         self.foundPackages = len(self.packageItems)
@@ -1490,6 +1517,10 @@ class UninstallSoftwareSection(SoftwareSection):
 
         if (self.IsFirstPackageLoad and getSettings("EnablePackageBackup")):
             self.IsFirstPackageLoad = False
+            Executor.submit(POOL_IO, self.backupPackages, list(self.PackageItemReference.keys()), priority=PRIORITY_LOW, name="Package backup")
+
+    def backupPackages(self, packages: list[Package]) -> None:
+        with QoS.lowerThreadPriority():
             try:
                 print("🟢 Starting package backup...")
 
@@ -1509,7 +1540,7 @@ class UninstallSoftwareSection(SoftwareSection):
 
                 backupPath = os.path.join(dirName, fileName)
                 print("🔵 Backup path set to", backupPath)
-                data = self.packageExporter.generateExportJson(list(self.PackageItemReference.keys()))
+                data = self.packageExporter.generateExportJson(packages)
                 with open(backupPath, "w", encoding="utf-8", errors="ignore") as f:
                     f.write(json.dumps(data, indent=4))
                 print("🟢 Package backup succeeded!")
@@ -1556,7 +1587,7 @@ class UninstallSoftwareSection(SoftwareSection):
     def uninstallPackageItem(self, packageItem: InstalledPackageItem, admin: bool = False, removeData: bool = False, interactive: bool = False, avoidConfirm: bool = False) -> None:
         if not avoidConfirm:
             a = CustomMessageBox(self)
-            Thread(target=self.confirmUninstallSelected, args=([packageItem], a, admin, interactive, removeData)).start()
+            Executor.submit(POOL_IO, self.confirmUninstallSelected, [packageItem], a, admin, interactive, removeData, priority=PRIORITY_HIGH, name="Confirming the uninstallation")
         else:
             options = InstallationOptions(packageItem.Package)
             if admin:
@@ -1567,10 +1598,10 @@ class UninstallSoftwareSection(SoftwareSection):
                 options.RemoveDataOnUninstall = True
             self.addInstallation(PackageUninstallerWidget(packageItem.Package, options))
 
-    def loadPackages(self, manager: PackageManagerModule) -> None:
-        packages = manager.getInstalledPackages()
-        for package in packages:
-            self.addProgram.emit(package)
+    def loadPackages(self, manager: PackageManagerModule, token: CancellationToken) -> None:
+        if not self.streamPackages(manager.iterInstalledPackages(token), token):
+            print(f"🟡 Dropping the {manager.NAME} installed packages because the list was reloaded")
+            return
         self.PackagesLoaded[manager] = True
         self.finishLoading.emit()
 
@@ -1603,6 +1634,9 @@ class PackageInfoPopupWindow(QWidget):
     isAnUninstall = False
     currentPackage: Package = None
     isLoadingPackageDetails: bool = False
+    DetailsLoaded: bool = False
+    DetailsLoadingToken: CancellationToken = None
+    PendingVersionsPackage: Package = None  # The package whose versions will be loaded when the versions combo box is expanded
 
     pressed = False
     oldPos = QPoint(0, 0)
@@ -1975,6 +2009,7 @@ class PackageInfoPopupWindow(QWidget):
         self.InteractiveCheckbox.clicked.connect(lambda: self.loadPackageCommandLine(saveOptionsToDisk=True))
         self.HashCheckBox.clicked.connect(lambda: self.loadPackageCommandLine(saveOptionsToDisk=True))
         self.VersionCombo.currentIndexChanged.connect(lambda: self.loadPackageCommandLine(saveOptionsToDisk=True))
+        self.VersionCombo.popupAboutToShow.connect(self.loadPendingVersions)
         self.ArchCombo.currentIndexChanged.connect(lambda: self.loadPackageCommandLine(saveOptionsToDisk=True))
         self.ScopeCombo.currentIndexChanged.connect(lambda: self.loadPackageCommandLine(saveOptionsToDisk=True))
         self.InstallPreRelease.stateChanged.connect(lambda enabled: (self.loadPackageCommandLine(saveOptionsToDisk=True), self.VersionCombo.setEnabled(not enabled)))
@@ -2071,7 +2106,11 @@ class PackageInfoPopupWindow(QWidget):
         self.isAnUninstall = uninstall
         if self.currentPackage == package:
             return
+        self.cancelDetailsLoading()
         self.currentPackage = package
+        self.DetailsLoaded = False
+        self.DetailsLoadingToken = CancellationToken()
+        self.PendingVersionsPackage = None
 
         self.ApplyIcons()
 
@@ -2127,7 +2166,7 @@ class PackageInfoPopupWindow(QWidget):
             p = QPixmap()
             for viewer in self.imagesCarrousel:
                 viewer.setPixmap(p, index=0)
-            Thread(target=self.loadPackageScreenshots, args=(package,)).start()
+            Executor.submit(POOL_IO, self.loadPackageScreenshots, package, priority=PRIORITY_HIGH, name=f"Loading screenshots for {package}")
 
         Capabilities = package.PackageManager.Capabilities
         self.adminCheckbox.setEnabled(Capabilities.CanRunAsAdmin)
@@ -2141,9 +2180,9 @@ class PackageInfoPopupWindow(QWidget):
 
         self.callInMain.emit(lambda: resetLayoutWidget())
         self.callInMain.emit(lambda: self.appIcon.setPixmap(QIcon(getMedia("install")).pixmap(64, 64)))
-        Thread(target=self.loadPackageIcon, args=(package,)).start()
+        Executor.submit(POOL_IO, self.loadPackageIcon, package, priority=PRIORITY_HIGH, name=f"Loading icon for {package}")
 
-        Thread(target=self.loadPackageDetails, args=(package,), daemon=True, name=f"Loading details for {package}").start()
+        Executor.submit(POOL_SUBPROCESS, self.loadPackageDetails, package, self.DetailsLoadingToken, priority=PRIORITY_HIGH, name=f"Loading details for {package}")
 
         self.tagsWidget.layout().clear()
 
@@ -2156,14 +2195,63 @@ class PackageInfoPopupWindow(QWidget):
                          self.width(),
                          self.height())
 
-    def loadPackageDetails(self, package: Package):
-        details = package.PackageManager.getPackageDetails(package)
+    def loadPackageDetails(self, package: Package, token: CancellationToken):
+        details = package.PackageManager.getPackageDetails(package, token)
+        if token.isCancelled():
+            print(f"🟡 Dropping the details of {package.Id} because the window was closed")
+            return
         self.callInMain.emit(lambda: self.printData(details))
 
+    def loadPendingVersions(self) -> None:
+        """
+        Loads the versions of the current package the first time the versions combo box is expanded, if they were not loaded with the details.
+        """
+        package, self.PendingVersionsPackage = self.PendingVersionsPackage, None
+        if package is None or package != self.currentPackage:
+            return
+        self.VersionCombo.addItem(_("Loading..."))
+        Executor.submit(POOL_SUBPROCESS, self.loadPackageVersions, package, self.DetailsLoadingToken, priority=PRIORITY_HIGH, name=f"Loading versions for {package}")
+
+    def loadPackageVersions(self, package: Package, token: CancellationToken):
+        versions = package.PackageManager.getPackageVersions(package, token)
+        if token.isCancelled():
+            return
+        self.callInMain.emit(lambda: self.printVersions(package, versions))
+
+    def printVersions(self, package: Package, versions: list[str]) -> None:
+        if package != self.currentPackage:
+            return
+        self.isLoadingPackageDetails = True  # Changing the items must not save the installation options
+        loadingIndex = self.VersionCombo.findText(_("Loading..."))
+        if loadingIndex >= 0:
+            self.VersionCombo.removeItem(loadingIndex)
+        self.VersionCombo.addItems(versions)
+        self.isLoadingPackageDetails = False
+
+    def loadInstallerSize(self, details: PackageDetails, token: CancellationToken):
+        details.loadInstallerSize()
+        if token.isCancelled():
+            return
+        self.callInMain.emit(lambda: self.printInstallerLink(details))
+
+    def printInstallerLink(self, details: PackageDetails) -> None:
+        if details.PackageObject != self.currentPackage:
+            return
+        self.link.setText(f"<b>{_('Installer URL')} ({_('Latest Version')}):</b> {details.asUrl(details.InstallerURL)} {f'({details.InstallerSize} MB)' if details.InstallerSize > 0 else ''}")
+
+    def cancelDetailsLoading(self) -> None:
+        """
+        Kills the commands loading the details of the current package, if they are still running. The details will be loaded again if the package is shown again.
+        """
+        if self.DetailsLoadingToken is not None and not self.DetailsLoaded:
+            self.DetailsLoadingToken.cancel()
+            self.currentPackage = None
+
     def printData(self, details: PackageDetails) -> None:
         self.isLoadingPackageDetails = True
         if details.PackageObject != self.currentPackage:
             return
+        self.DetailsLoaded = True
         package = self.currentPackage
 
         self.LoadingIndicator.hide()
@@ -2195,7 +2283,9 @@ class PackageInfoPopupWindow(QWidget):
         else:
             self.license.setText(f"<b>{_('License')}:</b> {_('Not available')}")
         self.sha.setText(f"<b>{_('Installer SHA512') if package.isManager(Choco) or package.isManager(Npm) or package.isManager(Dotnet) else _('Installer SHA256')} ({_('Latest Version')}):</b> {details.InstallerHash}")
-        self.link.setText(f"<b>{_('Installer URL')} ({_('Latest Version')}):</b> {details.asUrl(details.InstallerURL)} {f'({details.InstallerSize} MB)' if details.InstallerSize > 0 else ''}")
+        self.printInstallerLink(details)
+        if not details.InstallerSizeLoaded:
+            Executor.submit(POOL_IO, self.loadInstallerSize, details, self.DetailsLoadingToken, priority=PRIORITY_LOW, name=f"Loading installer size for {package}")
         self.type.setText(f"<b>{_('Installer Type')} ({_('Latest Version')}):</b> {details.InstallerType}")
         self.packageId.setText(f"<b>{_('Package ID')}:</b> {details.Id}")
         self.date.setText(f"<b>{_('Publication date:') if package.isManager(Npm) else _('Last updated:')}</b> {details.UpdateDate}")
@@ -2205,6 +2295,7 @@ class PackageInfoPopupWindow(QWidget):
         while self.VersionCombo.count() > 0:
             self.VersionCombo.removeItem(0)
         self.VersionCombo.addItems([_("Latest")] + details.Versions)
+        self.PendingVersionsPackage = package if not details.VersionsLoaded else None
         while self.ArchCombo.count() > 0:
             self.ArchCombo.removeItem(0)
         self.ArchCombo.addItems([_("Default")] + details.Architectures)
@@ -2372,6 +2463,7 @@ class PackageInfoPopupWindow(QWidget):
         return _
 
     def close(self) -> bool:
+        self.cancelDetailsLoading()
         self.blackCover.hide()
         self.iv.close()
         self.parent().window().blackmatt.hide()
@@ -2382,6 +2474,7 @@ class PackageInfoPopupWindow(QWidget):
         return super().close()
 
     def hide(self) -> None:
+        self.cancelDetailsLoading()
         self.blackCover.hide()
         try:
             self.parent().window().blackmatt.hide()
@@ -0,0 +1,62 @@
+if __name__ == "__main__":
+    # WingetUI cannot be run directly from this file, it must be run by importing the wingetui module
+    import os
+    import subprocess
+    import sys
+    sys.exit(subprocess.run(["cmd", "/C", "python", "-m", "wingetui"], shell=True, cwd=os.path.dirname(__file__).split("wingetui")[0]).returncode)
+
+
+import threading
+
+from wingetui.Core.Tools import report
+
+
+class CancellationToken():
+    """
+    Passed to the package manager methods by whoever is waiting for their results. Once cancelled, the commands started
+    with it get killed, and the caller is expected to drop whatever (partial) result the method returns.
+    A token can't be reset: every new operation needs a new token.
+    """
+    Cancelled: bool = False
+
+    def __init__(self):
+        self.Cancelled = False
+        self.__callbacks: list[callable] = []
+        self.__lock = threading.Lock()
+
+    def cancel(self) -> None:
+        with self.__lock:
+            if self.Cancelled:
+                return
+            self.Cancelled = True
+            callbacks, self.__callbacks = self.__callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                report(e)
+
+    def isCancelled(self) -> bool:
+        return self.Cancelled
+
+    def addCallback(self, callback: callable) -> None:
+        """
+        The callback will be called when the token gets cancelled. If it already was, the callback is called right away.
+        """
+        with self.__lock:
+            if not self.Cancelled:
+                self.__callbacks.append(callback)
+                return
+        callback()
+
+    def removeCallback(self, callback: callable) -> None:
+        with self.__lock:
+            if callback in self.__callbacks:
+                self.__callbacks.remove(callback)
+
+
+def isCancelled(token: CancellationToken | None) -> bool:
+    """
+    Returns True if the given token exists and has been cancelled. Meant for the methods where the token is optional.
+    """
+    return token is not None and token.Cancelled
@@ -0,0 +1,127 @@
+if __name__ == "__main__":
+    # WingetUI cannot be run directly from this file, it must be run by importing the wingetui module
+    import os
+    import subprocess
+    import sys
+    sys.exit(subprocess.run(["cmd", "/C", "python", "-m", "wingetui"], shell=True, cwd=os.path.dirname(__file__).split("wingetui")[0]).returncode)
+
+
+import threading
+import time
+
+from wingetui.Core.Tools import _
+
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half-open"
+
+
+class ManagerCircuitBreaker():
+    """
+    Keeps track of the health of a package manager.
+    - Closed: the manager works, every request is let through.
+    - Open: the manager failed (or timed out) FAILURE_THRESHOLD times in a row. Requests are skipped until the backoff period is over.
+    - Half-open: the backoff period is over, a single request is let through to probe the manager. If it succeeds the breaker
+      gets closed again, otherwise it gets opened for twice the previous backoff period.
+    """
+    FAILURE_THRESHOLD: int = 3
+    BASE_BACKOFF: float = 30
+    MAX_BACKOFF: float = 1800
+    PROBE_TIMEOUT: float = 600
+
+    Name: str = ""
+    State: str = STATE_CLOSED
+    ConsecutiveFailures: int = 0
+    Backoff: float = BASE_BACKOFF
+    OpenUntil: float = 0.0
+    LastFailureReason: str = ""
+
+    def __init__(self, name: str):
+        self.Name = name
+        self.State = STATE_CLOSED
+        self.ConsecutiveFailures = 0
+        self.Backoff = self.BASE_BACKOFF
+        self.OpenUntil = 0.0
+        self.LastFailureReason = ""
+        self.__probeStartTime = 0.0
+        self.__lock = threading.Lock()
+
+    def allowRequest(self) -> bool:
+        """
+        Returns True if the manager should be queried now. When the breaker is open and the backoff period is over, the caller becomes the probe.
+        """
+        with self.__lock:
+            if self.State == STATE_CLOSED:
+                return True
+            if self.State == STATE_OPEN:
+                if time.time() < self.OpenUntil:
+                    return False
+                print(f"🔵 {self.Name} backoff period is over, probing it again")
+                self.State = STATE_HALF_OPEN
+                self.__probeStartTime = time.time()
+                return True
+            # Half-open: only one probe at a time, unless the previous one never reported back
+            if time.time() - self.__probeStartTime > self.PROBE_TIMEOUT:
+                self.__probeStartTime = time.time()
+                return True
+            return False
+
+    def recordSuccess(self) -> None:
+        with self.__lock:
+            if self.State != STATE_CLOSED:
+                print(f"🟢 {self.Name} is working again")
+            self.State = STATE_CLOSED
+            self.ConsecutiveFailures = 0
+            self.Backoff = self.BASE_BACKOFF
+            self.LastFailureReason = ""
+
+    def recordFailure(self, reason: str) -> None:
+        with self.__lock:
+            self.ConsecutiveFailures += 1
+            self.LastFailureReason = str(reason)
+            if self.State == STATE_HALF_OPEN:
+                self.Backoff = min(self.Backoff * 2, self.MAX_BACKOFF)
+                self.__open()
+            elif self.State == STATE_CLOSED and self.ConsecutiveFailures >= self.FAILURE_THRESHOLD:
+                self.__open()
+            else:
+                print(f"🟡 {self.Name} failed ({self.LastFailureReason}), {self.ConsecutiveFailures} consecutive failure(s)")
+
+    def recordCommand(self, command) -> None:
+        """
+        Records the outcome of a listing command (a RunningCommand or a HostedCommand): timed out commands count as failures.
+        Cancelled commands say nothing about the health of the manager, so they are not recorded.
+        """
+        if command.Cancelled:
+            return
+        if command.TimedOut:
+            self.recordFailure(_("The operation timed out"))
+        else:
+            self.recordSuccess()
+
+    def isOpen(self) -> bool:
+        """
+        Returns True if the manager is being skipped right now. Unlike allowRequest(), it never makes the caller the probe.
+        """
+        return self.State == STATE_OPEN and time.time() < self.OpenUntil
+
+    def isDegraded(self) -> bool:
+        return self.State != STATE_CLOSED or self.ConsecutiveFailures > 0
+
+    def getStatusText(self) -> str:
+        """
+        Returns a human-readable, translated description of the state of the manager, to be shown on the interface.
+        """
+        if self.State == STATE_OPEN:
+            return _("{0} is not responding ({1}). WingetUI will try again in {2} seconds").format(self.Name, self.LastFailureReason, max(0, int(self.OpenUntil - time.time())))
+        if self.State == STATE_HALF_OPEN:
+            return _("{0} was not responding, WingetUI is checking if it works again").format(self.Name)
+        if self.ConsecutiveFailures > 0:
+            return _("The last operation of {0} failed ({1})").format(self.Name, self.LastFailureReason)
+        return ""
+
+    def __open(self) -> None:
+        self.State = STATE_OPEN
+        self.OpenUntil = time.time() + self.Backoff
+        print(f"🟠 {self.Name} failed ({self.LastFailureReason}) {self.ConsecutiveFailures} time(s) in a row, skipping it for {self.Backoff:.0f} seconds")
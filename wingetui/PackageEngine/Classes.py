@@ -12,13 +12,19 @@ if __name__ == "__main__":
 
 import os
 import subprocess
+from typing import Iterator
 from PySide6.QtCore import *
 from PySide6.QtGui import *
-from urllib.request import urlopen
+from urllib.request import Request, urlopen
 
 import wingetui.Core.Globals as Globals
 from wingetui.Core.Tools import *
 from wingetui.Core.Tools import _, blueColor
+from wingetui.PackageEngine.Cancellation import CancellationToken, isCancelled
+from wingetui.PackageEngine.CircuitBreaker import ManagerCircuitBreaker
+from wingetui.PackageEngine.CommandRunner import CommandRunner
+from wingetui.PackageEngine.StructuredOutput import StructuredOutputModes, asList, parseJsonOutput
+from wingetui.PackageEngine.TableOutputParser import TableOutputParser, isTruncated
 
 
 class Package():
@@ -278,15 +284,18 @@ class PackageDetails(Package):
     InstallerURL: str = _("Not available")
     InstallerHash: str = _("Not available")
     InstallerSize: int = 0  # In Megabytes
+    InstallerSizeLoaded: bool = True  # False if the size has to be asked to the server of the installer with loadInstallerSize
     InstallerType: str = _("Not available")
     ManifestUrl: str = _("Not available")
     UpdateDate: str = _("Not available")
     ReleaseNotes: str = _("Not available")
     ReleaseNotesUrl: str = _("Not available")
     Versions: list[str] = []
+    VersionsLoaded: bool = True  # False if the versions are too slow to load with the details, and have to be asked with getPackageVersions
     Architectures: list[str] = []
     Scopes: list[str] = []
     Tags: list[str] = []
+    INSTALLER_SIZE_TIMEOUT: float = 10  # In seconds
 
     def __init__(self, package: Package):
         self.Name = package.Name
@@ -295,6 +304,8 @@ class PackageDetails(Package):
         self.Source = package.Source
         self.PackageObject = package
         self.Versions = []
+        self.VersionsLoaded = True
+        self.InstallerSizeLoaded = True
         self.Architectures = []
         self.Scopes = []
         self.Tags = []
@@ -304,6 +315,18 @@ class PackageDetails(Package):
     def asUrl(self, url: str) -> str:
         return f"<a href='{url}' style='color:{blueColor}'>{url}</a>" if "://" in url else url
 
+    def loadInstallerSize(self) -> int:
+        """
+        Asks the server of the installer for its size with a HEAD request. It blocks for up to INSTALLER_SIZE_TIMEOUT seconds, so it has to run on the io pool.
+        """
+        try:
+            with urlopen(Request(self.InstallerURL, method="HEAD"), timeout=self.INSTALLER_SIZE_TIMEOUT) as response:
+                self.InstallerSize = int((response.length or 0) / 1000000)
+        except Exception as e:
+            print("🟠 Can't get installer size:", type(e), str(e))
+        self.InstallerSizeLoaded = True
+        return self.InstallerSize
+
 
 class InstallationOptions():
     SkipHashCheck: bool = False
@@ -436,10 +459,16 @@ class PackageManagerModule():
     BLACKLISTED_PACKAGE_VERSIONS: list[str]
 
     Properties: ManagerProperties
+    Runner: CommandRunner
+    Health: ManagerCircuitBreaker
+    StructuredOutput: StructuredOutputModes
 
     def __init__(self):
         self.Capabilities = PackageManagerCapabilities()
         self.Properties = ManagerProperties()
+        self.Runner = CommandRunner(self.NAME)
+        self.Health = ManagerCircuitBreaker(self.NAME)
+        self.StructuredOutput = StructuredOutputModes(self.NAME)
         self.BLACKLISTED_PACKAGE_NAMES: list[str] = []
         self.BLACKLISTED_PACKAGE_IDS: list[str] = []
         self.BLACKLISTED_PACKAGE_VERSIONS: list[str] = []
@@ -451,26 +480,48 @@ class PackageManagerModule():
     def isEnabled() -> bool:
         pass
 
-    def getAvailableUpdates(self) -> list[UpgradablePackage]:
+    def getAvailableUpdates(self, token: CancellationToken = None) -> list[UpgradablePackage]:
         """
         Will retieve the upgradable packages by the package manager in the format of a list[UpgradablePackage] object.
+        If the given token gets cancelled, the running commands are killed and the (partial) result must be discarded. The same goes for the other query methods.
         """
+        return list(self.iterAvailableUpdates(token))
 
-    def getInstalledPackages(self) -> list[Package]:
+    def iterAvailableUpdates(self, token: CancellationToken = None) -> Iterator[UpgradablePackage]:
+        """
+        Will yield the upgradable packages by the package manager one by one, as soon as each one has been parsed from the output of the command.
+        The managers implement these iter* generators, and the get* methods collect them into a list.
+        """
+        yield from ()
+
+    def getInstalledPackages(self, token: CancellationToken = None) -> list[Package]:
         """
         Will retieve the intalled packages by the package manager in the format of a list[Package] object.
         """
+        return list(self.iterInstalledPackages(token))
+
+    def iterInstalledPackages(self, token: CancellationToken = None) -> Iterator[Package]:
+        """
+        Will yield the intalled packages by the package manager one by one, as soon as each one has been parsed.
+        """
+        yield from ()
 
     def getIcon(self, source: str) -> QIcon:
         """
         Will return the corresponding icon to the given source
         """
 
-    def getPackageDetails(self, package: Package):
+    def getPackageDetails(self, package: Package, token: CancellationToken = None):
         """
         Will return a PackageDetails object containing the information of the given Package object
         """
 
+    def getPackageVersions(self, package: Package, token: CancellationToken = None) -> list[str]:
+        """
+        Will return the versions of the given package, for the managers whose getPackageDetails leaves them unloaded (see PackageDetails.VersionsLoaded)
+        """
+        return []
+
     def startInstallation(self, package: Package, options: InstallationOptions, installationWidget: 'PackageInstallerWidget') -> subprocess.Popen:
         """
         Starts a thread that installs the specified Package, making use of the given options. Reports the progress through the given InstallationWidget
@@ -511,10 +562,32 @@ class PackageManagerModule():
         Force update package manager's sources
         """
 
-    def getPackagesForQuery(self, query: str) -> list[Package]:
+    def getPackagesForQuery(self, query: str, token: CancellationToken = None) -> list[Package]:
         f"""
         Will retieve the packages for the given "query: str" from the package manager {self.NAME} in the format of a list[Package] object.
         """
+        return list(self.iterPackagesForQuery(query, token))
+
+    def iterPackagesForQuery(self, query: str, token: CancellationToken = None) -> Iterator[Package]:
+        """
+        Will yield the packages found for the given query one by one, as soon as each one has been parsed.
+        """
+        yield from ()
+
+    def readJsonOutput(self, command, emptyMeansNone: bool = False) -> object:
+        """
+        Waits for a command run in one of the structured output modes of the manager, and returns the JSON document it printed.
+        Returns None if the command was cancelled or timed out, or if it succeeded without printing anything and emptyMeansNone is set (ConvertTo-Json prints nothing for an empty list).
+        Raises ValueError if the output is not JSON, so the caller can fall back to the table output.
+        Unlike the tables, a JSON document can't be parsed until the command has finished.
+        """
+        lines = list(command)
+        Globals.PackageManagerOutput += "\n\n---------" + self.NAME + "\n" + "\n".join(lines)
+        if command.TimedOut or command.Cancelled:
+            return None
+        if emptyMeansNone and command.ReturnCode == 0 and not any(line.strip() for line in lines):
+            return None
+        return parseJsonOutput(lines)
 
 
 class PackageManagerWithSources(PackageManagerModule):
@@ -527,7 +600,7 @@ class PackageManagerWithSources(PackageManagerModule):
         self.Sources = []
         self.KnownSources = []
 
-    def getSources(self) -> list[ManagerSource]:
+    def getSources(self, token: CancellationToken = None) -> list[ManagerSource]:
         pass
 
     def installSource(self, source: ManagerSource, options: InstallationOptions, installationWidget: 'PackageInstallerWidget') -> subprocess.Popen:
@@ -0,0 +1,356 @@
+if __name__ == "__main__":
+    # WingetUI cannot be run directly from this file, it must be run by importing the wingetui module
+    import os
+    import subprocess
+    import sys
+    sys.exit(subprocess.run(["cmd", "/C", "python", "-m", "wingetui"], shell=True, cwd=os.path.dirname(__file__).split("wingetui")[0]).returncode)
+
+
+import os
+import shutil
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+
+from wingetui.Core.Executor import Executor
+from wingetui.Core.Tools import ProcessOutput, report
+from wingetui.PackageEngine.Cancellation import CancellationToken
+from wingetui.PackageEngine.CommandWatchdog import Watchdog
+from wingetui.PackageEngine.QualityOfService import QoS, QOS_INTERACTIVE
+
+
+class CommandTiming():
+    """
+    Lightweight record of a finished command, kept on the CommandRunner history.
+    """
+    Args: list[str] = []
+    Key: str = ""
+    StartTime: float = 0.0
+    WallTime: float = 0.0
+    BytesRead: int = 0
+    ReturnCode: int = None
+    Stalled: bool = False
+    TimedOut: bool = False
+    Killed: bool = False
+    Cancelled: bool = False
+
+    def __init__(self, command: 'RunningCommand | HostedCommand'):
+        self.Args = command.Args
+        self.Key = command.Key
+        self.StartTime = command.StartTime
+        self.WallTime = command.WallTime
+        self.BytesRead = command.BytesRead
+        self.ReturnCode = command.ReturnCode
+        self.Stalled = command.Stalled
+        self.TimedOut = command.TimedOut
+        self.Killed = command.Killed
+        self.Cancelled = command.Cancelled
+
+    def __str__(self) -> str:
+        return f"<CommandTiming: {' '.join(self.Args)}; WallTime={self.WallTime:.3f}s; BytesRead={self.BytesRead}; ReturnCode={self.ReturnCode}; Stalled={self.Stalled}; TimedOut={self.TimedOut}; Killed={self.Killed}; Cancelled={self.Cancelled}>"
+
+
+class CommandDeadline():
+    """
+    Watches a running command: it gets flagged as stalled after stallAfter seconds, and onTimeout is called once killAfter seconds have passed.
+    The deadlines wait on the executor scheduler, so commands do not need a timer thread each.
+    """
+    Stalled: bool = False
+
+    def __init__(self, description: str, stallAfter: float, killAfter: float, onTimeout: callable):
+        self.Stalled = False
+        self.__description = description
+        self.__stallAfter = min(stallAfter, killAfter)
+        self.__killAfter = killAfter
+        self.__onTimeout = onTimeout
+        self.__cancelled = False
+        self.__timer = Executor.schedule(self.__stallAfter, self.__stall, name=f"{description} deadline")
+
+    def cancel(self) -> None:
+        self.__cancelled = True
+        self.__timer.cancel()
+
+    def __stall(self) -> None:
+        if self.__cancelled:
+            return
+        self.Stalled = True
+        gracePeriod = self.__killAfter - self.__stallAfter
+        if gracePeriod > 0:
+            print(f"🟡 {self.__description} has been running for {self.__stallAfter:.0f}s, which is much longer than usual. It will be killed in {gracePeriod:.0f}s")
+            self.__timer = Executor.schedule(gracePeriod, self.__timeout, name=f"{self.__description} deadline")
+        else:
+            self.__timeout()
+
+    def __timeout(self) -> None:
+        if not self.__cancelled:
+            self.__onTimeout()
+
+
+class RunningCommand():
+    """
+    A process started by a CommandRunner. Iterating over it yields the decoded output lines as they arrive.
+    Once the output has been exhausted (or the command has been killed), the process is reaped and the timing is recorded on the runner.
+    When the cancellation token given to the runner gets cancelled, the process gets killed and the iteration ends.
+    A command whose output might not be read to the end (such as one started next to another one) must be closed, with close() or as a
+    context manager, so its process, its deadline and its QoS slot are released. Commands that are garbage collected are closed too.
+    """
+    Args: list[str] = []
+    Key: str = ""
+    QoS: str = QOS_INTERACTIVE
+    Process: subprocess.Popen = None
+    Output: ProcessOutput = None
+    Runner: 'CommandRunner' = None
+    Deadline: CommandDeadline = None
+    Token: CancellationToken = None
+    StartTime: float = 0.0
+    WallTime: float = 0.0
+    ReturnCode: int = None
+    TimedOut: bool = False
+    Killed: bool = False
+    Cancelled: bool = False
+    Finished: bool = False
+
+    def __init__(self, runner: 'CommandRunner', args: list[str], key: str, qos: str, process: subprocess.Popen, limits: tuple[float, float] | None, token: CancellationToken = None):
+        self.Runner = runner
+        self.Args = args
+        self.Key = key
+        self.QoS = qos
+        self.Process = process
+        self.Output = ProcessOutput(process)
+        self.StartTime = time.time()
+        self.TimedOut = False
+        self.Killed = False
+        self.Cancelled = False
+        self.Finished = False
+        self.__finishLock = threading.Lock()
+        self.Deadline = CommandDeadline(f"Command {' '.join(args)}", *limits, self.__timeout) if limits else None
+        self.Token = token
+        if token is not None:
+            token.addCallback(self.__cancel)
+
+    def __iter__(self):
+        try:
+            yield from self.Output
+        finally:
+            self.__finish()
+
+    @property
+    def Lines(self) -> list[str]:
+        return self.Output.Lines
+
+    @property
+    def BytesRead(self) -> int:
+        return self.Output.BytesRead
+
+    @property
+    def Stalled(self) -> bool:
+        return self.Deadline is not None and self.Deadline.Stalled
+
+    def wait(self) -> 'RunningCommand':
+        """
+        Blocks until the command has finished (or has been killed) and returns itself, so the Lines and ReturnCode attributes can be read.
+        """
+        for _line in self:
+            pass
+        return self
+
+    def close(self) -> None:
+        """
+        Kills the command if it is still running, and releases its process, its deadline and its QoS slot. Does nothing if it has already finished.
+        """
+        self.__finish()
+
+    def __enter__(self) -> 'RunningCommand':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __del__(self):
+        if not getattr(self, "Finished", True):
+            try:
+                self.close()
+            except Exception:
+                pass  # The interpreter may be shutting down
+
+    def kill(self) -> None:
+        """
+        Kills the process and all of its children. The iteration over the output will end as soon as the pipe gets closed.
+        """
+        if self.Process.poll() is None:
+            self.Killed = True
+            killProcessTree(self.Process)
+
+    def __timeout(self) -> None:
+        if self.Process.poll() is None:
+            print(f"🟠 Command {' '.join(self.Args)} timed out, killing it...")
+            self.TimedOut = True
+            self.kill()
+
+    def __cancel(self) -> None:
+        if self.Process.poll() is None:
+            self.Cancelled = True
+            self.kill()
+
+    def __finish(self) -> None:
+        with self.__finishLock:
+            if self.Finished:
+                return
+            self.Finished = True
+        if self.Deadline:
+            self.Deadline.cancel()
+        if self.Token is not None:
+            self.Token.removeCallback(self.__cancel)
+        if self.Process.poll() is None and not self.Output.Finished:  # The caller stopped reading before the end of the output
+            self.kill()
+        self.ReturnCode = self.Process.wait()
+        self.WallTime = time.time() - self.StartTime
+        QoS.release(self.QoS)
+        self.Runner.recordTiming(CommandTiming(self))
+
+    def __str__(self) -> str:
+        return f"<RunningCommand: {' '.join(self.Args)}; ReturnCode={self.ReturnCode}; TimedOut={self.TimedOut}; Killed={self.Killed}; Cancelled={self.Cancelled}>"
+
+
+class CommandRunner():
+    """
+    Runs the query commands of a package manager (list, search, show, etc.) without a shell.
+    The environment is frozen once and reused for every command, the executable lookups are cached, and every
+    command gets a deadline, after which it gets killed together with all of its child processes.
+    """
+    HISTORY_LENGTH: int = 200
+    CanUsePowerShellHosts: bool = True
+    CanRunConcurrently: bool = True  # Whether a manager may run several commands at the same time, from other threads
+
+    __frozenEnvironment: dict[str, str] = None
+    __environmentLock = threading.Lock()
+
+    Name: str = ""
+    History: deque[CommandTiming] = None
+
+    def __init__(self, name: str):
+        self.Name = name
+        self.History = deque(maxlen=self.HISTORY_LENGTH)
+        self.__resolvedExecutables: dict[str, str] = {}
+
+    @classmethod
+    def getEnvironment(cls) -> dict[str, str]:
+        """
+        Returns the environment shared by all the commands. It is copied from os.environ the first time it is needed.
+        """
+        with cls.__environmentLock:
+            if cls.__frozenEnvironment is None:
+                cls.__frozenEnvironment = os.environ.copy()
+            return cls.__frozenEnvironment
+
+    @classmethod
+    def refreshEnvironment(cls) -> None:
+        """
+        Discards the frozen environment, so changes to os.environ (such as a modified PATH) get picked up by the next command.
+        """
+        with cls.__environmentLock:
+            cls.__frozenEnvironment = None
+
+    def resolveExecutable(self, executable: str) -> str:
+        """
+        Returns the full path to the given executable, looked up on the frozen PATH. The result is cached for the rest of the session.
+        If the executable can't be found the name is returned as is, so the process creation fails with a meaningful error.
+        """
+        if executable not in self.__resolvedExecutables:
+            self.__resolvedExecutables[executable] = shutil.which(executable, path=self.getEnvironment().get("PATH", os.defpath)) or executable
+        return self.__resolvedExecutables[executable]
+
+    def getCommandKey(self, args: list[str]) -> str:
+        """
+        Returns the name under which the timings of the given command are kept: the manager, the verb and the flags, without any values (package ids, queries, etc.)
+        """
+        verb = ""
+        flags = []
+        skipNext = False
+        for arg in args[1:]:
+            arg = str(arg)
+            if skipNext:
+                skipNext = False
+            elif arg == "-m":  # python -m pip
+                skipNext = True
+            elif arg.startswith("-"):
+                flags.append(arg)
+            elif not verb:
+                verb = arg
+        return " ".join([f"{self.Name}:", verb or os.path.basename(str(args[0]))] + flags)
+
+    def getLimits(self, key: str, timeout: float | None) -> tuple[float, float] | None:
+        """
+        Returns the (stallAfter, killAfter) limits for a command. When no timeout is given, the limits are learnt by the watchdog. A timeout of 0 disables them.
+        """
+        if timeout is None:
+            return Watchdog.getLimits(key)
+        return (timeout, timeout) if timeout else None
+
+    def run(self, args: list[str], timeout: float | None = None, cwd: str = None, input: str = None, token: CancellationToken = None) -> RunningCommand:
+        """
+        Starts the given argv list and returns a RunningCommand. Iterate over it to read the output as it arrives, or call wait() to collect it all.
+        When input is given it will be written to the process stdin, which is then closed. Otherwise the stdin is empty, so interactive prompts do not hang.
+        Unless a timeout is given, the command gets killed once it runs far beyond its usual duration (see CommandWatchdog).
+        The command belongs to the QoS class of the calling thread: background commands may wait before being started, and run at a lower priority.
+        If a cancellation token is given, the command gets killed as soon as it is cancelled (right after starting, if it already was).
+        """
+        key = self.getCommandKey(args)
+        args = [self.resolveExecutable(args[0])] + [str(arg) for arg in args[1:]]
+        qos = QoS.getCurrentClass()
+        QoS.acquire(qos)
+        try:
+            processArgs, priorityFlags = QoS.getProcessArguments(args, qos)
+            kwargs = {}
+            if os.name == "nt":
+                kwargs["creationflags"] = subprocess.CREATE_NO_WINDOW | subprocess.CREATE_NEW_PROCESS_GROUP | priorityFlags
+            else:
+                kwargs["start_new_session"] = True
+            process = subprocess.Popen(processArgs, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE if input is not None else subprocess.DEVNULL, cwd=cwd or os.getcwd(), env=self.getEnvironment(), **kwargs)
+        except Exception:
+            QoS.release(qos)
+            raise
+        if input is not None:
+            threading.Thread(target=self.__feedInput, args=(process, input), daemon=True, name=f"{self.Name} command input writer").start()
+        return RunningCommand(self, args, key, qos, process, self.getLimits(key, timeout), token)
+
+    def __feedInput(self, process: subprocess.Popen, input: str) -> None:
+        # Written from another thread, so a process that fills the output pipe before reading all of its input can't deadlock the reader
+        try:
+            process.stdin.write(input.encode("utf-8"))
+            process.stdin.close()
+        except OSError as e:
+            report(e)
+
+    def recordTiming(self, timing: CommandTiming) -> None:
+        self.History.append(timing)
+        if timing.Cancelled:
+            print(f"🔵 {self.Name}: {timing} was cancelled")  # Its duration says nothing about how long the command usually takes
+        elif timing.TimedOut:
+            print(f"🟠 {self.Name}: {timing} was killed by the watchdog, its results will be partial")
+            Watchdog.record(timing.Key, timing.WallTime)  # So a command that is legitimately slow gets more time the next time
+        elif timing.Killed:
+            print(f"🟠 {self.Name}: {timing}")
+        else:
+            Watchdog.record(timing.Key, timing.WallTime)
+
+
+def killProcessTree(p: subprocess.Popen) -> None:
+    """
+    Kills the given process and all the processes it has spawned.
+    """
+    try:
+        if os.name == "nt":
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(p.pid)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, creationflags=subprocess.CREATE_NO_WINDOW)
+        else:
+            os.killpg(p.pid, signal.SIGKILL)  # The process was started with start_new_session, so its pid is also the group id
+    except ProcessLookupError:
+        pass
+    except Exception as e:
+        report(e)
+    try:
+        p.kill()
+    except OSError:
+        pass
@@ -0,0 +1,101 @@
+if __name__ == "__main__":
+    # WingetUI cannot be run directly from this file, it must be run by importing the wingetui module
+    import os
+    import subprocess
+    import sys
+    sys.exit(subprocess.run(["cmd", "/C", "python", "-m", "wingetui"], shell=True, cwd=os.path.dirname(__file__).split("wingetui")[0]).returncode)
+
+
+import atexit
+import threading
+import time
+
+from wingetui.Core.Tools import GetJsonSettings, SetJsonSettings, getSettingsValue, getint
+
+
+class CommandWatchdog():
+    """
+    Learns how long every command of every package manager usually takes, and gives each new command its limits:
+    the time after which it gets flagged as stalled, and the time after which it gets killed so the caller gets a partial result instead of hanging.
+    Commands without enough history get the default (generous) limits. The history is kept between sessions.
+    """
+    SETTINGS_NAME: str = "CommandTimings"
+    MAX_SAMPLES: int = 20
+    MIN_SAMPLES: int = 3
+    SLOWNESS_FACTOR: float = 4
+    MIN_STALL_TIME: float = 20
+    DEFAULT_STALL_TIME: float = 120
+    DEFAULT_GRACE_PERIOD: float = 30
+    MAX_TIMEOUT: float = 600
+    SAVE_INTERVAL: float = 30
+
+    Durations: dict[str, list[float]] = {}
+
+    def __init__(self):
+        self.Durations = {}
+        self.__loaded = False
+        self.__dirty = False
+        self.__lastSave = 0.0
+        self.__lock = threading.Lock()
+        atexit.register(self.save)
+
+    def getGracePeriod(self) -> float:
+        """
+        Returns the seconds a stalled command is given before being killed. It can be changed through the CommandWatchdogGracePeriod setting.
+        """
+        value = getSettingsValue("CommandWatchdogGracePeriod")
+        return max(0, getint(value, self.DEFAULT_GRACE_PERIOD)) if value else self.DEFAULT_GRACE_PERIOD
+
+    def getExpectedTime(self, key: str) -> float | None:
+        """
+        Returns the usual duration (the 90th percentile of the recorded ones) of the given command, or None if there is not enough history.
+        """
+        with self.__lock:
+            self.__load()
+            durations = sorted(self.Durations.get(key, []))
+        if len(durations) < self.MIN_SAMPLES:
+            return None
+        return durations[min(len(durations) - 1, int(len(durations) * 0.9))]
+
+    def getLimits(self, key: str) -> tuple[float, float]:
+        """
+        Returns a (stallAfter, killAfter) tuple, in seconds, for a new run of the given command.
+        """
+        expected = self.getExpectedTime(key)
+        stallAfter = self.DEFAULT_STALL_TIME if expected is None else max(self.MIN_STALL_TIME, expected * self.SLOWNESS_FACTOR)
+        stallAfter = min(stallAfter, self.MAX_TIMEOUT)
+        return stallAfter, min(stallAfter + self.getGracePeriod(), self.MAX_TIMEOUT)
+
+    def record(self, key: str, wallTime: float) -> None:
+        """
+        Adds the duration of a command that finished on its own to its history.
+        """
+        with self.__lock:
+            self.__load()
+            durations = self.Durations.setdefault(key, [])
+            durations.append(round(wallTime, 3))
+            del durations[:-self.MAX_SAMPLES]
+            self.__dirty = True
+            shouldSave = time.time() - self.__lastSave > self.SAVE_INTERVAL
+        if shouldSave:
+            self.save()
+
+    def save(self) -> None:
+        with self.__lock:
+            if not self.__dirty:
+                return
+            data = {key: list(durations) for key, durations in self.Durations.items()}
+            self.__dirty = False
+            self.__lastSave = time.time()
+        SetJsonSettings(self.SETTINGS_NAME, data)
+
+    def __load(self) -> None:
+        if self.__loaded:
+            return
+        self.__loaded = True
+        for key, durations in GetJsonSettings(self.SETTINGS_NAME).items():
+            if isinstance(durations, list):
+                self.Durations[key] = [float(d) for d in durations if isinstance(d, (int, float))][-self.MAX_SAMPLES:]
+
+
+Watchdog = CommandWatchdog()
@@ -0,0 +1,148 @@
+if __name__ == "__main__":
+    # WingetUI cannot be run directly from this file, it must be run by importing the wingetui module
+    import os
+    import subprocess
+    import sys
+    sys.exit(subprocess.run(["cmd", "/C", "python", "-m", "wingetui"], shell=True, cwd=os.path.dirname(__file__).split("wingetui")[0]).returncode)
+
+
+import os
+import shutil
+import threading
+import time
+
+from wingetui.Core.Executor import Executor, POOL_SUBPROCESS, PRIORITY_LOW
+from wingetui.Core.Tools import report
+from wingetui.PackageEngine.CommandRunner import CommandRunner
+
+
+HELPER_UNKNOWN = "unknown"
+HELPER_READY = "ready"
+HELPER_MISSING = "missing"
+HELPER_INSTALLING = "installing"
+HELPER_FAILED = "failed"
+
+
+class HelperTool():
+    """
+    An executable that a manager needs besides itself (parse_pip_search, scoop-search, dotnet-tools-outdated, etc.), and the command that installs it.
+    """
+    Name: str = ""
+    InstallCommand: list[str] = None
+    InstallDirectory: str = None
+    State: str = HELPER_UNKNOWN
+    Path: str = None
+    ModifiedTime: float = 0
+    LastLookupTime: float = 0
+
+    def __init__(self, name: str, installCommand: list[str], installDirectory: str = None):
+        self.Name = name
+        self.InstallCommand = installCommand
+        self.InstallDirectory = installDirectory
+
+
+class HelperToolRegistry():
+    """
+    Resolves the helper tools of the managers, and installs the missing ones in the background.
+
+    The path of a tool is looked up once per session and then validated against its modification time, so a tool that gets removed or
+    replaced is looked up again. A tool that can't be found is looked up again at most every MISSING_RECHECK_INTERVAL seconds.
+    A missing tool gets installed by prepare(), on the subprocess pool and with a low priority. The managers are expected to degrade
+    gracefully (to a slower command, or to no results) while resolve() returns None, instead of waiting for the installation to finish.
+    An installation that fails, or takes longer than INSTALL_TIMEOUT seconds, is not retried during the same session.
+    """
+    MISSING_RECHECK_INTERVAL: float = 30
+    INSTALL_TIMEOUT: float = 300
+
+    def __init__(self):
+        self.__tools: dict[str, HelperTool] = {}
+        self.__lock = threading.Lock()
+        self.Runner = CommandRunner("Helper tools")
+
+    def register(self, name: str, installCommand: list[str], installDirectory: str = None) -> HelperTool:
+        """
+        Registers a helper tool. Registering the same tool again only updates its installation command, which is an argv list run without a shell.
+        """
+        with self.__lock:
+            if name in self.__tools:
+                self.__tools[name].InstallCommand = installCommand
+                self.__tools[name].InstallDirectory = installDirectory
+            else:
+                self.__tools[name] = HelperTool(name, installCommand, installDirectory)
+            return self.__tools[name]
+
+    def resolve(self, name: str) -> str | None:
+        """
+        Returns the full path of the given helper tool, or None if it is not available (yet).
+        """
+        with self.__lock:
+            tool = self.__tools[name]
+            if tool.Path:
+                try:
+                    if os.stat(tool.Path).st_mtime == tool.ModifiedTime:
+                        return tool.Path
+                except OSError:
+                    pass
+                print(f"🟡 Helper tool {name} changed or was removed from {tool.Path}, looking it up again")
+                tool.Path = None
+                tool.LastLookupTime = 0
+            if time.time() - tool.LastLookupTime < self.MISSING_RECHECK_INTERVAL:
+                return None
+            tool.LastLookupTime = time.time()
+            path = shutil.which(name, path=CommandRunner.getEnvironment().get("PATH", os.defpath))
+            if path:
+                try:
+                    tool.ModifiedTime = os.stat(path).st_mtime
+                    tool.Path = path
+                    tool.State = HELPER_READY
+                except OSError:
+                    path = None
+            if not path and tool.State not in (HELPER_INSTALLING, HELPER_FAILED):
+                tool.State = HELPER_MISSING
+            return tool.Path
+
+    def isReady(self, name: str) -> bool:
+        return self.resolve(name) is not None
+
+    def prepare(self, name: str) -> None:
+        """
+        Installs the given helper tool in the background if it is missing. Does nothing if it is available, being installed, or failed to install.
+        """
+        if self.isReady(name):
+            return
+        with self.__lock:
+            tool = self.__tools[name]
+            if tool.State != HELPER_MISSING:
+                return
+            tool.State = HELPER_INSTALLING
+        print(f"🟡 Installing {name}, that was missing...")
+        Executor.submit(POOL_SUBPROCESS, self.__install, tool, priority=PRIORITY_LOW, name=f"Helper tool installer: {name}")
+
+    def getStates(self) -> dict[str, str]:
+        with self.__lock:
+            return {name: tool.State for name, tool in self.__tools.items()}
+
+    def __install(self, tool: HelperTool) -> None:
+        try:
+            startTime = time.time()
+            p = self.Runner.run(tool.InstallCommand, timeout=self.INSTALL_TIMEOUT, cwd=tool.InstallDirectory).wait()
+            output = "\n".join(p.Lines).strip()
+            if output:
+                print(output)
+            CommandRunner.refreshEnvironment()  # The installer may have added a directory to the PATH
+            with self.__lock:
+                tool.LastLookupTime = 0
+            installed = self.resolve(tool.Name) is not None
+            with self.__lock:
+                tool.State = HELPER_READY if installed else HELPER_FAILED
+            if installed:
+                print(f"🟢 Helper tool {tool.Name} was installed in {round(time.time() - startTime, 1)}s")
+            else:
+                print(f"🔴 Helper tool {tool.Name} could not be installed ({'timed out' if p.TimedOut else f'exit code {p.ReturnCode}'})")
+        except Exception as e:
+            report(e)
+            with self.__lock:
+                tool.State = HELPER_FAILED
+
+
+HelperTools = HelperToolRegistry()
@@ -64,36 +64,56 @@ class ChocoPackageManager(PackageManagerWithSources):
     def isEnabled(self) -> bool:
         return not getSettings(f"Disable{self.NAME}")
 
-    def getPackagesForQuery(self, query: str) -> list[Package]:
+    def iterPackagesForQuery(self, query: str, token: CancellationToken = None) -> Iterator[Package]:
         print(f"🔵 Searching packages on chocolatey for query {query}")
-        packages: list[Package] = []
+        packageCount = 0
+        if self.StructuredOutput.isAvailable("search"):
+            try:
+                for fields in self.iterLimitedOutput([self.EXECUTABLE, "search", query], 2, token):
+                    id, version = fields[0], fields[1]
+                    if id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS:
+                        yield Package(formatPackageIdAsName(id), id, version, self.NAME, Choco)
+                return
+            except ValueError as e:
+                self.StructuredOutput.markUnavailable("search", str(e))
         try:
-            p = subprocess.Popen([self.EXECUTABLE, "search", query], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, shell=True, env=os.environ.copy())
-            while p.poll() is None:
-                line: str = str(p.stdout.readline().strip(), "utf-8", errors="ignore")
+            p = self.Runner.run([self.EXECUTABLE, "search", query], token=token)
+            for line in p:
+                line = line.strip()
                 if line:
                     if len(line.split(" ")) >= 2:
                         name = formatPackageIdAsName(line.split(" ")[0])
                         id = line.split(" ")[0]
                         version = line.split(" ")[1]
                         if name not in self.BLACKLISTED_PACKAGE_NAMES and id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS:
-                            packages.append(Package(name, id, version, self.NAME, Choco))
-            return packages
+                            yield Package(name, id, version, self.NAME, Choco)
+                            packageCount += 1
         except Exception as e:
             report(e)
-            return packages
 
-    def getAvailableUpdates(self) -> list[UpgradablePackage]:
+    def iterAvailableUpdates(self, token: CancellationToken = None) -> Iterator[UpgradablePackage]:
         f"""
-        Will retieve the upgradable packages by {self.NAME} in the format of a list[UpgradablePackage] object.
+        Will yield the upgradable packages by {self.NAME} as UpgradablePackage objects, one by one while its output is being parsed.
         """
         print(f"🔵 Starting {self.NAME} search for updates")
+        if self.StructuredOutput.isAvailable("outdated"):
+            try:
+                packageCount = 0
+                for fields in self.iterLimitedOutput([self.EXECUTABLE, "outdated"], 3, token):
+                    id, version, newVersion = fields[0], fields[1], fields[2]
+                    if id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS:
+                        yield UpgradablePackage(formatPackageIdAsName(id), id, version, newVersion, self.NAME, Choco)
+                        packageCount += 1
+                print(f"🟢 {self.NAME} search for updates finished with {packageCount} result(s)")
+                return
+            except ValueError as e:
+                self.StructuredOutput.markUnavailable("outdated", str(e))
         try:
-            packages: list[UpgradablePackage] = []
-            p = subprocess.Popen([self.EXECUTABLE, "outdated"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ.copy(), shell=True)
+            packageCount = 0
+            p = self.Runner.run([self.EXECUTABLE, "outdated"], token=token)
             rawoutput = "\n\n---------" + self.NAME
-            while p.poll() is None:
-                line: str = str(p.stdout.readline().strip(), "utf-8", errors="ignore")
+            for line in p:
+                line = line.strip()
                 rawoutput += "\n" + line
                 if line:
 
@@ -108,25 +128,38 @@ class ChocoPackageManager(PackageManagerWithSources):
                         continue
 
                     if name not in self.BLACKLISTED_PACKAGE_NAMES and id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS:
-                        packages.append(UpgradablePackage(name, id, version, newVersion, source, Choco))
-            print(f"🟢 {self.NAME} search for updates finished with {len(packages)} result(s)")
+                        yield UpgradablePackage(name, id, version, newVersion, source, Choco)
+                        packageCount += 1
+            print(f"🟢 {self.NAME} search for updates finished with {packageCount} result(s)")
             Globals.PackageManagerOutput += rawoutput
-            return packages
+            self.Health.recordCommand(p)
         except Exception as e:
             report(e)
-            return []
+            self.Health.recordFailure(str(e))
 
-    def getInstalledPackages(self, second_attempt=False) -> list[Package]:
+    def iterInstalledPackages(self, token: CancellationToken = None) -> Iterator[Package]:
         f"""
-        Will retieve the intalled packages by {self.NAME} in the format of a list[Package] object.
+        Will yield the intalled packages by {self.NAME} as Package objects, one by one while its output is being parsed.
         """
         print(f"🔵 Starting {self.NAME} search for installed packages")
+        if self.StructuredOutput.isAvailable("list"):
+            try:
+                packageCount = 0
+                for fields in self.iterLimitedOutput([self.EXECUTABLE, "list"], 2, token):
+                    id, version = fields[0], fields[1]
+                    if id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS:
+                        yield Package(formatPackageIdAsName(id), id, version, self.NAME, Choco)
+                        packageCount += 1
+                print(f"🟢 {self.NAME} search for installed packages finished with {packageCount} result(s)")
+                return
+            except ValueError as e:
+                self.StructuredOutput.markUnavailable("list", str(e))
         try:
-            packages: list[Package] = []
-            p = subprocess.Popen([self.EXECUTABLE, "list"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ.copy(), shell=True)
+            packageCount = 0
+            p = self.Runner.run([self.EXECUTABLE, "list"], token=token)
             rawoutput = "\n\n---------" + self.NAME
-            while p.poll() is None:
-                line: str = str(p.stdout.readline().strip(), "utf-8", errors="ignore")
+            for line in p:
+                line = line.strip()
                 rawoutput += "\n" + line
                 if line:
                     if len(line.split(" ")) >= 2:
@@ -137,35 +170,60 @@ class ChocoPackageManager(PackageManagerWithSources):
                         if id == "Chocolatey" and "v" in version:
                             continue
                         if name not in self.BLACKLISTED_PACKAGE_NAMES and id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS:
-                            packages.append(Package(name, id, version, source, Choco))
-            print(f"🟢 {self.NAME} search for installed packages finished with {len(packages)} result(s)")
+                            yield Package(name, id, version, source, Choco)
+                            packageCount += 1
+            print(f"🟢 {self.NAME} search for installed packages finished with {packageCount} result(s)")
             Globals.PackageManagerOutput += rawoutput
-            if len(packages) <= 2 and not second_attempt:
-                print("🟠 Chocolatey got too few installed packages, retrying")
-                return self.getInstalledPackages(second_attempt=True)
+            if packageCount <= 2 and p.ReturnCode != 0 and not p.TimedOut and not p.Cancelled:
+                print(f"🟠 {self.NAME} got too few installed packages and exited with code {p.ReturnCode}")
+                self.Health.recordFailure(_("Too few packages were found"))
             else:
-                return packages
+                self.Health.recordCommand(p)
         except Exception as e:
             report(e)
-            return []
+            self.Health.recordFailure(str(e))
 
-    def getPackageDetails(self, package: Package) -> PackageDetails:
+    def iterLimitedOutput(self, args: list[str], fieldCount: int, token: CancellationToken = None) -> Iterator[list[str]]:
+        """
+        Runs the given command with --limit-output (-r), which prints a pipe-separated id|version|... line per package instead of
+        a table, and yields the fields of each line as soon as it is printed.
+        If the command prints something, but not a single line in that format, ValueError is raised before anything has been yielded,
+        so the caller can fall back to the table output.
+        """
+        p = self.Runner.run(args + ["-r"], token=token)
+        rawoutput = "\n\n---------" + self.NAME
+        packageLines = 0
+        otherLines = 0
+        for line in p:
+            line = line.strip()
+            rawoutput += "\n" + line
+            fields = line.split("|")
+            if len(fields) >= fieldCount:
+                packageLines += 1
+                yield fields
+            elif line:
+                otherLines += 1
+        Globals.PackageManagerOutput += rawoutput
+        if packageLines == 0 and not p.TimedOut and not p.Cancelled and (otherLines > 0 or p.ReturnCode != 0):
+            raise ValueError(f"no pipe-separated lines were printed, and the command exited with code {p.ReturnCode}")
+        self.Health.recordCommand(p)
+
+    def getPackageDetails(self, package: Package, token: CancellationToken = None) -> PackageDetails:
         """
         Will return a PackageDetails object containing the information of the given Package object
         """
         print(f"🔵 Starting get info for {package.Name} on {self.NAME}")
         details = PackageDetails(package)
         try:
-            p = subprocess.Popen([self.EXECUTABLE, "info", package.Id], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ.copy(), shell=True)
+            p = self.Runner.run([self.EXECUTABLE, "info", package.Id], token=token)
             output: list[str] = []
             details.ManifestUrl = f"https://community.chocolatey.org/packages/{package.Id}"
             details.Architectures = ["x86"]
             isReadingDescription = False
             isReadingReleaseNotes = False
-            while p.poll() is None:
-                line = p.stdout.readline()
+            for line in p:
                 if line:
-                    output.append(str(line, encoding='utf-8', errors="ignore"))
+                    output.append(line)
             for line in output:
                 if isReadingDescription:
                     if line.startswith("  "):
@@ -206,13 +264,13 @@ class ChocoPackageManager(PackageManagerWithSources):
             details.Description = ConvertMarkdownToHtml(details.Description)
             details.ReleaseNotes = ConvertMarkdownToHtml(details.ReleaseNotes)
 
-            p = subprocess.Popen([self.EXECUTABLE, "find", "-e", package.Id, "-a"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ.copy(), shell=True)
+            p = self.Runner.run([self.EXECUTABLE, "find", "-e", package.Id, "-a"], token=token)
             print(f"🟢 Starting get info for id {package.Id}")
             output = []
-            while p.poll() is None:
-                line = p.stdout.readline().strip()
-                if b" " in line:
-                    output.append(str(line, encoding='utf-8', errors="ignore"))
+            for line in p:
+                line = line.strip()
+                if " " in line:
+                    output.append(line)
             for line in output:
                 details.Versions.append(line.split(" ")[1])
             print(f"🟢 Get info finished for {package.Name} on {self.NAME}")
@@ -266,8 +324,7 @@ class ChocoPackageManager(PackageManagerWithSources):
         output = ""
         counter = 0
         p.stdin = b"\r\n"
-        while p.poll() is None:
-            line, is_newline = getLineFromStdout(p)
+        for line, is_newline in StdoutLineReader(p):
             line = str(line, encoding='utf-8', errors="ignore").strip()
             if line:
                 widget.addInfoLine.emit((line, is_newline))
@@ -299,8 +356,7 @@ class ChocoPackageManager(PackageManagerWithSources):
         counter = 0
         output = ""
         p.stdin = b"\r\n"
-        while p.poll() is None:
-            line, is_newline = getLineFromStdout(p)
+        for line, is_newline in StdoutLineReader(p):
             line = line.strip()
             line = str(line, encoding='utf-8', errors="ignore").strip()
             if line:
@@ -319,18 +375,21 @@ class ChocoPackageManager(PackageManagerWithSources):
             outputCode = RETURNCODE_NEEDS_ELEVATION
         widget.finishInstallation.emit(outputCode, output)
 
-    def getSources(self) -> None:
+    def getSources(self, token: CancellationToken = None) -> None:
         print(f"🔵 Starting {self.NAME} source search...")
-        p = subprocess.Popen(f"{self.EXECUTABLE} source list", stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ, shell=True)
+        try:
+            p = self.Runner.run([self.EXECUTABLE, "source", "list"], token=token)
+        except FileNotFoundError as e:
+            report(e)
+            return []
         output = []
         sources: list[ManagerSource] = []
         counter = 0
-        while p.poll() is None:
-            line = p.stdout.readline()
+        for line in p:
             line = line.strip()
             if line:
-                if counter > 0 and b"---" not in line:
-                    output.append(str(line, encoding='utf-8', errors="ignore"))
+                if counter > 0 and "---" not in line:
+                    output.append(line)
                 else:
                     counter += 1
         counter = 0
@@ -364,8 +423,7 @@ class ChocoPackageManager(PackageManagerWithSources):
         output = ""
         counter = 0
         p.stdin = b"\r\n"
-        while p.poll() is None:
-            line, is_newline = getLineFromStdout(p)
+        for line, is_newline in StdoutLineReader(p):
             line = str(line, encoding='utf-8', errors="ignore").strip()
             if line:
                 widget.addInfoLine.emit((line, is_newline))
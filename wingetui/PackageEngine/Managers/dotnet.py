@@ -11,6 +11,7 @@ import subprocess
 from wingetui.Core.Tools import *
 from wingetui.Core.Tools import _
 from wingetui.PackageEngine.Classes import *
+from wingetui.PackageEngine.HelperTools import HelperTools
 
 
 class DotNetToolPackageManager(PackageManagerModule):
@@ -37,123 +38,94 @@ class DotNetToolPackageManager(PackageManagerModule):
         self.Properties.UninstallVerb = "uninstall"
         self.Properties.ExecutableName = "dotnet tool"
 
+        HelperTools.register("dotnet-tools-outdated", [self.EXECUTABLE, "tool", "install", "--global", "dotnet-tools-outdated"], GSUDO_EXE_LOCATION)
+
     def isEnabled(self) -> bool:
         return not getSettings(f"Disable{self.NAME}")
 
-    def getPackagesForQuery(self, query: str) -> list[Package]:
+    def iterPackagesForQuery(self, query: str, token: CancellationToken = None) -> Iterator[Package]:
         f"""
-        Will retieve the packages for the given "query: str" from the package manager {self.NAME} in the format of a list[Package] object.
+        Will yield the packages for the given "query: str" from the package manager {self.NAME} as Package objects, one by one while its output is being parsed.
         """
         print(f"🔵 Starting {self.NAME} query search")
         try:
-            p = subprocess.Popen([self.EXECUTABLE, "tool", "search", query], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, shell=True)
-            packages: list[Package] = []
-            dashesPassed = False
-            while p.poll() is None:
-                line: str = str(p.stdout.readline().strip(), "utf-8", errors="ignore")
-                if line:
-                    if not dashesPassed:
-                        if "---" in line:
-                            dashesPassed = True
-                    else:
-                        if len(line.split(" ")) >= 2:
-                            package = list(filter(None, line.split(" ")))
-                            name = formatPackageIdAsName(package[0])
-                            id = package[0]
-                            version = package[1]
-                            source = self.NAME
-                            if name not in self.BLACKLISTED_PACKAGE_NAMES and id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS:
-                                packages.append(Package(name, id, version, source, Dotnet))
-                        else:
-                            continue
+            p = self.Runner.run([self.EXECUTABLE, "tool", "search", query], token=token)
+            packageCount = 0
+            for cells in TableOutputParser(minimumColumnGap=2).parse(p):  # Package ID, Latest Version, Authors, Downloads, Verified
+                name = formatPackageIdAsName(cells[0])
+                id = cells[0]
+                version = cells[1]
+                source = self.NAME
+                if name not in self.BLACKLISTED_PACKAGE_NAMES and id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS:
+                    yield Package(name, id, version, source, Dotnet)
+                    packageCount += 1
 
             print(f"🟢 {self.NAME} package query finished successfully")
-            return packages
         except Exception as e:
             report(e)
-            return []
 
-    def getAvailableUpdates(self) -> list[UpgradablePackage]:
+    def iterAvailableUpdates(self, token: CancellationToken = None) -> Iterator[UpgradablePackage]:
         f"""
-        Will retieve the upgradable packages by {self.NAME} in the format of a list[UpgradablePackage] object.
+        Will yield the upgradable packages by {self.NAME} as UpgradablePackage objects, one by one while its output is being parsed.
         """
         print(f"🔵 Starting {self.NAME} search for updates")
         try:
-            if shutil.which("dotnet-tools-outdated") is None:
-                print("🟡 Installing dotnet-tools-outdated, that was missing...")
-                Command = [self.EXECUTABLE, "tool", "install", "--global", "dotnet-tools-outdated", "--global"]
-                p = subprocess.Popen(Command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, shell=True, cwd=GSUDO_EXE_LOCATION, env=os.environ)
-                p.wait()
-                print(p.stdout.readlines())
-
-            rawoutput: str = "\n--------dotnet\n\n"
-            packages: list[UpgradablePackage] = []
-            p = subprocess.Popen(["dotnet-tools-outdated"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ.copy(), shell=True)
-            dashesPassed = False
-            while p.poll() is None:
-                line: str = str(p.stdout.readline().strip(), "utf-8", errors="ignore")
-                if line:
-                    rawoutput += line + "\n"
-                    if not dashesPassed:
-                        if "---" in line:
-                            dashesPassed = True
-                    else:
-                        if len(line.split(" ")) >= 3:
-                            package = list(filter(None, line.split(" ")))
-                            name = formatPackageIdAsName(package[0])
-                            id = package[0]
-                            version = package[1]
-                            newVersion = package[2]
-                            source = self.NAME
-                            if name not in self.BLACKLISTED_PACKAGE_NAMES and id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS:
-                                packages.append(UpgradablePackage(name, id, version, newVersion, source, Dotnet))
-
-            print(f"🟢 {self.NAME} search for updates finished with {len(packages)} result(s)")
-            Globals.PackageManagerOutput += rawoutput
-            return packages
+            outdatedTool = HelperTools.resolve("dotnet-tools-outdated")
+            if outdatedTool is None:
+                HelperTools.prepare("dotnet-tools-outdated")
+                print(f"🟡 dotnet-tools-outdated is not available yet, {self.NAME} updates will show up once it has been installed")
+                return
+
+            packageCount = 0
+            parser = TableOutputParser(minimumColumnGap=2, requiredColumns=3)
+            p = self.Runner.run([outdatedTool], token=token)
+            for cells in parser.parse(p):
+                name = formatPackageIdAsName(cells[0])
+                id = cells[0]
+                version = cells[1]
+                newVersion = cells[2]
+                source = self.NAME
+                if name not in self.BLACKLISTED_PACKAGE_NAMES and id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS:
+                    yield UpgradablePackage(name, id, version, newVersion, source, Dotnet)
+                    packageCount += 1
+
+            print(f"🟢 {self.NAME} search for updates finished with {packageCount} result(s)")
+            Globals.PackageManagerOutput += "\n--------dotnet\n\n" + "\n".join(parser.Lines)
+            self.Health.recordCommand(p)
         except Exception as e:
             report(e)
-            return []
+            self.Health.recordFailure(str(e))
 
-    def getInstalledPackages(self, second_attempt=False) -> list[Package]:
+    def iterInstalledPackages(self, token: CancellationToken = None) -> Iterator[Package]:
         f"""
-        Will retieve the intalled packages by {self.NAME} in the format of a list[Package] object.
+        Will yield the intalled packages by {self.NAME} as Package objects, one by one while its output is being parsed.
         """
         print(f"🔵 Starting {self.NAME} search for installed packages")
         try:
-            rawoutput = "\n\n-------dotnet\n"
-            packages: list[Package] = []
-            p = subprocess.Popen([self.EXECUTABLE, "tool", "list", "--global"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, shell=True, env=os.environ.copy())
-            dashesPassed = False
-            while p.poll() is None:
-                line: str = str(p.stdout.readline().strip(), "utf-8", errors="ignore")
-                if line:
-                    rawoutput += line + "\n"
-                    if not dashesPassed:
-                        if "---" in line:
-                            dashesPassed = True
-                    else:
-                        if len(line.split(" ")) >= 2:
-                            package = list(filter(None, line.split(" ")))
-                            name = formatPackageIdAsName(package[0])
-                            id = package[0]
-                            version = package[1]
-                            source = self.NAME
-                            if name not in self.BLACKLISTED_PACKAGE_NAMES and id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS:
-                                packages.append(Package(name, id, version, source, Dotnet))
-            print(f"🟢 {self.NAME} search for installed packages finished with {len(packages)} result(s)")
-            Globals.PackageManagerOutput += rawoutput + "\n\n"
-            if len(packages) <= 2 and not second_attempt:
-                print("🟠 Chocolatey got too few installed packages, retrying")
-                return self.getInstalledPackages(second_attempt=True)
+            packageCount = 0
+            parser = TableOutputParser(minimumColumnGap=2)
+            p = self.Runner.run([self.EXECUTABLE, "tool", "list", "--global"], token=token)
+            for cells in parser.parse(p):  # Package Id, Version, Commands
+                name = formatPackageIdAsName(cells[0])
+                id = cells[0]
+                version = cells[1]
+                source = self.NAME
+                if name not in self.BLACKLISTED_PACKAGE_NAMES and id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS:
+                    yield Package(name, id, version, source, Dotnet)
+                    packageCount += 1
+            print(f"🟢 {self.NAME} search for installed packages finished with {packageCount} result(s)")
+            Globals.PackageManagerOutput += "\n\n-------dotnet\n" + "\n".join(parser.Lines) + "\n\n"
+            if packageCount <= 2 and p.ReturnCode != 0 and not p.TimedOut and not p.Cancelled:
+                print(f"🟠 {self.NAME} got too few installed packages and exited with code {p.ReturnCode}")
+                self.Health.recordFailure(_("Too few packages were found"))
             else:
-                return packages
+                self.Health.recordCommand(p)
 
         except Exception as e:
             report(e)
-            return []
+            self.Health.recordFailure(str(e))
 
-    def getPackageDetails(self, package: Package) -> PackageDetails:
+    def getPackageDetails(self, package: Package, token: CancellationToken = None) -> PackageDetails:
         """
         Will return a PackageDetails object containing the information of the given Package object
         """
@@ -251,14 +223,14 @@ class DotNetToolPackageManager(PackageManagerModule):
 
     def installationThread(self, p: subprocess.Popen, options: InstallationOptions, widget: 'PackageInstallerWidget'):
         output = ""
-        while p.poll() is None:
-            line, is_newline = getLineFromStdout(p)
+        for line, is_newline in StdoutLineReader(p):
             line = str(line, encoding='utf-8', errors="ignore").strip()
 
             if line:
                 if is_newline:
                     output += line + "\n"
                 widget.addInfoLine.emit((line, is_newline))
+        p.wait()
         outputCode = p.returncode
         if outputCode != 0:
             if "is already installed" in output:
@@ -276,8 +248,7 @@ class DotNetToolPackageManager(PackageManagerModule):
 
     def uninstallationThread(self, p: subprocess.Popen, options: InstallationOptions, widget: 'PackageInstallerWidget'):
         output = ""
-        while p.poll() is None:
-            line, is_newline = getLineFromStdout(p)
+        for line, is_newline in StdoutLineReader(p):
             line = str(line, encoding='utf-8', errors="ignore").strip()
 
             if line:
@@ -285,6 +256,7 @@ class DotNetToolPackageManager(PackageManagerModule):
                 if is_newline:
                     output += line + "\n"
                 widget.addInfoLine.emit((line, is_newline))
+        p.wait()
         print(p.returncode)
         widget.finishInstallation.emit(p.returncode, output)
 
@@ -292,6 +264,8 @@ class DotNetToolPackageManager(PackageManagerModule):
         o = subprocess.run(f"{self.EXECUTABLE}  --version", shell=True, stdout=subprocess.PIPE)
         Globals.componentStatus[f"{self.NAME}Found"] = o.returncode == 0
         Globals.componentStatus[f"{self.NAME}Version"] = o.stdout.decode('utf-8').replace("\n", "")
+        if o.returncode == 0 and self.isEnabled():
+            HelperTools.prepare("dotnet-tools-outdated")
         if signal:
             signal.emit()
 
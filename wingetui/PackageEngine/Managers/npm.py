@@ -44,17 +44,25 @@ class NPMPackageManager(PackageManagerModule):
     def isEnabled(self) -> bool:
         return not getSettings(f"Disable{self.NAME}")
 
-    def getPackagesForQuery(self, query: str) -> list[Package]:
+    def iterPackagesForQuery(self, query: str, token: CancellationToken = None) -> Iterator[Package]:
         f"""
-        Will retieve the packages for the given "query: str" from the package manager {self.NAME} in the format of a list[Package] object.
+        Will yield the packages for the given "query: str" from the package manager {self.NAME} as Package objects, one by one while its output is being parsed.
         """
         print(f"🔵 Starting {self.NAME} search for dynamic packages")
+        if self.StructuredOutput.isAvailable("search"):
+            try:
+                packages = self.getStructuredPackagesForQuery(query, token)
+                print(f"🟢 {self.NAME} search for dynamic packages finished with {len(packages)} result(s)")
+                yield from packages
+                return
+            except Exception as e:
+                self.StructuredOutput.markUnavailable("search", str(e))
         try:
-            packages: list[Package] = []
-            p = subprocess.Popen(f"{self.EXECUTABLE} search {query}", stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.path.expanduser("~"), env=os.environ.copy(), shell=True)
+            packageCount = 0
+            p = self.Runner.run([self.EXECUTABLE, "search", query], cwd=os.path.expanduser("~"), token=token)
             DashesPassed = False
-            while p.poll() is None:
-                line: str = str(p.stdout.readline().strip(), "utf-8", errors="ignore")
+            for line in p:
+                line = line.strip()
                 if line:
                     if not DashesPassed:
                         if "NAME" in line:
@@ -67,25 +75,32 @@ class NPMPackageManager(PackageManagerModule):
                             version = package[4].strip()
                             source = self.NAME
                             if name not in self.BLACKLISTED_PACKAGE_NAMES and id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS:
-                                packages.append(Package(name, id, version, source, Npm))
-            print(f"🟢 {self.NAME} search for updates finished with {len(packages)} result(s)")
-            return packages
+                                yield Package(name, id, version, source, Npm)
+                                packageCount += 1
+            print(f"🟢 {self.NAME} search for updates finished with {packageCount} result(s)")
         except Exception as e:
             report(e)
-            return []
 
-    def getAvailableUpdates(self) -> list[UpgradablePackage]:
+    def iterAvailableUpdates(self, token: CancellationToken = None) -> Iterator[UpgradablePackage]:
         f"""
-        Will retieve the upgradable packages by {self.NAME} in the format of a list[UpgradablePackage] object.
+        Will yield the upgradable packages by {self.NAME} as UpgradablePackage objects, one by one while its output is being parsed.
         """
         print(f"🔵 Starting {self.NAME} search for updates")
+        if self.StructuredOutput.isAvailable("outdated"):
+            try:
+                packages = self.getStructuredAvailableUpdates(token)
+                print(f"🟢 {self.NAME} search for updates finished with {len(packages)} result(s)")
+                yield from packages
+                return
+            except Exception as e:
+                self.StructuredOutput.markUnavailable("outdated", str(e))
         try:
-            packages: list[UpgradablePackage] = []
-            p = subprocess.Popen(f"{self.EXECUTABLE} outdated", stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.path.expanduser("~"), env=os.environ.copy(), shell=True)
+            packageCount = 0
+            p = self.Runner.run([self.EXECUTABLE, "outdated"], cwd=os.path.expanduser("~"), token=token)
             DashesPassed = False
             rawoutput = "\n\n---------" + self.NAME
-            while p.poll() is None:
-                line: str = str(p.stdout.readline().strip(), "utf-8", errors="ignore")
+            for line in p:
+                line = line.strip()
                 rawoutput += "\n" + line
                 if line:
                     if not DashesPassed:
@@ -100,13 +115,14 @@ class NPMPackageManager(PackageManagerModule):
                             newVersion = package[3].strip()
                             source = self.NAME
                             if name not in self.BLACKLISTED_PACKAGE_NAMES and id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS and newVersion not in self.BLACKLISTED_PACKAGE_VERSIONS:
-                                packages.append(UpgradablePackage(name, id, version, newVersion, source, Npm))
+                                yield UpgradablePackage(name, id, version, newVersion, source, Npm)
+                                packageCount += 1
             Globals.PackageManagerOutput += rawoutput
-            p = subprocess.Popen(f"{self.EXECUTABLE} outdated -g", stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.path.expanduser("~"), env=os.environ.copy(), shell=True)
+            p = self.Runner.run([self.EXECUTABLE, "outdated", "-g"], cwd=os.path.expanduser("~"), token=token)
             DashesPassed = False
             rawoutput = "\n\n---------" + self.NAME + "@global"
-            while p.poll() is None:
-                line: str = str(p.stdout.readline().strip(), "utf-8", errors="ignore")
+            for line in p:
+                line = line.strip()
                 rawoutput += "\n" + line
                 if line:
                     if not DashesPassed:
@@ -121,26 +137,35 @@ class NPMPackageManager(PackageManagerModule):
                             newVersion = package[3].strip()
                             source = self.NAME + "@global"
                             if name not in self.BLACKLISTED_PACKAGE_NAMES and id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS and newVersion not in self.BLACKLISTED_PACKAGE_VERSIONS:
-                                packages.append(UpgradablePackage(name, id, version, newVersion, source, Npm))
+                                yield UpgradablePackage(name, id, version, newVersion, source, Npm)
+                                packageCount += 1
             Globals.PackageManagerOutput += rawoutput
-            print(f"🟢 {self.NAME} search for updates finished with {len(packages)} result(s)")
-            return packages
+            print(f"🟢 {self.NAME} search for updates finished with {packageCount} result(s)")
+            self.Health.recordCommand(p)
         except Exception as e:
             report(e)
-            return []
+            self.Health.recordFailure(str(e))
 
-    def getInstalledPackages(self) -> list[Package]:
+    def iterInstalledPackages(self, token: CancellationToken = None) -> Iterator[Package]:
         f"""
-        Will retieve the intalled packages by {self.NAME} in the format of a list[Package] object.
+        Will yield the intalled packages by {self.NAME} as Package objects, one by one while its output is being parsed.
         """
         print(f"🔵 Starting {self.NAME} search for installed packages")
+        if self.StructuredOutput.isAvailable("list"):
+            try:
+                packages = self.getStructuredInstalledPackages(token)
+                print(f"🟢 {self.NAME} search for installed packages finished with {len(packages)} result(s)")
+                yield from packages
+                return
+            except Exception as e:
+                self.StructuredOutput.markUnavailable("list", str(e))
         try:
-            packages: list[Package] = []
-            p = subprocess.Popen(f"{self.EXECUTABLE} list", stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.path.expanduser("~"), env=os.environ.copy(), shell=True)
+            packageCount = 0
+            p = self.Runner.run([self.EXECUTABLE, "list"], cwd=os.path.expanduser("~"), token=token)
             currentScope = ""
             rawoutput = "\n\n---------" + self.NAME
-            while p.poll() is None:
-                line: str = str(p.stdout.readline().strip(), "utf-8", errors="ignore")
+            for line in p:
+                line = line.strip()
                 rawoutput += "\n" + line
                 if line and len(line) > 4:
                     if line[1:3] in ("--", "──"):
@@ -152,15 +177,16 @@ class NPMPackageManager(PackageManagerModule):
                             id = idString.strip()
                             version = package[-1].strip()
                             if name not in self.BLACKLISTED_PACKAGE_NAMES and id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS:
-                                packages.append(Package(name, id, version, self.NAME + currentScope, Npm))
+                                yield Package(name, id, version, self.NAME + currentScope, Npm)
+                                packageCount += 1
                     elif "@" in line.split(" ")[0]:
                         currentScope = "@" + line.split(" ")[0][:-1]
                         print("🔵 NPM changed scope to", currentScope)
             Globals.PackageManagerOutput += rawoutput
-            p = subprocess.Popen(f"{self.EXECUTABLE} list -g", stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.path.expanduser("~"), env=os.environ.copy(), shell=True)
+            p = self.Runner.run([self.EXECUTABLE, "list", "-g"], cwd=os.path.expanduser("~"), token=token)
             rawoutput = "\n\n---------" + self.NAME
-            while p.poll() is None:
-                line: str = str(p.stdout.readline().strip(), "utf-8", errors="ignore")
+            for line in p:
+                line = line.strip()
                 rawoutput += "\n" + line
                 if line and len(line) > 4:
                     if line[1:3] in ("--", "──"):
@@ -172,15 +198,75 @@ class NPMPackageManager(PackageManagerModule):
                             id = idString.strip()
                             version = package[-1].strip()
                             if name not in self.BLACKLISTED_PACKAGE_NAMES and id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS:
-                                packages.append(Package(name, id, version, self.NAME + "@global", Npm))
-            print(f"🟢 {self.NAME} search for installed packages finished with {len(packages)} result(s)")
+                                yield Package(name, id, version, self.NAME + "@global", Npm)
+                                packageCount += 1
+            print(f"🟢 {self.NAME} search for installed packages finished with {packageCount} result(s)")
             Globals.PackageManagerOutput += rawoutput
-            return packages
+            self.Health.recordCommand(p)
         except Exception as e:
             report(e)
-            return []
+            self.Health.recordFailure(str(e))
 
-    def getPackageDetails(self, package: Package) -> PackageDetails:
+    def getStructuredPackagesForQuery(self, query: str, token: CancellationToken = None) -> list[Package]:
+        """
+        Reads the search results from npm search --json. Raises an exception if the JSON output can't be used.
+        """
+        packages: list[Package] = []
+        p = self.Runner.run([self.EXECUTABLE, "search", "--json", query], cwd=os.path.expanduser("~"), token=token)
+        for entry in asList(self.readJsonOutput(p)):
+            id = entry["name"]
+            version = entry["version"]
+            if id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS:
+                packages.append(Package(formatPackageIdAsName(id[1:] if id[0] == "@" else id), id, version, self.NAME, Npm))
+        return packages
+
+    def getStructuredAvailableUpdates(self, token: CancellationToken = None) -> list[UpgradablePackage]:
+        """
+        Reads the upgradable packages from npm outdated --json, for the user and the global scopes. Raises an exception if the JSON output can't be used.
+        npm outdated exits with code 1 when there are updates, so only the document is checked.
+        """
+        packages: list[UpgradablePackage] = []
+        for scopeArgs, source in (([], self.NAME), (["-g"], self.NAME + "@global")):
+            p = self.Runner.run([self.EXECUTABLE, "outdated", "--json"] + scopeArgs, cwd=os.path.expanduser("~"), token=token)
+            document = self.readJsonOutput(p) or {}
+            if "error" in document:
+                raise ValueError(document["error"].get("summary", "npm reported an error"))
+            for id, entry in document.items():
+                if isinstance(entry, list):  # The same package is outdated on more than one location
+                    entry = entry[0]
+                version = entry.get("current", "")
+                newVersion = entry.get("latest", "")
+                if not version:
+                    continue  # Missing dependencies are reported too, but there is nothing installed to update
+                if id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS and newVersion not in self.BLACKLISTED_PACKAGE_VERSIONS:
+                    packages.append(UpgradablePackage(formatPackageIdAsName(id[1:] if id[0] == "@" else id), id, version, newVersion, source, Npm))
+        self.Health.recordCommand(p)
+        return packages
+
+    def getStructuredInstalledPackages(self, token: CancellationToken = None) -> list[Package]:
+        """
+        Reads the installed packages from npm list --json, for the user and the global scopes. Raises an exception if the JSON output can't be used.
+        """
+        packages: list[Package] = []
+        for scopeArgs in ([], ["-g"]):
+            p = self.Runner.run([self.EXECUTABLE, "list", "--json", "--depth=0"] + scopeArgs, cwd=os.path.expanduser("~"), token=token)
+            document = self.readJsonOutput(p) or {}
+            if "error" in document and "dependencies" not in document:  # Problems such as extraneous packages are reported as an error too, along with the packages
+                raise ValueError(document["error"].get("summary", "npm reported an error"))
+            if scopeArgs:
+                source = self.NAME + "@global"
+            else:
+                source = self.NAME + ("@" + document["name"] if document.get("name") else "")  # The table output shows the name of the folder as the scope
+            for id, entry in document.get("dependencies", {}).items():
+                version = entry.get("version", "")
+                if not version:
+                    continue  # Declared but not installed
+                if id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS:
+                    packages.append(Package(formatPackageIdAsName(id[1:] if id[0] == "@" else id), id, version, source, Npm))
+        self.Health.recordCommand(p)
+        return packages
+
+    def getPackageDetails(self, package: Package, token: CancellationToken = None) -> PackageDetails:
         """
         Will return a PackageDetails object containing the information of the given Package object
         """
@@ -191,12 +277,11 @@ class NPMPackageManager(PackageManagerModule):
             details.ManifestUrl = f"https://www.npmjs.com/package/{package.Id}"
             details.ReleaseNotesUrl = f"https://www.npmjs.com/package/{package.Id}?activeTab=versions"
             details.Scopes = ["Global"]
-            p = subprocess.Popen(f"{self.EXECUTABLE} info {package.Id}", stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.path.expanduser("~"), env=os.environ, shell=True)
+            p = self.Runner.run([self.EXECUTABLE, "info", package.Id], cwd=os.path.expanduser("~"), token=token)
             output: list[str] = []
-            while p.poll() is None:
-                line = p.stdout.readline()
+            for line in p:
                 if line:
-                    output.append(str(line, encoding='utf-8', errors="ignore").strip())
+                    output.append(line.strip())
             lineNo = 0
             ReadingMaintainer = False
             for line in output:
@@ -227,10 +312,10 @@ class NPMPackageManager(PackageManagerModule):
             details.Description = ConvertMarkdownToHtml(details.Description)
             details.ReleaseNotes = ConvertMarkdownToHtml(details.ReleaseNotes)
 
-            p = subprocess.Popen(f"{self.EXECUTABLE} info {package.Id} versions --json", stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.path.expanduser("~"), env=os.environ, shell=True)
+            p = self.Runner.run([self.EXECUTABLE, "info", package.Id, "versions", "--json"], cwd=os.path.expanduser("~"), token=token)
             output: list[str] = []
-            while p.poll() is None:
-                line = str(p.stdout.readline(), encoding='utf-8', errors="ignore").strip()
+            for line in p:
+                line = line.strip()
                 if line.startswith("\""):
                     details.Versions = [line[:-1].replace("\"", "")] + details.Versions  # The addition order is inverted, so the latest version shows at the top
             print(f"🟢 Get info finished for {package.Name} on {self.NAME}")
@@ -279,14 +364,14 @@ class NPMPackageManager(PackageManagerModule):
 
     def installationThread(self, p: subprocess.Popen, options: InstallationOptions, widget: 'PackageInstallerWidget'):
         output = ""
-        while p.poll() is None:
-            line, is_newline = getLineFromStdout(p)
+        for line, is_newline in StdoutLineReader(p):
             line = line.strip()
             line = str(line, encoding='utf-8', errors="ignore").strip()
             if line:
                 widget.addInfoLine.emit((line, is_newline))
                 if is_newline:
                     output += line + "\n"
+        p.wait()
         match p.returncode:
             case 0:
                 outputCode = RETURNCODE_OPERATION_SUCCEEDED
@@ -310,14 +395,14 @@ class NPMPackageManager(PackageManagerModule):
     def uninstallationThread(self, p: subprocess.Popen, options: InstallationOptions, widget: 'PackageInstallerWidget'):
         outputCode = 1
         output = ""
-        while p.poll() is None:
-            line, is_newline = getLineFromStdout(p)
+        for line, is_newline in StdoutLineReader(p):
             line = line.strip()
             line = str(line, encoding='utf-8', errors="ignore").strip()
             if line:
                 widget.addInfoLine.emit((line, is_newline))
                 if is_newline:
                     output += line + "\n"
+        p.wait()
         match p.returncode:
             case 0:
                 outputCode = RETURNCODE_OPERATION_SUCCEEDED
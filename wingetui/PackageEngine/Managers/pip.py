@@ -12,6 +12,7 @@ import subprocess
 from wingetui.Core.Tools import *
 from wingetui.Core.Tools import _
 from wingetui.PackageEngine.Classes import *
+from wingetui.PackageEngine.HelperTools import HelperTools
 
 
 class PipPackageManager(PackageManagerModule):
@@ -44,26 +45,28 @@ class PipPackageManager(PackageManagerModule):
         self.BLACKLISTED_PACKAGE_IDS = ["WARNING:", "[notice]", "Package"]
         self.BLACKLISTED_PACKAGE_VERSIONS = ["Ignoring", "invalie"]
 
+        HelperTools.register("parse_pip_search", self.EXECUTABLE.split(" ") + ["install", "parse_pip_search", "--no-input", "--no-color", "--no-python-version-warning", "--no-cache"], GSUDO_EXE_LOCATION)
+
     def isEnabled(self) -> bool:
         return not getSettings(f"Disable{self.NAME}")
 
-    def getPackagesForQuery(self, query: str) -> list[Package]:
+    def iterPackagesForQuery(self, query: str, token: CancellationToken = None) -> Iterator[Package]:
         f"""
-        Will retieve the packages for the given "query: str" from the package manager {self.NAME} in the format of a list[Package] object.
+        Will yield the packages for the given "query: str" from the package manager {self.NAME} as Package objects, one by one while its output is being parsed.
         """
         print(f"🔵 Starting {self.NAME} search for dynamic packages")
         try:
-            if shutil.which("parse_pip_search") is None:
-                print("🟡 Installing pip-search, that was missing...")
-                Command = self.EXECUTABLE.split(" ") + ["install", "parse_pip_search", "--no-input", "--no-color", "--no-python-version-warning", "--no-cache"]
-                p = subprocess.Popen(Command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, shell=True, cwd=GSUDO_EXE_LOCATION, env=os.environ)
-                p.wait()
-            packages: list[Package] = []
-            p = subprocess.Popen(f"parse_pip_search {query}", stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ.copy(), shell=True)
+            searchTool = HelperTools.resolve("parse_pip_search")
+            if searchTool is None:
+                HelperTools.prepare("parse_pip_search")
+                yield from self.getExactMatchForQuery(query, token)
+                return
+            packageCount = 0
+            p = self.Runner.run([searchTool, query], token=token)
             DashesPassed = False
             rawoutput = "\n\n---------" + self.NAME
-            while p.poll() is None:
-                line: str = str(p.stdout.readline().strip(), "utf-8", errors="ignore")
+            for line in p:
+                line = line.strip()
                 rawoutput += "\n" + line
                 if line:
                     if not DashesPassed:
@@ -77,82 +80,122 @@ class PipPackageManager(PackageManagerModule):
                             version = package[1]
                             source = self.NAME
                             if name not in self.BLACKLISTED_PACKAGE_NAMES and id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS:
-                                packages.append(Package(name, id, version, source, Pip))
-            print(f"🟢 {self.NAME} search for updates finished with {len(packages)} result(s)")
+                                yield Package(name, id, version, source, Pip)
+                                packageCount += 1
+            print(f"🟢 {self.NAME} search for updates finished with {packageCount} result(s)")
             Globals.PackageManagerOutput += rawoutput
-            return packages
         except Exception as e:
             report(e)
-            return []
 
-    def getAvailableUpdates(self) -> list[UpgradablePackage]:
+    def getExactMatchForQuery(self, query: str, token: CancellationToken = None) -> list[Package]:
+        """
+        Used while parse_pip_search is not available: returns the package whose name is exactly the given query, if there is one.
+        """
+        print(f"🟡 parse_pip_search is not available yet, {self.NAME} will only look for an exact match")
+        p = self.Runner.run(self.EXECUTABLE.split(" ") + ["index", "versions", query.strip()], token=token).wait()
+        Globals.PackageManagerOutput += "\n\n---------" + self.NAME + "\n" + "\n".join(p.Lines)
+        for line in p.Lines:
+            match = re.match(r"^(\S+) \((\S+)\)$", line.strip())
+            if match:
+                return [Package(formatPackageIdAsName(match.group(1)), match.group(1), match.group(2), self.NAME, Pip)]
+        return []
+
+    def iterAvailableUpdates(self, token: CancellationToken = None) -> Iterator[UpgradablePackage]:
         f"""
-        Will retieve the upgradable packages by {self.NAME} in the format of a list[UpgradablePackage] object.
+        Will yield the upgradable packages by {self.NAME} as UpgradablePackage objects, one by one while its output is being parsed.
         """
         print(f"🔵 Starting {self.NAME} search for updates")
+        if self.StructuredOutput.isAvailable("outdated"):
+            try:
+                packages = self.getStructuredAvailableUpdates(token)
+                print(f"🟢 {self.NAME} search for updates finished with {len(packages)} result(s)")
+                yield from packages
+                return
+            except Exception as e:
+                self.StructuredOutput.markUnavailable("outdated", str(e))
         try:
-            packages: list[UpgradablePackage] = []
-            p = subprocess.Popen(f"{self.EXECUTABLE} list --outdated", stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ.copy(), shell=True)
-            DashesPassed = False
-            rawoutput = "\n\n---------" + self.NAME
-            while p.poll() is None:
-                line: str = str(p.stdout.readline().strip(), "utf-8", errors="ignore")
-                rawoutput += "\n" + line
-                if line:
-                    if not DashesPassed:
-                        if "----" in line:
-                            DashesPassed = True
-                    else:
-                        package = list(filter(None, line.split(" ")))
-                        if len(package) >= 3:
-                            name = formatPackageIdAsName(package[0])
-                            id = package[0]
-                            version = package[1]
-                            newVersion = package[2]
-                            source = self.NAME
-                            if name not in self.BLACKLISTED_PACKAGE_NAMES and id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS and newVersion not in self.BLACKLISTED_PACKAGE_VERSIONS:
-                                packages.append(UpgradablePackage(name, id, version, newVersion, source, Pip))
-            print(f"🟢 {self.NAME} search for updates finished with {len(packages)} result(s)")
-            Globals.PackageManagerOutput += rawoutput
-            return packages
+            packageCount = 0
+            parser = TableOutputParser(requiredColumns=3)
+            p = self.Runner.run(self.EXECUTABLE.split(" ") + ["list", "--outdated"], token=token)
+            for cells in parser.parse(p):  # Package, Version, Latest, Type
+                name = formatPackageIdAsName(cells[0])
+                id = cells[0]
+                version = cells[1]
+                newVersion = cells[2]
+                source = self.NAME
+                if name not in self.BLACKLISTED_PACKAGE_NAMES and id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS and newVersion not in self.BLACKLISTED_PACKAGE_VERSIONS:
+                    yield UpgradablePackage(name, id, version, newVersion, source, Pip)
+                    packageCount += 1
+            print(f"🟢 {self.NAME} search for updates finished with {packageCount} result(s)")
+            Globals.PackageManagerOutput += "\n\n---------" + self.NAME + "\n" + "\n".join(parser.Lines)
+            self.Health.recordCommand(p)
         except Exception as e:
             report(e)
-            return []
+            self.Health.recordFailure(str(e))
 
-    def getInstalledPackages(self, second_attempt: bool = False) -> list[Package]:
+    def iterInstalledPackages(self, token: CancellationToken = None) -> Iterator[Package]:
         f"""
-        Will retieve the intalled packages by {self.NAME} in the format of a list[Package] object.
+        Will yield the intalled packages by {self.NAME} as Package objects, one by one while its output is being parsed.
         """
         print(f"🔵 Starting {self.NAME} search for installed packages")
+        if self.StructuredOutput.isAvailable("list"):
+            try:
+                packages = self.getStructuredInstalledPackages(token)
+                print(f"🟢 {self.NAME} search for installed packages finished with {len(packages)} result(s)")
+                yield from packages
+                return
+            except Exception as e:
+                self.StructuredOutput.markUnavailable("list", str(e))
         try:
-            packages: list[Package] = []
-            p = subprocess.Popen(f"{self.EXECUTABLE} list", stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ.copy(), shell=True)
-            DashesPassed = False
-            while p.poll() is None:
-                line: str = str(p.stdout.readline().strip(), "utf-8", errors="ignore")
-                if line:
-                    if not DashesPassed:
-                        if "----" in line:
-                            DashesPassed = True
-                    else:
-                        package = list(filter(None, line.split(" ")))
-                        if len(package) >= 2:
-                            name = formatPackageIdAsName(package[0])
-                            id = package[0]
-                            version = package[1]
-                            if name not in self.BLACKLISTED_PACKAGE_NAMES and id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS:
-                                packages.append(Package(name, id, version, self.NAME, Pip))
-            print(f"🟢 {self.NAME} search for installed packages finished with {len(packages)} result(s)")
-            if len(packages) == 0 and not second_attempt:
-                print("🟠 Pip got too few installed packages, retrying")
-                return self.getInstalledPackages(second_attempt=True)
+            packageCount = 0
+            p = self.Runner.run(self.EXECUTABLE.split(" ") + ["list"], token=token)
+            for cells in TableOutputParser().parse(p):  # Package, Version
+                name = formatPackageIdAsName(cells[0])
+                id = cells[0]
+                version = cells[1]
+                if name not in self.BLACKLISTED_PACKAGE_NAMES and id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS:
+                    yield Package(name, id, version, self.NAME, Pip)
+                    packageCount += 1
+            print(f"🟢 {self.NAME} search for installed packages finished with {packageCount} result(s)")
+            if packageCount == 0 and p.ReturnCode != 0 and not p.TimedOut and not p.Cancelled:
+                print(f"🟠 {self.NAME} got too few installed packages and exited with code {p.ReturnCode}")
+                self.Health.recordFailure(_("Too few packages were found"))
             else:
-                return packages
+                self.Health.recordCommand(p)
         except Exception as e:
             report(e)
-            return []
+            self.Health.recordFailure(str(e))
 
-    def getPackageDetails(self, package: Package) -> PackageDetails:
+    def getStructuredAvailableUpdates(self, token: CancellationToken = None) -> list[UpgradablePackage]:
+        """
+        Reads the upgradable packages from pip list --outdated --format=json. Raises an exception if the JSON output can't be used.
+        """
+        packages: list[UpgradablePackage] = []
+        p = self.Runner.run(self.EXECUTABLE.split(" ") + ["list", "--outdated", "--format=json"], token=token)
+        for entry in asList(self.readJsonOutput(p)):
+            id = entry["name"]
+            version = entry["version"]
+            newVersion = entry["latest_version"]
+            if id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS and newVersion not in self.BLACKLISTED_PACKAGE_VERSIONS:
+                packages.append(UpgradablePackage(formatPackageIdAsName(id), id, version, newVersion, self.NAME, Pip))
+        self.Health.recordCommand(p)
+        return packages
+
+    def getStructuredInstalledPackages(self, token: CancellationToken = None) -> list[Package]:
+        """
+        Reads the installed packages from pip list --format=json. Raises an exception if the JSON output can't be used.
+        """
+        packages: list[Package] = []
+        p = self.Runner.run(self.EXECUTABLE.split(" ") + ["list", "--format=json"], token=token)
+        for entry in asList(self.readJsonOutput(p)):
+            id = entry["name"]
+            version = entry["version"]
+            if id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS:
+                packages.append(Package(formatPackageIdAsName(id), id, version, self.NAME, Pip))
+        self.Health.recordCommand(p)
+        return packages
+
+    def getPackageDetails(self, package: Package, token: CancellationToken = None) -> PackageDetails:
         """
         Will return a PackageDetails object containing the information of the given Package object
         """
@@ -207,12 +250,11 @@ class PipPackageManager(PackageManagerModule):
             details.Description = ConvertMarkdownToHtml(details.Description)
             details.ReleaseNotes = ConvertMarkdownToHtml(details.ReleaseNotes)
 
-            p = subprocess.Popen(f"{self.EXECUTABLE} index versions {package.Id}", stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.path.expanduser("~"), env=os.environ, shell=True)
+            p = self.Runner.run(self.EXECUTABLE.split(" ") + ["index", "versions", package.Id], cwd=os.path.expanduser("~"), token=token)
             output: list[str] = []
-            while p.poll() is None:
-                line = p.stdout.readline()
+            for line in p:
                 if line:
-                    output.append(str(line, encoding='utf-8', errors="ignore").strip())
+                    output.append(line.strip())
             for line in output:
                 if "Available versions:" in line:
                     details.Versions = [v.strip() for v in line.replace("Available versions:", "").split(",")]
@@ -270,14 +312,14 @@ class PipPackageManager(PackageManagerModule):
 
     def installationThread(self, p: subprocess.Popen, options: InstallationOptions, widget: 'PackageInstallerWidget'):
         output = ""
-        while p.poll() is None:
-            line, is_newline = getLineFromStdout(p)
+        for line, is_newline in StdoutLineReader(p):
             line = line.strip()
             line = str(line, encoding='utf-8', errors="ignore").strip()
             if line:
                 widget.addInfoLine.emit((line, is_newline))
                 if is_newline:
                     output += line + "\n"
+        p.wait()
         match p.returncode:
             case 0:
                 outputCode = RETURNCODE_OPERATION_SUCCEEDED
@@ -300,13 +342,13 @@ class PipPackageManager(PackageManagerModule):
     def uninstallationThread(self, p: subprocess.Popen, options: InstallationOptions, widget: 'PackageInstallerWidget'):
         outputCode = 1
         output = ""
-        while p.poll() is None:
-            line, is_newline = getLineFromStdout(p)
+        for line, is_newline in StdoutLineReader(p):
             line = line.strip()
             line = str(line, encoding='utf-8', errors="ignore").strip()
             if line:
                 widget.addInfoLine.emit((line, is_newline))
                 output += line + "\n"
+        p.wait()
         match p.returncode:
             case 0:
                 outputCode = RETURNCODE_OPERATION_SUCCEEDED
@@ -321,6 +363,8 @@ class PipPackageManager(PackageManagerModule):
         o = subprocess.run(f"{self.EXECUTABLE} -V", shell=True, stdout=subprocess.PIPE)
         Globals.componentStatus[f"{self.NAME}Found"] = shutil.which("python.exe") is not None
         Globals.componentStatus[f"{self.NAME}Version"] = o.stdout.decode('utf-8').replace("\n", " ").replace("\r", " ")
+        if o.returncode == 0 and self.isEnabled():
+            HelperTools.prepare("parse_pip_search")
         if signal:
             signal.emit()
 
@@ -11,6 +11,7 @@ import subprocess
 from wingetui.Core.Tools import *
 from wingetui.Core.Tools import _
 from wingetui.PackageEngine.Classes import *
+from wingetui.PackageEngine.PowerShellHosts import PowerShellHosts, quotePowerShellArgument
 
 
 class PowershellPackageManager(PackageManagerWithSources):
@@ -48,17 +49,17 @@ class PowershellPackageManager(PackageManagerWithSources):
     def isEnabled(self) -> bool:
         return not getSettings(f"Disable{self.NAME}")
 
-    def getPackagesForQuery(self, query: str) -> list[Package]:
+    def iterPackagesForQuery(self, query: str, token: CancellationToken = None) -> Iterator[Package]:
         f"""
-        Will retieve the packages for the given "query: str" from the package manager {self.NAME} in the format of a list[Package] object.
+        Will yield the packages for the given "query: str" from the package manager {self.NAME} as Package objects, one by one while its output is being parsed.
         """
         print(f"🔵 Starting {self.NAME} query search")
         try:
-            p = subprocess.Popen([self.EXECUTABLE, "-Command", "Find-Module", query], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, shell=True)
-            packages: list[Package] = []
+            p = PowerShellHosts.run(f"Find-Module {quotePowerShellArgument(query)}", self.Runner, token=token)
+            packageCount = 0
             dashesPassed = False
-            while p.poll() is None:
-                line: str = str(p.stdout.readline().strip(), "utf-8", errors="ignore")
+            for line in p:
+                line = line.strip()
                 if line:
                     if not dashesPassed:
                         if "---" in line:
@@ -71,19 +72,18 @@ class PowershellPackageManager(PackageManagerWithSources):
                         source = f"{self.NAME}: {package[2]}"
 
                         if name not in self.BLACKLISTED_PACKAGE_NAMES and id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS:
-                            packages.append(Package(name, id, version, source, Powershell))
+                            yield Package(name, id, version, source, Powershell)
+                            packageCount += 1
 
             print(f"🟢 {self.NAME} package query finished successfully")
-            return packages
         except Exception as e:
             report(e)
-            return []
 
-    def getAvailableUpdates(self) -> list[UpgradablePackage]:
+    def iterAvailableUpdates(self, token: CancellationToken = None) -> Iterator[UpgradablePackage]:
         f"""
-        Will retieve the upgradable packages by {self.NAME} in the format of a list[UpgradablePackage] object.
+        Will yield the upgradable packages by {self.NAME} as UpgradablePackage objects, one by one while its output is being parsed.
         """
-        Sources = self.getSources()
+        Sources = self.getSources(token)
         SourceDict = "{"
         for source in Sources:
             SourceDict += f'"{source.Name}" = "{source.Url}";'
@@ -128,14 +128,13 @@ class PowershellPackageManager(PackageManagerWithSources):
         }
 
         Get-InstalledModule | Test-GalleryModuleUpdate
-        exit
         """
         print(f"🔵 Starting {self.NAME} search for updates")
         try:
-            packages: list[UpgradablePackage] = []
-            p = subprocess.run(self.EXECUTABLE, input=bytes(Command, "utf-8"), stdout=subprocess.PIPE, stderr=subprocess.STDOUT, cwd=os.getcwd(), env=os.environ.copy(), shell=True)
+            packageCount = 0
+            p = PowerShellHosts.run(Command, self.Runner, token=token)
             rawoutput = "\n\n---------"
-            for line in p.stdout.decode("utf-8").split("\n"):
+            for line in p:
                 rawoutput += "\n" + line
                 if line and not line.startswith(">>") and not line.startswith("PS "):
                     package = list(filter(None, line.split("|")))
@@ -147,27 +146,28 @@ class PowershellPackageManager(PackageManagerWithSources):
                         source = f"{self.NAME}: {package[3]}"
 
                         if name not in self.BLACKLISTED_PACKAGE_NAMES and id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS:
-                            packages.append(UpgradablePackage(name, id, version, newVersion, source, self))
+                            yield UpgradablePackage(name, id, version, newVersion, source, self)
+                            packageCount += 1
 
-            print(f"🟢 {self.NAME} search for updates finished with {len(packages)} result(s)")
+            print(f"🟢 {self.NAME} search for updates finished with {packageCount} result(s)")
             Globals.PackageManagerOutput += rawoutput
-            return packages
+            self.Health.recordCommand(p)
         except Exception as e:
             report(e)
-            return []
+            self.Health.recordFailure(str(e))
 
-    def getInstalledPackages(self) -> list[Package]:
+    def iterInstalledPackages(self, token: CancellationToken = None) -> Iterator[Package]:
         f"""
-        Will retieve the intalled packages by {self.NAME} in the format of a list[Package] object.
+        Will yield the intalled packages by {self.NAME} as Package objects, one by one while its output is being parsed.
         """
         print(f"🔵 Starting {self.NAME} search for installed packages")
         try:
-            packages: list[Package] = []
-            p = subprocess.Popen([self.EXECUTABLE, "-Command", "Get-InstalledModule"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ.copy(), shell=True)
+            packageCount = 0
+            p = PowerShellHosts.run("Get-InstalledModule", self.Runner, token=token)
             rawoutput = "\n\n---------"
             dashesPassed = False
-            while p.poll() is None:
-                line: str = str(p.stdout.readline().strip(), "utf-8", errors="ignore")
+            for line in p:
+                line = line.strip()
                 rawoutput += "\n" + line
                 if line:
                     if not dashesPassed:
@@ -181,16 +181,17 @@ class PowershellPackageManager(PackageManagerWithSources):
                         source = f"{self.NAME}: {package[2]}"
 
                         if name not in self.BLACKLISTED_PACKAGE_NAMES and id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS:
-                            packages.append(Package(name, id, version, source, Powershell))
+                            yield Package(name, id, version, source, Powershell)
+                            packageCount += 1
 
-            print(f"🟢 {self.NAME} search for installed packages finished with {len(packages)} result(s)")
+            print(f"🟢 {self.NAME} search for installed packages finished with {packageCount} result(s)")
             Globals.PackageManagerOutput += rawoutput
-            return packages
+            self.Health.recordCommand(p)
         except Exception as e:
             report(e)
-            return []
+            self.Health.recordFailure(str(e))
 
-    def getPackageDetails(self, package: Package) -> PackageDetails:
+    def getPackageDetails(self, package: Package, token: CancellationToken = None) -> PackageDetails:
         """
         Will return a PackageDetails object containing the information of the given Package object
         """
@@ -198,10 +199,10 @@ class PowershellPackageManager(PackageManagerWithSources):
         details = PackageDetails(package)
         details.Scopes = ["AllUsers", "CurrentUser"]
         try:
-            p = subprocess.Popen(f"\"Find-Module -Name {package.Id} | Get-Member -MemberType NoteProperty\"", executable=shutil.which("powershell"), stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ.copy(), shell=True)
+            p = PowerShellHosts.run(f"Find-Module -Name {quotePowerShellArgument(package.Id)} | Get-Member -MemberType NoteProperty", self.Runner, token=token)
 
-            while p.poll() is None:
-                line: str = str(p.stdout.readline().strip(), "utf-8", errors="ignore")
+            for line in p:
+                line = line.strip()
                 if line and "NoteProperty" in line:
                     if line.startswith("Description"):
                         content = "=".join(line.split("=")[1:]).strip()
@@ -243,10 +244,10 @@ class PowershellPackageManager(PackageManagerWithSources):
                         content = "=".join(line.split("=")[1:]).strip()
                         details.UpdateDate = content if content != "null" else ""
 
-            p = subprocess.Popen(f"\"Find-Module -Name {package.Id} -AllVersions\"", executable=shutil.which("powershell"), stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ.copy(), shell=True)
+            p = PowerShellHosts.run(f"Find-Module -Name {quotePowerShellArgument(package.Id)} -AllVersions", self.Runner, token=token)
 
-            while p.poll() is None:
-                line: str = str(p.stdout.readline().strip(), "utf-8", errors="ignore")
+            for line in p:
+                line = line.strip()
                 if line and package.Id in line:
                     details.Versions += [line.split(" ")[0].strip()]
 
@@ -305,8 +306,7 @@ class PowershellPackageManager(PackageManagerWithSources):
 
     def installationThread(self, p: subprocess.Popen, options: InstallationOptions, widget: 'PackageInstallerWidget'):
         output = ""
-        while p.poll() is None:
-            line, is_newline = getLineFromStdout(p)
+        for line, is_newline in StdoutLineReader(p):
             line = line.strip()
             line = str(line, encoding='utf-8', errors="ignore").strip()
             if line:
@@ -316,6 +316,7 @@ class PowershellPackageManager(PackageManagerWithSources):
                     widget.counterSignal.emit(3)
                 elif "installing" in line:
                     widget.counterSignal.emit(7)
+        p.wait()
         c = p.returncode
         if "AdminPrivilegesAreRequired" in output:
             c = RETURNCODE_NEEDS_ELEVATION
@@ -332,8 +333,7 @@ class PowershellPackageManager(PackageManagerWithSources):
 
     def uninstallationThread(self, p: subprocess.Popen, options: InstallationOptions, widget: 'PackageInstallerWidget'):
         output = ""
-        while p.poll() is None:
-            line, is_newline = getLineFromStdout(p)
+        for line, is_newline in StdoutLineReader(p):
             line = line.strip()
             line = str(line, encoding='utf-8', errors="ignore").strip()
             if line:
@@ -341,26 +341,30 @@ class PowershellPackageManager(PackageManagerWithSources):
                 widget.addInfoLine.emit((line, is_newline))
                 if "removing" in line:
                     widget.counterSignal.emit(5)
+        p.wait()
         c = p.returncode
         if "AdminPrivilegesAreRequired" in output:
             c = RETURNCODE_NEEDS_ELEVATION
         widget.finishInstallation.emit(c, output)
 
-    def getSources(self) -> list[ManagerSource]:
+    def getSources(self, token: CancellationToken = None) -> list[ManagerSource]:
         print(f"🔵 Starting {self.NAME} source search...")
-        p = subprocess.Popen([self.EXECUTABLE, "-Command", "Get-PSRepository"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ, shell=True)
+        try:
+            p = PowerShellHosts.run("Get-PSRepository", self.Runner, token=token)
+        except FileNotFoundError as e:
+            report(e)
+            return []
         output = []
         dashesPassed = False
         sources: list[ManagerSource] = []
-        while p.poll() is None:
-            line = p.stdout.readline()
+        for line in p:
             line = line.strip()
             if line:
                 if not dashesPassed:
-                    if b"---" in line:
+                    if "---" in line:
                         dashesPassed = True
                 else:
-                    output.append(str(line, encoding='utf-8', errors="ignore"))
+                    output.append(line)
         for element in output:
             try:
                 while "  " in element.strip():
@@ -389,8 +393,7 @@ class PowershellPackageManager(PackageManagerWithSources):
     def sourceProgressThread(self, p: subprocess.Popen, options: InstallationOptions, widget: 'PackageInstallerWidget'):
         output = ""
         counter = 0
-        while p.poll() is None:
-            line, is_newline = getLineFromStdout(p)
+        for line, is_newline in StdoutLineReader(p):
             line = str(line, encoding='utf-8', errors="ignore").strip()
             if line:
                 widget.addInfoLine.emit((line, is_newline))
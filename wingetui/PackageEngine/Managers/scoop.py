@@ -12,6 +12,12 @@ import subprocess
 from wingetui.Core.Tools import *
 from wingetui.Core.Tools import _
 from wingetui.PackageEngine.Classes import *
+from wingetui.PackageEngine.HelperTools import HelperTools
+from wingetui.PackageEngine.PowerShellHosts import PowerShellHosts, quotePowerShellArgument
+from wingetui.PackageEngine.ScoopBucketRefresh import Refresher
+from wingetui.PackageEngine.ScoopBuckets import Manifests, getScoopArchitecture, getScoopInstaller, resolveScoopUpgrades
+from wingetui.PackageEngine.ScoopInventory import Inventory
+from wingetui.PackageEngine.ScoopSearchIndex import ScoopIndex
 
 
 class ScoopPackageManager(PackageManagerWithSources):
@@ -44,6 +50,8 @@ class ScoopPackageManager(PackageManagerWithSources):
         self.Properties.UninstallVerb = "uninstall"
         self.Properties.ExecutableName = "scoop"
 
+        HelperTools.register("scoop-search", self.EXECUTABLE.split(" ") + ["install", "scoop-search"], GSUDO_EXE_LOCATION)
+
         self.KnownSources = [
             # This list should reflect the one published on https://github.com/ScoopInstaller/Scoop/blob/master/buckets.json
             ManagerSource(self, "main", "https://github.com/ScoopInstaller/Main"),
@@ -61,23 +69,34 @@ class ScoopPackageManager(PackageManagerWithSources):
     def isEnabled(self) -> bool:
         return not getSettings(f"Disable{self.NAME}")
 
-    def getPackagesForQuery(self, query: str) -> list[Package]:
+    def iterPackagesForQuery(self, query: str, token: CancellationToken = None) -> Iterator[Package]:
         f"""
-        Will retieve the packages for the given "query: str" from the package manager {self.NAME} in the format of a list[Package] object.
+        Will yield the packages for the given "query: str" from the package manager {self.NAME} as Package objects, one by one while its output is being parsed.
         """
         print(f"🔵 Starting {self.NAME} search for dynamic packages")
+        results = None
+        if ScoopIndex.isAvailable():
+            try:
+                results = ScoopIndex.search(query)
+            except Exception as e:
+                report(e)
+        if results is not None:  # Found on the local index of the bucket manifests, scoop-search is not needed
+            for id, version, bucket in results:
+                name = formatPackageIdAsName(id)
+                if name not in self.BLACKLISTED_PACKAGE_NAMES and id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS:
+                    yield Package(name, id, version, f"{self.NAME}: {bucket}", Scoop)
+            return
         try:
-            if shutil.which("scoop-search") is None:
-                print("🟡 Installing scoop-search, that was missing...")
-                Command = self.EXECUTABLE + " install scoop-search"
-                p = subprocess.Popen(Command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, shell=True, cwd=GSUDO_EXE_LOCATION, env=os.environ)
-                p.wait()
-            packages: list[Package] = []
-            p = subprocess.Popen(f"scoop-search {query}", stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ.copy(), shell=True)
+            searchTool = HelperTools.resolve("scoop-search")
+            if searchTool is None:
+                HelperTools.prepare("scoop-search")
+                yield from self.iterBuiltInSearchResults(query, token)
+                return
+            packageCount = 0
+            p = self.Runner.run([searchTool, query], token=token)
             rawoutput = "\n\n---------" + self.NAME
             bucket = ""
-            while p.poll() is None:
-                line: str = str(p.stdout.readline(), "utf-8", errors="ignore")
+            for line in p:
                 rawoutput += "\n" + line
                 if line:
                     if line.startswith("'"):
@@ -90,187 +109,215 @@ class ScoopPackageManager(PackageManagerWithSources):
                             version = package[1].replace("(", "").replace(")", "")
                             source = f'{self.NAME}: {bucket}'
                             if name not in self.BLACKLISTED_PACKAGE_NAMES and id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS:
-                                packages.append(Package(name, id, version, source, Scoop))
-            print(f"🟢 {self.NAME} search for updates finished with {len(packages)} result(s)")
+                                yield Package(name, id, version, source, Scoop)
+                                packageCount += 1
+            print(f"🟢 {self.NAME} search for updates finished with {packageCount} result(s)")
             Globals.PackageManagerOutput += rawoutput
-            return packages
         except Exception as e:
             report(e)
-            return []
 
-    def getAvailableUpdates(self) -> list[UpgradablePackage]:
+    def iterBuiltInSearchResults(self, query: str, token: CancellationToken = None) -> Iterator[Package]:
+        """
+        Used while scoop-search is not available: searches with scoop itself, which is much slower but does not need anything else.
+        """
+        print(f"🟡 scoop-search is not available yet, falling back to {self.NAME}'s own search")
+        packageCount = 0
+        parser = TableOutputParser()
+        p = PowerShellHosts.run(f"scoop search {quotePowerShellArgument(query)}", self.Runner, token=token)
+        for cells in parser.parse(p):  # Name, Version, Source, Binaries
+            name = formatPackageIdAsName(cells[0])
+            id = cells[0]
+            version = cells[1]
+            source = f"{self.NAME}: {cells[2] if len(cells) > 2 else ''}"
+            if name not in self.BLACKLISTED_PACKAGE_NAMES and id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS:
+                yield Package(name, id, version, source, Scoop)
+                packageCount += 1
+        print(f"🟢 {self.NAME} search for updates finished with {packageCount} result(s)")
+        Globals.PackageManagerOutput += "\n\n---------" + self.NAME + "\n" + "\n".join(parser.Lines)
+
+    def iterAvailableUpdates(self, token: CancellationToken = None) -> Iterator[UpgradablePackage]:
         f"""
-        Will retieve the upgradable packages by {self.NAME} in the format of a list[UpgradablePackage] object.
+        Will yield the upgradable packages by {self.NAME} as UpgradablePackage objects, one by one while its output is being parsed.
         """
         print(f"🔵 Starting {self.NAME} search for updates")
+        upgrades = None
+        if Manifests.isAvailable():
+            try:
+                upgrades = resolveScoopUpgrades(Inventory.getInstalledApps(), Manifests)
+            except Exception as e:
+                report(e)
+        if upgrades is not None:  # Compared with the bucket manifests, scoop status is not needed
+            packageCount = 0
+            for app, newVersion in upgrades:
+                name = formatPackageIdAsName(app.Id)
+                if name not in self.BLACKLISTED_PACKAGE_NAMES and app.Id not in self.BLACKLISTED_PACKAGE_IDS and app.Version not in self.BLACKLISTED_PACKAGE_VERSIONS and newVersion not in self.BLACKLISTED_PACKAGE_VERSIONS:
+                    yield UpgradablePackage(name, app.Id, app.Version, newVersion, self.NAME, Scoop)
+                    packageCount += 1
+            print(f"🟢 {self.NAME} search for updates finished with {packageCount} result(s)")
+            return
+        if self.StructuredOutput.isAvailable("status"):
+            try:
+                packages = self.getStructuredAvailableUpdates(token)
+                print(f"🟢 {self.NAME} search for updates finished with {len(packages)} result(s)")
+                yield from packages
+                return
+            except Exception as e:
+                self.StructuredOutput.markUnavailable("status", str(e))
         try:
-            packages: list[UpgradablePackage] = []
-            p = subprocess.Popen(f"{self.EXECUTABLE} status", stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ.copy(), shell=True)
-            DashesPassed = False
-            rawoutput = "\n\n---------" + self.NAME
-            while p.poll() is None:
-                line: str = str(p.stdout.readline().strip(), "utf-8", errors="ignore")
-                rawoutput += "\n" + line
-                if line:
-                    if not DashesPassed:
-                        if "----" in line:
-                            DashesPassed = True
-                    elif "Held package" in line:
-                        continue
-                    else:
-                        package = list(filter(None, line.split(" ")))
-                        if len(package) >= 3:
-                            name = formatPackageIdAsName(package[0])
-                            id = package[0]
-                            version = package[1]
-                            newVersion = package[2]
-                            source = self.NAME
-                            if name not in self.BLACKLISTED_PACKAGE_NAMES and id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS and newVersion not in self.BLACKLISTED_PACKAGE_VERSIONS:
-                                packages.append(UpgradablePackage(name, id, version, newVersion, source, Scoop))
-            print(f"🟢 {self.NAME} search for updates finished with {len(packages)} result(s)")
-            Globals.PackageManagerOutput += rawoutput
-            return packages
+            packageCount = 0
+            parser = TableOutputParser(requiredColumns=3)
+            p = PowerShellHosts.run("scoop status", self.Runner, token=token)
+            for cells in parser.parse(p):  # Name, Installed Version, Latest Version, Missing Dependencies, Info
+                if "Held package" in cells[-1]:
+                    continue
+                name = formatPackageIdAsName(cells[0])
+                id = cells[0]
+                version = cells[1]
+                newVersion = cells[2]
+                source = self.NAME
+                if name not in self.BLACKLISTED_PACKAGE_NAMES and id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS and newVersion not in self.BLACKLISTED_PACKAGE_VERSIONS:
+                    yield UpgradablePackage(name, id, version, newVersion, source, Scoop)
+                    packageCount += 1
+            print(f"🟢 {self.NAME} search for updates finished with {packageCount} result(s)")
+            Globals.PackageManagerOutput += "\n\n---------" + self.NAME + "\n" + "\n".join(parser.Lines)
+            self.Health.recordCommand(p)
         except Exception as e:
             report(e)
-            return []
+            self.Health.recordFailure(str(e))
 
-    def getInstalledPackages(self) -> list[Package]:
+    def iterInstalledPackages(self, token: CancellationToken = None) -> Iterator[Package]:
         f"""
-        Will retieve the intalled packages by {self.NAME} in the format of a list[Package] object.
+        Will yield the intalled packages by {self.NAME} as Package objects, one by one while its output is being parsed.
         """
         print(f"🔵 Starting {self.NAME} search for installed packages")
-        time.sleep(2)
+        apps = None
+        if Inventory.isAvailable():
+            try:
+                apps = Inventory.getInstalledApps()
+            except Exception as e:
+                report(e)
+        if apps is not None:  # Read from the Scoop folders, scoop list is not needed
+            packageCount = 0
+            for app in apps:
+                name = formatPackageIdAsName(app.Id)
+                source = f"Scoop{' (Global)' if app.IsGlobal else ''}: {app.Bucket}"
+                if name not in self.BLACKLISTED_PACKAGE_NAMES and app.Id not in self.BLACKLISTED_PACKAGE_IDS and app.Version not in self.BLACKLISTED_PACKAGE_VERSIONS:
+                    yield Package(name, app.Id, app.Version, source, Scoop)
+                    packageCount += 1
+            print(f"🟢 {self.NAME} search for installed packages finished with {packageCount} result(s)")
+            return
+        if self.StructuredOutput.isAvailable("list"):
+            try:
+                packages = self.getStructuredInstalledPackages(token)
+                print(f"🟢 {self.NAME} search for installed packages finished with {len(packages)} result(s)")
+                yield from packages
+                return
+            except Exception as e:
+                self.StructuredOutput.markUnavailable("list", str(e))
         try:
-            packages: list[Package] = []
-            p = subprocess.Popen(f"{self.EXECUTABLE} list", stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ.copy(), shell=True)
-            DashesPassed = False
-            rawoutput = "\n\n---------" + self.NAME
-            while p.poll() is None:
-                line: str = str(p.stdout.readline().strip(), "utf-8", errors="ignore")
-                rawoutput += "\n" + line
-                if line:
-                    if not DashesPassed:
-                        if "----" in line:
-                            DashesPassed = True
-                    else:
-                        globalscoop = "Global" in line
-                        package = list(filter(None, line.split(" ")))
-                        if len(package) >= 2:
-                            name = formatPackageIdAsName(package[0])
-                            id = package[0]
-                            version = package[1]
-                            source = f"Scoop{' (Global)' if globalscoop else ''}: {package[2].strip()}"
-                            if name not in self.BLACKLISTED_PACKAGE_NAMES and id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS:
-                                packages.append(Package(name, id, version, source, Scoop))
-            print(f"🟢 {self.NAME} search for installed packages finished with {len(packages)} result(s)")
-            Globals.PackageManagerOutput += rawoutput
-            return packages
+            packageCount = 0
+            parser = TableOutputParser()
+            p = PowerShellHosts.run("scoop list", self.Runner, token=token)
+            for cells in parser.parse(p):  # Name, Version, Source, Updated, Info
+                globalscoop = "Global" in cells[-1]
+                name = formatPackageIdAsName(cells[0])
+                id = cells[0]
+                version = cells[1]
+                source = f"Scoop{' (Global)' if globalscoop else ''}: {cells[2] if len(cells) > 2 else ''}"
+                if name not in self.BLACKLISTED_PACKAGE_NAMES and id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS:
+                    yield Package(name, id, version, source, Scoop)
+                    packageCount += 1
+            print(f"🟢 {self.NAME} search for installed packages finished with {packageCount} result(s)")
+            Globals.PackageManagerOutput += "\n\n---------" + self.NAME + "\n" + "\n".join(parser.Lines)
+            self.Health.recordCommand(p)
         except Exception as e:
             report(e)
-            return []
+            self.Health.recordFailure(str(e))
 
-    def getPackageDetails(self, package: Package) -> PackageDetails:
+    def getStructuredAvailableUpdates(self, token: CancellationToken = None) -> list[UpgradablePackage]:
+        """
+        Reads the upgradable packages from the objects returned by scoop status, converted to JSON. Raises an exception if the JSON output can't be used.
+        """
+        packages: list[UpgradablePackage] = []
+        p = PowerShellHosts.run("scoop status 6>$null | Select-Object Name, 'Installed Version', 'Latest Version', Info | ConvertTo-Json -Compress", self.Runner, token=token)
+        for entry in asList(self.readJsonOutput(p, emptyMeansNone=True)):
+            if not entry["Name"]:
+                raise ValueError("scoop status did not return objects")  # Old versions of scoop print text instead
+            id = entry["Name"]
+            version = entry["Installed Version"]
+            newVersion = entry["Latest Version"]
+            if "Held package" in str(entry["Info"]) or not newVersion:
+                continue
+            if id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS and newVersion not in self.BLACKLISTED_PACKAGE_VERSIONS:
+                packages.append(UpgradablePackage(formatPackageIdAsName(id), id, version, newVersion, self.NAME, Scoop))
+        self.Health.recordCommand(p)
+        return packages
+
+    def getStructuredInstalledPackages(self, token: CancellationToken = None) -> list[Package]:
+        """
+        Reads the installed packages from the objects returned by scoop list, converted to JSON. Raises an exception if the JSON output can't be used.
+        """
+        packages: list[Package] = []
+        p = PowerShellHosts.run("scoop list 6>$null | Select-Object Name, Version, Source, Info | ConvertTo-Json -Compress", self.Runner, token=token)
+        for entry in asList(self.readJsonOutput(p, emptyMeansNone=True)):
+            if not entry["Name"]:
+                raise ValueError("scoop list did not return objects")
+            id = entry["Name"]
+            version = entry["Version"]
+            globalscoop = "Global" in str(entry["Info"])
+            source = f"Scoop{' (Global)' if globalscoop else ''}: {entry['Source']}"
+            if id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS:
+                packages.append(Package(formatPackageIdAsName(id), id, version, source, Scoop))
+        self.Health.recordCommand(p)
+        return packages
+
+    def getPackageDetails(self, package: Package, token: CancellationToken = None) -> PackageDetails:
         """
-        Will return a PackageDetails object containing the information of the given Package object
+        Will return a PackageDetails object containing the information of the given Package object.
+        The manifest is read straight from the local bucket checkouts when they have it (see ScoopBucketManifests.findManifest), without running
+        anything. scoop cat and scoop info are only used for the packages that are not on a local bucket.
         """
         print(f"🔵 Starting get info for {package.Name} on {self.NAME}")
         details = PackageDetails(package)
         try:
-            unknownStr = _("Not available")
-            bucket = "main" if len(package.Source.split(": ")) == 1 else package.Source.split(': ')[-1]
-            if bucket in Globals.scoopBuckets:
-                bucketRoot = Globals.scoopBuckets[bucket].replace(".git", "")
-            else:
-                bucketRoot = f"https://github.com/ScoopInstaller/{bucket}"
-            details.ManifestUrl = f"{bucketRoot}/blob/master/bucket/{package.Id.split('/')[-1]}.json"
+            bucket = "" if len(package.Source.split(": ")) == 1 else package.Source.split(': ')[-1]
             details.Scopes = [_("Local"), _("Global")]
             details.InstallerType = _("Scoop package")
 
-            rawOutput = b""
-            p = subprocess.Popen(' '.join([self.EXECUTABLE, "cat", f"{package.Id}"]), stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ, shell=True)
-            while p.poll() is None:
-                pass
-            for line in p.stdout.readlines():
-                line = line.strip()
-                if line:
-                    rawOutput += line + b"\n"
-
-            data: dict = json.loads(str(rawOutput, encoding='utf-8', errors="ignore"))
-
-            if "description" in data.keys():
-                if type(data["description"]) is list:
-                    details.Description = "\n".join(data["description"])
-                else:
-                    details.Description = data["description"]
-            details.Description = ConvertMarkdownToHtml(details.Description)
-
-            if "version" in data.keys():
-                details.Versions.append(data["version"])
-
-            if "innosetup" in data.keys():
-                details.InstallerType = "Inno Setup"
-
-            if "homepage" in data.keys():
-                w: str = data["homepage"]
-                details.HomepageURL = w
-                if "https://github.com/" in w:
-                    details.Author = w.replace("https://github.com/", "").split("/")[0]
-                else:
-                    for e in ("https://", "http://", "www.", ".com", ".net", ".io", ".org", ".us", ".eu", ".es", ".tk", ".co.uk", ".in", ".it", ".fr", ".de", ".kde", ".microsoft"):
-                        w = w.replace(e, "")
-                    details.Author = w.split("/")[0].capitalize()
-
-            if "notes" in data.keys():
-                if type(data["notes"]) is list:
-                    details.ReleaseNotes = "\n".join(data["notes"])
-                else:
-                    details.ReleaseNotes = data["notes"]
-            details.ReleaseNotes = ConvertMarkdownToHtml(details.ReleaseNotes)
-
-            if "license" in data.keys():
-                details.License = data["license"] if type(data["license"]) is not dict else data["license"]["identifier"]
-                details.LicenseURL = unknownStr if type(data["license"]) is not dict else data["license"]["url"]
-
-            if "url" in data.keys():
-                details.InstallerHash = data["hash"][0] if type(data["hash"]) is list else data["hash"]
-                url = data["url"][0] if type(data["url"]) is list else data["url"]
-                details.InstallerURL = url
+            found = None
+            if Manifests.isAvailable() and "/" not in package.Id and "\\" not in package.Id:
                 try:
-                    details.InstallerSize = int(urlopen(url).length / 1000000)
+                    found = Manifests.findManifest(package.Id, bucket if "/" not in bucket and "\\" not in bucket else "")
                 except Exception as e:
-                    print("🟠 Can't get installer size:", type(e), str(e))
-            elif "architecture" in data.keys():
-                details.InstallerHash = data["architecture"]["64bit"]["hash"]
-                url = data["architecture"]["64bit"]["url"]
-                details.InstallerURL = url
+                    report(e)
+            if found is not None:
+                bucket, data = found
+                self.setManifestUrl(details, package, bucket)
+                self.loadManifestDetails(details, data, self.getInstalledArchitecture(package.Id))
                 try:
-                    details.InstallerSize = int(urlopen(url).length / 1000000)
-                except Exception as e:
-                    print("🟠 Can't get installer size:", type(e), str(e))
-                if type(data["architecture"]) is dict:
-                    details.Architectures = list(data["architecture"].keys())
+                    details.UpdateDate = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(os.path.getmtime(Manifests.getManifestPath(bucket, package.Id))))
+                except OSError:
+                    pass
+                print(f"🟢 Get info finished for {package.Name} on {self.NAME}, read from the {bucket} bucket")
+                return details
+
+            self.setManifestUrl(details, package, bucket or Manifests.DEFAULT_BUCKET)
+            rawOutput = ""
+            p = PowerShellHosts.run(f"scoop cat {quotePowerShellArgument(package.Id)}", self.Runner, token=token)
+            for line in p:
+                line = line.strip()
+                if line:
+                    rawOutput += line + "\n"
 
-            if "checkver" in data.keys():
-                if type(data["checkver"]) is dict:
-                    if "url" in data["checkver"].keys():
-                        url = data["checkver"]["url"]
-                        details.ReleaseNotesUrl = url
-
-            if details.ReleaseNotesUrl == unknownStr and "github.com" in details.InstallerURL:
-                try:
-                    url = "/".join(details.InstallerURL.replace("/download/", "/tag/").split("/")[:-1])
-                    details.ReleaseNotesUrl = url
-                except Exception as e:
-                    report(e)
+            data: dict = json.loads(rawOutput)
+            self.loadManifestDetails(details, data, self.getInstalledArchitecture(package.Id))
 
             output: list[str] = []
-            p = subprocess.Popen(' '.join([self.EXECUTABLE, "info", package.Id]), stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ, shell=True)
-            while p.poll() is None:
-                pass
-            for line in p.stdout.readlines():
+            p = PowerShellHosts.run(f"scoop info {quotePowerShellArgument(package.Id)}", self.Runner, token=token)
+            for line in p:
                 line = line.strip()
                 if line:
-                    output.append(self.ansi_escape.sub('', str(line, encoding='utf-8', errors="ignore")))
+                    output.append(self.ansi_escape.sub('', line))
             for line in output:
                 for line in output:
                     if "Updated by" in line:
@@ -284,6 +331,84 @@ class ScoopPackageManager(PackageManagerWithSources):
             report(e)
             return details
 
+    def setManifestUrl(self, details: PackageDetails, package: Package, bucket: str) -> None:
+        if bucket in Globals.scoopBuckets:
+            bucketRoot = Globals.scoopBuckets[bucket].replace(".git", "")
+        else:
+            bucketRoot = f"https://github.com/ScoopInstaller/{bucket}"
+        details.ManifestUrl = f"{bucketRoot}/blob/master/bucket/{package.Id.split('/')[-1]}.json"
+
+    def getInstalledArchitecture(self, id: str) -> str:
+        """
+        Returns the architecture the given app was installed for, or the one Scoop would install it for if it is not installed.
+        """
+        if Inventory.isAvailable():
+            for root, isGlobal in Inventory.getRoots():
+                app = Inventory.getApp(os.path.join(root, "apps", id.split("/")[-1]), isGlobal)
+                if app is not None and app.Architecture:
+                    return app.Architecture
+        return getScoopArchitecture()
+
+    def loadManifestDetails(self, details: PackageDetails, data: dict, architecture: str) -> None:
+        """
+        Fills the given details with the ones on a Scoop manifest. The installer url and hash are the ones of the given architecture.
+        """
+        unknownStr = _("Not available")
+        if "description" in data.keys():
+            if type(data["description"]) is list:
+                details.Description = "\n".join(data["description"])
+            else:
+                details.Description = data["description"]
+        details.Description = ConvertMarkdownToHtml(details.Description)
+
+        if "version" in data.keys():
+            details.Versions.append(data["version"])
+
+        if "innosetup" in data.keys():
+            details.InstallerType = "Inno Setup"
+
+        if "homepage" in data.keys():
+            w: str = data["homepage"]
+            details.HomepageURL = w
+            if "https://github.com/" in w:
+                details.Author = w.replace("https://github.com/", "").split("/")[0]
+            else:
+                for e in ("https://", "http://", "www.", ".com", ".net", ".io", ".org", ".us", ".eu", ".es", ".tk", ".co.uk", ".in", ".it", ".fr", ".de", ".kde", ".microsoft"):
+                    w = w.replace(e, "")
+                details.Author = w.split("/")[0].capitalize()
+
+        if "notes" in data.keys():
+            if type(data["notes"]) is list:
+                details.ReleaseNotes = "\n".join(data["notes"])
+            else:
+                details.ReleaseNotes = data["notes"]
+        details.ReleaseNotes = ConvertMarkdownToHtml(details.ReleaseNotes)
+
+        if "license" in data.keys():
+            details.License = data["license"] if type(data["license"]) is not dict else data["license"]["identifier"]
+            details.LicenseURL = unknownStr if type(data["license"]) is not dict else data["license"]["url"]
+
+        if type(data.get("architecture")) is dict:
+            details.Architectures = list(data["architecture"].keys())
+        url, hash = getScoopInstaller(data, architecture)
+        if url:
+            details.InstallerURL = url
+            details.InstallerHash = hash or unknownStr
+            details.InstallerSizeLoaded = False  # Asked to the server once the details are shown, see PackageDetails.loadInstallerSize
+
+        if "checkver" in data.keys():
+            if type(data["checkver"]) is dict:
+                if "url" in data["checkver"].keys():
+                    url = data["checkver"]["url"]
+                    details.ReleaseNotesUrl = url
+
+        if details.ReleaseNotesUrl == unknownStr and "github.com" in details.InstallerURL:
+            try:
+                url = "/".join(details.InstallerURL.replace("/download/", "/tag/").split("/")[:-1])
+                details.ReleaseNotesUrl = url
+            except Exception as e:
+                report(e)
+
     def getIcon(self, source: str) -> QIcon:
         if not self.LoadedIcons:
             self.LoadedIcons = True
@@ -333,8 +458,7 @@ class ScoopPackageManager(PackageManagerWithSources):
     def installationThread(self, p: subprocess.Popen, options: InstallationOptions, widget: 'PackageInstallerWidget'):
         output = ""
         outputCode = 1
-        while p.poll() is None:
-            line, is_newline = getLineFromStdout(p)
+        for line, is_newline in StdoutLineReader(p):
             line = line.strip()
             line = str(line, encoding='utf-8', errors="ignore").strip()
             if line:
@@ -374,8 +498,7 @@ class ScoopPackageManager(PackageManagerWithSources):
     def uninstallationThread(self, p: subprocess.Popen, options: InstallationOptions, widget: 'PackageInstallerWidget'):
         outputCode = 1
         output = ""
-        while p.poll() is None:
-            line, is_newline = getLineFromStdout(p)
+        for line, is_newline in StdoutLineReader(p):
             line = line.strip()
             line = str(line, encoding='utf-8', errors="ignore").strip()
             if line:
@@ -396,18 +519,28 @@ class ScoopPackageManager(PackageManagerWithSources):
             outputCode = RETURNCODE_NEEDS_ELEVATION
         widget.finishInstallation.emit(outputCode, output)
 
-    def getSources(self) -> None:
+    def getSources(self, token: CancellationToken = None) -> None:
         print(f"🔵 Starting {self.NAME} source search...")
-        p = subprocess.Popen(f"{self.EXECUTABLE} bucket list", stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ, shell=True)
+        if Manifests.isAvailable():
+            sources = Refresher.getSources(self)
+            if sources is not None:  # Described by the last bucket refresh, scoop bucket list is not needed
+                for source in sources:
+                    Globals.scoopBuckets[source.Name] = source.Url
+                print(f"🟢 {self.NAME} source search finished with {len(sources)} sources, read from the bucket checkouts")
+                return sources
+        try:
+            p = PowerShellHosts.run("scoop bucket list", self.Runner, token=token)
+        except FileNotFoundError as e:
+            report(e)
+            return []
         output = []
         sources: list[ManagerSource] = []
         counter = 0
-        while p.poll() is None:
-            line = p.stdout.readline()
+        for line in p:
             line = line.strip()
             if line:
-                if counter > 1 and b"---" not in line:
-                    output.append(self.ansi_escape.sub('', str(line, encoding='utf-8', errors="ignore")))
+                if counter > 1 and "---" not in line:
+                    output.append(self.ansi_escape.sub('', line))
                 else:
                     counter += 1
         counter = 0
@@ -447,8 +580,7 @@ class ScoopPackageManager(PackageManagerWithSources):
     def sourceProgressThread(self, p: subprocess.Popen, options: InstallationOptions, widget: 'PackageInstallerWidget'):
         output = ""
         counter = 0
-        while p.poll() is None:
-            line, is_newline = getLineFromStdout(p)
+        for line, is_newline in StdoutLineReader(p):
             line = str(line, encoding='utf-8', errors="ignore").strip()
             if line:
                 widget.addInfoLine.emit((line, is_newline))
@@ -464,6 +596,9 @@ class ScoopPackageManager(PackageManagerWithSources):
             o = subprocess.run(f"{self.EXECUTABLE} -v", shell=True, stdout=subprocess.PIPE)
             Globals.componentStatus[f"{self.NAME}Found"] = shutil.which("scoop") is not None
             Globals.componentStatus[f"{self.NAME}Version"] = o.stdout.decode('utf-8', errors="ignore").replace("\n", " ").replace("\r", " ")
+            if Globals.componentStatus[f"{self.NAME}Found"] and self.isEnabled():
+                HelperTools.prepare("scoop-search")
+                ScoopIndex.prepare()
             if signal:
                 signal.emit()
         except Exception:
@@ -474,7 +609,14 @@ class ScoopPackageManager(PackageManagerWithSources):
 
     def updateSources(self, signal: Signal = None) -> None:
         print(f"🔵 Reloading {self.NAME} sources...")
-        subprocess.run(f"{self.EXECUTABLE} update", shell=True, stdout=subprocess.PIPE)
+        try:
+            if Refresher.isAvailable():
+                Refresher.refresh(self.Runner)  # Scoop itself and its buckets
+            else:
+                PowerShellHosts.run("scoop update", self.Runner).wait()
+        except Exception as e:
+            report(e)
+        ScoopIndex.invalidate()
         if signal:
             signal.emit()
 
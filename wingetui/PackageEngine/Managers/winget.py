@@ -6,11 +6,22 @@ if __name__ == "__main__":
     sys.exit(subprocess.run(["cmd", "/C", "python", "-m", "wingetui"], shell=True, cwd=os.path.dirname(__file__).split("wingetui")[0]).returncode)
 
 import os
+import queue
+import socket
 import subprocess
+import time
+from concurrent.futures import Future
+from typing import Callable
 
+from wingetui.Core.Executor import Executor, POOL_SUBPROCESS, PRIORITY_HIGH
 from wingetui.Core.Tools import *
 from wingetui.Core.Tools import _
 from wingetui.PackageEngine.Classes import *
+from wingetui.PackageEngine.QualityOfService import QoS
+from wingetui.PackageEngine.WingetIdResolver import IdResolver
+from wingetui.PackageEngine.WingetSourceClassifier import SourceClassifier
+from wingetui.PackageEngine.WingetSourceIndex import WingetIndex
+from wingetui.PackageEngine.WingetUpgradeResolver import UPGRADE_RESOLVER_CLI, UPGRADE_RESOLVER_VERIFY, getUpgradeDiffReport, resolveUpgrades
 
 
 class WingetPackageManager(PackageManagerWithSources):
@@ -33,6 +44,14 @@ class WingetPackageManager(PackageManagerWithSources):
             EXECUTABLE = os.path.join(realpath, "PackageEngine/Managers", "winget-cli_x64", "winget.exe")
 
     NAME = "Winget"
+    EXPORT_FILE = os.path.join(TEMP_DIR, "WingetExport.json")
+    UPGRADES_EXPORT_FILE = os.path.join(TEMP_DIR, "WingetUpgradesExport.json")
+    IDS_EXPORT_FILE = os.path.join(TEMP_DIR, "WingetIdsExport.json")
+    DETAILS_LOCALES_SETTINGS = "WingetDetailsLocales"
+    SEARCH_LATENCY_BUDGETS: dict[str, float] = {"winget": 20, "msstore": 15}  # In seconds, msstore may take long to answer and can't hold back the search for too long
+    DEFAULT_SEARCH_LATENCY_BUDGET: float = 20
+    QUEUED_SEARCH_TIMEOUT: float = 1  # In seconds, see iterQueuedPackages
+    MAX_DETAILS_PROCESSES = 2  # A single winget show, and the export of the full ids when the id of the package is truncated
 
     wingetIcon = None
     localIcon = None
@@ -54,6 +73,7 @@ class WingetPackageManager(PackageManagerWithSources):
         self.Capabilities.SupportsCustomSources = True
         self.Capabilities.Sources.KnowsPackageCount = False
         self.Capabilities.Sources.KnowsUpdateDate = False
+        self.DetailsMetrics = {"Opens": 0, "Processes": 0, "MaxProcesses": 0, "LastProcesses": 0}
 
         self.Properties.Name = self.NAME
         self.Properties.Description = _("Microsoft's official package manager. Full of well-known and verified packages<br>Contains: <b>General Software, Microsoft Store apps</b>")
@@ -77,502 +97,560 @@ class WingetPackageManager(PackageManagerWithSources):
     def isEnabled(self) -> bool:
         return not getSettings(f"Disable{self.NAME}")
 
-    def getPackagesForQuery(self, query: str) -> list[Package]:
+    def iterPackagesForQuery(self, query: str, token: CancellationToken = None) -> Iterator[Package]:
+        """
+        Yields the packages found for the given query. The winget source is searched on its local index when it is available, and
+        the other sources are searched with one winget search per source, all at the same time (see iterSourcesSearchResults).
+        """
         print(f"🔵 Starting {self.NAME} search for dynamic packages")
-        packages: list[Package] = []
-        rawOutput = f"\n\n------- Winget query {query}"
+        if WingetIndex.isAvailable():
+            try:
+                foundIds: set[str] = set()
+                results = WingetIndex.search(query)
+                for id, name, version in results:
+                    if name not in self.BLACKLISTED_PACKAGE_NAMES and id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS:
+                        foundIds.add(id.lower())
+                        yield Package(name, id, version, f"Winget: {WingetIndex.SOURCE_NAME}", Winget)
+                yield from self.iterSourcesSearchResults(query, self.getSourcesWithoutIndex(), token, foundIds)  # Such as msstore, which has no local index
+                return
+            except Exception as e:
+                report(e)
+        yield from self.iterSourcesSearchResults(query, list(Globals.wingetSources.keys()) or [None], token)
+
+    def getSourcesWithoutIndex(self) -> list[str]:
+        if not Globals.wingetSources:
+            return ["msstore"]  # The sources have not been loaded yet, assume the default ones
+        return [source for source in Globals.wingetSources.keys() if source != WingetIndex.SOURCE_NAME]
+
+    def iterSourcesSearchResults(self, query: str, sourceNames: list[str | None], token: CancellationToken = None, foundIds: set[str] = None) -> Iterator[Package]:
+        """
+        Runs winget search on each one of the given sources at the same time, and yields the packages of every source as soon as they are parsed,
+        so a slow source (such as msstore) does not hold back the results of the others. Each search is killed once it goes over the latency budget
+        of its source (see getSearchBudget), and the packages it found until then are kept.
+        A package found on more than one source (or already in foundIds) is only yielded the first time, by its case-insensitive id.
+        """
+        foundIds = foundIds if foundIds is not None else set()
+        if len(sourceNames) > 1 and self.Runner.CanRunConcurrently:
+            results = queue.Queue()
+            qos = QoS.getCurrentClass()
+
+            def searchSource(sourceName: str | None) -> None:
+                with QoS.running(qos):  # The searches belong to the same QoS class as the calling thread
+                    for package in self.iterSearchCommandResults(query, sourceName, token):
+                        results.put(package)
+
+            futures = {}
+            for sourceName in sourceNames:
+                futures[sourceName] = Executor.submit(POOL_SUBPROCESS, searchSource, sourceName, priority=PRIORITY_HIGH, name=f"Winget search on {sourceName}")
+                futures[sourceName].add_done_callback(lambda future: results.put(None))  # This source has finished (or was never started)
+            packages = self.iterQueuedPackages(results, futures, lambda sourceName: self.iterSearchCommandResults(query, sourceName, token))
+        else:
+            packages = (package for sourceName in sourceNames for package in self.iterSearchCommandResults(query, sourceName, token))
+
+        for package in packages:
+            if package.Id.lower() in foundIds:
+                print(f"🟡 Not showing {package.Id} from {package.Source} again")
+                continue
+            foundIds.add(package.Id.lower())
+            yield package
+
+    def iterQueuedPackages(self, results: queue.Queue, futures: dict[str | None, Future], searchSource: Callable[[str | None], Iterator[Package]]) -> Iterator[Package]:
+        """
+        Yields the packages put on the given queue by the searches of the given futures, until every one of them has finished.
+        A search that is still waiting for a worker after QUEUED_SEARCH_TIMEOUT without results (because every worker of the subprocess pool
+        is busy, possibly waiting for this very thread) is taken back from the pool and run on the calling thread instead.
+        """
+        producerCount = len(futures)
+        while producerCount:
+            try:
+                package = results.get(timeout=self.QUEUED_SEARCH_TIMEOUT)
+            except queue.Empty:
+                for sourceName, future in futures.items():
+                    if future.cancel():
+                        print(f"🟡 The {self.NAME} search on {sourceName} did not get a worker, running it on the calling thread")
+                        yield from searchSource(sourceName)
+                continue
+            if package is None:
+                producerCount -= 1
+            else:
+                yield package
+
+    def getSearchBudget(self, sourceName: str | None) -> float | None:
+        """
+        Returns the time, in seconds, after which a winget search on the given source gets killed. None lets the watchdog learn it.
+        """
+        return self.SEARCH_LATENCY_BUDGETS.get(sourceName, self.DEFAULT_SEARCH_LATENCY_BUDGET) if sourceName else None
+
+    def iterSearchCommandResults(self, query: str, sourceName: str | None, token: CancellationToken = None) -> Iterator[Package]:
+        """
+        Runs winget search, on the given source or on all of them, and yields the packages found.
+        """
+        packageCount = 0
+        startTime = time.time()
+        parser = TableOutputParser(requiredColumns=3)
         try:
-            p = subprocess.Popen([self.EXECUTABLE, "search", query, "--accept-source-agreements"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, shell=True)
-            hasShownId: bool = False
-            idPosition: int = 0
-            versionPosition: int = 0
-            noSourcesAvailable: bool = False
-            while p.poll() is None:
-                line: str = str(p.stdout.readline().strip(), "utf-8", errors="ignore")
-                if line:
-                    rawOutput += line
-                    if not hasShownId:
-                        if " Id " in line:
-                            line = line.replace("\x08-\x08\\\x08|\x08 \r", "")
-                            for char in ("\r", "/", "|", "\\", "-"):
-                                line = line.split(char)[-1].strip()
-                            hasShownId = True
-                            idPosition = len(line.split("Id")[0])
-                            versionPosition = len(line.split("Version")[0])
-                            sourcePosition = len(line.split("Source")[0])
-                            if len(line) == sourcePosition:
-                                noSourcesAvailable = True
-                                print("🟡 Winget reported no sources on getPackagesForQuery")
-
-                    elif "---" in line:
-                        pass
+            p = self.Runner.run([self.EXECUTABLE, "search", query, "--accept-source-agreements"] + (["--source", sourceName] if sourceName else []), timeout=self.getSearchBudget(sourceName), token=token)
+            for cells in parser.parse(p):
+                name, id, ver = cells[0], cells[1], cells[2]
+                if len(parser.Headers) >= 4:  # Name, Id, Version, (Match,) Source
+                    source = self.getSourceFromCell(cells[-1])
+                else:
+                    source = ""
+                if not source and sourceName:
+                    source = f"Winget: {sourceName}"  # There is no Source column when searching on a single source
+                elif not source:
+                    line = " ".join(cells[3:])
+                    if "msstore" in line:
+                        source = "Winget: msstore"
+                    elif "winget" in line:
+                        source = "Winget: winget"
                     else:
-                        try:
-                            name = line[0:idPosition].strip()
-                            idVersionSubstr = line[idPosition:].strip()
-                            if "  " in name:
-                                oName = name
-                                while "  " in oName:
-                                    oName = oName.replace("  ", " ")
-                                idVersionSubstr = oName.split(" ")[-1] + idVersionSubstr
-                                name = " ".join(oName.split(" ")[:-1])
-                            idVersionSubstr.replace("\t", " ")
-                            while "  " in idVersionSubstr:
-                                idVersionSubstr = idVersionSubstr.replace("  ", " ")
-                            iOffset = 0
-                            id = idVersionSubstr.split(" ")[iOffset]
-                            ver = idVersionSubstr.split(" ")[iOffset + 1]
-                            if not noSourcesAvailable:
-                                source = "Winget: " + idVersionSubstr.split(" ")[iOffset + 2]
-                            if len(id) == 1:
-                                iOffset + 1
-                                id = idVersionSubstr.split(" ")[iOffset]
-                                ver = idVersionSubstr.split(" ")[iOffset + 1]
-                                if not noSourcesAvailable:
-                                    source = "Winget: " + idVersionSubstr.split(" ")[iOffset + 2]
-                            if ver.strip() in ("<", "-"):
-                                iOffset += 1
-                                ver = ver.strip() + " " + idVersionSubstr.split(" ")[iOffset + 1]
-                                if not noSourcesAvailable:
-                                    source = "Winget: " + idVersionSubstr.split(" ")[iOffset + 2]
-
-                            if noSourcesAvailable:
-                                if "msstore" in line:
-                                    source = "Winget: msstore"
-                                elif "winget" in line:
-                                    source = "Winget: winget"
-                                else:
-                                    source = "Winget"
-
-                            elif source.strip() == "":
-                                if "msstore" in line:
-                                    source = "Winget: msstore"
-                                elif "winget" in line:
-                                    source = "Winget: winget"
-                                elif len(Globals.wingetSources.keys() >= 0):
-                                    source = "Winget: " + list(Globals.wingetSources.keys())[0]
-                                else:
-                                    source = "Winget"
-
-                            if "Tag" in source or "Moniker" in source or "Command" in source:
-                                if "msstore" in line:
-                                    source = "Winget: msstore"
-                                elif "winget" in line:
-                                    source = "Winget: winget"
-                                else:
-                                    source = "Winget"
-
-                            source = source.strip()
-
-                            if "  " not in name:
-                                if name not in self.BLACKLISTED_PACKAGE_NAMES and id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS:
-                                    packages.append(Package(name, id, ver, source, Winget))
-                            else:
-                                if name not in self.BLACKLISTED_PACKAGE_NAMES and id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS:
-                                    name = name.replace("  ", "#").replace("# ", "#").replace(" #", "#")
-                                    while "##" in name:
-                                        name = name.replace("##", "#")
-                                    print(f"🟡 package {name} failed parsing, going for method 2...")
-                                    packages.append(Package(name, id, ver, source, Winget))
-                        except Exception as e:
-                            report(e)
-                            packages.append(Package(line[0:idPosition].strip(), line[idPosition:versionPosition].strip(), line[versionPosition:sourcePosition].strip(), f"Winget: {line[sourcePosition:].strip()}", Winget))
-                            if type(e) is not IndexError:
-                                report(e)
-            print(f"🟢 {self.NAME} search for updates finished with {len(packages)} result(s)")
-            Globals.PackageManagerOutput += rawOutput
-            return packages
+                        source = "Winget"
+                if name not in self.BLACKLISTED_PACKAGE_NAMES and id not in self.BLACKLISTED_PACKAGE_IDS and ver not in self.BLACKLISTED_PACKAGE_VERSIONS:
+                    yield Package(name, id, ver, source, Winget)
+                    packageCount += 1
+            if parser.TableCount and len(parser.Headers) < 4 and not sourceName:
+                print("🟡 Winget reported no sources on getPackagesForQuery")
+            if p.TimedOut:
+                print(f"🟠 {self.NAME} search on {sourceName} went over its budget of {self.getSearchBudget(sourceName)} seconds, its results are partial")
+            print(f"🟢 {self.NAME} search on {sourceName or 'all sources'} finished with {packageCount} result(s) in {round(time.time() - startTime, 2)} seconds")
+            Globals.PackageManagerOutput += f"\n\n------- Winget query {query}{f' on {sourceName}' if sourceName else ''}\n" + "\n".join(parser.Lines)
 
         except Exception as e:
             report(e)
-            return packages
 
-    def getAvailableUpdates(self) -> list[UpgradablePackage]:
+    def getSourceFromCell(self, cell: str) -> str:
+        """
+        Returns the source shown on the Source column of a table, or an empty string if the cell does not hold a source (the Match column
+        of winget search is shown on its place when no sources are available).
+        """
+        if not cell or " " in cell or ":" in cell:
+            return ""
+        return "Winget: " + cell
+
+    def iterAvailableUpdates(self, token: CancellationToken = None) -> Iterator[UpgradablePackage]:
         f"""
-        Will retieve the upgradable packages by {self.NAME} in the format of a list[UpgradablePackage] object.
+        Will yield the upgradable packages by {self.NAME} as UpgradablePackage objects, one by one while its output is being parsed.
+        Unless the WingetUpgradeResolver setting says otherwise, the upgrades from the winget source are found offline: the installed
+        versions exported by winget are compared with the latest versions on the local source index. winget upgrade is only run for
+        the other sources, or for all of them when the index is not available or winget export fails or times out.
         """
         print(f"🔵 Starting {self.NAME} search for updates")
+        mode = getSettingsValue("WingetUpgradeResolver")
+        if mode != UPGRADE_RESOLVER_CLI and WingetIndex.isAvailable() and self.StructuredOutput.isAvailable("export"):
+            try:
+                offlineUpdates = self.getOfflineAvailableUpdates(token)
+                if isCancelled(token):
+                    return
+                if offlineUpdates is None:
+                    print(f"🟡 {self.NAME} export did not finish, searching for updates with winget upgrade instead")
+                    yield from self.iterUpgradeCommandResults(None, token)
+                    return
+                packages, otherSources = offlineUpdates
+                if mode == UPGRADE_RESOLVER_VERIFY:
+                    commandPackages = list(self.iterUpgradeCommandResults(None, token))
+                    diffReport = getUpgradeDiffReport(packages, [package for package in commandPackages if package.Source == f"Winget: {WingetIndex.SOURCE_NAME}"])
+                    print(f"🔵 {diffReport}")
+                    Globals.PackageManagerOutput += f"\n\n{diffReport}"
+                    yield from commandPackages
+                    return
+                yield from packages
+                for sourceName in otherSources:
+                    if isCancelled(token):
+                        return
+                    yield from self.iterUpgradeCommandResults(sourceName, token)
+                return
+            except Exception as e:
+                report(e)
+                self.StructuredOutput.markUnavailable("export", str(e))
+        yield from self.iterUpgradeCommandResults(None, token)
+
+    def getOfflineAvailableUpdates(self, token: CancellationToken = None) -> tuple[list[UpgradablePackage], list[str]] | None:
+        """
+        Returns the upgradable packages from the source on the local index, and the names of the other sources that have installed packages.
+        Returns None if winget export was cancelled, timed out or did not write its file, so the caller can run winget upgrade instead.
+        """
+        startTime = time.time()
+        os.makedirs(os.path.dirname(self.UPGRADES_EXPORT_FILE), exist_ok=True)
+        if os.path.exists(self.UPGRADES_EXPORT_FILE):
+            os.remove(self.UPGRADES_EXPORT_FILE)  # So an old export is never taken for the current one
+        command = self.Runner.run([self.EXECUTABLE, "export", "-o", self.UPGRADES_EXPORT_FILE, "--include-versions", "--accept-source-agreements"], token=token).wait()
+        if command.TimedOut or command.Cancelled or not os.path.exists(self.UPGRADES_EXPORT_FILE):
+            return None
+        exportTime = time.time()
+        installedPackages = self.readExportFile(self.UPGRADES_EXPORT_FILE)
+        packages = []
+        for name, id, version, newVersion in resolveUpgrades(installedPackages, WingetIndex.getLatestVersions(), WingetIndex.SOURCE_NAME):
+            if name not in self.BLACKLISTED_PACKAGE_NAMES and id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS:
+                packages.append(UpgradablePackage(name, id, version, newVersion, f"Winget: {WingetIndex.SOURCE_NAME}", Winget))
+        otherSources = sorted({source for version, source in installedPackages.values() if source != WingetIndex.SOURCE_NAME})
+        print(f"🟢 {self.NAME} offline search for updates found {len(packages)} update(s) among {len(installedPackages)} exported package(s) (export took {round(exportTime - startTime, 2)}s, resolving took {round((time.time() - exportTime) * 1000, 1)}ms)")
+        self.Health.recordCommand(command)
+        return packages, otherSources
+
+    def iterUpgradeCommandResults(self, sourceName: str | None, token: CancellationToken = None) -> Iterator[UpgradablePackage]:
+        """
+        Runs winget upgrade, on the given source or on all of them, and yields the packages listed.
+        """
         try:
-            packages: list[UpgradablePackage] = []
-            p = subprocess.Popen([self.EXECUTABLE, "upgrade", "--include-unknown", "--accept-source-agreements"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ.copy(), shell=True)
-            hasShownId: bool = False
-            idPosition: int = 0
-            versionPosition: int = 0
-            newVerPosition: int = 0
-            rawoutput = "\n\n---------" + self.NAME
-            noSourcesAvailable = False
-            while p.poll() is None:
-                line: str = str(p.stdout.readline().strip(), "utf-8", errors="ignore")
-                rawoutput += "\n" + line
-                if not hasShownId:
-                    if " Id " in line:
-                        line = line.replace("\x08-\x08\\\x08|\x08 \r", "")
-                        for char in ("\r", "/", "|", "\\", "-"):
-                            line = line.split(char)[-1].strip()
-                        hasShownId = True
-                        idPosition = len(line.split("Id")[0])
-                        versionPosition = len(line.split("Version")[0])
-                        newVerPosition = len(line.split("Available")[0])
-                        sourcePosition = len(line.split("Source")[0])
-                        if len(line) == sourcePosition:
-                            noSourcesAvailable = True
-                            print("🟡 Winget reported no sources on getAvailableUpdates")
+            packageCount = 0
+            fullIdsLoaded = False
+            parser = TableOutputParser(requiredColumns=4)
+            p = self.Runner.run([self.EXECUTABLE, "upgrade", "--include-unknown", "--accept-source-agreements"] + (["--source", sourceName] if sourceName else []), token=token)
+            for cells in parser.parse(p):  # The packages that require explicit targeting are listed on a second table
+                name, id, ver, newver = cells[0], cells[1], cells[2], cells[3]
+                if isTruncated(id):
+                    if not fullIdsLoaded:
+                        self.loadFullIds(token)
+                        fullIdsLoaded = True
+                    id = IdResolver.resolve(id, name) or id
+                source = self.getSourceFromCell(cells[-1]) if len(parser.Headers) >= 5 else ""
+                if not source and sourceName:
+                    source = f"Winget: {sourceName}"  # There is no Source column when listing a single source
+                elif not source:
+                    if len(parser.Headers) >= 5 and len(Globals.wingetSources.keys()) > 0:
+                        print("🟠 No source found on Winget.getAvailableUpdates()!")
+                        source = "Winget: " + list(Globals.wingetSources.keys())[0]
                     else:
-                        pass
-                elif "---" in line:
-                    pass
-                elif " upgrades available." in line:
-                    hasShownId = False
-                else:
-                    element = line
-                    try:
-                        verElement = element[idPosition:].strip()
-                        verElement.replace("\t", " ")
-                        while "  " in verElement:
-                            verElement = verElement.replace("  ", " ")
-                        iOffset = 0
-                        id = verElement.split(" ")[iOffset]
-                        ver = verElement.split(" ")[iOffset + 1]
-                        newver = verElement.split(" ")[iOffset + 2]
-                        if not noSourcesAvailable:
-                            source = "Winget: " + verElement.split(" ")[iOffset + 3]
-                        if len(id) == 1:
-                            iOffset + 1
-                            id = verElement.split(" ")[iOffset]
-                            ver = verElement.split(" ")[iOffset + 1]
-                            newver = verElement.split(" ")[iOffset + 2]
-                            if not noSourcesAvailable:
-                                source = "Winget: " + verElement.split(" ")[iOffset + 3]
-                        if ver.strip() in ("<", ">", "-"):
-                            iOffset += 1
-                            ver = ver.strip() + " " + verElement.split(" ")[iOffset + 1]
-                            newver = verElement.split(" ")[iOffset + 2]
-                            if not noSourcesAvailable:
-                                source = "Winget: " + verElement.split(" ")[iOffset + 3]
-                        name = element[0:idPosition].strip()
-
-                        if noSourcesAvailable:
-                            source = "Winget"
-                        elif source.strip() == "":
-                            if len(list(Globals.wingetSources.keys()) >= 0):
-                                print("🟠 No source found on Winget.getAvailableUpdates()!")
-                                source = "Winget: " + list(Globals.wingetSources.keys())[0]
-                            else:
-                                source = "Winget"
-
-                        if "  " not in name:
-                            if name not in self.BLACKLISTED_PACKAGE_NAMES and id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS:
-                                packages.append(UpgradablePackage(name, id, ver, newver, source, Winget))
-                        else:
-                            name = name.replace("  ", "#").replace("# ", "#").replace(" #", "#")
-                            while "##" in name:
-                                name = name.replace("##", "#")
-                            if name not in self.BLACKLISTED_PACKAGE_NAMES and id not in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS:
-                                packages.append(UpgradablePackage(name.split("#")[0], name.split("#")[-1] + id, ver, newver, source, Winget))
-                    except Exception as e:
-                        packages.append(UpgradablePackage(element[0:idPosition].strip(), element[idPosition:versionPosition].strip(), element[versionPosition:newVerPosition].split(" ")[0].strip(), element[newVerPosition:sourcePosition].split(" ")[0].strip(), "Winget: " + element[sourcePosition:].split(" ")[0].strip(), Winget))
-                        if type(e) is not IndexError:
-                            report(e)
-            print(f"🟢 {self.NAME} search for updates finished with {len(packages)} result(s)")
-            Globals.PackageManagerOutput += rawoutput
-            return packages
+                        source = "Winget"
+                if name not in self.BLACKLISTED_PACKAGE_NAMES and id not in self.BLACKLISTED_PACKAGE_IDS and ver not in self.BLACKLISTED_PACKAGE_VERSIONS:
+                    yield UpgradablePackage(name, id, ver, newver, source, Winget)
+                    packageCount += 1
+            if parser.TableCount and len(parser.Headers) < 5 and not sourceName:
+                print("🟡 Winget reported no sources on getAvailableUpdates")
+            print(f"🟢 {self.NAME} search for updates finished with {packageCount} result(s)")
+            Globals.PackageManagerOutput += "\n\n---------" + self.NAME + "\n" + "\n".join(parser.Lines)
+            IdResolver.save()
+            self.Health.recordCommand(p)
         except Exception as e:
             report(e)
-            return []
+            self.Health.recordFailure(str(e))
 
-    def getInstalledPackages(self, second_attempt: bool = False) -> list[Package]:
+    def iterInstalledPackages(self, token: CancellationToken = None) -> Iterator[Package]:
         f"""
-        Will retieve the intalled packages by {self.NAME} in the format of a list[Package] object.
-        """
-
-        def getSource(id: str) -> str:
-            id = id.strip()
-            androidValid = True
-            for letter in id:
-                if letter not in "abcdefghijklmnopqrstuvwxyz.":
-                    androidValid = False
-            if androidValid and id.count(".") > 1:
-                return _("Android Subsystem")
-            s = "Winget"
-            for illegal_char in ("{", "}", " "):
-                if illegal_char in id:
-                    s = _("Local PC")
-                    break
-            if s == "Winget":
-                if id.count(".") != 1:
-                    s = (_("Local PC"))
-                    if id.count(".") > 1:
-                        for letter in id:
-                            if letter in "ABCDEFGHIJKLMNOPQRSTUVWXYZ":
-                                s = "Winget"
-                                break
-            if s == _("Local PC"):
-                if id == "Steam":
-                    s = "Steam"
-                if id.count("Steam App ") == 1:
-                    s = "Steam"
-                    for number in id.split("Steam App ")[1]:
-                        if number not in "0123456789":
-                            s = _("Local PC")
-                            break
-                if id == "Uplay":
-                    s = "Ubisoft Connect"
-                if id.count("Uplay Install ") == 1:
-                    s = "Ubisoft Connect"
-                    for number in id.split("Uplay Install ")[1]:
-                        if number not in "0123456789":
-                            s = _("Local PC")
-                            break
-                if id.count("_is1") == 1:
-                    s = "GOG"
-                    for number in id.split("_is1")[0]:
-                        if number not in "0123456789":
-                            s = _("Local PC")
-                            break
-                    if len(id) != 14:
-                        s = _("Local PC")
-                    if id.count("GOG") == 1:
-                        s = "GOG"
-            if s == "Winget":
-                if len(id.split("_")[-1]) in (13, 14) and (len(id.split("_")) == 2 or id == id.upper()):
-                    s = "Microsoft Store"
-                elif len(id.split("_")[-1]) <= 13 and len(id.split("_")) == 2 and "…" == id.split("_")[-1][-1]:  # Delect microsoft store ellipsed packages
-                    s = "Microsoft Store"
-            if len(id) in (13, 14) and (id.upper() == id):
-                s = "Winget: msstore"
-            if s == "Winget":
-                s = "Winget: winget"
-            return s
-
+        Will yield the intalled packages by {self.NAME} as Package objects, one by one while its output is being parsed.
+        """
         print(f"🔵 Starting {self.NAME} search for installed packages")
+        exportCommand = None
+        p = None
         try:
-            packages: list[Package] = []
-            p = subprocess.Popen([self.EXECUTABLE, "list", "--accept-source-agreements"], stdout=subprocess.PIPE, stderr=subprocess.PIPE, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ.copy(), shell=True)
-            hasShownId: bool = False
-            idPosition: int = 0
-            versionPosition: int = 0
-            rawoutput = "\n\n---------" + self.NAME
-            while p.poll() is None:
-                line: str = str(p.stdout.readline().strip(), "utf-8", errors="ignore")
-                rawoutput += "\n" + line
-                if not hasShownId:
-                    if " Id " in line:
-                        line = line.replace("\x08-\x08\\\x08|\x08 \r", "")
-                        for char in ("\r", "/", "|", "\\", "-"):
-                            line = line.split(char)[-1].strip()
-                        hasShownId = True
-                        idPosition = len(line.split("Id")[0])
-                        versionPosition = len(line.split("Version")[0])
-                        sourcePosition = len(line.split("Source")[0])
-                    else:
-                        pass
-                elif "---" in line:
-                    pass
+            packageCount = 0
+            exportedPackages: dict[str, tuple[str, str]] = None
+            if self.StructuredOutput.isAvailable("export"):
+                # Runs next to winget list, and is only waited for when a truncated id or version shows up
+                os.makedirs(os.path.dirname(self.EXPORT_FILE), exist_ok=True)
+                exportCommand = self.Runner.run([self.EXECUTABLE, "export", "-o", self.EXPORT_FILE, "--include-versions", "--accept-source-agreements"], token=token)
+            parser = TableOutputParser(requiredColumns=3)
+            p = self.Runner.run([self.EXECUTABLE, "list", "--accept-source-agreements"], token=token)
+            for cells in parser.parse(p):
+                name, id, ver = cells[0], cells[1], cells[2]
+                if len(parser.Headers) >= 4 and cells[-1] in Globals.wingetSources.keys():  # Name, Id, Version, (Available,) Source
+                    source = "Winget: " + cells[-1]
                 else:
-                    packageLine = line.replace("2010  x", "2010 x").replace("Microsoft.VCRedist.2010", " Microsoft.VCRedist.2010")  # Fix an issue with MSVC++ 2010, where it shows with a double space (see https://github.com/marticliment/WingetUI#450)
-                    try:
-                        verElement = packageLine[idPosition:].strip()
-                        verElement.replace("\t", " ")
-                        untrimmedVerelement = verElement
-                        while "  " in verElement:
-                            verElement = verElement.replace("  ", " ")
-                        iOffset = 0
-                        id = " ".join(untrimmedVerelement.split(" ")[iOffset:-1])
-                        ver = verElement.split(" ")[-1]
-                        if len(id) > (versionPosition - idPosition):
-                            id = " ".join(untrimmedVerelement.split(" ")[iOffset])
-                            id = id.replace("  ", "#").replace(" ", "").replace("#", " ")
-                            ver = verElement.split(" ")[iOffset + 1]
-                        if len(id) == 1:
-                            iOffset + 1
-                            id = verElement.split(" ")[iOffset]
-                            ver = verElement.split(" ")[iOffset + 1]
-                        if ver.strip() in ("<", "-", ">"):
-                            iOffset += 1
-                            ver = ver.strip() + " " + verElement.split(" ")[iOffset + 1]
-                        name = packageLine[0:idPosition].strip()
-
-                        if name.strip() == "":
-                            continue
-
-                        if packageLine.strip().split(" ")[-1] in Globals.wingetSources.keys():
-                            source = "Winget: " + packageLine.split(" ")[-1]
-                        else:
-                            source = getSource(id)
-
-                        if "  " not in name:
-                            if name not in self.BLACKLISTED_PACKAGE_NAMES and not id.strip() in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS:
-                                packages.append(Package(name, id.strip(), ver, source, Winget))
-                        else:
-                            if name not in self.BLACKLISTED_PACKAGE_NAMES and not id.strip() in self.BLACKLISTED_PACKAGE_IDS and version not in self.BLACKLISTED_PACKAGE_VERSIONS:
-                                print(f"🟡 package {name} failed parsing, going for method 2...")
-                                name = name.replace("  ", "#").replace("# ", "#").replace(" #", "#")
-                                while "##" in name:
-                                    name = name.replace("##", "#")
-                                packages.append(Package(name.split("#")[0], (name.split("#")[-1] + id).strip(), ver, source, Winget))
-                    except Exception as e:
-                        packages.append(Package(packageLine[0:idPosition].strip(), packageLine[idPosition:versionPosition].strip(), packageLine[versionPosition:sourcePosition].strip(), "Winget: " + packageLine[sourcePosition:].strip(), Winget))
-                        if type(e) is not IndexError:
-                            report(e)
-            print(f"🟢 {self.NAME} search for installed packages finished with {len(packages)} result(s)")
-            Globals.PackageManagerOutput += rawoutput
-
-            if len(packages) <= 2 and not second_attempt:
-                print("🟠 Chocolatey got too few installed packages, retrying")
-                return self.getInstalledPackages(second_attempt=True)
-
-            return packages
+                    source = SourceClassifier.classify(id)
+
+                if isTruncated(id) or isTruncated(ver):
+                    if exportedPackages is None:
+                        exportedPackages = self.getExportedPackages(exportCommand) if exportCommand is not None else {}
+                        IdResolver.addPackages({exportedId: "" for exportedId in exportedPackages.keys()})
+                        self.loadFullIds(token, allowExport=False)  # winget export has already been run
+                    if isTruncated(id):
+                        id = IdResolver.resolve(id, name) or id
+                    id, ver, source = self.completeFromExport(exportedPackages, id, ver, source)
+
+                if name not in self.BLACKLISTED_PACKAGE_NAMES and id not in self.BLACKLISTED_PACKAGE_IDS and ver not in self.BLACKLISTED_PACKAGE_VERSIONS:
+                    yield Package(name, id, ver, source, Winget)
+                    packageCount += 1
+            print(f"🟢 {self.NAME} search for installed packages finished with {packageCount} result(s)")
+            Globals.PackageManagerOutput += "\n\n---------" + self.NAME + "\n" + "\n".join(parser.Lines)
+            IdResolver.save()
+            if exportCommand is not None:
+                exportCommand.wait()
+
+            if packageCount <= 2 and p.ReturnCode != 0 and not p.TimedOut and not p.Cancelled:
+                print(f"🟠 {self.NAME} got too few installed packages and exited with code {p.ReturnCode}")
+                self.Health.recordFailure(_("Too few packages were found"))
+            else:
+                self.Health.recordCommand(p)
         except Exception as e:
             report(e)
-            return []
+            self.Health.recordFailure(str(e))
+        finally:
+            # Kills whatever is still running if the listing was abandoned (stopped early, cancelled or failed), and releases their QoS slots
+            for command in (exportCommand, p):
+                if command is not None:
+                    command.close()
+
+    def getExportedPackages(self, command) -> dict[str, tuple[str, str]]:
+        """
+        Waits for winget export, and returns the packages in the file it wrote as {id: (version, source)}. Unlike the table of winget list,
+        the file has the full ids and versions, but only of the packages that are installed from a source, and without their names.
+        If the file can't be read, winget export is not used again for the rest of the session.
+        """
+        command.wait()
+        if command.TimedOut or command.Cancelled:
+            return {}
+        try:
+            return self.readExportFile(self.EXPORT_FILE)
+        except Exception as e:
+            self.StructuredOutput.markUnavailable("export", str(e))
+            return {}
 
-    def getPackageDetails(self, package: Package) -> PackageDetails:
+    def readExportFile(self, path: str) -> dict[str, tuple[str, str]]:
+        """
+        Returns the packages on a file written by winget export, as {id: (version, source)}.
+        """
+        exportedPackages: dict[str, tuple[str, str]] = {}
+        with open(path, "r", encoding="utf-8-sig") as f:
+            document = json.load(f)
+        for source in document["Sources"]:
+            sourceName = source["SourceDetails"]["Name"]
+            for package in source["Packages"]:
+                exportedPackages[package["PackageIdentifier"]] = (package.get("Version", ""), sourceName)
+        return exportedPackages
+
+    def completeFromExport(self, exportedPackages: dict[str, tuple[str, str]], id: str, version: str, source: str) -> tuple[str, str, str]:
         """
-        Will return a PackageDetails object containing the information of the given Package object
+        Replaces a truncated version from the table of winget list with the full one from winget export, and sets the source the package was exported from.
+        """
+        if id not in exportedPackages:
+            return id, version, source
+        exportedVersion, sourceName = exportedPackages[id]
+        if isTruncated(version) and exportedVersion:
+            version = exportedVersion
+        return id, version, "Winget: " + sourceName
+
+    def loadFullIds(self, token: CancellationToken = None, allowExport: bool = True) -> int:
+        """
+        Feeds the id resolver with the full ids of the whole catalog from the local source index, which does not need any process and is
+        only done once per index. When the index is not available, the ids of the installed packages are loaded from winget export instead.
+        Returns the number of processes it took.
+        """
+        if WingetIndex.isAvailable():
+            try:
+                if IdResolver.LoadedFrom != WingetIndex.Path:
+                    IdResolver.addPackages({id: name for id, name, version in WingetIndex.getLatestVersions().values()}, WingetIndex.Path)
+                return 0
+            except Exception as e:
+                report(e)
+        if allowExport and self.StructuredOutput.isAvailable("export"):
+            try:
+                os.makedirs(os.path.dirname(self.IDS_EXPORT_FILE), exist_ok=True)
+                command = self.Runner.run([self.EXECUTABLE, "export", "-o", self.IDS_EXPORT_FILE, "--accept-source-agreements"], token=token).wait()
+                if not command.TimedOut and not command.Cancelled:
+                    IdResolver.addPackages({id: "" for id in self.readExportFile(self.IDS_EXPORT_FILE).keys()})
+                return 1
+            except Exception as e:
+                report(e)
+                return 1
+        return 0
+
+    def resolveTruncatedId(self, package: Package, token: CancellationToken = None) -> int:
+        """
+        Replaces the truncated id of the given package with the full one, when it can be found. Otherwise the id is left as it is,
+        and the package is installed, updated or uninstalled by name. Returns the number of processes it took.
+        """
+        processCount = 0
+        fullId = IdResolver.resolve(package.Id, package.Name)
+        if fullId is None:
+            processCount += self.loadFullIds(token)
+            fullId = IdResolver.resolve(package.Id, package.Name)
+        if fullId:
+            print(f"🔵 Found the full id of {package.Id}: {fullId}")
+            package.Id = fullId
+        else:
+            print(f"🟡 The full id of {package.Id} could not be found")
+        return processCount
+
+    def getPackageDetails(self, package: Package, token: CancellationToken = None) -> PackageDetails:
+        """
+        Will return a PackageDetails object containing the information of the given Package object.
+        The details are loaded with a single winget show, on the locale learnt for the source of the package (see getDetailsLocale), or without any locale,
+        and the versions are read from the local source index when possible, so opening the details of a package usually takes a single process.
+        When the index does not have them, the versions are left to getPackageVersions, which runs once the user expands the versions.
         """
         print(f"🔵 Starting get info for {package.Id} on {self.NAME}")
+        processCount = 0
         if "…" in package.Id:
-            self.updatePackageId(package)
+            processCount += self.resolveTruncatedId(package, token)
         details = PackageDetails(package)
         try:
             details.Scopes = [_("Current user"), _("Local machine")]
             details.ManifestUrl = f"https://github.com/microsoft/winget-pkgs/tree/master/manifests/{package.Id[0].lower()}/{'/'.join(package.Id.split('.'))}" if not (package.Id == package.Id.upper()) else f"https://apps.microsoft.com/store/detail/{package.Id}"
             details.Architectures = ["x64", "x86"] + (["arm64"] if self.IS_ARM else [])
-            loadedInformationPieces = 0
-            currentIteration = 0
-            while loadedInformationPieces < 2 and currentIteration < 50:
-                currentIteration += 1
-                outputIsDescribing = False
-                outputIsShowingNotes = False
-                outputIsShowingTags = False
-                p = subprocess.Popen([self.EXECUTABLE, "show", "--id", f"{package.Id}", "--exact", "--accept-source-agreements", "--locale", locale.getdefaultlocale()[0].replace("_", "-")], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ.copy(), shell=True)
-                output: list[str] = []
-                foundInstallers = True
-                while p.poll() is None:
-                    line = p.stdout.readline()
-                    if line:
-                        if b"No package found matching input criteria." in line:
-                            return details
-                        elif b"No applicable installer found; see logs for more details." in line:
-                            foundInstallers = False
-                            print(f"🟡 Couldn't found installers for locale {locale.getdefaultlocale()[0]}")
-                        elif b"The value provided for the `locale` argument is invalid" in line:
-                            foundInstallers = False
-                            print(f"🟠 The locale {locale.getdefaultlocale()[0]} was tagged as invalid!")
-                        output.append(str(line, encoding='utf-8', errors="ignore"))
-
-                if not foundInstallers:
-                    p = subprocess.Popen([self.EXECUTABLE, "show", "--id", f"{package.Id}", "--exact", "--accept-source-agreements", "--locale", "en-US"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ.copy(), shell=True)
-                    output: list[str] = []
-                    foundInstallers = True
-                    while p.poll() is None:
-                        line = p.stdout.readline()
-                        if line:
-                            if b"No package found matching input criteria." in line:
-                                return details
-                            elif b"No applicable installer found; see logs for more details." in line:
-                                foundInstallers = False
-                                print("🟠 Couldn't found installers for locale en_US")
-                            output.append(str(line, encoding='utf-8', errors="ignore"))
-
-                if not foundInstallers:
-                    p = subprocess.Popen([self.EXECUTABLE, "show", "--id", f"{package.Id}", "--exact", "--accept-source-agreements"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ.copy(), shell=True)
-                    output: list[str] = []
-                    foundInstallers = True
-                    while p.poll() is None:
-                        line = p.stdout.readline()
-                        if line:
-                            if b"No package found matching input criteria." in line:
-                                return details
-                            elif b"No applicable installer found; see logs for more details." in line:
-                                foundInstallers = False
-                                break
-                            output.append(str(line, encoding='utf-8', errors="ignore"))
-
-                Globals.PackageManagerOutput += "\n--------" + "\n".join(output)
-
-                for line in output:
-                    if line[0] == " " and outputIsDescribing:
-                        details.Description += "<br>" + line[2:]
-                    else:
-                        outputIsDescribing = False
-                    if line[0] == " " and outputIsShowingNotes:
-                        details.ReleaseNotes += line[2:] + "<br>"
-                    else:
-                        outputIsShowingNotes = False
-                    if line[0] == " " and outputIsShowingTags:
-                        details.Tags.append(line.strip())
-                    else:
-                        outputIsShowingTags = False
-                    if "Publisher:" in line:
-                        details.Publisher = line.replace("Publisher:", "").strip()
-                        loadedInformationPieces += 1
-                    elif "Description:" in line:
-                        details.Description = line.replace("Description:", "").strip()
-                        outputIsDescribing = True
-                        loadedInformationPieces += 1
-                    elif "Author:" in line:
-                        details.Author = line.replace("Author:", "").strip()
-                        loadedInformationPieces += 1
-                    elif "Homepage:" in line:
-                        details.HomepageURL = line.replace("Homepage:", "").strip()
-                        loadedInformationPieces += 1
-                    elif "License:" in line:
-                        details.License = line.replace("License:", "").strip()
-                        loadedInformationPieces += 1
-                    elif "License Url:" in line:
-                        details.LicenseURL = line.replace("License Url:", "").strip()
-                        loadedInformationPieces += 1
-                    elif "Installer SHA256:" in line:
-                        details.InstallerHash = line.replace("Installer SHA256:", "").strip()
-                        loadedInformationPieces += 1
-                    elif "Installer Url:" in line:
-                        details.InstallerURL = line.replace("Installer Url:", "").strip()
-                        try:
-                            details.InstallerSize = int(urlopen(details.InstallerURL).length / 1000000)
-                        except Exception as e:
-                            print("🟠 Can't get installer size:", type(e), str(e))
-                        loadedInformationPieces += 1
-                    elif "Release Date:" in line:
-                        details.UpdateDate = line.replace("Release Date:", "").strip()
-                        loadedInformationPieces += 1
-                    elif "Release Notes Url:" in line:
-                        details.ReleaseNotesUrl = line.replace("Release Notes Url:", "").strip()
-                        loadedInformationPieces += 1
-                    elif "Release Notes:" in line:
-                        details.ReleaseNotes = ""
-                        outputIsShowingNotes = True
-                        loadedInformationPieces += 1
-                    elif "Tags:" in line:
-                        details.Tags = []
-                        outputIsShowingTags = True
-                        loadedInformationPieces += 1
-                    elif "Installer Type:" in line:
-                        details.InstallerType = line.replace("Installer Type:", "").strip()
 
+            detailsLocale = self.getDetailsLocale(package.Source)
+            if isCancelled(token):
+                return details
+            p = self.Runner.run([self.EXECUTABLE, "show", "--id", f"{package.Id}", "--exact", "--accept-source-agreements"] + (["--locale", detailsLocale] if detailsLocale else []), token=token).wait()
+            processCount += 1
+            output = [line for line in p.Lines if line]
+            Globals.PackageManagerOutput += "\n--------" + "\n".join(output)
+            if any("No package found matching input criteria." in line for line in output):
+                return details
+            elif any("No applicable installer found" in line or "The value provided for the `locale` argument is invalid" in line for line in output):
+                print(f"🟡 Winget show found no installers for locale {detailsLocale}, it won't be used again for {package.Source}")
+                self.forgetDetailsLocale(package.Source)
+            elif self.parseShowOutput(details, output) >= 2:
+                installerLocale = self.getInstallerLocale(output)
+                if not detailsLocale and installerLocale:
+                    self.rememberDetailsLocale(package.Source, installerLocale)
+            elif not p.TimedOut and not p.Cancelled:
+                print(f"🟠 Winget show returned no details for {package.Id} on locale {detailsLocale or '(none)'}")
             details.Description = ConvertMarkdownToHtml(details.Description)
             details.ReleaseNotes = ConvertMarkdownToHtml(details.ReleaseNotes)
 
-            print(f"🔵 Loading versions for {package.Name}")
-            currentIteration = 0
-            versions = []
-            while versions == [] and currentIteration < 50:
-                currentIteration += 1
-                p = subprocess.Popen([self.EXECUTABLE, "show", "--id", f"{package.Id}", "-e", "--versions", "--accept-source-agreements"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ.copy(), shell=True)
+            versions = self.getIndexVersions(package)
+            details.Versions = versions or []
+            details.VersionsLoaded = versions is not None
+            print(f"🟢 Get info finished for {package.Name} on {self.NAME}")
+            return details
+        except Exception as e:
+            report(e)
+            return details
+        finally:
+            self.recordDetailsProcesses(processCount)
+
+    def parseShowOutput(self, details: PackageDetails, output: list[str]) -> int:
+        """
+        Fills the given details with the fields of the output of winget show, and returns the number of fields found.
+        """
+        loadedInformationPieces = 0
+        outputIsDescribing = False
+        outputIsShowingNotes = False
+        outputIsShowingTags = False
+        for line in output:
+            if line[0] == " " and outputIsDescribing:
+                details.Description += "<br>" + line[2:]
+            else:
+                outputIsDescribing = False
+            if line[0] == " " and outputIsShowingNotes:
+                details.ReleaseNotes += line[2:] + "<br>"
+            else:
+                outputIsShowingNotes = False
+            if line[0] == " " and outputIsShowingTags:
+                details.Tags.append(line.strip())
+            else:
+                outputIsShowingTags = False
+            if "Publisher:" in line:
+                details.Publisher = line.replace("Publisher:", "").strip()
+                loadedInformationPieces += 1
+            elif "Description:" in line:
+                details.Description = line.replace("Description:", "").strip()
+                outputIsDescribing = True
+                loadedInformationPieces += 1
+            elif "Author:" in line:
+                details.Author = line.replace("Author:", "").strip()
+                loadedInformationPieces += 1
+            elif "Homepage:" in line:
+                details.HomepageURL = line.replace("Homepage:", "").strip()
+                loadedInformationPieces += 1
+            elif "License:" in line:
+                details.License = line.replace("License:", "").strip()
+                loadedInformationPieces += 1
+            elif "License Url:" in line:
+                details.LicenseURL = line.replace("License Url:", "").strip()
+                loadedInformationPieces += 1
+            elif "Installer SHA256:" in line:
+                details.InstallerHash = line.replace("Installer SHA256:", "").strip()
+                loadedInformationPieces += 1
+            elif "Installer Url:" in line:
+                details.InstallerURL = line.replace("Installer Url:", "").strip()
+                try:
+                    details.InstallerSize = int(urlopen(details.InstallerURL).length / 1000000)
+                except Exception as e:
+                    print("🟠 Can't get installer size:", type(e), str(e))
+                loadedInformationPieces += 1
+            elif "Release Date:" in line:
+                details.UpdateDate = line.replace("Release Date:", "").strip()
+                loadedInformationPieces += 1
+            elif "Release Notes Url:" in line:
+                details.ReleaseNotesUrl = line.replace("Release Notes Url:", "").strip()
+                loadedInformationPieces += 1
+            elif "Release Notes:" in line:
+                details.ReleaseNotes = ""
+                outputIsShowingNotes = True
+                loadedInformationPieces += 1
+            elif "Tags:" in line:
+                details.Tags = []
+                outputIsShowingTags = True
+                loadedInformationPieces += 1
+            elif "Installer Type:" in line:
+                details.InstallerType = line.replace("Installer Type:", "").strip()
+        return loadedInformationPieces
+
+    def getDetailsLocale(self, source: str) -> str | None:
+        """
+        Returns the installer locale winget picked the last time it showed a package of the given source on this computer, or None if there is none yet.
+        """
+        return GetJsonSettings(self.DETAILS_LOCALES_SETTINGS).get(f"{socket.gethostname()}|{source}") or None
+
+    def getInstallerLocale(self, output: list[str]) -> str:
+        for line in output:
+            if "Installer Locale:" in line:
+                return line.replace("Installer Locale:", "").strip()
+        return ""
+
+    def rememberDetailsLocale(self, source: str, detailsLocale: str) -> None:
+        key = f"{socket.gethostname()}|{source}"
+        rememberedLocales = GetJsonSettings(self.DETAILS_LOCALES_SETTINGS)
+        if rememberedLocales.get(key) != detailsLocale:
+            rememberedLocales[key] = detailsLocale
+            SetJsonSettings(self.DETAILS_LOCALES_SETTINGS, rememberedLocales)
+
+    def forgetDetailsLocale(self, source: str) -> None:
+        rememberedLocales = GetJsonSettings(self.DETAILS_LOCALES_SETTINGS)
+        if rememberedLocales.pop(f"{socket.gethostname()}|{source}", None) is not None:
+            SetJsonSettings(self.DETAILS_LOCALES_SETTINGS, rememberedLocales)
+
+    def getPackageVersions(self, package: Package, token: CancellationToken = None) -> list[str]:
+        """
+        Will return the versions of the given package, newest first, from the local source index or from winget show --versions.
+        """
+        print(f"🔵 Loading versions for {package.Name}")
+        versions = self.getIndexVersions(package)
+        if versions is not None:
+            return versions
+        versions = []
+        try:
+            with self.Runner.run([self.EXECUTABLE, "show", "--id", f"{package.Id}", "-e", "--versions", "--accept-source-agreements"], token=token) as p:
                 foundDashes = False
-                while p.poll() is None:
-                    line = p.stdout.readline().strip()
+                for line in p:
+                    line = line.strip()
                     if line:
                         if foundDashes:
-                            versions.append(str(line, encoding='utf-8', errors="ignore"))
-                        elif b"--" in line:
+                            versions.append(line)
+                        elif "--" in line:
                             foundDashes = True
-            details.Versions = versions
-            print(f"🟢 Get info finished for {package.Name} on {self.NAME}")
-            return details
+            print(f"🟢 Found {len(versions)} version(s) for {package.Name}")
         except Exception as e:
             report(e)
-            return details
+        return versions
+
+    def getIndexVersions(self, package: Package) -> list[str] | None:
+        """
+        Returns the versions of the given package from the local source index, newest first, or None if they have to be asked to winget.
+        """
+        if package.Source not in ("Winget", f"Winget: {WingetIndex.SOURCE_NAME}") or not WingetIndex.isAvailable():
+            return None
+        try:
+            return WingetIndex.getVersions(package.Id)
+        except Exception as e:
+            report(e)
+            return None
+
+    def recordDetailsProcesses(self, processCount: int) -> None:
+        assert processCount <= self.MAX_DETAILS_PROCESSES, f"Loading the details took {processCount} processes"
+        self.DetailsMetrics["Opens"] += 1
+        self.DetailsMetrics["Processes"] += processCount
+        self.DetailsMetrics["MaxProcesses"] = max(self.DetailsMetrics["MaxProcesses"], processCount)
+        self.DetailsMetrics["LastProcesses"] = processCount
+        print(f"🔵 {self.NAME} details took {processCount} process(es)")
+
+    def getDetailsMetrics(self) -> dict:
+        metrics = dict(self.DetailsMetrics)
+        metrics["AverageProcesses"] = round(metrics["Processes"] / metrics["Opens"], 2) if metrics["Opens"] else 0.0
+        return metrics
 
     def getIcon(self, source: str) -> QIcon:
         if not self.LoadedIcons:
@@ -627,7 +705,7 @@ class WingetPackageManager(PackageManagerWithSources):
 
     def startInstallation(self, package: Package, options: InstallationOptions, widget: 'PackageInstallerWidget') -> subprocess.Popen:
         if "…" in package.Id:
-            self.updatePackageId(package)
+            self.resolveTruncatedId(package)
 
         if "64" in package.Name or "64" in package.Id:
             print(f"🟠 Forcing 64bit architecture for package {package.Id}, {package.Name}")
@@ -646,7 +724,7 @@ class WingetPackageManager(PackageManagerWithSources):
 
     def startUpdate(self, package: Package, options: InstallationOptions, widget: 'PackageInstallerWidget') -> subprocess.Popen:
         if "…" in package.Id:
-            self.updatePackageId(package)
+            self.resolveTruncatedId(package)
 
         if "64-bit" in package.Name or "x64" in package.Id.lower():
             print(f"🟠 Forcing 64bit architecture for package {package.Id}, {package.Name}")
@@ -666,8 +744,7 @@ class WingetPackageManager(PackageManagerWithSources):
     def installationThread(self, p: subprocess.Popen, options: InstallationOptions, widget: 'PackageInstallerWidget'):
         output = ""
         counter = 0
-        while p.poll() is None:
-            line, is_newline = getLineFromStdout(p)
+        for line, is_newline in StdoutLineReader(p):
             line = str(line, encoding='utf-8', errors="ignore").strip()
             if line:
                 widget.addInfoLine.emit((line, is_newline))
@@ -689,7 +766,7 @@ class WingetPackageManager(PackageManagerWithSources):
 
     def startUninstallation(self, package: Package, options: InstallationOptions, widget: 'PackageInstallerWidget') -> subprocess.Popen:
         if "…" in package.Id:
-            self.updatePackageId(package, installed=True)
+            self.resolveTruncatedId(package)
 
         if "64" in package.Name or "64" in package.Id:
             print(f"🟠 Forcing 64bit architecture for package {package.Id}, {package.Name}")
@@ -709,8 +786,7 @@ class WingetPackageManager(PackageManagerWithSources):
     def uninstallationThread(self, p: subprocess.Popen, options: InstallationOptions, widget: 'PackageInstallerWidget'):
         counter = RETURNCODE_OPERATION_SUCCEEDED
         output = ""
-        while p.poll() is None:
-            line, is_newline = getLineFromStdout(p)
+        for line, is_newline in StdoutLineReader(p):
             line = str(line, encoding='utf-8', errors="ignore").strip()
             if line:
                 widget.addInfoLine.emit((line, is_newline))
@@ -724,50 +800,24 @@ class WingetPackageManager(PackageManagerWithSources):
             outputCode = RETURNCODE_NEEDS_ELEVATION
         widget.finishInstallation.emit(outputCode, output)
 
-    def updatePackageId(self, package: Package, installed: bool = False) -> tuple[str, str]:
-        if not installed:
-            p = subprocess.Popen([self.EXECUTABLE, "search", "--name", package.Name.replace("…", ""), "--accept-source-agreements"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ.copy(), shell=True)
-        else:
-            p = subprocess.Popen([self.EXECUTABLE, "list", "--query", package.Name.replace("…", ""), "--accept-source-agreements"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ.copy(), shell=True)
-        idSeparator = -1
-        rawoutput = "\n\n" + " ".join(p.args)
-        print(f"🔵 Finding Id for {package.Name} with command {p.args}")
-        while p.poll() is None:
-            line = p.stdout.readline()
-            line = line.strip()
-            if line:
-                rawoutput += str(line, encoding='utf-8', errors="ignore") + "\n"
-                if idSeparator == -1:
-                    line = str(line, encoding='utf-8', errors="ignore").replace("\x08-\x08\\\x08|\x08 \r", "").split("\r")[-1]
-                    if " Id " in line:
-                        idSeparator = len(line.split("Id")[0])
-                else:
-                    if b"---" not in line:
-                        newId = str(line, "utf-8", errors="ignore")[idSeparator:].split(" ")[0].strip()
-                        print(line, idSeparator)
-                        print("🔵 found Id", newId)
-                        package.Id = newId
-                        Globals.PackageManagerOutput += rawoutput + "\n\n"
-                        return
-
-        Globals.PackageManagerOutput += rawoutput + "\n\n"
-        print("🟡 Better id not found!")
-
-    def getSources(self) -> None:
+    def getSources(self, token: CancellationToken = None) -> None:
         print(f"🔵 Starting {self.NAME} source search...")
-        p = subprocess.Popen([self.EXECUTABLE, "source", "list"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=os.environ, shell=True)
+        try:
+            p = self.Runner.run([self.EXECUTABLE, "source", "list"], token=token)
+        except FileNotFoundError as e:
+            report(e)
+            return []
         output = []
         dashesPassed = False
         sources: list[ManagerSource] = []
-        while p.poll() is None:
-            line = p.stdout.readline()
+        for line in p:
             line = line.strip()
             if line:
                 if not dashesPassed:
-                    if b"---" in line:
+                    if "---" in line:
                         dashesPassed = True
                 else:
-                    output.append(str(line, encoding='utf-8', errors="ignore"))
+                    output.append(line)
         for element in output:
             try:
                 while "  " in element.strip():
@@ -796,8 +846,7 @@ class WingetPackageManager(PackageManagerWithSources):
     def sourceProgressThread(self, p: subprocess.Popen, options: InstallationOptions, widget: 'PackageInstallerWidget'):
         output = ""
         counter = 0
-        while p.poll() is None:
-            line, is_newline = getLineFromStdout(p)
+        for line, is_newline in StdoutLineReader(p):
             line = str(line, encoding='utf-8', errors="ignore").strip()
             if line:
                 widget.addInfoLine.emit((line, is_newline))
@@ -818,7 +867,10 @@ class WingetPackageManager(PackageManagerWithSources):
 
     def updateSources(self, signal: Signal = None) -> None:
         print(f"🔵 Reloading {self.NAME} sources...")
-        subprocess.run([self.EXECUTABLE, "source", "update"], shell=True, stdout=subprocess.PIPE)
+        try:
+            self.Runner.run([self.EXECUTABLE, "source", "update"]).wait()
+        except Exception as e:
+            report(e)
         if signal:
             signal.emit()
 
@@ -0,0 +1,401 @@
+if __name__ == "__main__":
+    # WingetUI cannot be run directly from this file, it must be run by importing the wingetui module
+    import os
+    import subprocess
+    import sys
+    sys.exit(subprocess.run(["cmd", "/C", "python", "-m", "wingetui"], shell=True, cwd=os.path.dirname(__file__).split("wingetui")[0]).returncode)
+
+
+import base64
+import io
+import os
+import subprocess
+import threading
+import time
+import uuid
+
+from wingetui.Core.Tools import getSettings, report
+from wingetui.PackageEngine.Cancellation import CancellationToken
+from wingetui.PackageEngine.CommandRunner import CommandDeadline, CommandRunner, CommandTiming, RunningCommand, killProcessTree
+from wingetui.PackageEngine.QualityOfService import QoS, QOS_BACKGROUND, QOS_INTERACTIVE
+
+
+# Every reply from a host ends with a line made of this marker, the token of the request and the exit code of the command.
+REPLY_MARKER = "\x1e#WINGETUI-END#"
+
+# The loop run by every host. Each request is a single line with a token and the base64-encoded UTF-8 script to run.
+HOST_BOOTSTRAP_SCRIPT = """
+$ProgressPreference = "SilentlyContinue"
+[Console]::OutputEncoding = [Text.Encoding]::UTF8
+while ($true) {
+    $request = [Console]::In.ReadLine()
+    if ($null -eq $request) { break }
+    $token, $payload = $request.Split(" ", 2)
+    $global:LASTEXITCODE = 0
+    $succeeded = $true
+    try {
+        $script = [Text.Encoding]::UTF8.GetString([Convert]::FromBase64String($payload))
+        & ([ScriptBlock]::Create($script)) *>&1 | Out-String -Stream | ForEach-Object { [Console]::Out.WriteLine($_) }
+        $succeeded = $?
+    } catch {
+        $_ | Out-String -Stream | ForEach-Object { [Console]::Out.WriteLine($_) }
+        $succeeded = $false
+    }
+    $code = if ($LASTEXITCODE) { $LASTEXITCODE } elseif ($succeeded) { 0 } else { 1 }
+    [Console]::Out.WriteLine("MARKER $token $code")
+    [Console]::Out.Flush()
+}
+""".replace("MARKER", REPLY_MARKER)
+
+
+def getScriptKey(runner: CommandRunner, script: str) -> str:
+    """
+    Returns the name under which the timings of the given script are kept: its first words, up to the first literal value.
+    """
+    words = []
+    for word in next((line for line in script.splitlines() if line.strip()), "").split():
+        if word.startswith(("'", '"', "$", "{", "(")) or len(words) == 3:
+            break
+        words.append(word)
+    return f"{runner.Name}: {' '.join(words)}"
+
+
+def quotePowerShellArgument(argument: str) -> str:
+    """
+    Returns the given string as a single-quoted PowerShell literal, so it can be safely embedded on a script.
+    """
+    return "'" + str(argument).replace("'", "''") + "'"
+
+
+class PowerShellHost():
+    """
+    A long-lived PowerShell process that runs the scripts it receives through stdin, one at a time.
+    """
+    Process: subprocess.Popen = None
+    QoS: str = QOS_INTERACTIVE
+    CommandCount: int = 0
+    LastUsed: float = 0.0
+    Broken: bool = False
+
+    def __init__(self, args: list[str], qos: str = QOS_INTERACTIVE):
+        self.QoS = qos
+        args, priorityFlags = QoS.getProcessArguments(args, qos)
+        kwargs = {}
+        if os.name == "nt":
+            kwargs["creationflags"] = subprocess.CREATE_NO_WINDOW | subprocess.CREATE_NEW_PROCESS_GROUP | priorityFlags
+        else:
+            kwargs["start_new_session"] = True
+        self.Process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.PIPE, cwd=os.getcwd(), env=CommandRunner.getEnvironment(), **kwargs)
+        self.Stdout = io.TextIOWrapper(self.Process.stdout, encoding="utf-8", errors="ignore", newline=None)
+        self.CommandCount = 0
+        self.LastUsed = time.time()
+        self.Broken = False
+
+    def isAlive(self) -> bool:
+        return not self.Broken and self.Process.poll() is None
+
+    def send(self, script: str) -> str:
+        """
+        Sends the given script to the host and returns the token that will identify its reply.
+        """
+        token = uuid.uuid4().hex
+        payload = base64.b64encode(script.encode("utf-8")).decode("ascii")
+        self.Process.stdin.write(f"{token} {payload}\n".encode("ascii"))
+        self.Process.stdin.flush()
+        self.CommandCount += 1
+        self.LastUsed = time.time()
+        return token
+
+    def readLine(self) -> str | None:
+        """
+        Returns the next output line of the host, without the line break, or None if the host has exited.
+        """
+        line = self.Stdout.readline()
+        if not line:
+            self.Broken = True
+            return None
+        return line.rstrip("\r\n")
+
+    def kill(self) -> None:
+        self.Broken = True
+        if self.Process.poll() is None:
+            killProcessTree(self.Process)
+        try:
+            self.Process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            pass
+
+
+class HostedCommand():
+    """
+    A script running on a PowerShellHost. It can be used the same way as a RunningCommand: iterating over it
+    yields the output lines as they arrive, and wait() collects them all.
+    Cancelling the given token kills the host, since a running script can't be interrupted through the framing protocol. So does the
+    deadline firing, or the command being closed (see close()) before the end of its output.
+    """
+    Args: list[str] = []
+    Key: str = ""
+    Lines: list[str] = []
+    Deadline: CommandDeadline = None
+    StartTime: float = 0.0
+    WallTime: float = 0.0
+    BytesRead: int = 0
+    ReturnCode: int = None
+    TimedOut: bool = False
+    Killed: bool = False
+    Cancelled: bool = False
+    Finished: bool = False
+
+    def __init__(self, pool: 'PowerShellHostPool', host: PowerShellHost, script: str, runner: CommandRunner, timeout: float | None, token: CancellationToken = None):
+        self.Args = ["powershell-host", script]
+        self.Key = getScriptKey(runner, script)
+        self.Lines = []
+        self.StartTime = time.time()
+        self.BytesRead = 0
+        self.ReturnCode = None
+        self.TimedOut = False
+        self.Killed = False
+        self.Cancelled = False
+        self.Finished = False
+        self.__pool = pool
+        self.__host = host
+        self.__script = script
+        self.__runner = runner
+        self.__replyToken = host.send(script)
+        limits = runner.getLimits(self.Key, timeout)
+        self.Deadline = CommandDeadline(f"PowerShell command {self.Key}", *limits, self.__timeout) if limits else None
+        self.__cancellationToken = token
+        if token is not None:
+            token.addCallback(self.__cancel)
+
+    def __iter__(self):
+        if self.Finished:
+            yield from self.Lines
+            return
+        try:
+            while True:
+                line = self.__host.readLine()
+                if line is None:
+                    if not self.Lines and not self.TimedOut and not self.Cancelled:
+                        # The host died before replying, so the script is run again on a regular process
+                        print("🟠 PowerShell host died while running a command, falling back to a one-shot process")
+                        fallback = self.__pool.runOneShot(self.__script, self.__runner, token=self.__cancellationToken)
+                        for line in fallback:
+                            self.Lines.append(line)
+                            yield line
+                        self.ReturnCode = fallback.ReturnCode
+                    break
+                if line.startswith(REPLY_MARKER):
+                    reply = line.split(" ")
+                    if len(reply) >= 3 and reply[1] == self.__replyToken:
+                        try:
+                            self.ReturnCode = int(reply[2])
+                        except ValueError:
+                            self.ReturnCode = 1
+                        break
+                    continue  # A late reply to a previous command
+                self.BytesRead += len(line) + 1
+                self.Lines.append(line)
+                yield line
+        finally:
+            self.__finish()
+
+    @property
+    def Stalled(self) -> bool:
+        return self.Deadline is not None and self.Deadline.Stalled
+
+    def wait(self) -> 'HostedCommand':
+        """
+        Blocks until the command has finished (or has been killed) and returns itself, so the Lines and ReturnCode attributes can be read.
+        """
+        for _line in self:
+            pass
+        return self
+
+    def kill(self) -> None:
+        """
+        Kills the host running this command. The host won't be used again.
+        """
+        self.Killed = True
+        self.__host.kill()
+
+    def __timeout(self) -> None:
+        if not self.Finished:
+            print(f"🟠 PowerShell command {self.__script} timed out, killing its host...")
+            self.TimedOut = True
+            self.kill()
+
+    def __cancel(self) -> None:
+        if not self.Finished:
+            self.Cancelled = True
+            self.kill()
+
+    def close(self) -> None:
+        """
+        Kills the host if the script is still running, and gives it back to the pool. Does nothing if the command has already finished.
+        """
+        self.__finish()
+
+    def __enter__(self) -> 'HostedCommand':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __del__(self):
+        if not getattr(self, "Finished", True):
+            try:
+                self.close()
+            except Exception:
+                pass  # The interpreter may be shutting down
+
+    def __finish(self) -> None:
+        if self.Finished:
+            return
+        if self.ReturnCode is None and self.__host.isAlive():
+            # The caller stopped reading before the end of the reply. The rest of it can't be skipped without waiting for the script to end,
+            # which may never happen, so the host is killed instead, and the pool will start a new one for the next command
+            print(f"🟡 PowerShell command {self.Key} was abandoned before the end of its output, killing its host...")
+            self.kill()
+        if self.Deadline:
+            self.Deadline.cancel()
+        if self.__cancellationToken is not None:
+            self.__cancellationToken.removeCallback(self.__cancel)
+        if self.ReturnCode is None:
+            self.ReturnCode = -1
+        self.Finished = True
+        self.WallTime = time.time() - self.StartTime
+        QoS.release(self.__host.QoS)
+        self.__pool.release(self.__host)
+        self.__runner.recordTiming(CommandTiming(self))
+
+    def __str__(self) -> str:
+        return f"<HostedCommand: {self.__script}; ReturnCode={self.ReturnCode}; TimedOut={self.TimedOut}; Killed={self.Killed}; Cancelled={self.Cancelled}>"
+
+
+class PowerShellHostPool():
+    """
+    Keeps a few warm PowerShell processes around, so the Scoop and PowerShell managers do not pay the PowerShell startup time on every command.
+    Hosts get a health check when they have been idle for a while and are recycled after running MAX_COMMANDS_PER_HOST commands.
+    When no host can be started the commands are run on one-shot PowerShell processes, the same way they were run before.
+    Background commands get their own, lower-priority, hosts.
+    """
+    MAX_HOSTS: int = 2
+    MAX_BACKGROUND_HOSTS: int = 1
+    MAX_COMMANDS_PER_HOST: int = 50
+    HEALTH_CHECK_AFTER_IDLE: float = 60
+    HEALTH_CHECK_TIMEOUT: float = 15
+    MAX_START_FAILURES: int = 3
+
+    Executable: str = "powershell.exe"
+    HostArgs: list[str] = []
+    StartFailures: int = 0
+
+    def __init__(self, executable: str = "powershell.exe", hostArgs: list[str] = None):
+        self.Executable = executable
+        encodedBootstrap = base64.b64encode(HOST_BOOTSTRAP_SCRIPT.encode("utf-16-le")).decode("ascii")
+        self.HostArgs = hostArgs if hostArgs else [executable, "-NoLogo", "-NoProfile", "-NonInteractive", "-ExecutionPolicy", "Bypass", "-EncodedCommand", encodedBootstrap]
+        self.StartFailures = 0
+        self.__idleHosts: dict[str, list[PowerShellHost]] = {QOS_INTERACTIVE: [], QOS_BACKGROUND: []}
+        self.__lock = threading.Lock()
+        self.__slots: dict[str, threading.BoundedSemaphore] = {QOS_INTERACTIVE: threading.BoundedSemaphore(self.MAX_HOSTS), QOS_BACKGROUND: threading.BoundedSemaphore(self.MAX_BACKGROUND_HOSTS)}
+
+    def isEnabled(self) -> bool:
+        return not getSettings("DisablePowerShellHostPool") and self.StartFailures < self.MAX_START_FAILURES
+
+    def run(self, script: str, runner: CommandRunner, timeout: float | None = None, token: CancellationToken = None) -> HostedCommand | RunningCommand:
+        """
+        Runs the given PowerShell script on a warm host and returns the running command. The script must not call exit.
+        If the pool is disabled or every host is busy, the script is run on a one-shot process through the given runner.
+        """
+        qos = QoS.getCurrentClass()
+        if self.isEnabled() and runner.CanUsePowerShellHosts and self.__slots[qos].acquire(blocking=False):
+            try:
+                host = self.__acquireHost(qos)
+            except Exception as e:
+                report(e)
+                host = None
+            if host:
+                QoS.acquire(qos)
+                try:
+                    return HostedCommand(self, host, script, runner, timeout, token)
+                except OSError as e:
+                    report(e)
+                    QoS.release(qos)
+                    host.kill()
+                    self.release(host)
+            else:
+                self.__slots[qos].release()
+        return self.runOneShot(script, runner, timeout, token)
+
+    def runOneShot(self, script: str, runner: CommandRunner, timeout: float | None = None, token: CancellationToken = None) -> RunningCommand:
+        return runner.run([self.Executable, "-NoProfile", "-ExecutionPolicy", "Bypass", "-Command", script], timeout=timeout, token=token)
+
+    def release(self, host: PowerShellHost) -> None:
+        """
+        Gives back a host once its command has finished. Dead and worn-out hosts are discarded.
+        """
+        if host.isAlive() and host.CommandCount < self.MAX_COMMANDS_PER_HOST:
+            with self.__lock:
+                self.__idleHosts[host.QoS].append(host)
+        else:
+            host.kill()
+        self.__slots[host.QoS].release()
+
+    def shutdown(self) -> None:
+        """
+        Kills all the idle hosts.
+        """
+        with self.__lock:
+            hosts = [host for hosts in self.__idleHosts.values() for host in hosts]
+            for hosts in self.__idleHosts.values():
+                hosts.clear()
+        for host in hosts:
+            host.kill()
+
+    def __acquireHost(self, qos: str) -> PowerShellHost | None:
+        while True:
+            with self.__lock:
+                host = self.__idleHosts[qos].pop() if self.__idleHosts[qos] else None
+            if host is None:
+                break
+            if host.isAlive() and (time.time() - host.LastUsed < self.HEALTH_CHECK_AFTER_IDLE or self.__isHealthy(host)):
+                return host
+            print("🟡 Discarding an unhealthy PowerShell host")
+            host.kill()
+
+        try:
+            host = PowerShellHost(self.HostArgs, qos)
+        except OSError as e:
+            print(f"🟠 Could not start a PowerShell host: {e}")
+            self.StartFailures += 1
+            return None
+        if not self.__isHealthy(host):
+            print("🟠 A new PowerShell host did not answer the health check")
+            host.kill()
+            self.StartFailures += 1
+            return None
+        self.StartFailures = 0
+        return host
+
+    def __isHealthy(self, host: PowerShellHost) -> bool:
+        """
+        Sends an empty command to the host and checks that its reply arrives in time.
+        """
+        deadline = threading.Timer(self.HEALTH_CHECK_TIMEOUT, host.kill)
+        deadline.daemon = True
+        deadline.start()
+        try:
+            token = host.send("")
+            host.CommandCount -= 1  # Health checks do not wear out the host
+            while (line := host.readLine()) is not None:
+                if line.startswith(REPLY_MARKER) and token in line:
+                    return True
+            return False
+        except OSError:
+            return False
+        finally:
+            deadline.cancel()
+
+
+PowerShellHosts = PowerShellHostPool()
@@ -0,0 +1,132 @@
+if __name__ == "__main__":
+    # WingetUI cannot be run directly from this file, it must be run by importing the wingetui module
+    import os
+    import subprocess
+    import sys
+    sys.exit(subprocess.run(["cmd", "/C", "python", "-m", "wingetui"], shell=True, cwd=os.path.dirname(__file__).split("wingetui")[0]).returncode)
+
+
+import os
+import shutil
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+
+import wingetui.Core.Globals as Globals
+from wingetui.Core.Tools import report
+
+
+QOS_INTERACTIVE = "interactive"
+QOS_BACKGROUND = "background"
+
+
+class QoSScheduler():
+    """
+    Decides when and how the commands of each quality-of-service class get started.
+    - Interactive commands (what the user is waiting for right now) start immediately, at normal priority.
+    - Background commands (automatic update checks, source refreshes, backups) are limited to BACKGROUND_CONCURRENCY at a time,
+      run at a lower CPU and I/O priority, and wait while interactive commands are running or installations are queued.
+      They never wait for more than MAX_YIELD_TIME, so they can't be starved forever.
+    The class of the commands is taken from the calling thread (see running() and background()), so the package managers do not need to know about it.
+    """
+    BACKGROUND_CONCURRENCY: int = 2
+    MAX_YIELD_TIME: float = 120
+    POLL_INTERVAL: float = 0.5
+    NICE_INCREMENT: int = 10
+
+    RunningInteractive: int = 0
+    RunningBackground: int = 0
+
+    def __init__(self):
+        self.RunningInteractive = 0
+        self.RunningBackground = 0
+        self.__local = threading.local()
+        self.__condition = threading.Condition()
+        self.__wrapperArgs: list[str] = None
+
+    def getCurrentClass(self) -> str:
+        """
+        Returns the QoS class of the calling thread. Threads are interactive unless told otherwise.
+        """
+        return getattr(self.__local, "qos", QOS_INTERACTIVE)
+
+    @contextmanager
+    def running(self, qos: str):
+        """
+        Every command started by the calling thread inside this context manager will belong to the given QoS class.
+        """
+        previous = self.getCurrentClass()
+        self.__local.qos = qos
+        try:
+            yield
+        finally:
+            self.__local.qos = previous
+
+    def background(self):
+        return self.running(QOS_BACKGROUND)
+
+    def isInteractiveWorkPending(self) -> bool:
+        return self.RunningInteractive > 0 or len(Globals.pending_programs) > 0
+
+    def acquire(self, qos: str) -> None:
+        """
+        Blocks until a command of the given class can be started.
+        """
+        with self.__condition:
+            if qos != QOS_BACKGROUND:
+                self.RunningInteractive += 1
+                return
+            yieldDeadline = time.time() + self.MAX_YIELD_TIME
+            while self.RunningBackground >= self.BACKGROUND_CONCURRENCY or (self.isInteractiveWorkPending() and time.time() < yieldDeadline):
+                self.__condition.wait(self.POLL_INTERVAL)  # Installations are queued outside of the scheduler, so they need to be polled
+            self.RunningBackground += 1
+
+    def release(self, qos: str) -> None:
+        with self.__condition:
+            if qos != QOS_BACKGROUND:
+                self.RunningInteractive -= 1
+            else:
+                self.RunningBackground -= 1
+            self.__condition.notify_all()
+
+    def getProcessArguments(self, args: list[str], qos: str) -> tuple[list[str], int]:
+        """
+        Returns the argv list and the Windows creation flags to start a command of the given class with.
+        Background commands get the below-normal priority class on Windows, and are wrapped with nice and ionice elsewhere.
+        """
+        if qos != QOS_BACKGROUND:
+            return args, 0
+        if os.name == "nt":
+            return args, subprocess.BELOW_NORMAL_PRIORITY_CLASS
+        if self.__wrapperArgs is None:
+            self.__wrapperArgs = []
+            if shutil.which("ionice"):
+                self.__wrapperArgs += ["ionice", "-c", "2", "-n", "7"]
+            if shutil.which("nice"):
+                self.__wrapperArgs += ["nice", "-n", str(self.NICE_INCREMENT)]
+        return self.__wrapperArgs + args, 0
+
+    @contextmanager
+    def lowerThreadPriority(self):
+        """
+        Lowers the CPU and I/O priority of the calling thread until the end of the block, so background work can run on the workers of the executor.
+        This is only done on Windows, where the background mode of a thread can be left. Elsewhere the thread priority can't be raised back.
+        """
+        lowered = False
+        if os.name == "nt":
+            try:
+                import ctypes
+                THREAD_MODE_BACKGROUND_BEGIN = 0x00010000
+                lowered = bool(ctypes.windll.kernel32.SetThreadPriority(ctypes.windll.kernel32.GetCurrentThread(), THREAD_MODE_BACKGROUND_BEGIN))
+            except Exception as e:
+                report(e)
+        try:
+            yield
+        finally:
+            if lowered:
+                THREAD_MODE_BACKGROUND_END = 0x00020000
+                ctypes.windll.kernel32.SetThreadPriority(ctypes.windll.kernel32.GetCurrentThread(), THREAD_MODE_BACKGROUND_END)
+
+
+QoS = QoSScheduler()
@@ -0,0 +1,194 @@
+if __name__ == "__main__":
+    # WingetUI cannot be run directly from this file, it must be run by importing the wingetui module
+    import os
+    import subprocess
+    import sys
+    sys.exit(subprocess.run(["cmd", "/C", "python", "-m", "wingetui"], shell=True, cwd=os.path.dirname(__file__).split("wingetui")[0]).returncode)
+
+
+import os
+import shutil
+import threading
+import time
+from collections import deque
+
+from wingetui.Core.Executor import Executor, POOL_SUBPROCESS
+from wingetui.Core.Tools import report
+from wingetui.PackageEngine.Classes import CancellationToken, ManagerSource, isCancelled
+from wingetui.PackageEngine.CommandRunner import CommandRunner
+from wingetui.PackageEngine.QualityOfService import QoS
+from wingetui.PackageEngine.ScoopBuckets import Manifests
+from wingetui.PackageEngine.ScoopSearchIndex import ScoopSearchIndex
+
+
+class ScoopBucket():
+    """
+    A Scoop bucket checkout, as it was after the last refresh.
+    """
+    Name: str = ""
+    Folder: str = ""
+    Url: str = ""
+    Head: str | None = None
+    UpdateDate: str = ""  # The date of the last commit pulled
+    PackageCount: int = 0
+    Refreshed: bool = False  # False if it was skipped: fetched within the freshness window, or not a git checkout
+    Failed: bool = False
+    Duration: float = 0  # In seconds
+
+    def __init__(self, name: str, folder: str):
+        self.Name = name
+        self.Folder = folder
+
+
+class ScoopBucketRefresher():
+    """
+    Pulls the git checkouts of Scoop itself and of its buckets at the same time, instead of one after the other like scoop update does.
+    At most MAX_CONCURRENT_PULLS run at once, on the subprocess pool of the executor, and a checkout fetched within the freshness window
+    (by WingetUI, by scoop update or by hand, as told by its .git/FETCH_HEAD) is skipped.
+    The update date and the package count of every bucket are kept until its HEAD changes, so the sources of Scoop can be
+    listed without scoop bucket list (see getSources).
+    """
+    GIT_EXECUTABLE: str = "git"
+    MAX_CONCURRENT_PULLS: int = 4
+    FRESHNESS_WINDOW: float = 10 * 60  # In seconds
+    PULL_TIMEOUT: float = 120
+    CORE_NAME: str = "scoop"
+
+    Core: ScoopBucket = None  # Scoop itself, as it was after the last refresh
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__buckets: dict[str, ScoopBucket] = {}  # By folder, the last known state of each bucket
+        self.Core = None
+
+    def isAvailable(self) -> bool:
+        """
+        Returns True if the buckets can be refreshed with git. Scoop must be a git checkout as well, otherwise only scoop update can update it
+        (scoop update clones it again the first time, so this is the case of a Scoop that has never been updated).
+        """
+        return Manifests.isAvailable() and os.path.isdir(os.path.join(self.getCoreFolder(), ".git")) \
+            and shutil.which(self.GIT_EXECUTABLE, path=CommandRunner.getEnvironment().get("PATH", os.defpath)) is not None
+
+    @staticmethod
+    def getCoreFolder() -> str:
+        return os.path.join(os.path.dirname(Manifests.getBucketsFolder()), "apps", "scoop", "current")
+
+    def refresh(self, runner: CommandRunner, force: bool = False, token: CancellationToken = None) -> list[ScoopBucket]:
+        """
+        Pulls Scoop itself and every bucket that have not been fetched within the freshness window (or all of them, if force is True),
+        and returns the buckets, by name.
+        """
+        startTime = time.time()
+        core = ScoopBucket(self.CORE_NAME, self.getCoreFolder())
+        buckets = [ScoopBucket(name, folder) for name, folder in sorted(Manifests.getBuckets().items())]
+        pending = deque([core] + buckets)
+        pendingLock = threading.Lock()
+        qos = QoS.getCurrentClass()
+
+        def refreshPending() -> None:
+            with QoS.running(qos):  # The pulls belong to the same QoS class as the calling thread
+                while True:
+                    with pendingLock:
+                        if not pending:
+                            return
+                        bucket = pending.popleft()
+                    try:
+                        self.refreshBucket(runner, bucket, force, token, describe=bucket is not core)
+                    except Exception as e:
+                        bucket.Failed = True
+                        report(e)
+
+        pulls = min(self.MAX_CONCURRENT_PULLS if runner.CanRunConcurrently else 1, len(pending))
+        futures = [Executor.submit(POOL_SUBPROCESS, refreshPending, name="Scoop bucket refresh") for _i in range(pulls - 1)]
+        # The calling thread pulls too, so the refresh goes on even if it runs on a worker of the subprocess pool and every other worker is busy
+        refreshPending()
+        for future in futures:
+            if not future.cancel():  # The workers that have not started by now would have nothing left to pull
+                future.result()
+        self.Core = core
+        refreshed = [bucket for bucket in buckets if bucket.Refreshed]
+        print(f"🟢 Refreshed {len(refreshed)} of {len(buckets)} Scoop bucket(s) in {round(time.time() - startTime, 2)}s, {sum(bucket.Failed for bucket in buckets)} failed")
+        return buckets
+
+    def refreshBucket(self, runner: CommandRunner, bucket: ScoopBucket, force: bool = False, token: CancellationToken = None, describe: bool = True) -> None:
+        startTime = time.time()
+        if not os.path.isdir(os.path.join(bucket.Folder, ".git")):
+            print(f"🟡 The Scoop bucket {bucket.Name} is not a git checkout, not refreshing it")
+        elif not force and time.time() - self.getLastFetchTime(bucket.Folder) < self.FRESHNESS_WINDOW:
+            print(f"🔵 The Scoop bucket {bucket.Name} was fetched recently, not refreshing it")
+        elif not isCancelled(token):
+            p = runner.run([self.GIT_EXECUTABLE, "-C", bucket.Folder, "pull", "-q"], timeout=self.PULL_TIMEOUT, token=token).wait()
+            bucket.Refreshed = True
+            bucket.Failed = p.ReturnCode != 0 or p.TimedOut or p.Cancelled
+            if bucket.Failed:
+                print(f"🟠 Can't refresh the Scoop bucket {bucket.Name} (return code {p.ReturnCode}): {' '.join(p.Lines[-3:])}")
+        bucket.Duration = time.time() - startTime
+        if describe:
+            self.describeBucket(runner, bucket, token)
+        else:
+            bucket.Head = ScoopSearchIndex.getGitHead(bucket.Folder)
+        if bucket.Refreshed:
+            print(f"🔵 Scoop bucket {bucket.Name} {'failed to refresh' if bucket.Failed else 'refreshed'} in {round(bucket.Duration, 2)}s")
+
+    def describeBucket(self, runner: CommandRunner, bucket: ScoopBucket, token: CancellationToken = None) -> None:
+        """
+        Fills the url, the update date and the package count of the given bucket, which are read again only if its HEAD has changed.
+        """
+        bucket.Head = ScoopSearchIndex.getGitHead(bucket.Folder)
+        with self.__lock:
+            known = self.__buckets.get(bucket.Folder)
+        if known is not None and known.Head is not None and known.Head == bucket.Head:
+            bucket.Url, bucket.UpdateDate, bucket.PackageCount = known.Url, known.UpdateDate, known.PackageCount
+        else:
+            bucket.Url = self.getRemoteUrl(bucket.Folder)
+            bucket.PackageCount = sum(1 for entry in os.scandir(Manifests.getManifestsFolder(bucket.Name)) if entry.name.endswith(".json"))
+            if bucket.Head is not None and not isCancelled(token):
+                p = runner.run([self.GIT_EXECUTABLE, "-C", bucket.Folder, "log", "-1", "--format=%ct"], token=token).wait()
+                if p.ReturnCode == 0 and p.Lines and p.Lines[0].strip().isdigit():
+                    bucket.UpdateDate = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(int(p.Lines[0].strip())))
+        with self.__lock:
+            self.__buckets[bucket.Folder] = bucket
+
+    def getSources(self, manager) -> list[ManagerSource] | None:
+        """
+        Returns the sources of the given manager from the last known state of the buckets, or None if any bucket has changed since it was described.
+        """
+        sources = []
+        for name, folder in sorted(Manifests.getBuckets().items()):
+            with self.__lock:
+                bucket = self.__buckets.get(folder)
+            if bucket is None or bucket.Head is None or bucket.Head != ScoopSearchIndex.getGitHead(folder):
+                return None
+            sources.append(ManagerSource(manager, bucket.Name, bucket.Url, bucket.PackageCount, bucket.UpdateDate))
+        return sources
+
+    @staticmethod
+    def getLastFetchTime(folder: str) -> float:
+        """
+        Returns when the given git checkout was last fetched (git writes FETCH_HEAD on every fetch or pull), or 0 if it never was.
+        """
+        try:
+            return os.path.getmtime(os.path.join(folder, ".git", "FETCH_HEAD"))
+        except OSError:
+            return 0
+
+    @staticmethod
+    def getRemoteUrl(folder: str) -> str:
+        """
+        Returns the url of the origin remote of the given git checkout, read from its .git/config, or an empty string.
+        """
+        try:
+            with open(os.path.join(folder, ".git", "config"), "r", encoding="utf-8") as f:
+                section = ""
+                for line in f:
+                    line = line.strip()
+                    if line.startswith("["):
+                        section = line
+                    elif section == '[remote "origin"]' and line.replace(" ", "").startswith("url="):
+                        return line.split("=", 1)[1].strip()
+        except OSError:
+            pass
+        return ""
+
+
+Refresher = ScoopBucketRefresher()
@@ -0,0 +1,163 @@
+if __name__ == "__main__":
+    # WingetUI cannot be run directly from this file, it must be run by importing the wingetui module
+    import os
+    import subprocess
+    import sys
+    sys.exit(subprocess.run(["cmd", "/C", "python", "-m", "wingetui"], shell=True, cwd=os.path.dirname(__file__).split("wingetui")[0]).returncode)
+
+
+import json
+import os
+import platform
+import threading
+import time
+
+from wingetui.PackageEngine.ScoopInventory import Inventory, InstalledScoopApp
+from wingetui.PackageEngine.VersionComparison import isNewerScoopVersion
+
+
+class ScoopBucketManifests():
+    """
+    Reads the manifests of the Scoop buckets straight from their git checkouts, under the buckets folder of the user Scoop root
+    (global apps are installed from the same buckets). A bucket keeps its manifests on a bucket subfolder, or on its root for the older ones.
+    Every manifest read is kept until its file changes, and so is the list of buckets until the buckets folder changes.
+    """
+    DEFAULT_BUCKET = "main"
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__manifests: dict[str, tuple[int, dict]] = {}  # By path: (modification time, manifest)
+        self.__buckets: tuple[str, int, dict[str, str]] = ("", 0, {})  # (buckets folder, modification time, folders by bucket name)
+
+    def getBucketsFolder(self) -> str:
+        return os.path.join(Inventory.getRoots()[0][0], "buckets")
+
+    def isAvailable(self) -> bool:
+        return Inventory.isAvailable() and os.path.isdir(self.getBucketsFolder())
+
+    def getBuckets(self) -> dict[str, str]:
+        """
+        Returns the folder of every bucket checked out, by bucket name.
+        """
+        bucketsFolder = self.getBucketsFolder()
+        try:
+            modifiedTime = os.stat(bucketsFolder).st_mtime_ns
+        except OSError:
+            return {}
+        with self.__lock:
+            cached = self.__buckets
+        if cached[0] == bucketsFolder and cached[1] == modifiedTime:
+            return dict(cached[2])
+        buckets = {entry.name: entry.path for entry in os.scandir(bucketsFolder) if entry.is_dir()}
+        with self.__lock:
+            self.__buckets = (bucketsFolder, modifiedTime, buckets)
+        return dict(buckets)
+
+    def getManifestsFolder(self, bucket: str) -> str:
+        bucketFolder = os.path.join(self.getBucketsFolder(), bucket)
+        return os.path.join(bucketFolder, "bucket") if os.path.isdir(os.path.join(bucketFolder, "bucket")) else bucketFolder
+
+    def getManifestPath(self, bucket: str, id: str) -> str:
+        return os.path.join(self.getManifestsFolder(bucket), f"{id}.json")
+
+    def getManifest(self, bucket: str, id: str) -> dict | None:
+        """
+        Returns the manifest of the given app on the given bucket, or None if the bucket does not have it (or it can't be read).
+        """
+        path = self.getManifestPath(bucket, id)
+        try:
+            modifiedTime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        with self.__lock:
+            cached = self.__manifests.get(path)
+        if cached is not None and cached[0] == modifiedTime:
+            return cached[1]
+        try:
+            with open(path, "r", encoding="utf-8-sig") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"🟠 Can't read the Scoop manifest {path}: {e}")
+            return None
+        if not isinstance(manifest, dict):
+            return None
+        with self.__lock:
+            self.__manifests[path] = (modifiedTime, manifest)
+        return manifest
+
+    def findManifest(self, id: str, bucket: str = "") -> tuple[str, dict] | None:
+        """
+        Returns the (bucket, manifest) of the given app the way scoop cat finds it: on the given bucket, or else on the bucket it was
+        installed from, or else on the first bucket that has it (main first). Returns None if no local bucket has it.
+        """
+        buckets = self.getBuckets()
+        candidates = [bucket] if bucket else []
+        for root, isGlobal in Inventory.getRoots():
+            app = Inventory.getApp(os.path.join(root, "apps", id), isGlobal)
+            if app is not None and app.Bucket in buckets:
+                candidates.append(app.Bucket)
+                break
+        candidates += sorted(buckets.keys(), key=lambda name: (name != self.DEFAULT_BUCKET, name))
+        checked = set()
+        for candidate in candidates:
+            if candidate in buckets and candidate not in checked:
+                checked.add(candidate)
+                manifest = self.getManifest(candidate, id)
+                if manifest is not None:
+                    return candidate, manifest
+        return None
+
+
+def resolveScoopUpgrades(apps: list[InstalledScoopApp], manifests: ScoopBucketManifests, today: str = None) -> list[tuple[InstalledScoopApp, str]]:
+    """
+    Returns the (app, latest version) of the installed apps whose bucket manifest has a newer version, like scoop status does, but without
+    running anything. Held apps, apps installed from a url and apps whose manifest is gone from their bucket are left out.
+    The autoupdate section of the manifests is not evaluated (it needs the network), the version on the bucket is the latest one, as for
+    scoop status. today (as yyyyMMdd) is only needed for the nightly apps, and defaults to the current day.
+    """
+    today = today or time.strftime("%Y%m%d")
+    upgrades = []
+    for app in apps:
+        if app.IsHeld or not app.Bucket or "/" in app.Bucket or "\\" in app.Bucket:
+            continue
+        manifest = manifests.getManifest(app.Bucket, app.Id)
+        if manifest is None or not manifest.get("version"):
+            continue
+        latestVersion = str(manifest["version"])
+        if isNewerScoopVersion(latestVersion, app.Version, today):
+            upgrades.append((app, latestVersion))
+    return upgrades
+
+
+def getScoopArchitecture() -> str:
+    """
+    Returns the architecture Scoop installs apps for on this machine (64bit, 32bit or arm64).
+    """
+    machine = platform.machine().lower()
+    if machine in ("arm64", "aarch64"):
+        return "arm64"
+    if machine in ("amd64", "x86_64"):
+        return "64bit"
+    return "32bit"
+
+
+def getScoopInstaller(manifest: dict, architecture: str) -> tuple[str, str]:
+    """
+    Returns the (url, hash) of the first file a manifest downloads on the given architecture, as Scoop picks it: from the
+    architecture section when it has one (falling back to the architectures this one can run), or else from the top level.
+    Empty strings are returned for what the manifest does not have.
+    """
+    url, hash = manifest.get("url", ""), manifest.get("hash", "")
+    architectures = manifest.get("architecture")
+    if isinstance(architectures, dict):
+        for candidate in {"arm64": ("arm64", "64bit", "32bit"), "64bit": ("64bit", "32bit")}.get(architecture, (architecture,)):
+            section = architectures.get(candidate)
+            if isinstance(section, dict) and section.get("url"):
+                url, hash = section["url"], section.get("hash", "")
+                break
+    url = url[0] if isinstance(url, list) and url else url
+    hash = hash[0] if isinstance(hash, list) and hash else hash
+    return (url if isinstance(url, str) else ""), (hash if isinstance(hash, str) else "")
+
+
+Manifests = ScoopBucketManifests()
@@ -0,0 +1,153 @@
+if __name__ == "__main__":
+    # WingetUI cannot be run directly from this file, it must be run by importing the wingetui module
+    import os
+    import subprocess
+    import sys
+    sys.exit(subprocess.run(["cmd", "/C", "python", "-m", "wingetui"], shell=True, cwd=os.path.dirname(__file__).split("wingetui")[0]).returncode)
+
+
+import json
+import os
+import threading
+import time
+
+from wingetui.Core.Tools import getSettings, report
+
+
+class InstalledScoopApp():
+    """
+    An app installed by Scoop, as described by the manifest.json and install.json of its current version.
+    """
+    Id: str = ""
+    Version: str = ""
+    Bucket: str = ""  # Or the url of the manifest, for the apps installed from one
+    Architecture: str = ""
+    IsGlobal: bool = False
+    IsHeld: bool = False
+    Path: str = ""  # The folder of the app, the one that holds every installed version
+
+    def __init__(self, id: str, version: str, bucket: str, architecture: str, isGlobal: bool, isHeld: bool, path: str):
+        self.Id = id
+        self.Version = version
+        self.Bucket = bucket
+        self.Architecture = architecture
+        self.IsGlobal = isGlobal
+        self.IsHeld = isHeld
+        self.Path = path
+
+
+class ScoopInventory():
+    """
+    Reads the apps installed by Scoop straight from its folders, instead of running scoop list on a PowerShell.
+    Every app has an apps/<app>/current folder (a junction to the installed version) with the manifest it was installed from
+    and an install.json with the bucket, the architecture and whether the app is held. The user and the global roots are
+    scanned one after the other, and an app is only read again when its folder or one of those two files has changed.
+    If no Scoop root can be found, isAvailable() returns False and scoop list has to be used instead.
+    """
+    SCOOP_ITSELF = "scoop"  # scoop list does not show Scoop itself
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__apps: dict[str, tuple[tuple, InstalledScoopApp | None]] = {}  # By app folder: (modification times, app)
+        self.__listings: dict[str, tuple[int, list[str]]] = {}  # By apps folder: (modification time, app folders)
+
+    def isAvailable(self) -> bool:
+        if getSettings("DisableScoopFilesystemInventory"):
+            return False
+        return any(os.path.isdir(os.path.join(root, "apps")) for root, isGlobal in self.getRoots())
+
+    def getRoots(self) -> list[tuple[str, bool]]:
+        """
+        Returns the (path, isGlobal) of the user and the global Scoop roots, the way Scoop finds them: from the SCOOP and SCOOP_GLOBAL
+        environment variables, then from the root_path and global_path of its config file, and then on their default locations.
+        """
+        config = {}
+        try:
+            configPath = os.path.join(os.environ.get("XDG_CONFIG_HOME", os.path.join(os.path.expanduser("~"), ".config")), "scoop", "config.json")
+            if os.path.isfile(configPath):
+                with open(configPath, "r", encoding="utf-8-sig") as f:
+                    config = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"🟠 Can't read the Scoop config file: {e}")
+        userRoot = os.environ.get("SCOOP") or config.get("root_path") or os.path.join(os.path.expanduser("~"), "scoop")
+        globalRoot = os.environ.get("SCOOP_GLOBAL") or config.get("global_path") or os.path.join(os.environ.get("ProgramData", "C:\\ProgramData"), "scoop")
+        return [(userRoot, False), (globalRoot, True)]
+
+    def getInstalledApps(self) -> list[InstalledScoopApp]:
+        """
+        Returns the apps installed on every Scoop root, user ones first. The apps whose installation failed (the ones without a current manifest) are left out, like scoop list does.
+        """
+        startTime = time.time()
+        roots = [(root, isGlobal) for root, isGlobal in self.getRoots() if os.path.isdir(os.path.join(root, "apps"))]
+        apps = [app for root, isGlobal in roots for app in self.getRootApps(root, isGlobal)]  # On the calling thread, waiting on a pool from a pool worker could deadlock
+        print(f"🟢 Read {len(apps)} Scoop app(s) from {len(roots)} root(s) in {round((time.time() - startTime) * 1000, 1)}ms")
+        return apps
+
+    def getRootApps(self, root: str, isGlobal: bool) -> list[InstalledScoopApp]:
+        appsFolder = os.path.join(root, "apps")
+        modifiedTime = os.stat(appsFolder).st_mtime_ns
+        with self.__lock:
+            listing = self.__listings.get(appsFolder)
+        if listing is None or listing[0] != modifiedTime:
+            folders = sorted((entry.path for entry in os.scandir(appsFolder) if entry.is_dir() and entry.name.lower() != self.SCOOP_ITSELF), key=lambda path: os.path.basename(path).lower())
+            with self.__lock:
+                self.__listings[appsFolder] = (modifiedTime, folders)
+        else:
+            folders = listing[1]
+        apps = []
+        for folder in folders:
+            app = self.getApp(folder, isGlobal)
+            if app is not None:
+                apps.append(app)
+        return apps
+
+    def getApp(self, folder: str, isGlobal: bool) -> InstalledScoopApp | None:
+        """
+        Returns the app installed on the given folder, read again only if the folder, its manifest or its install.json have changed since the last time.
+        """
+        currentFolder = os.path.join(folder, "current")
+        try:
+            stamp = (os.stat(folder).st_mtime_ns, self.getModifiedTime(os.path.join(currentFolder, "manifest.json")), self.getModifiedTime(os.path.join(currentFolder, "install.json")))
+        except OSError:
+            return None
+        with self.__lock:
+            cached = self.__apps.get(folder)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        app = self.readApp(folder, isGlobal)
+        with self.__lock:
+            self.__apps[folder] = (stamp, app)
+        return app
+
+    @staticmethod
+    def getModifiedTime(path: str) -> int:
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return 0
+
+    @staticmethod
+    def readApp(folder: str, isGlobal: bool) -> InstalledScoopApp | None:
+        currentFolder = os.path.join(folder, "current")
+        try:
+            with open(os.path.join(currentFolder, "manifest.json"), "r", encoding="utf-8-sig") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return None  # The installation failed, or is still running
+        except (OSError, ValueError) as e:
+            print(f"🟠 Can't read the Scoop manifest of {folder}: {e}")
+            return None
+        installInfo = {}
+        try:
+            with open(os.path.join(currentFolder, "install.json"), "r", encoding="utf-8-sig") as f:
+                installInfo = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            report(e)
+        version = str(manifest.get("version") or os.path.basename(os.path.realpath(currentFolder)))
+        bucket = str(installInfo.get("bucket") or installInfo.get("url") or "")
+        return InstalledScoopApp(os.path.basename(folder), version, bucket, str(installInfo.get("architecture", "")), isGlobal, bool(installInfo.get("hold")), folder)
+
+
+Inventory = ScoopInventory()
@@ -0,0 +1,243 @@
+if __name__ == "__main__":
+    # WingetUI cannot be run directly from this file, it must be run by importing the wingetui module
+    import os
+    import subprocess
+    import sys
+    sys.exit(subprocess.run(["cmd", "/C", "python", "-m", "wingetui"], shell=True, cwd=os.path.dirname(__file__).split("wingetui")[0]).returncode)
+
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from wingetui.Core.Executor import Executor, POOL_IO, PRIORITY_LOW
+from wingetui.Core.Tools import getSettings, report
+from wingetui.PackageEngine.ScoopBuckets import Manifests
+
+
+SCHEMA_VERSION = 1
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS buckets(name TEXT PRIMARY KEY, head TEXT);
+    CREATE TABLE IF NOT EXISTS manifests(id INTEGER PRIMARY KEY, bucket TEXT, name TEXT, version TEXT, path TEXT UNIQUE, mtime INTEGER);
+    CREATE INDEX IF NOT EXISTS manifests_bucket ON manifests(bucket);
+    CREATE TABLE IF NOT EXISTS terms(term TEXT, manifest INTEGER, weight INTEGER, PRIMARY KEY(term, manifest)) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS terms_manifest ON terms(manifest);
+"""
+
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+LAST_CHARACTER = chr(0x10FFFF)  # Sorts after any other character, so term < prefix + LAST_CHARACTER finds the terms that start with prefix
+MIN_PREFIX_LENGTH = 2  # Shorter query words only match whole terms, as a single letter starts the terms of almost every manifest
+
+# How much a query word is worth when it starts a term of each kind. A manifest gets the best weight of every word.
+WEIGHT_WHOLE_NAME = 50  # "vsc" on vscode-insiders
+WEIGHT_NAME_WORD = 30  # "insiders" on vscode-insiders
+WEIGHT_NAME_PART = 20  # "code" on vscode-insiders
+WEIGHT_BINARY = 15
+WEIGHT_DESCRIPTION = 5
+WEIGHT_HOMEPAGE = 3
+WEIGHT_EXACT_NAME = 100  # Added when the query is the name of the app
+
+
+class ScoopSearchIndex():
+    """
+    A persistent inverted index over the manifests of every local Scoop bucket, so a search does not need scoop-search or scoop search.
+    The name, description, homepage and binaries of every manifest are split into words, which are kept on a SQLite database next to the
+    settings, with the manifest they come from and how much they weigh on the ranking. The name is also indexed by its parts, so a
+    query matches it anywhere (like scoop search does).
+    The index is updated incrementally: a bucket whose git HEAD has not changed is skipped, and on the other ones only the manifests whose
+    modification time changed are read again. The first build runs in the background, and search() returns None until it is done.
+    """
+    PATH: str = os.path.join(os.path.expanduser("~"), ".wingetui", "ScoopSearchIndex.db")
+    UPDATE_INTERVAL: float = 30  # The buckets are checked for changes at most this often, in seconds, unless invalidate() is called
+
+    def __init__(self):
+        self.__lock = threading.RLock()
+        self.__connection: sqlite3.Connection = None
+        self.__lastUpdateTime: float = 0
+        self.__building = False
+
+    def isAvailable(self) -> bool:
+        return not getSettings("DisableScoopSearchIndex") and Manifests.isAvailable()
+
+    def prepare(self) -> None:
+        """
+        Builds or updates the index in the background, if it is needed.
+        """
+        with self.__lock:
+            if self.__building or not self.isAvailable():
+                return
+            self.__building = True
+        Executor.submit(POOL_IO, self.__updateInBackground, priority=PRIORITY_LOW, name="Scoop search index update")
+
+    def invalidate(self) -> None:
+        """
+        Makes the next search check the buckets for changes, such as after a scoop update.
+        """
+        self.__lastUpdateTime = 0
+
+    def search(self, query: str, limit: int = 1000) -> list[tuple[str, str, str]] | None:
+        """
+        Returns the (id, version, bucket) of the manifests that match every word of the query, best matches first,
+        or None if the index has not been built yet (its build is started then).
+        """
+        if self.__building:
+            return None  # The build holds the lock until it is done
+        words = TOKEN_PATTERN.findall(query.lower())
+        with self.__lock:
+            connection = self.__getConnection()
+            if connection.execute("SELECT COUNT(*) FROM buckets").fetchone()[0] == 0:
+                self.prepare()
+                return None
+            if time.time() - self.__lastUpdateTime > self.UPDATE_INTERVAL:
+                self.update()
+            if not words:
+                return []
+            startTime = time.time()
+            # The best weight of every word on each manifest, added up on the manifests that have all of them
+            wordsQuery = " UNION ALL ".join(["SELECT manifest, MAX(weight) AS weight FROM terms WHERE term >= ? AND term <= ? GROUP BY manifest"] * len(words))
+            results = connection.execute(f"""
+                SELECT manifests.name, manifests.version, manifests.bucket FROM (
+                    SELECT manifest, SUM(weight) AS score FROM ({wordsQuery}) GROUP BY manifest HAVING COUNT(*) = ?
+                ) AS matches JOIN manifests ON manifests.id = matches.manifest
+                ORDER BY matches.score + (LOWER(manifests.name) = ?) * ? DESC, LENGTH(manifests.name), LOWER(manifests.name), manifests.bucket
+                LIMIT ?""", [value for word in words for value in (word, word + LAST_CHARACTER if len(word) >= MIN_PREFIX_LENGTH else word)] + [len(words), query.strip().lower(), WEIGHT_EXACT_NAME, limit]).fetchall()
+        print(f"🟢 Scoop index search for \"{query}\" returned {len(results)} result(s) in {round((time.time() - startTime) * 1000, 1)}ms")
+        return results
+
+    def update(self) -> None:
+        """
+        Brings the index up to date with the bucket checkouts: adds the new buckets and manifests, reads again the changed ones, and removes the ones that are gone.
+        """
+        with self.__lock:
+            startTime = time.time()
+            connection = self.__getConnection()
+            buckets = Manifests.getBuckets()
+            indexedHeads = dict(connection.execute("SELECT name, head FROM buckets"))
+            changedManifests = 0
+            with connection:
+                for bucket in indexedHeads.keys() - buckets.keys():
+                    self.__removeManifests(connection, "bucket = ?", (bucket,))
+                    connection.execute("DELETE FROM buckets WHERE name = ?", (bucket,))
+                for bucket, folder in buckets.items():
+                    head = self.getGitHead(folder)
+                    if head is not None and bucket in indexedHeads and indexedHeads[bucket] == head:
+                        continue  # Nothing was pulled on this bucket
+                    changedManifests += self.__updateBucket(connection, bucket, Manifests.getManifestsFolder(bucket))
+                    connection.execute("INSERT OR REPLACE INTO buckets VALUES (?, ?)", (bucket, head))
+            self.__lastUpdateTime = time.time()
+            if changedManifests or not indexedHeads:
+                print(f"🟢 Scoop search index updated in {round((time.time() - startTime) * 1000, 1)}ms, {changedManifests} manifest(s) changed")
+
+    def __updateBucket(self, connection: sqlite3.Connection, bucket: str, folder: str) -> int:
+        indexed = {path: (manifest, modifiedTime) for manifest, path, modifiedTime in connection.execute("SELECT id, path, mtime FROM manifests WHERE bucket = ?", (bucket,))}
+        found = set()
+        changedManifests = 0
+        for entry in os.scandir(folder):
+            if not entry.name.endswith(".json") or not entry.is_file():
+                continue
+            found.add(entry.path)
+            modifiedTime = entry.stat().st_mtime_ns
+            if entry.path in indexed and indexed[entry.path][1] == modifiedTime:
+                continue
+            if entry.path in indexed:
+                self.__removeManifests(connection, "id = ?", (indexed[entry.path][0],))
+            self.__addManifest(connection, bucket, entry.path, modifiedTime)
+            changedManifests += 1
+        for path in indexed.keys() - found:
+            self.__removeManifests(connection, "id = ?", (indexed[path][0],))
+            changedManifests += 1
+        return changedManifests
+
+    def __addManifest(self, connection: sqlite3.Connection, bucket: str, path: str, modifiedTime: int) -> None:
+        try:
+            with open(path, "r", encoding="utf-8-sig") as f:
+                manifest = json.load(f)
+            if not isinstance(manifest, dict):
+                raise ValueError("The manifest is not an object")
+        except (OSError, ValueError) as e:
+            print(f"🟠 Can't index the Scoop manifest {path}: {e}")
+            manifest = {}
+        name = os.path.basename(path)[:-len(".json")]
+        id = connection.execute("INSERT INTO manifests(bucket, name, version, path, mtime) VALUES (?, ?, ?, ?, ?)", (bucket, name, str(manifest.get("version", "")), path, modifiedTime)).lastrowid
+        connection.executemany("INSERT INTO terms VALUES (?, ?, ?)", [(term, id, weight) for term, weight in self.getTerms(name, manifest).items()])
+
+    @staticmethod
+    def __removeManifests(connection: sqlite3.Connection, condition: str, parameters: tuple) -> None:
+        connection.execute(f"DELETE FROM terms WHERE manifest IN (SELECT id FROM manifests WHERE {condition})", parameters)
+        connection.execute(f"DELETE FROM manifests WHERE {condition}", parameters)
+
+    @staticmethod
+    def getTerms(name: str, manifest: dict) -> dict[str, int]:
+        """
+        Returns the terms a manifest is found by, with the best weight of each one.
+        """
+        terms: dict[str, int] = {}
+
+        def addTerms(words: list[str], weight: int) -> None:
+            for word in words:
+                if terms.get(word, 0) < weight:
+                    terms[word] = weight
+
+        name = name.lower()
+        addTerms([name[i:] for i in range(1, len(name) - 1)], WEIGHT_NAME_PART)
+        addTerms(TOKEN_PATTERN.findall(name), WEIGHT_NAME_WORD)
+        addTerms([name], WEIGHT_WHOLE_NAME)
+        binaries = [manifest.get("bin")] + [architecture.get("bin") for architecture in (manifest.get("architecture") or {}).values() if isinstance(architecture, dict)]
+        for binary in binaries:
+            for entry in (binary if isinstance(binary, list) else [binary]):
+                for value in (entry if isinstance(entry, list) else [entry])[:2]:  # [path, alias, arguments]
+                    if isinstance(value, str) and value:
+                        addTerms(TOKEN_PATTERN.findall(os.path.splitext(os.path.basename(value.replace("\\", "/")))[0].lower()), WEIGHT_BINARY)
+        description = manifest.get("description", "")
+        addTerms(TOKEN_PATTERN.findall((" ".join(description) if isinstance(description, list) else str(description)).lower()), WEIGHT_DESCRIPTION)
+        addTerms(TOKEN_PATTERN.findall(str(manifest.get("homepage", "")).lower().split("://")[-1]), WEIGHT_HOMEPAGE)
+        return terms
+
+    @staticmethod
+    def getGitHead(folder: str) -> str | None:
+        """
+        Returns the commit the given git checkout is on, read from its .git folder, or None if it is not a git checkout.
+        """
+        gitFolder = os.path.join(folder, ".git")
+        try:
+            with open(os.path.join(gitFolder, "HEAD"), "r") as f:
+                head = f.read().strip()
+            if not head.startswith("ref: "):
+                return head  # Detached
+            ref = head[len("ref: "):]
+            if os.path.isfile(os.path.join(gitFolder, ref)):
+                with open(os.path.join(gitFolder, ref), "r") as f:
+                    return f.read().strip()
+            with open(os.path.join(gitFolder, "packed-refs"), "r") as f:
+                for line in f:
+                    if line.strip().endswith(" " + ref):
+                        return line.split(" ")[0]
+        except OSError:
+            pass
+        return None
+
+    def __updateInBackground(self) -> None:
+        try:
+            self.update()
+        except Exception as e:
+            report(e)
+        finally:
+            self.__building = False
+
+    def __getConnection(self) -> sqlite3.Connection:
+        if self.__connection is None:
+            os.makedirs(os.path.dirname(self.PATH), exist_ok=True)
+            connection = sqlite3.connect(self.PATH, check_same_thread=False)
+            if connection.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                print("🔵 Creating the Scoop search index")
+                connection.executescript("DROP TABLE IF EXISTS buckets; DROP TABLE IF EXISTS manifests; DROP TABLE IF EXISTS terms;")
+                connection.executescript(SCHEMA)
+                connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self.__connection = connection
+        return self.__connection
+
+
+ScoopIndex = ScoopSearchIndex()
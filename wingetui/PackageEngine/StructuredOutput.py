@@ -0,0 +1,65 @@
+if __name__ == "__main__":
+    # WingetUI cannot be run directly from this file, it must be run by importing the wingetui module
+    import os
+    import subprocess
+    import sys
+    sys.exit(subprocess.run(["cmd", "/C", "python", "-m", "wingetui"], shell=True, cwd=os.path.dirname(__file__).split("wingetui")[0]).returncode)
+
+
+import json
+
+from wingetui.Core.Tools import getSettings
+
+
+class StructuredOutputModes():
+    """
+    Keeps track, for one manager, of the machine-readable output modes (npm --json, pip --format=json, choco -r, etc.) that work on this machine.
+    The managers prefer these modes over scraping their tables, and fall back to the tables when a mode is not available.
+    A mode that fails once (because of an old version of the manager, an unexpected document, etc.) is not tried again for the rest of the session.
+    The structured modes of every manager can be disabled with the DisableStructuredOutput setting.
+    """
+    ManagerName: str = ""
+
+    def __init__(self, managerName: str):
+        self.ManagerName = managerName
+        self.__unavailableModes: dict[str, str] = {}
+
+    def isAvailable(self, mode: str) -> bool:
+        return mode not in self.__unavailableModes and not getSettings("DisableStructuredOutput")
+
+    def markUnavailable(self, mode: str, reason: str) -> None:
+        print(f"🟡 {self.ManagerName} structured output for \"{mode}\" is not available ({reason}), falling back to the table output")
+        self.__unavailableModes[mode] = reason
+
+    def getUnavailableModes(self) -> dict[str, str]:
+        return dict(self.__unavailableModes)
+
+
+def parseJsonOutput(lines: list[str]) -> object:
+    """
+    Returns the JSON document printed by a command. Since the standard error is merged into the output, any warning or
+    notice printed before or after the document is skipped. Raises ValueError if the output does not contain a JSON document.
+    """
+    text = "\n".join(lines)
+    decoder = json.JSONDecoder()
+    position = 0
+    for line in lines:
+        stripped = line.lstrip()
+        if stripped[:1] in ("[", "{"):
+            try:
+                return decoder.raw_decode(text, position + len(line) - len(stripped))[0]
+            except ValueError:
+                pass  # A warning that happens to start with a bracket, such as "[notice]"
+        position += len(line) + 1
+    raise ValueError("The output does not contain a JSON document")
+
+
+def asList(document: object) -> list:
+    """
+    ConvertTo-Json writes a single object instead of an array when there is only one, and nothing at all when there are none.
+    """
+    if document is None:
+        return []
+    if isinstance(document, list):
+        return document
+    return [document]
@@ -0,0 +1,165 @@
+if __name__ == "__main__":
+    # WingetUI cannot be run directly from this file, it must be run by importing the wingetui module
+    import os
+    import subprocess
+    import sys
+    sys.exit(subprocess.run(["cmd", "/C", "python", "-m", "wingetui"], shell=True, cwd=os.path.dirname(__file__).split("wingetui")[0]).returncode)
+
+
+from typing import Iterable, Iterator
+from unicodedata import combining, east_asian_width
+
+
+TRUNCATION_MARK = "…"
+
+
+def getCellWidth(char: str) -> int:
+    """
+    Returns the number of terminal cells the given character takes: two for the wide (CJK) characters, none for the combining marks.
+    """
+    if east_asian_width(char) in ("W", "F"):
+        return 2
+    if combining(char):
+        return 0
+    return 1
+
+
+def isTruncated(value: str) -> bool:
+    """
+    Winget replaces the end of the values that do not fit on their column with TRUNCATION_MARK.
+    """
+    return value.endswith(TRUNCATION_MARK)
+
+
+class TableOutputParser():
+    """
+    Parses the tables printed by winget, dotnet tool, pip and scoop:
+
+        Name        Id               Version
+        ------------------------------------
+        Some app    Publisher.App    1.0.0
+
+    The header is the last line printed before the line of dashes, so it is found whatever the language of the output.
+    The column boundaries are computed once per table, from the dashes themselves if they are split by column (as pip and scoop print them),
+    or from the header otherwise, where a column starts after at least minimumColumnGap spaces (dotnet has column names with spaces in them).
+    The rows are then sliced on those boundaries counting terminal cells instead of characters, so a name with double-width characters does
+    not shift the columns after it. Truncated values keep their TRUNCATION_MARK, so the callers can tell them apart.
+
+    A table ends on an empty line, and a new line of dashes starts a new table. Rows that leave any of the first requiredColumns columns
+    empty (such as "2 upgrades available." right below the table) are skipped.
+    """
+    Headers: list[str] = []
+    Starts: list[int] = []
+    Boundaries: list[tuple[int, int]] = []
+    Lines: list[str] = []
+    TableCount: int = 0
+
+    def __init__(self, minimumColumnGap: int = 1, requiredColumns: int = 2):
+        self.MinimumColumnGap = minimumColumnGap
+        self.RequiredColumns = requiredColumns
+        self.Headers = []
+        self.Starts = []
+        self.Boundaries = []
+        self.Lines = []
+        self.TableCount = 0
+
+    def parse(self, lines: Iterable[str]) -> Iterator[list[str]]:
+        """
+        Yields the cells of every row of every table in the given lines, stripped, as soon as the line after them has been read
+        (a line could still turn out to be the header of a new table). The lines are kept in Lines, for the logs.
+        """
+        previousLine = ""
+        pendingRow: str = None
+        inTable = False
+        for line in lines:
+            self.Lines.append(line)
+            line = self.cleanLine(line)
+            if self.isSeparator(line):
+                pendingRow = None  # It was the header of the new table
+                self.startTable(previousLine, line)
+                inTable = True
+            elif not line.strip():
+                if pendingRow is not None:
+                    row = self.splitRow(pendingRow)
+                    if row:
+                        yield row
+                    pendingRow = None
+                inTable = False
+            elif inTable:
+                if pendingRow is not None:
+                    row = self.splitRow(pendingRow)
+                    if row:
+                        yield row
+                pendingRow = line
+            if line.strip():
+                previousLine = line
+        if pendingRow is not None:
+            row = self.splitRow(pendingRow)
+            if row:
+                yield row
+
+    @staticmethod
+    def cleanLine(line: str) -> str:
+        """
+        Removes the progress spinners and bars that were overwritten with carriage returns or backspaces, and the trailing whitespace.
+        """
+        if "\r" in line:
+            line = line.rstrip("\r").split("\r")[-1]
+        if "\x08" in line:
+            line = line.split("\x08")[-1]
+        return line.rstrip()
+
+    @staticmethod
+    def isSeparator(line: str) -> bool:
+        stripped = line.strip()
+        return len(stripped) >= 3 and stripped.count("-") + stripped.count("─") + stripped.count(" ") == len(stripped) and stripped.count(" ") < len(stripped) // 2
+
+    def startTable(self, header: str, separator: str) -> None:
+        starts = self.getColumnStarts(separator, 1) if " " in separator.strip() else self.getColumnStarts(header, self.MinimumColumnGap)
+        self.Starts = starts or [0]
+        self.Boundaries = [(start, self.Starts[index + 1] if index + 1 < len(self.Starts) else None) for index, start in enumerate(self.Starts)]
+        self.Headers = self.splitCells(header)
+        self.TableCount += 1
+
+    @staticmethod
+    def getColumnStarts(line: str, minimumGap: int) -> list[int]:
+        """
+        Returns the cell where every column of the given header or line of dashes starts.
+        """
+        starts: list[int] = []
+        cell = 0
+        spaces = minimumGap  # So a column starting on the first cell is found
+        for char in line:
+            if char == " ":
+                spaces += 1
+            else:
+                if spaces >= minimumGap:
+                    starts.append(cell)
+                spaces = 0
+            cell += getCellWidth(char)
+        return starts
+
+    def splitCells(self, line: str) -> list[str]:
+        if line.isascii():  # One cell per character, which is by far the most common case
+            return [line[start:end].strip() for start, end in self.Boundaries]
+        indexes: list[int] = []
+        cell = 0
+        for index, char in enumerate(line):
+            while len(indexes) < len(self.Starts) and cell >= self.Starts[len(indexes)]:
+                indexes.append(index)
+            if len(indexes) == len(self.Starts):
+                break
+            cell += getCellWidth(char)
+        while len(indexes) < len(self.Starts):
+            indexes.append(len(line))
+        return [line[start:indexes[column + 1] if column + 1 < len(indexes) else None].strip() for column, start in enumerate(indexes)]
+
+    def splitRow(self, line: str) -> list[str]:
+        """
+        Returns the cells of the given row, or an empty list if any of the required columns is empty.
+        """
+        cells = self.splitCells(line)
+        for index in range(min(self.RequiredColumns, len(cells))):
+            if not cells[index]:
+                return []
+        return cells
@@ -0,0 +1,119 @@
+if __name__ == "__main__":
+    # WingetUI cannot be run directly from this file, it must be run by importing the wingetui module
+    import os
+    import subprocess
+    import sys
+    sys.exit(subprocess.run(["cmd", "/C", "python", "-m", "wingetui"], shell=True, cwd=os.path.dirname(__file__).split("wingetui")[0]).returncode)
+
+
+import re
+from functools import cmp_to_key
+from itertools import zip_longest
+
+
+UNKNOWN_VERSIONS = ("", "unknown", "latest", "-")
+VERSION_PART_PATTERN = re.compile(r"^(\d*)(.*)$")
+EMPTY_VERSION_PART = (0, "")
+
+
+def splitVersion(version: str) -> list[tuple[int, str]]:
+    """
+    Splits a version on its dots, into (number, suffix) parts: "1.2.3-beta" becomes [(1, ""), (2, ""), (3, "-beta")].
+    A leading "v" is ignored, and so are the trailing zero parts, so "1.0" and "1.0.0" are the same version.
+    """
+    version = version.strip()
+    if version[:1] in ("v", "V") and version[1:2].isdigit():
+        version = version[1:]
+    parts = []
+    for part in version.split("."):
+        number, suffix = VERSION_PART_PATTERN.match(part.strip()).groups()
+        parts.append((int(number) if number else 0, suffix.lower()))
+    while parts and parts[-1] == EMPTY_VERSION_PART:
+        parts.pop()
+    return parts
+
+
+def compareVersions(first: str, second: str) -> int:
+    """
+    Compares two versions the way winget does: part by part, numerically, and then by the text that follows the number.
+    A part with text after its number (1.0-beta, 2.1rc1) is older than the same number alone.
+    Returns a negative number if first is older than second, 0 if they are the same version, and a positive number otherwise.
+    """
+    for (firstNumber, firstSuffix), (secondNumber, secondSuffix) in zip_longest(splitVersion(first), splitVersion(second), fillvalue=EMPTY_VERSION_PART):
+        if firstNumber != secondNumber:
+            return -1 if firstNumber < secondNumber else 1
+        if firstSuffix != secondSuffix:
+            if not firstSuffix or not secondSuffix:
+                return 1 if not firstSuffix else -1
+            return -1 if firstSuffix < secondSuffix else 1
+    return 0
+
+
+getVersionKey = cmp_to_key(compareVersions)
+
+
+def isNewerVersion(candidate: str, installed: str) -> bool:
+    """
+    Returns True if the candidate version is an upgrade for the installed one. The installed version may be unknown (which
+    winget upgrade --include-unknown treats as upgradable) or approximate, as winget prints it: "< 1.2" is older than 1.2,
+    and "> 1.2" can't be known to be older than anything.
+    """
+    installed = installed.strip()
+    if installed.lower() in UNKNOWN_VERSIONS:
+        return candidate.strip().lower() not in UNKNOWN_VERSIONS
+    if installed.startswith("<"):
+        return compareVersions(candidate, installed[1:]) >= 0
+    if installed.startswith(">"):
+        return False
+    return compareVersions(candidate, installed) > 0
+
+
+SCOOP_SEPARATORS_PATTERN = re.compile(r"[-_+]")
+SCOOP_PART_BOUNDARY_PATTERN = re.compile(r"(?<=\d)(?=[a-z])|(?<=[a-z])(?=\d)", re.IGNORECASE)
+SCOOP_PRERELEASE_PATTERN = re.compile(r"alpha|beta|rc|pre", re.IGNORECASE)
+SCOOP_NIGHTLY_PATTERN = re.compile(r"nightly-(\d{8})", re.IGNORECASE)
+
+
+def splitScoopVersion(version: str) -> list[int | str]:
+    """
+    Splits a Scoop version the way Scoop does: on dots, dashes, underscores and plus signs, and between numbers and letters, so "1.2b3-rc_1" becomes [1, 2, "b", 3, "rc", 1].
+    """
+    parts = []
+    for part in SCOOP_SEPARATORS_PATTERN.sub(".", version.strip()).split("."):
+        for piece in SCOOP_PART_BOUNDARY_PATTERN.split(part):
+            parts.append(int(piece) if piece.isdigit() else piece.lower())
+    return parts
+
+
+def compareScoopVersions(first: str, second: str) -> int:
+    """
+    Compares two Scoop versions like Scoop's Compare-Version: part by part, numbers numerically and text alphabetically. A version that
+    goes on after the other one is newer ("1.1.1" after "1.1"), unless what follows is a pre-release ("1.1-beta" before "1.1"), and a
+    number is newer than a text on the same position. Returns a negative number if first is older than second, 0 if they are the same version, and a positive number otherwise.
+    """
+    if first == second:
+        return 0
+    firstParts, secondParts = splitScoopVersion(first), splitScoopVersion(second)
+    for i in range(max(len(firstParts), len(secondParts))):
+        if i >= len(firstParts):
+            return 1 if SCOOP_PRERELEASE_PATTERN.search(str(secondParts[i])) else -1
+        if i >= len(secondParts):
+            return -1 if SCOOP_PRERELEASE_PATTERN.search(str(firstParts[i])) else 1
+        firstPart, secondPart = firstParts[i], secondParts[i]
+        if type(firstPart) is not type(secondPart):
+            return 1 if isinstance(firstPart, int) else -1
+        if firstPart != secondPart:
+            return 1 if firstPart > secondPart else -1
+    return 0
+
+
+def isNewerScoopVersion(candidate: str, installed: str, today: str) -> bool:
+    """
+    Returns True if the version of a bucket manifest is an upgrade for the installed one. Nightly manifests (version "nightly") are installed
+    as nightly-<yyyyMMdd>, and Scoop installs a new build the first time they are updated on a later day, so they are upgradable once the
+    installed build is older than the given day (as yyyyMMdd).
+    """
+    if candidate.strip().lower() == "nightly":
+        match = SCOOP_NIGHTLY_PATTERN.fullmatch(installed.strip())
+        return match is not None and match.group(1) < today
+    return compareScoopVersions(candidate, installed) > 0
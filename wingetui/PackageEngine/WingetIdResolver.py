@@ -0,0 +1,127 @@
+if __name__ == "__main__":
+    # WingetUI cannot be run directly from this file, it must be run by importing the wingetui module
+    import os
+    import subprocess
+    import sys
+    sys.exit(subprocess.run(["cmd", "/C", "python", "-m", "wingetui"], shell=True, cwd=os.path.dirname(__file__).split("wingetui")[0]).returncode)
+
+
+import atexit
+import threading
+from bisect import bisect_left
+from typing import Iterable
+
+from wingetui.Core.Tools import GetJsonSettings, SetJsonSettings
+from wingetui.PackageEngine.TableOutputParser import TRUNCATION_MARK, isTruncated
+
+
+class PrefixIndex():
+    """
+    Keeps a sorted list of lowercase ids, so the ones that start with a given prefix are found with a binary search.
+    """
+
+    def __init__(self):
+        self.__keys: list[str] = []
+        self.__ids: dict[str, str] = {}
+
+    def update(self, ids: Iterable[str]) -> None:
+        added = False
+        for id in ids:
+            key = id.lower()
+            if key not in self.__ids:
+                self.__ids[key] = id
+                added = True
+        if added:
+            self.__keys = sorted(self.__ids.keys())
+
+    def find(self, prefix: str, limit: int = 20) -> list[str]:
+        """
+        Returns up to limit ids that start with the given prefix, case-insensitively.
+        """
+        prefix = prefix.lower()
+        matches = []
+        position = bisect_left(self.__keys, prefix)
+        while position < len(self.__keys) and self.__keys[position].startswith(prefix) and len(matches) < limit:
+            matches.append(self.__ids[self.__keys[position]])
+            position += 1
+        return matches
+
+    def __len__(self) -> int:
+        return len(self.__keys)
+
+
+class WingetIdResolver():
+    """
+    Maps the ids that winget truncates on its tables (Microsoft.VisualStudioCode.Insid…) to the full ones.
+    The manager feeds it with full ids in batches (from the local source index or from winget export), and every truncated id is then
+    looked up on a PrefixIndex. When a prefix matches more than one id, the name of the package is used to pick one (the full name wins over the ones it is a prefix of).
+    The ids resolved are kept between sessions, and used for the truncated ids that the ids loaded on this session can't resolve.
+    """
+    SETTINGS_NAME: str = "WingetTruncatedIds"
+    MAX_MAPPINGS: int = 2000
+
+    LoadedFrom: str = ""
+
+    def __init__(self):
+        self.__index = PrefixIndex()
+        self.__names: dict[str, str] = {}
+        self.__mappings: dict[str, str] = {}
+        self.__loaded = False
+        self.__dirty = False
+        self.__lock = threading.Lock()
+        atexit.register(self.save)
+
+    def addPackages(self, packages: dict[str, str], loadedFrom: str = "") -> None:
+        """
+        Adds full ids to the index, given as {id: name}. The name may be empty.
+        """
+        with self.__lock:
+            self.__index.update(packages.keys())
+            for id, name in packages.items():
+                if name:
+                    self.__names[id.lower()] = name
+            if loadedFrom:
+                self.LoadedFrom = loadedFrom
+
+    def resolve(self, truncatedId: str, name: str = "") -> str | None:
+        """
+        Returns the full id for the given truncated one, or None if it can't be told apart from other ids.
+        """
+        prefix = truncatedId.split(TRUNCATION_MARK)[0]
+        namePrefix = name.split(TRUNCATION_MARK)[0].lower()
+        with self.__lock:
+            self.__load()
+            candidates = self.__index.find(prefix)
+            if len(candidates) > 1 and namePrefix:
+                candidates = [candidate for candidate in candidates if self.__names.get(candidate.lower(), "").lower().startswith(namePrefix)]
+                if len(candidates) > 1 and not isTruncated(name):
+                    candidates = [candidate for candidate in candidates if self.__names.get(candidate.lower(), "").lower() == namePrefix] or candidates
+            if len(candidates) == 1:
+                if self.__mappings.get(truncatedId) != candidates[0]:
+                    self.__mappings[truncatedId] = candidates[0]
+                    if len(self.__mappings) > self.MAX_MAPPINGS:
+                        del self.__mappings[next(iter(self.__mappings))]
+                    self.__dirty = True
+                return candidates[0]
+            if not candidates:
+                return self.__mappings.get(truncatedId)
+            return None
+
+    def save(self) -> None:
+        with self.__lock:
+            if not self.__dirty:
+                return
+            data = dict(self.__mappings)
+            self.__dirty = False
+        SetJsonSettings(self.SETTINGS_NAME, data)
+
+    def __load(self) -> None:
+        if self.__loaded:
+            return
+        self.__loaded = True
+        for truncatedId, id in GetJsonSettings(self.SETTINGS_NAME).items():
+            if isinstance(id, str) and truncatedId not in self.__mappings:
+                self.__mappings[truncatedId] = id
+
+
+IdResolver = WingetIdResolver()
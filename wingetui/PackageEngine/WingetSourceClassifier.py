@@ -0,0 +1,85 @@
+if __name__ == "__main__":
+    # WingetUI cannot be run directly from this file, it must be run by importing the wingetui module
+    import os
+    import subprocess
+    import sys
+    sys.exit(subprocess.run(["cmd", "/C", "python", "-m", "wingetui"], shell=True, cwd=os.path.dirname(__file__).split("wingetui")[0]).returncode)
+
+
+import re
+
+from wingetui.Core.Tools import _
+
+
+ANDROID_ID_PATTERN = re.compile(r"[a-z.]*")  # com.example.app
+LOCAL_ID_CHARACTERS_PATTERN = re.compile(r"[{} ]")  # {GUID} or a display name
+UPPERCASE_PATTERN = re.compile(r"[A-Z]")
+STEAM_APP_PATTERN = re.compile(r"Steam App [0-9]*\Z")
+UPLAY_INSTALL_PATTERN = re.compile(r"Uplay Install [0-9]*\Z")
+GOG_ID_PATTERN = re.compile(r"[0-9]{10}_is1")
+
+
+class WingetSourceClassifier():
+    """
+    Tells the source of a package listed by winget list from its id, when the table has no Source column (or the source is not a known one):
+    apps from the Microsoft Store, Steam, GOG, Ubisoft Connect and the Android Subsystem, and programs found on the ARP entries of this PC.
+    The patterns are compiled once, the labels are translated once, and the result for every id is kept, since the same ids are listed on every refresh.
+    """
+    MAX_CACHED_IDS: int = 20000
+
+    def __init__(self):
+        self.__cache: dict[str, str] = {}
+        self.__labels: dict[str, str] = None
+
+    def classify(self, id: str) -> str:
+        source = self.__cache.get(id)
+        if source is None:
+            if len(self.__cache) >= self.MAX_CACHED_IDS:
+                self.__cache.clear()
+            source = self.__cache[id] = self.getSource(id.strip())
+        return source
+
+    def getSource(self, id: str) -> str:
+        """
+        Returns the source of the given (stripped) id, without looking at the cache.
+        """
+        if self.__labels is None:
+            self.__labels = {"Android Subsystem": _("Android Subsystem"), "Local PC": _("Local PC")}
+        localPc = self.__labels["Local PC"]
+
+        dotCount = id.count(".")
+        if dotCount > 1 and ANDROID_ID_PATTERN.fullmatch(id):
+            return self.__labels["Android Subsystem"]
+        if LOCAL_ID_CHARACTERS_PATTERN.search(id):
+            source = localPc
+        elif dotCount == 1 or (dotCount > 1 and UPPERCASE_PATTERN.search(id)):
+            source = "Winget"
+        else:
+            source = localPc
+
+        if source == localPc:
+            if id == "Steam":
+                source = "Steam"
+            if id.count("Steam App ") == 1:
+                source = "Steam" if STEAM_APP_PATTERN.search(id) else localPc
+            if id == "Uplay":
+                source = "Ubisoft Connect"
+            if id.count("Uplay Install ") == 1:
+                source = "Ubisoft Connect" if UPLAY_INSTALL_PATTERN.search(id) else localPc
+            if id.count("_is1") == 1:
+                source = "GOG" if GOG_ID_PATTERN.fullmatch(id) or id.count("GOG") == 1 else localPc
+        elif source == "Winget":
+            parts = id.split("_")
+            if len(parts[-1]) in (13, 14) and (len(parts) == 2 or id == id.upper()):
+                source = "Microsoft Store"
+            elif len(parts[-1]) <= 13 and len(parts) == 2 and parts[-1].endswith("…"):  # Ellipsed Microsoft Store packages
+                source = "Microsoft Store"
+
+        if len(id) in (13, 14) and id.upper() == id:
+            return "Winget: msstore"
+        if source == "Winget":
+            return "Winget: winget"
+        return source
+
+
+SourceClassifier = WingetSourceClassifier()
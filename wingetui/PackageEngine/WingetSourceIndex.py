@@ -0,0 +1,244 @@
+if __name__ == "__main__":
+    # WingetUI cannot be run directly from this file, it must be run by importing the wingetui module
+    import os
+    import subprocess
+    import sys
+    sys.exit(subprocess.run(["cmd", "/C", "python", "-m", "wingetui"], shell=True, cwd=os.path.dirname(__file__).split("wingetui")[0]).returncode)
+
+
+import glob
+import os
+import pathlib
+import sqlite3
+import threading
+import time
+
+from wingetui.Core.Tools import getSettings, getSettingsValue, report
+from wingetui.PackageEngine.VersionComparison import compareVersions, getVersionKey
+
+
+# The tables and columns each known schema of index.db must have, by major version
+KNOWN_SCHEMAS: dict[str, dict[str, tuple[str, ...]]] = {
+    "1": {
+        "manifest": ("id", "name", "moniker", "version"),
+        "ids": ("id",),
+        "names": ("name",),
+        "monikers": ("moniker",),
+        "versions": ("version",),
+        "tags": ("tag",),
+        "tags_map": ("manifest", "tag"),
+    },
+    "2": {
+        "packages": ("id", "name", "moniker", "latest_version"),
+        "tags2": ("tag",),
+        "tags2_map": ("package", "tag"),
+    },
+}
+
+SEARCH_QUERIES: dict[str, str] = {
+    # Every version of a package is a row of the manifest table, the latest one is picked afterwards.
+    # The small lookup tables are scanned first, so the manifest table only gets matched by rowid.
+    "1": """
+        SELECT ids.id, names.name, versions.version FROM manifest
+        JOIN ids ON ids.rowid = manifest.id
+        JOIN names ON names.rowid = manifest.name
+        JOIN versions ON versions.rowid = manifest.version
+        WHERE manifest.id IN (SELECT rowid FROM ids WHERE id LIKE ?1 ESCAPE '\\')
+        OR manifest.name IN (SELECT rowid FROM names WHERE name LIKE ?1 ESCAPE '\\')
+        OR manifest.moniker IN (SELECT rowid FROM monikers WHERE moniker LIKE ?1 ESCAPE '\\')
+        OR manifest.rowid IN (SELECT manifest FROM tags_map WHERE tag IN (SELECT rowid FROM tags WHERE tag LIKE ?1 ESCAPE '\\'))
+    """,
+    "2": """
+        SELECT packages.id, packages.name, packages.latest_version FROM packages
+        WHERE packages.id LIKE ?1 ESCAPE '\\' OR packages.name LIKE ?1 ESCAPE '\\' OR packages.moniker LIKE ?1 ESCAPE '\\'
+        OR packages.rowid IN (SELECT tags2_map.package FROM tags2_map JOIN tags2 ON tags2.rowid = tags2_map.tag WHERE tags2.tag LIKE ?1 ESCAPE '\\')
+    """,
+}
+
+LATEST_VERSION_QUERIES: dict[str, str] = {
+    "1": """
+        SELECT ids.id, names.name, versions.version FROM manifest
+        JOIN ids ON ids.rowid = manifest.id
+        JOIN names ON names.rowid = manifest.name
+        JOIN versions ON versions.rowid = manifest.version
+    """,
+    "2": "SELECT packages.id, packages.name, packages.latest_version FROM packages",
+}
+
+# Only the version 1 schema has a row for every version of a package, the version 2 one keeps the latest version alone
+VERSIONS_QUERIES: dict[str, str] = {
+    "1": """
+        SELECT versions.version FROM manifest
+        JOIN versions ON versions.rowid = manifest.version
+        WHERE manifest.id IN (SELECT rowid FROM ids WHERE id = ? COLLATE NOCASE)
+    """,
+}
+
+
+class WingetSourceIndex():
+    """
+    Searches the catalog of the "winget" source straight from the index.db that winget downloads with it, instead of running winget search.
+    The database is opened read-only, and reopened when winget replaces it with a newer one (on a source update).
+    Only the known schemas (see KNOWN_SCHEMAS) are queried: if the index can't be found or has a schema that is not known,
+    isAvailable() returns False and winget search has to be used instead.
+    The location of the index can be overridden with the WingetIndexPath setting.
+    """
+    SOURCE_NAME = "winget"
+    INDEX_PATTERNS = [
+        # Unpackaged and portable winget (such as the bundled one)
+        os.path.join(os.environ.get("LOCALAPPDATA", ""), "Microsoft", "WinGet", "State", "**", "Microsoft.Winget.Source_8wekyb3d8bbwe", "**", "index.db"),
+        # Winget from the App Installer package
+        os.path.join(os.environ.get("LOCALAPPDATA", ""), "Packages", "Microsoft.DesktopAppInstaller_8wekyb3d8bbwe", "LocalState", "**", "Microsoft.Winget.Source_8wekyb3d8bbwe", "**", "index.db"),
+        os.path.join(os.environ.get("ProgramFiles", "C:\\Program Files"), "WindowsApps", "Microsoft.Winget.Source_*_8wekyb3d8bbwe", "Public", "index.db"),
+    ]
+    PATH_RECHECK_INTERVAL: float = 60
+
+    Path: str = None
+    SchemaVersion: str = None
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__connection: sqlite3.Connection = None
+        self.__modifiedTime: float = 0
+        self.__lastLookupTime: float = 0
+        self.__unknownSchemas: set[str] = set()
+        self.__latestVersions: dict[str, tuple[str, str, str]] = None
+
+    def isAvailable(self) -> bool:
+        if getSettings("DisableWingetIndexSearch"):
+            return False
+        with self.__lock:
+            return self.__getConnection() is not None
+
+    def search(self, query: str) -> list[tuple[str, str, str]]:
+        """
+        Returns the (id, name, version) of the latest version of every package whose id, name, moniker or tag contains the given query, case-insensitively.
+        Raises RuntimeError if the index is not available.
+        """
+        pattern = "%" + query.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        with self.__lock:
+            connection = self.__getConnection()
+            if connection is None:
+                raise RuntimeError("The winget source index is not available")
+            startTime = time.time()
+            rows = connection.execute(SEARCH_QUERIES[self.SchemaVersion], (pattern,)).fetchall()
+        latestVersions = self.getLatestRows(rows)
+        print(f"🟢 Winget index search for \"{query}\" returned {len(latestVersions)} result(s) in {round((time.time() - startTime) * 1000, 1)}ms")
+        return list(latestVersions.values())
+
+    def getLatestVersions(self) -> dict[str, tuple[str, str, str]]:
+        """
+        Returns the (id, name, version) of the latest version of every package on the index, by lowercase id (winget ids are case-insensitive).
+        The result is kept until the index changes. Raises RuntimeError if the index is not available.
+        """
+        with self.__lock:
+            connection = self.__getConnection()
+            if connection is None:
+                raise RuntimeError("The winget source index is not available")
+            if self.__latestVersions is None:
+                startTime = time.time()
+                self.__latestVersions = {id.lower(): row for id, row in self.getLatestRows(connection.execute(LATEST_VERSION_QUERIES[self.SchemaVersion])).items()}
+                print(f"🟢 Loaded the latest version of {len(self.__latestVersions)} packages from the winget index in {round((time.time() - startTime) * 1000, 1)}ms")
+            return self.__latestVersions
+
+    def getVersions(self, id: str) -> list[str] | None:
+        """
+        Returns every version of the given package on the index, newest first, or None if the schema of the index does not keep them.
+        Raises RuntimeError if the index is not available.
+        """
+        with self.__lock:
+            connection = self.__getConnection()
+            if connection is None:
+                raise RuntimeError("The winget source index is not available")
+            if self.SchemaVersion not in VERSIONS_QUERIES:
+                return None
+            versions = {row[0] for row in connection.execute(VERSIONS_QUERIES[self.SchemaVersion], (id,))}
+        return sorted(versions, key=getVersionKey, reverse=True)
+
+    @staticmethod
+    def getLatestRows(rows: list[tuple[str, str, str]]) -> dict[str, tuple[str, str, str]]:
+        latestVersions: dict[str, tuple[str, str, str]] = {}
+        for id, name, version in rows:
+            if id not in latestVersions or compareVersions(version, latestVersions[id][2]) > 0:
+                latestVersions[id] = (id, name, version)
+        return latestVersions
+
+    def findIndex(self) -> str | None:
+        """
+        Returns the most recent index.db found, or None.
+        """
+        if getSettingsValue("WingetIndexPath"):
+            return getSettingsValue("WingetIndexPath") if os.path.isfile(getSettingsValue("WingetIndexPath")) else None
+        candidates = []
+        for pattern in self.INDEX_PATTERNS:
+            try:
+                candidates += glob.glob(pattern, recursive=True)
+            except OSError:
+                pass  # WindowsApps can't be listed without administrator rights
+        candidates = [candidate for candidate in candidates if os.path.isfile(candidate)]
+        return max(candidates, key=os.path.getmtime) if candidates else None
+
+    def __getConnection(self) -> sqlite3.Connection | None:
+        if self.Path:
+            try:
+                if os.stat(self.Path).st_mtime == self.__modifiedTime:
+                    return self.__connection
+            except OSError:
+                pass
+            print(f"🔵 Winget index {self.Path} changed or was removed, opening it again")
+            self.__close()
+        if time.time() - self.__lastLookupTime < self.PATH_RECHECK_INTERVAL:
+            return None
+        self.__lastLookupTime = time.time()
+        path = self.findIndex()
+        if path is None or path in self.__unknownSchemas:
+            return None
+        try:
+            modifiedTime = os.stat(path).st_mtime
+            connection = sqlite3.connect(pathlib.Path(path).as_uri() + "?mode=ro&immutable=1", uri=True, check_same_thread=False)
+            schemaVersion = self.getSchemaVersion(connection)
+            if schemaVersion is None:
+                connection.close()
+                self.__unknownSchemas.add(path)
+                return None
+            self.Path, self.SchemaVersion, self.__connection, self.__modifiedTime = path, schemaVersion, connection, modifiedTime
+            print(f"🟢 Opened the winget index {path} (schema version {schemaVersion})")
+            return connection
+        except Exception as e:
+            report(e)
+            return None
+
+    @staticmethod
+    def getSchemaVersion(connection: sqlite3.Connection) -> str | None:
+        """
+        Returns the major schema version of the given index, or None if it is not one of the KNOWN_SCHEMAS.
+        """
+        try:
+            row = connection.execute("SELECT value FROM metadata WHERE name = 'majorVersion'").fetchone()
+        except sqlite3.Error:
+            row = None
+        majorVersion = str(row[0]) if row else None
+        if majorVersion not in KNOWN_SCHEMAS:
+            print(f"🟡 The winget index has an unknown schema version ({majorVersion}), falling back to winget search")
+            return None
+        for table, columns in KNOWN_SCHEMAS[majorVersion].items():
+            existingColumns = {row[1] for row in connection.execute(f"PRAGMA table_info({table})")}
+            if not set(columns).issubset(existingColumns):
+                print(f"🟡 The winget index is missing the table or columns {table}({', '.join(columns)}), falling back to winget search")
+                return None
+        return majorVersion
+
+    def __close(self) -> None:
+        if self.__connection is not None:
+            try:
+                self.__connection.close()
+            except sqlite3.Error:
+                pass
+        self.__connection = None
+        self.__latestVersions = None
+        self.Path = None
+        self.SchemaVersion = None
+        self.__lastLookupTime = 0
+
+
+WingetIndex = WingetSourceIndex()
@@ -0,0 +1,63 @@
+if __name__ == "__main__":
+    # WingetUI cannot be run directly from this file, it must be run by importing the wingetui module
+    import os
+    import subprocess
+    import sys
+    sys.exit(subprocess.run(["cmd", "/C", "python", "-m", "wingetui"], shell=True, cwd=os.path.dirname(__file__).split("wingetui")[0]).returncode)
+
+
+from wingetui.PackageEngine.TableOutputParser import TRUNCATION_MARK
+from wingetui.PackageEngine.VersionComparison import isNewerVersion
+
+
+# Values of the WingetUpgradeResolver setting
+UPGRADE_RESOLVER_OFFLINE = "offline"  # The default: compare the installed packages with the local source index
+UPGRADE_RESOLVER_CLI = "cli"  # Always use winget upgrade
+UPGRADE_RESOLVER_VERIFY = "verify"  # Run both, show the results of winget upgrade and log the differences
+
+
+def resolveUpgrades(installedPackages: dict[str, tuple[str, str]], latestVersions: dict[str, tuple[str, str, str]], sourceName: str) -> list[tuple[str, str, str, str]]:
+    """
+    Returns the (name, id, installed version, latest version) of the installed packages from the given source that have a newer version on it.
+    installedPackages is {id: (version, source)}, as read from winget export, and latestVersions is {lowercase id: (id, name, version)},
+    as returned by WingetSourceIndex.getLatestVersions(). The packages from other sources are ignored.
+    """
+    upgrades = []
+    for id, (installedVersion, packageSource) in installedPackages.items():
+        if packageSource != sourceName:
+            continue
+        latest = latestVersions.get(id.lower())
+        if latest is not None and isNewerVersion(latest[2], installedVersion):
+            upgrades.append((latest[1], latest[0], installedVersion, latest[2]))
+    return upgrades
+
+
+def getUpgradeDiffReport(offlinePackages: list, commandPackages: list) -> str:
+    """
+    Returns a report of the differences between the upgrades found offline and the ones listed by winget upgrade, matched by id.
+    The ids truncated by winget upgrade are matched with the offline ones that start the same way.
+    """
+    offlineById = {package.Id.lower(): package for package in offlinePackages}
+    commandById = {}
+    for package in commandPackages:
+        id = package.Id.lower()
+        if id.endswith(TRUNCATION_MARK):
+            matches = [offlineId for offlineId in offlineById.keys() if offlineId.startswith(id[:-1])]
+            if len(matches) == 1:
+                id = matches[0]
+        commandById[id] = package
+
+    lines = [f"Winget upgrade resolver verification: {len(offlinePackages)} upgrade(s) found offline, {len(commandPackages)} listed by winget upgrade"]
+    for id in sorted(offlineById.keys() - commandById.keys()):
+        package = offlineById[id]
+        lines.append(f" - Only found offline: {package.Id} {package.Version} -> {package.NewVersion}")
+    for id in sorted(commandById.keys() - offlineById.keys()):
+        package = commandById[id]
+        lines.append(f" - Only listed by winget upgrade: {package.Id} {package.Version} -> {package.NewVersion} ({package.Source})")
+    for id in sorted(offlineById.keys() & commandById.keys()):
+        offline, command = offlineById[id], commandById[id]
+        if (offline.Version, offline.NewVersion) != (command.Version, command.NewVersion):
+            lines.append(f" - Different versions for {offline.Id}: {offline.Version} -> {offline.NewVersion} offline, {command.Version} -> {command.NewVersion} by winget upgrade")
+    if len(lines) == 1:
+        lines.append(" - Both lists are the same")
+    return "\n".join(lines)